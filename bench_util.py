@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+테스트 스크립트 공용 도우미 - 직접 실행할 때의 테스트 러너와 벤치마크
+
+test_*.py의 테스트 함수는 pytest로도 그대로 돌아가고, `python3 test_xxx.py`로 실행하면
+run_tests()가 같은 함수들을 돌린 뒤 파일별 벤치마크 표(report)를 출력합니다.
+"""
+
+import inspect
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+def benchmark(function: Callable, *args, seconds: float = 0.5) -> float:
+    """호출당 평균 소요 시간 (µs)"""
+    count = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        function(*args)
+        count += 1
+    return 1e6 * (time.perf_counter() - started) / count
+
+def run_tests(title: str, namespace: Dict, report: Optional[Callable[[], None]] = None) -> int:
+    """namespace의 test_* 함수를 차례로 실행하고 report로 벤치마크 출력 (종료 코드 반환)"""
+    print("============================================================")
+    print(f"🔴 {title}")
+    print("============================================================")
+    
+    tests = [value for name, value in namespace.items() if name.startswith('test_') and callable(value)]
+    failed = 0
+    for test in tests:
+        # pytest의 tmp_path 픽스처를 받는 테스트에는 임시 디렉터리를 만들어 넘김
+        tmp_path = Path(tempfile.mkdtemp()) if 'tmp_path' in inspect.signature(test).parameters else None
+        try:
+            test(tmp_path) if tmp_path is not None else test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+        finally:
+            if tmp_path is not None:
+                shutil.rmtree(tmp_path, ignore_errors=True)
+    
+    if report is not None:
+        report()
+    
+    print(f"\n전체 결과: {len(tests) - failed}/{len(tests)} 통과")
+    return 0 if failed == 0 else 1
@@ -6,12 +6,877 @@ import numpy as np
 import threading
 import time
 import logging
-from typing import Dict, Optional, Tuple
+import os
+import mmap
+import select
+import ctypes
+import math
+try:
+    import fcntl
+except ImportError:  # V4L2 백엔드는 리눅스 전용
+    fcntl = None
+from typing import Callable, Dict, List, Optional, Tuple
 from config import config
+from usb_bandwidth import UsbBandwidthPlanner, find_usb_bus
+from h264_encoder import H264EncodeStage, is_available as h264_available
+from frame_overlay import FrameOverlay
+from latency_metrics import LatencyHistogram, PipelineLatency
+
+class FrameEntry:
+    """링 버퍼에 저장되는 프레임 (시퀀스 번호, 캡처 시각, 이미지)
+    
+    패스스루 모드에서는 카메라가 보낸 JPEG 원본(jpeg)만 보관하고,
+    frame에 처음 접근하는 소비자가 한 번만 디코딩합니다.
+    frame은 항상 오버레이 없는 원본이며, 오버레이를 원하는 소비자는 view(True)로
+    annotator가 한 번만 그린 복사본을 공유합니다.
+    """
+    
+    __slots__ = ('seq', 'timestamp', 'jpeg', '_frame', '_decoder', '_annotator', '_annotated', '_lock')
+    
+    def __init__(self, seq: int, timestamp: float, frame: Optional[np.ndarray] = None,
+                 jpeg: Optional[bytes] = None,
+                 decoder: Optional[Callable[[bytes], Optional[np.ndarray]]] = None,
+                 annotator: Optional[Callable[[np.ndarray, 'FrameEntry'], np.ndarray]] = None):
+        self.seq = seq
+        self.timestamp = timestamp
+        self.jpeg = jpeg
+        self._frame = frame
+        self._decoder = decoder
+        self._annotator = annotator
+        self._annotated: Optional[np.ndarray] = None
+        self._lock = threading.Lock() if frame is None or annotator is not None else None
+    
+    @property
+    def frame(self) -> Optional[np.ndarray]:
+        """BGR 이미지 (패스스루 프레임은 지연 디코딩)"""
+        if self._frame is None and self.jpeg is not None:
+            with self._lock:
+                if self._frame is None:
+                    if self._decoder is not None:
+                        self._frame = self._decoder(self.jpeg)
+                    else:
+                        self._frame = cv2.imdecode(np.frombuffer(self.jpeg, np.uint8), cv2.IMREAD_COLOR)
+        return self._frame
+    
+    @property
+    def is_decoded(self) -> bool:
+        return self._frame is not None
+    
+    def view(self, overlay: bool = False) -> Optional[np.ndarray]:
+        """원본(overlay=False) 또는 오버레이를 그린 복사본 (처음 요청한 소비자가 한 번만 그림)"""
+        if not overlay or self._annotator is None:
+            return self.frame
+        if self._annotated is None:
+            frame = self.frame
+            if frame is None:
+                return None
+            with self._lock:
+                if self._annotated is None:
+                    self._annotated = self._annotator(frame.copy(), self)
+        return self._annotated
+
+class FrameRingBuffer:
+    """단일 생산자 / 다중 소비자 최신 프레임 링 버퍼
+    
+    캡처 스레드 하나만 put()을 호출하고, 소비자들은 latest() 또는
+    wait_next()로 프레임을 읽습니다. 소비자는 반환된 프레임을 수정하면 안 됩니다.
+    """
+    
+    def __init__(self, capacity: int = 4):
+        self.capacity = max(1, capacity)
+        self._slots: List[Optional[FrameEntry]] = [None] * self.capacity
+        self._seq = 0
+        self._cond = threading.Condition()
+    
+    @property
+    def seq(self) -> int:
+        """마지막으로 기록된 프레임의 시퀀스 번호 (0이면 아직 없음)"""
+        return self._seq
+    
+    def put(self, frame: Optional[np.ndarray], timestamp: float, jpeg: Optional[bytes] = None,
+            decoder: Optional[Callable[[bytes], Optional[np.ndarray]]] = None,
+            annotator: Optional[Callable[[np.ndarray, FrameEntry], np.ndarray]] = None) -> int:
+        """새 프레임 기록 후 시퀀스 번호 반환 (패스스루 모드는 frame 대신 jpeg 전달)"""
+        with self._cond:
+            seq = self._seq + 1
+            self._slots[seq % self.capacity] = FrameEntry(seq, timestamp, frame, jpeg, decoder, annotator)
+            self._seq = seq
+            self._cond.notify_all()
+        return seq
+    
+    def latest(self) -> Optional[FrameEntry]:
+        """가장 최근 프레임 반환"""
+        seq = self._seq
+        if seq == 0:
+            return None
+        return self._slots[seq % self.capacity]
+    
+    def get(self, seq: int) -> Optional[FrameEntry]:
+        """특정 시퀀스의 프레임 반환 (이미 덮어써졌으면 None)"""
+        entry = self._slots[seq % self.capacity]
+        if entry is None or entry.seq != seq:
+            return None
+        return entry
+    
+    def wait_next(self, after_seq: int, timeout: Optional[float] = None) -> Optional[FrameEntry]:
+        """after_seq 이후의 새 프레임이 들어올 때까지 대기 후 최신 프레임 반환"""
+        def ready() -> bool:
+            return self._seq > after_seq and self._slots[self._seq % self.capacity] is not None
+        
+        with self._cond:
+            if not ready():
+                self._cond.wait_for(ready, timeout)
+            if not ready():
+                return None
+            return self._slots[self._seq % self.capacity]
+    
+    def notify_all(self):
+        """대기 중인 소비자 깨우기 (캡처 중지 시)"""
+        with self._cond:
+            self._cond.notify_all()
+    
+    def clear(self):
+        """버퍼 비우기 (시퀀스 번호는 유지)"""
+        with self._cond:
+            self._slots = [None] * self.capacity
+
+def scaled_size(source: Tuple[int, int], width: Optional[int] = None,
+                height: Optional[int] = None) -> Optional[Tuple[int, int]]:
+    """요청한 너비/높이를 원본 비율에 맞춰 계산 (축소만 허용, 원본 크기면 None)"""
+    source_width, source_height = source
+    if width is None and height is None:
+        return None
+    if width is None:
+        width = source_width * height / source_height
+    if height is None:
+        height = source_height * width / source_width
+    # 크로마 서브샘플링(4:2:0)에 맞춰 짝수로
+    width = max(2, min(int(width), source_width) & ~1)
+    height = max(2, min(int(height), source_height) & ~1)
+    if (width, height) == (source_width & ~1, source_height & ~1):
+        return None
+    return width, height
+
+def parse_variant(params) -> Tuple[Optional[Tuple[Optional[int], Optional[int]]], Optional[float], Optional[bool]]:
+    """소비자별 크기/FPS/오버레이 요청(?w=320&h=180&fps=5&overlay=0) 분석 -> (크기, fps, 오버레이)
+    
+    오버레이를 지정하지 않으면 None (카메라 기본값), 잘못된 값은 ValueError.
+    """
+    width = int(params['w']) if params.get('w') else None
+    height = int(params['h']) if params.get('h') else None
+    fps = float(params['fps']) if params.get('fps') else None
+    for value in (width, height):
+        if value is not None and not 16 <= value <= 4096:
+            raise ValueError(f"잘못된 크기: {value}")
+    if fps is not None and not 0 < fps <= 120:
+        raise ValueError(f"잘못된 FPS: {fps}")
+    overlay = params.get('overlay')
+    if overlay:
+        if overlay.lower() not in ('0', '1', 'false', 'true', 'raw'):
+            raise ValueError(f"잘못된 오버레이 값: {overlay}")
+        overlay = overlay.lower() in ('1', 'true')
+    else:
+        overlay = None
+    size = (width, height) if width or height else None
+    return size, fps, overlay
+
+def variant_label(size: Optional[Tuple[Optional[int], Optional[int]]], fps: Optional[float],
+                  overlay: Optional[bool] = None) -> str:
+    """상태 표시용 변형 이름 (예: 320x@5, source, source+raw)"""
+    label = f"{size[0] or ''}x{size[1] or ''}" if size else 'source'
+    if fps:
+        label += f"@{fps:g}"
+    if overlay is not None:
+        label += '+overlay' if overlay else '+raw'
+    return label
+
+class FrameDecimator:
+    """소비자별 목표 FPS로 프레임 솎아내기
+    
+    다음 전송 예정 시각(next_due)을 1/fps씩 밀어 가며 예정 시각에 이른 프레임만 통과시키므로,
+    캡처 간격이 흔들려도 길게 보면 목표 FPS를 넘지 않습니다. 처음과 한참 뒤처졌을 때(카메라
+    정지 후 재개 등)는 캡처 시각을 1/fps 격자에 맞춰 다시 시작하므로, 같은 FPS를 요청한
+    소비자들은 같은 프레임을 골라 인코딩 캐시를 공유합니다.
+    """
+    
+    def __init__(self, fps: Optional[float] = None):
+        self.fps = fps
+        self.next_due: Optional[float] = None
+    
+    def accept(self, timestamp: float) -> bool:
+        if not self.fps:
+            return True
+        interval = 1.0 / self.fps
+        if self.next_due is None or timestamp - self.next_due >= interval:
+            # 격자에 맞춰 다시 시작
+            self.next_due = math.floor(timestamp * self.fps) * interval
+        # 캡처 지터로 예정 시각 조금 전에 온 프레임도 받되 (반 간격), 예정 시각은 1/fps씩만 전진
+        if timestamp < self.next_due - interval / 2:
+            return False
+        self.next_due += interval
+        return True
+
+class DeliveryStats:
+    """소비자 하나가 실제로 받은 FPS와 지연 (캡처 시각 -> 소켓에 넘긴 시각)
+    
+    전송할 때마다 record()를 부르는 스레드 하나만 갱신합니다. FPS와 지연은 지수 이동 평균,
+    max_latency는 지금까지의 최대값입니다. idle초 넘게 보내지 않았으면 FPS는 0입니다.
+    지연은 히스토그램에도 쌓아 p50/p95/p99를 보고하고, pipeline이 연결되어 있으면
+    카메라 전체의 'send' 단계에도 함께 기록합니다.
+    """
+    
+    def __init__(self, alpha: float = 0.1, idle: float = 2.0, pipeline: Optional[PipelineLatency] = None):
+        self.alpha = alpha
+        self.idle = idle
+        self.frames = 0
+        self.latency = 0.0
+        self.max_latency = 0.0
+        self.last_sent = 0.0
+        self._interval = 0.0
+        self.histogram = LatencyHistogram()
+        self.pipeline = pipeline
+    
+    def record(self, timestamp: float, now: Optional[float] = None):
+        now = time.time() if now is None else now
+        latency = max(0.0, now - timestamp)
+        if self.frames == 0:
+            self.latency = latency
+        else:
+            self.latency += self.alpha * (latency - self.latency)
+            interval = now - self.last_sent
+            self._interval = interval if self.frames == 1 else self._interval + self.alpha * (interval - self._interval)
+        self.max_latency = max(self.max_latency, latency)
+        self.last_sent = now
+        self.frames += 1
+        self.histogram.record(latency)
+        pipeline = self.pipeline
+        if pipeline is not None:
+            pipeline.record('send', latency)
+    
+    @property
+    def fps(self) -> float:
+        if self._interval <= 0 or time.time() - self.last_sent > self.idle:
+            return 0.0
+        return 1.0 / self._interval
+    
+    def to_dict(self) -> Dict:
+        p50, p95, p99 = self.histogram.percentiles()
+        return {
+            'frames': self.frames,
+            'fps': round(self.fps, 1),
+            'latency_ms': round(1000 * self.latency, 1),
+            'max_latency_ms': round(1000 * self.max_latency, 1),
+            'p50_latency_ms': round(1000 * p50, 1),
+            'p95_latency_ms': round(1000 * p95, 1),
+            'p99_latency_ms': round(1000 * p99, 1)
+        }
+
+class ScaledFrameCache:
+    """축소 프레임 공유 캐시 (프레임/크기마다 한 번만 cv2.resize)"""
+    
+    def __init__(self, max_entries: int = 8):
+        self.max_entries = max(1, max_entries)
+        self._entries: Dict[Tuple, np.ndarray] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get_or_scale(self, entry: FrameEntry, size: Tuple[Optional[int], Optional[int]],
+                     overlay: bool = False) -> Optional[np.ndarray]:
+        """entry를 요청 크기로 축소한 프레임 (원본보다 크거나 같으면 원본 그대로)"""
+        key = (entry.seq, size, overlay)
+        with self._lock:
+            scaled = self._entries.get(key)
+            if scaled is not None:
+                self.hits += 1
+                return scaled
+        
+        frame = entry.view(overlay)
+        if frame is None:
+            return None
+        target = scaled_size((frame.shape[1], frame.shape[0]), *size)
+        scaled = frame if target is None else cv2.resize(frame, target, interpolation=cv2.INTER_AREA)
+        
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = scaled
+            if len(self._entries) > self.max_entries:
+                for old_key in sorted(self._entries, key=lambda k: k[0]):
+                    if len(self._entries) <= self.max_entries or old_key[0] >= entry.seq:
+                        break
+                    del self._entries[old_key]
+        return scaled
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def get_stats(self) -> Dict:
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries)}
+
+class EncodedFrameCache:
+    """프레임 인코딩 결과 공유 캐시 (한 번 인코딩, 여러 소비자에게 전달)
+    
+    (프레임 시퀀스, 포맷, 품질, 크기, 오버레이)를 키로 인코딩된 bytes를 보관합니다.
+    같은 키를 요청한 첫 소비자만 인코딩하고, 동시에 요청한 다른 소비자는
+    인코딩이 끝날 때까지 기다렸다가 같은 bytes 객체를 받습니다.
+    histogram이 있으면 실제 인코딩(cv2.imencode)에 걸린 시간을 기록합니다.
+    """
+    
+    def __init__(self, max_entries: int = 8, scaler: Optional[ScaledFrameCache] = None,
+                 histogram: Optional[LatencyHistogram] = None):
+        self.max_entries = max(1, max_entries)
+        self.scaler = scaler or ScaledFrameCache(max_entries)
+        self.histogram = histogram
+        self._entries: Dict[Tuple, bytes] = {}
+        self._pending: Dict[Tuple, threading.Event] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.passthrough = 0
+    
+    def get_or_encode(self, entry: FrameEntry, fmt: str = '.jpg', quality: int = 80,
+                      size: Optional[Tuple[Optional[int], Optional[int]]] = None,
+                      overlay: bool = False) -> Optional[bytes]:
+        """캐시된 인코딩 결과 반환, 없으면 인코딩 후 저장 (size가 있으면 축소본을 인코딩)"""
+        # 패스스루 프레임은 카메라 JPEG을 그대로 사용 (품질은 카메라 설정을 따름)
+        if entry.jpeg is not None and fmt in ('.jpg', '.jpeg') and size is None and not overlay:
+            self.passthrough += 1
+            return entry.jpeg
+        
+        key = (entry.seq, fmt, quality, size, overlay)
+        
+        while True:
+            with self._lock:
+                data = self._entries.get(key)
+                if data is not None:
+                    self.hits += 1
+                    return data
+                
+                pending = self._pending.get(key)
+                if pending is None:
+                    # 이 소비자가 인코딩 담당
+                    pending = threading.Event()
+                    self._pending[key] = pending
+                    self.misses += 1
+                    break
+            
+            # 다른 소비자가 인코딩 중이면 완료 대기 후 다시 조회
+            pending.wait(1.0)
+            with self._lock:
+                if key not in self._entries and key not in self._pending:
+                    return None
+        
+        data = None
+        try:
+            frame = entry.view(overlay) if size is None else self.scaler.get_or_scale(entry, size, overlay)
+            if frame is not None:
+                started = time.perf_counter()
+                ret, encoded = cv2.imencode(fmt, frame, self._encode_params(fmt, quality))
+                if self.histogram is not None:
+                    self.histogram.record(time.perf_counter() - started)
+                if ret:
+                    data = encoded.tobytes()
+        except Exception:
+            data = None
+        
+        with self._lock:
+            del self._pending[key]
+            if data is not None:
+                self._entries[key] = data
+                self._evict(entry.seq)
+            else:
+                self.errors += 1
+        pending.set()
+        return data
+    
+    def _evict(self, newest_seq: int):
+        """오래된 시퀀스의 항목 제거 (락을 잡은 상태에서 호출)"""
+        if len(self._entries) <= self.max_entries:
+            return
+        for key in sorted(self._entries, key=lambda k: k[0]):
+            if len(self._entries) <= self.max_entries or key[0] >= newest_seq:
+                break
+            del self._entries[key]
+    
+    @staticmethod
+    def _encode_params(fmt: str, quality: int) -> List[int]:
+        if fmt in ('.jpg', '.jpeg'):
+            return [cv2.IMWRITE_JPEG_QUALITY, quality]
+        if fmt == '.webp':
+            return [cv2.IMWRITE_WEBP_QUALITY, quality]
+        return []
+    
+    def clear(self):
+        """캐시 비우기 (통계는 유지)"""
+        with self._lock:
+            self._entries.clear()
+        self.scaler.clear()
+    
+    def get_stats(self) -> Dict:
+        """캐시 적중/실패 통계 반환"""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'errors': self.errors,
+            'passthrough': self.passthrough,
+            'hit_rate': round(self.hits / total, 3) if total else 0.0,
+            'entries': len(self._entries),
+            'scaler': self.scaler.get_stats()
+        }
+
+# ---------------------------------------------------------------------------
+# 캡처 백엔드
+#
+# Camera는 설정의 'backend' 값으로 백엔드를 고릅니다.
+#   'opencv' - cv2.VideoCapture (기본값)
+#   'v4l2'   - V4L2 ioctl + mmap 드라이버 버퍼 직접 사용
+#   'fake'   - 생성 패턴 또는 파일 (카메라 없는 환경의 테스트용)
+#   'mosaic' - 다른 카메라들의 최신 프레임을 한 화면에 타일로 합성 (MosaicCamera 전용)
+# 모든 백엔드는 cv2.VideoCapture와 같은 isOpened()/read()/release()를 제공하며,
+# raw=True이면 read()가 MJPEG 원본을 1차원 uint8 배열로 반환합니다.
+# ---------------------------------------------------------------------------
+
+class CaptureBackend:
+    """캡처 백엔드 기본 클래스"""
+    
+    name = 'base'
+    
+    def __init__(self, camera_config: Dict, raw: bool = False):
+        self.config = camera_config
+        self.raw = raw
+        self.width, self.height = camera_config.get('resolution', (640, 480))
+        self.fps = camera_config.get('fps', 30)
+        self.fourcc = camera_config.get('fourcc', 'MJPG')
+        # 마지막으로 읽은 프레임의 드라이버 타임스탬프 (없으면 0)
+        self.last_timestamp = 0.0
+        # last_timestamp의 기준 시계: 'monotonic' (CLOCK_MONOTONIC), 'wall' (time.time()),
+        # None이면 read() 반환 시각과 다를 바 없어 캡처 시각으로 쓰지 않음
+        self.timestamp_clock: Optional[str] = None
+    
+    def open(self) -> bool:
+        raise NotImplementedError
+    
+    def isOpened(self) -> bool:
+        raise NotImplementedError
+    
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        raise NotImplementedError
+    
+    def release(self):
+        raise NotImplementedError
+
+class OpenCVCapture(CaptureBackend):
+    """cv2.VideoCapture(V4L2) 백엔드"""
+    
+    name = 'opencv'
+    
+    def __init__(self, camera_config: Dict, raw: bool = False):
+        super().__init__(camera_config, raw)
+        self.cap = None
+    
+    def open(self) -> bool:
+        # V4L2 백엔드 직접 지정
+        self.cap = cv2.VideoCapture(self.config['device'], cv2.CAP_V4L2)
+        if not self.cap.isOpened():
+            return False
+        
+        # 해상도 및 FPS 설정
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        self.cap.set(cv2.CAP_PROP_FPS, self.fps)
+        
+        # 버퍼 크기 설정 (더 큰 버퍼)
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 5)
+        
+        # 추가 카메라 설정
+        self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*self.fourcc))
+        self.cap.set(cv2.CAP_PROP_AUTOFOCUS, 0)
+        self.cap.set(cv2.CAP_PROP_AUTO_EXPOSURE, 0.25)  # Manual mode
+        
+        # 패스스루 모드: 디코딩 없이 카메라의 JPEG 버퍼를 그대로 받음
+        if self.raw:
+            self.cap.set(cv2.CAP_PROP_FORMAT, -1)
+            self.cap.set(cv2.CAP_PROP_CONVERT_RGB, 0)
+        return True
+    
+    def isOpened(self) -> bool:
+        return self.cap is not None and self.cap.isOpened()
+    
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        if self.cap is None:
+            return False, None
+        return self.cap.read()
+    
+    def release(self):
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+def _v4l2_fourcc(code: str) -> int:
+    a, b, c, d = (ord(ch) for ch in code)
+    return a | (b << 8) | (c << 16) | (d << 24)
+
+def _ioc(direction: int, number: int, size: int) -> int:
+    return (direction << 30) | (size << 16) | (ord('V') << 8) | number
+
+class _V4L2PixFormat(ctypes.Structure):
+    _fields_ = [('width', ctypes.c_uint32), ('height', ctypes.c_uint32),
+                ('pixelformat', ctypes.c_uint32), ('field', ctypes.c_uint32),
+                ('bytesperline', ctypes.c_uint32), ('sizeimage', ctypes.c_uint32),
+                ('colorspace', ctypes.c_uint32), ('priv', ctypes.c_uint32),
+                ('flags', ctypes.c_uint32), ('ycbcr_enc', ctypes.c_uint32),
+                ('quantization', ctypes.c_uint32), ('xfer_func', ctypes.c_uint32)]
+
+class _V4L2FormatUnion(ctypes.Union):
+    # v4l2_window에 포인터가 있으므로 포인터 정렬을 맞춤
+    _fields_ = [('pix', _V4L2PixFormat), ('raw_data', ctypes.c_uint8 * 200),
+                ('_align', ctypes.c_void_p)]
+
+class _V4L2Format(ctypes.Structure):
+    _fields_ = [('type', ctypes.c_uint32), ('fmt', _V4L2FormatUnion)]
+
+class _V4L2RequestBuffers(ctypes.Structure):
+    _fields_ = [('count', ctypes.c_uint32), ('type', ctypes.c_uint32),
+                ('memory', ctypes.c_uint32), ('capabilities', ctypes.c_uint32),
+                ('flags', ctypes.c_uint8), ('reserved', ctypes.c_uint8 * 3)]
+
+class _V4L2Timecode(ctypes.Structure):
+    _fields_ = [('type', ctypes.c_uint32), ('flags', ctypes.c_uint32),
+                ('frames', ctypes.c_uint8), ('seconds', ctypes.c_uint8),
+                ('minutes', ctypes.c_uint8), ('hours', ctypes.c_uint8),
+                ('userbits', ctypes.c_uint8 * 4)]
+
+class _Timeval(ctypes.Structure):
+    _fields_ = [('tv_sec', ctypes.c_long), ('tv_usec', ctypes.c_long)]
+
+class _V4L2BufferM(ctypes.Union):
+    _fields_ = [('offset', ctypes.c_uint32), ('userptr', ctypes.c_ulong),
+                ('planes', ctypes.c_void_p), ('fd', ctypes.c_int32)]
+
+class _V4L2Buffer(ctypes.Structure):
+    _fields_ = [('index', ctypes.c_uint32), ('type', ctypes.c_uint32),
+                ('bytesused', ctypes.c_uint32), ('flags', ctypes.c_uint32),
+                ('field', ctypes.c_uint32), ('timestamp', _Timeval),
+                ('timecode', _V4L2Timecode), ('sequence', ctypes.c_uint32),
+                ('memory', ctypes.c_uint32), ('m', _V4L2BufferM),
+                ('length', ctypes.c_uint32), ('reserved2', ctypes.c_uint32),
+                ('request_fd', ctypes.c_int32)]
+
+class _V4L2Fract(ctypes.Structure):
+    _fields_ = [('numerator', ctypes.c_uint32), ('denominator', ctypes.c_uint32)]
+
+class _V4L2CaptureParm(ctypes.Structure):
+    _fields_ = [('capability', ctypes.c_uint32), ('capturemode', ctypes.c_uint32),
+                ('timeperframe', _V4L2Fract), ('extendedmode', ctypes.c_uint32),
+                ('readbuffers', ctypes.c_uint32), ('reserved', ctypes.c_uint32 * 4)]
+
+class _V4L2StreamParmUnion(ctypes.Union):
+    _fields_ = [('capture', _V4L2CaptureParm), ('raw_data', ctypes.c_uint8 * 200)]
+
+class _V4L2StreamParm(ctypes.Structure):
+    _fields_ = [('type', ctypes.c_uint32), ('parm', _V4L2StreamParmUnion)]
+
+_IOC_WRITE, _IOC_READ = 1, 2
+VIDIOC_S_FMT = _ioc(_IOC_READ | _IOC_WRITE, 5, ctypes.sizeof(_V4L2Format))
+VIDIOC_REQBUFS = _ioc(_IOC_READ | _IOC_WRITE, 8, ctypes.sizeof(_V4L2RequestBuffers))
+VIDIOC_QUERYBUF = _ioc(_IOC_READ | _IOC_WRITE, 9, ctypes.sizeof(_V4L2Buffer))
+VIDIOC_QBUF = _ioc(_IOC_READ | _IOC_WRITE, 15, ctypes.sizeof(_V4L2Buffer))
+VIDIOC_DQBUF = _ioc(_IOC_READ | _IOC_WRITE, 17, ctypes.sizeof(_V4L2Buffer))
+VIDIOC_STREAMON = _ioc(_IOC_WRITE, 18, ctypes.sizeof(ctypes.c_int))
+VIDIOC_STREAMOFF = _ioc(_IOC_WRITE, 19, ctypes.sizeof(ctypes.c_int))
+VIDIOC_S_PARM = _ioc(_IOC_READ | _IOC_WRITE, 22, ctypes.sizeof(_V4L2StreamParm))
+
+V4L2_BUF_TYPE_VIDEO_CAPTURE = 1
+V4L2_MEMORY_MMAP = 1
+V4L2_FIELD_ANY = 0
+V4L2_BUF_FLAG_TIMESTAMP_MASK = 0xe000
+V4L2_BUF_FLAG_TIMESTAMP_MONOTONIC = 0x2000
+
+class V4L2Buffer:
+    """디큐된 드라이버 버퍼에 대한 뷰
+    
+    view는 mmap된 드라이버 메모리를 그대로 가리키며, release()를 호출하면
+    뷰를 해제하고 버퍼를 드라이버에 다시 큐잉합니다. with 문으로 사용할 수 있습니다.
+    """
+    
+    def __init__(self, capture: 'V4L2Capture', buf: _V4L2Buffer, view: memoryview):
+        self._capture = capture
+        self._buf = buf
+        self.view = view
+        self.index = buf.index
+        self.sequence = buf.sequence
+        self.timestamp = buf.timestamp.tv_sec + buf.timestamp.tv_usec / 1e6
+        # 대부분의 드라이버는 CLOCK_MONOTONIC 기준 (그 외는 드라이버마다 달라 믿지 않음)
+        self.monotonic = (buf.flags & V4L2_BUF_FLAG_TIMESTAMP_MASK) == V4L2_BUF_FLAG_TIMESTAMP_MONOTONIC
+    
+    def array(self) -> np.ndarray:
+        """버퍼 내용을 복사 없이 numpy 배열로 반환 (release 전까지만 유효)"""
+        return np.frombuffer(self.view, dtype=np.uint8)
+    
+    def release(self):
+        if self.view is None:
+            return
+        self.view.release()
+        self.view = None
+        self._capture._requeue(self._buf)
+    
+    def __enter__(self) -> 'V4L2Buffer':
+        return self
+    
+    def __exit__(self, *exc):
+        self.release()
+
+class V4L2Capture(CaptureBackend):
+    """V4L2 ioctl + mmap 백엔드 (드라이버 버퍼를 복사 없이 사용)"""
+    
+    name = 'v4l2'
+    
+    def __init__(self, camera_config: Dict, raw: bool = False):
+        super().__init__(camera_config, raw)
+        self.fd = -1
+        self.buffers: List[mmap.mmap] = []
+        self.buffer_count = camera_config.get('v4l2_buffers', 4)
+        self.read_timeout = 2.0
+        self.streaming = False
+    
+    def open(self) -> bool:
+        if fcntl is None:
+            return False
+        device = self.config['device']
+        if isinstance(device, int):
+            device = f"/dev/video{device}"
+        try:
+            self.fd = os.open(device, os.O_RDWR | os.O_NONBLOCK)
+            
+            fmt = _V4L2Format()
+            fmt.type = V4L2_BUF_TYPE_VIDEO_CAPTURE
+            fmt.fmt.pix.width = self.width
+            fmt.fmt.pix.height = self.height
+            fmt.fmt.pix.pixelformat = _v4l2_fourcc(self.fourcc)
+            fmt.fmt.pix.field = V4L2_FIELD_ANY
+            fcntl.ioctl(self.fd, VIDIOC_S_FMT, fmt)
+            # 드라이버가 조정한 실제 값 반영
+            self.width, self.height = fmt.fmt.pix.width, fmt.fmt.pix.height
+            
+            parm = _V4L2StreamParm()
+            parm.type = V4L2_BUF_TYPE_VIDEO_CAPTURE
+            parm.parm.capture.timeperframe.numerator = 1
+            parm.parm.capture.timeperframe.denominator = int(self.fps)
+            try:
+                fcntl.ioctl(self.fd, VIDIOC_S_PARM, parm)
+            except OSError:
+                pass  # 프레임레이트 설정을 지원하지 않는 장치
+            
+            req = _V4L2RequestBuffers()
+            req.count = self.buffer_count
+            req.type = V4L2_BUF_TYPE_VIDEO_CAPTURE
+            req.memory = V4L2_MEMORY_MMAP
+            fcntl.ioctl(self.fd, VIDIOC_REQBUFS, req)
+            
+            for index in range(req.count):
+                buf = self._new_buffer(index)
+                fcntl.ioctl(self.fd, VIDIOC_QUERYBUF, buf)
+                self.buffers.append(mmap.mmap(self.fd, buf.length, mmap.MAP_SHARED,
+                                              mmap.PROT_READ | mmap.PROT_WRITE,
+                                              offset=buf.m.offset))
+                fcntl.ioctl(self.fd, VIDIOC_QBUF, buf)
+            
+            fcntl.ioctl(self.fd, VIDIOC_STREAMON, ctypes.c_int(V4L2_BUF_TYPE_VIDEO_CAPTURE))
+            self.streaming = True
+            return True
+            
+        except OSError:
+            self.release()
+            return False
+    
+    @staticmethod
+    def _new_buffer(index: int = 0) -> _V4L2Buffer:
+        buf = _V4L2Buffer()
+        buf.index = index
+        buf.type = V4L2_BUF_TYPE_VIDEO_CAPTURE
+        buf.memory = V4L2_MEMORY_MMAP
+        return buf
+    
+    def isOpened(self) -> bool:
+        return self.fd >= 0 and self.streaming
+    
+    def grab_buffer(self, timeout: Optional[float] = None) -> Optional[V4L2Buffer]:
+        """다음 드라이버 버퍼를 디큐 (호출자가 release() 해야 함)"""
+        if not self.isOpened():
+            return None
+        timeout = self.read_timeout if timeout is None else timeout
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return None
+        
+        buf = self._new_buffer()
+        try:
+            fcntl.ioctl(self.fd, VIDIOC_DQBUF, buf)
+        except BlockingIOError:
+            return None
+        
+        view = memoryview(self.buffers[buf.index])[:buf.bytesused]
+        return V4L2Buffer(self, buf, view)
+    
+    def _requeue(self, buf: _V4L2Buffer):
+        if self.isOpened():
+            fcntl.ioctl(self.fd, VIDIOC_QBUF, buf)
+    
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        buffer = self.grab_buffer()
+        if buffer is None:
+            return False, None
+        
+        with buffer:
+            self.last_timestamp = buffer.timestamp
+            self.timestamp_clock = 'monotonic' if buffer.monotonic else None
+            data = buffer.array()
+            if self.fourcc == 'MJPG':
+                if self.raw:
+                    # 원본 JPEG만 복사 (드라이버 버퍼는 바로 반환)
+                    return True, data.copy()
+                frame = cv2.imdecode(data, cv2.IMREAD_COLOR)
+            elif self.fourcc == 'YUYV':
+                # mmap 메모리에서 바로 색 변환 (중간 복사 없음)
+                frame = cv2.cvtColor(data[:self.width * self.height * 2].reshape(self.height, self.width, 2),
+                                     cv2.COLOR_YUV2BGR_YUYV)
+            else:
+                return False, None
+        return frame is not None, frame
+    
+    def read_jpeg(self) -> Optional[bytes]:
+        """MJPEG 원본을 bytes로 한 번만 복사해 반환 (패스스루 모드용)"""
+        buffer = self.grab_buffer()
+        if buffer is None:
+            return None
+        with buffer:
+            self.last_timestamp = buffer.timestamp
+            self.timestamp_clock = 'monotonic' if buffer.monotonic else None
+            return buffer.view.tobytes()
+    
+    def release(self):
+        if self.fd < 0:
+            return
+        if self.streaming:
+            try:
+                fcntl.ioctl(self.fd, VIDIOC_STREAMOFF, ctypes.c_int(V4L2_BUF_TYPE_VIDEO_CAPTURE))
+            except OSError:
+                pass
+            self.streaming = False
+        for buffer in self.buffers:
+            buffer.close()
+        self.buffers = []
+        os.close(self.fd)
+        self.fd = -1
+
+class FakeCapture(CaptureBackend):
+    """가짜 캡처 백엔드 (카메라 없이 캡처 파이프라인 테스트용)
+    
+    device가 'pattern'이면 움직이는 테스트 패턴을 생성하고,
+    그 외에는 이미지/동영상 파일을 읽어 반복 재생합니다.
+    """
+    
+    name = 'fake'
+    
+    def __init__(self, camera_config: Dict, raw: bool = False):
+        super().__init__(camera_config, raw)
+        self.source = camera_config.get('device', 'pattern')
+        self.opened = False
+        self.index = 0
+        self.next_time = 0.0
+        self.still = None
+        self.video = None
+        # 프레임을 만든 시각 (raw 모드면 JPEG 인코딩 시간이 'read' 단계로 잡힘)
+        self.timestamp_clock = 'wall'
+    
+    def open(self) -> bool:
+        if self.source != 'pattern':
+            if not os.path.exists(str(self.source)):
+                return False
+            self.still = cv2.imread(str(self.source), cv2.IMREAD_COLOR)
+            if self.still is None:
+                self.video = cv2.VideoCapture(str(self.source))
+                if not self.video.isOpened():
+                    return False
+            else:
+                self.still = cv2.resize(self.still, (self.width, self.height))
+        self.opened = True
+        self.next_time = time.time()
+        return True
+    
+    def isOpened(self) -> bool:
+        return self.opened
+    
+    def _next_image(self) -> Optional[np.ndarray]:
+        if self.still is not None:
+            return self.still.copy()
+        if self.video is not None:
+            ret, frame = self.video.read()
+            if not ret:
+                # 파일 끝이면 처음부터 다시 재생
+                self.video.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                ret, frame = self.video.read()
+            if not ret:
+                return None
+            return cv2.resize(frame, (self.width, self.height))
+        
+        # 테스트 패턴: 세로 그라데이션 위로 이동하는 막대
+        frame = np.empty((self.height, self.width, 3), np.uint8)
+        frame[:] = (np.arange(self.height, dtype=np.uint32) * 255 // max(1, self.height - 1)
+                    ).astype(np.uint8)[:, None, None]
+        bar = (self.index * 8) % self.width
+        frame[:, bar:bar + 16] = (0, 0, 255)
+        return frame
+    
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        if not self.opened:
+            return False, None
+        
+        # 설정된 FPS에 맞춰 프레임 생성
+        delay = self.next_time - time.time()
+        if delay > 0:
+            time.sleep(delay)
+        self.next_time = max(self.next_time, time.time() - 1.0) + 1.0 / max(1, self.fps)
+        
+        frame = self._next_image()
+        if frame is None:
+            return False, None
+        self.index += 1
+        self.last_timestamp = time.time()
+        
+        if self.raw:
+            ret, encoded = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 80])
+            return ret, encoded.reshape(-1) if ret else None
+        return True, frame
+    
+    def release(self):
+        self.opened = False
+        if self.video is not None:
+            self.video.release()
+            self.video = None
+
+CAPTURE_BACKENDS = {
+    'opencv': OpenCVCapture,
+    'v4l2': V4L2Capture,
+    'fake': FakeCapture
+}
+
+def create_capture(camera_config: Dict, raw: bool = False) -> CaptureBackend:
+    """설정의 'backend' 값에 해당하는 캡처 백엔드 생성"""
+    backend = camera_config.get('backend', 'opencv')
+    if backend not in CAPTURE_BACKENDS:
+        raise ValueError(f"알 수 없는 캡처 백엔드: {backend}")
+    return CAPTURE_BACKENDS[backend](camera_config, raw)
 
 class Camera:
     """개별 웹캠을 관리하는 클래스"""
     
+    # stop()이 캡처 스레드의 read() 반환을 기다리는 최대 시간 (백엔드 읽기 제한 시간보다 길게)
+    stop_timeout = 5.0
+    
     def __init__(self, camera_id: str, camera_config: Dict):
         self.camera_id = camera_id
         self.config = camera_config
@@ -23,136 +888,408 @@ class Camera:
         self.fps_counter = 0
         self.fps_start_time = time.time()
         
+        # 캡처 스레드와 최신 프레임 링 버퍼
+        self.frames = FrameRingBuffer(camera_config.get('ring_size', 4))
+        self.capture_thread = None
+        # 캡처 스레드가 read()에서 빠져나왔는지 (그 전에는 장치를 해제하지 않음)
+        self._capture_done: Optional[threading.Event] = None
+        self._cap_lock = threading.Lock()
+        self.read_failures = 0
+        
+        # 기동 시 실제 첫 프레임 소요 시간 (대기 한도는 startup_timeout)
+        self.time_to_first_frame: Optional[float] = None
+        
+        # USB 대역폭 계획 결과 (None이면 설정값 그대로 사용)
+        self.usb_plan: Optional[Dict] = None
+        
+        # 캡처 모드: 'decode' (OpenCV가 BGR로 디코딩) 또는
+        # 'passthrough' (카메라 MJPEG을 그대로 전달, 필요할 때만 디코딩)
+        self.capture_mode = camera_config.get('capture_mode', 'decode')
+        
+        # 파이프라인 단계별 지연 히스토그램 (캡처 -> 오버레이 -> 인코딩 -> 패킷화 -> 전송)
+        self.latency = PipelineLatency()
+        
+        # 인코딩 결과 공유 캐시
+        self.encoded = EncodedFrameCache(camera_config.get('encode_cache_size', 8),
+                                         histogram=self.latency.stages['encode'])
+        
+        # 정보 오버레이 (링 버퍼에는 원본을 두고, 오버레이를 원하는 소비자에게만 한 번 그려 공유)
+        self.overlay = FrameOverlay(camera_config['name'])
+        
+        # H.264 인코딩 단계 - (크기, fps, 오버레이) 변형마다 하나 (H.264 소비자가 처음 요청할 때 생성)
+        self.h264: Dict[Tuple, H264EncodeStage] = {}
+        
+        # 소비자 구독 (온디맨드 캡처: 첫 구독자가 장치를 열고, 마지막 구독자가 떠나면 linger 후 해제)
+        self.consumers: Dict[str, int] = {}
+        self.on_demand_starts = 0
+        self._subscription_lock = threading.Lock()
+        self._release_timer: Optional[threading.Timer] = None
+        
         # 로깅 설정
         self.logger = logging.getLogger(f"Camera_{camera_id}")
         
-    def initialize(self) -> bool:
-        """카메라 초기화"""
+    def initialize(self, startup_timeout: Optional[float] = None) -> bool:
+        """카메라 초기화 (startup_timeout: 첫 프레임 대기 한도, 기본값은 설정의 startup_timeout)"""
         try:
             device = self.config['device']
-            # V4L2 백엔드 직접 지정
-            self.cap = cv2.VideoCapture(device, cv2.CAP_V4L2)
+            open_started = time.time()
+            self.time_to_first_frame = None
+            self.cap = self._create_backend()
             
-            if not self.cap.isOpened():
-                self.logger.error(f"카메라 {device}를 열 수 없습니다.")
+            if not self.cap.open():
+                self.logger.error(f"카메라 {device}를 열 수 없습니다. (백엔드: {self.cap.name})")
+                self.cap.release()
+                self.cap = None
                 return False
             
-            # 해상도 및 FPS 설정
-            width, height = self.config['resolution']
-            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
-            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
-            self.cap.set(cv2.CAP_PROP_FPS, self.config['fps'])
-            
-            # 버퍼 크기 설정 (더 큰 버퍼)
-            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 5)
-            
-            # 추가 카메라 설정
-            self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc('M', 'J', 'P', 'G'))
-            self.cap.set(cv2.CAP_PROP_AUTOFOCUS, 0)
-            self.cap.set(cv2.CAP_PROP_AUTO_EXPOSURE, 0.25)  # Manual mode
-            
-            # 카메라 안정화를 위한 대기
-            time.sleep(3)  # 1초 → 3초로 증가
-            
-            # 초기 프레임 읽기 테스트
-            ret, test_frame = self.cap.read()
-            if not ret:
-                self.logger.warning(f"카메라 {self.config['name']} 초기 프레임 읽기 실패")
-                # 재시도
-                time.sleep(2)
-                ret, test_frame = self.cap.read()
-                if not ret:
-                    self.logger.error(f"카메라 {self.config['name']} 재시도 후에도 프레임 읽기 실패")
-                    return False
+            # 고정 대기 대신 첫 정상 프레임이 나올 때까지 대기
+            timeout = startup_timeout if startup_timeout is not None else self.startup_timeout
+            if not self._wait_first_frame(open_started, timeout):
+                self.logger.error(f"카메라 {self.config['name']} 첫 프레임 대기 시간 초과 "
+                                  f"({timeout}초)")
+                self.cap.release()
+                self.cap = None
+                return False
             
-            self.logger.info(f"카메라 {self.config['name']} 초기화 완료")
+            self.logger.info(f"카메라 {self.config['name']} 초기화 완료 "
+                             f"(첫 프레임까지 {self.time_to_first_frame:.2f}초)")
             return True
             
         except Exception as e:
             self.logger.error(f"카메라 초기화 실패: {e}")
             return False
     
-    def start(self):
-        """카메라 스트리밍 시작"""
+    def _create_backend(self) -> CaptureBackend:
+        return create_capture(self.effective_config(), raw=self.capture_mode == 'passthrough')
+    
+    def apply_usb_plan(self, plan_entry: Optional[Dict]):
+        """USB 대역폭 계획 적용 (다음 초기화부터 반영)"""
+        self.usb_plan = plan_entry
+    
+    def effective_config(self) -> Dict:
+        """대역폭 계획으로 조정된 해상도/FPS/포맷을 반영한 설정"""
+        if not self.usb_plan or not self.usb_plan.get('mode'):
+            return self.config
+        return {**self.config, **self.usb_plan['mode']}
+    
+    def _wait_first_frame(self, open_started: float, timeout: float) -> bool:
+        """첫 정상 프레임을 읽을 때까지 반복 (timeout 초과 시 False)"""
+        deadline = open_started + timeout
+        while time.time() < deadline:
+            ret, frame = self.cap.read()
+            if ret and frame is not None and len(frame) > 0:
+                self.time_to_first_frame = time.time() - open_started
+                return True
+            time.sleep(0.05)
+        return False
+    
+    @property
+    def usb_bus(self) -> Optional[int]:
+        """카메라가 연결된 USB 버스 번호 (설정값 우선, 없으면 sysfs 조회)"""
+        if self.config.get('usb_bus') is not None:
+            return self.config['usb_bus']
+        device = self.config.get('device')
+        if not isinstance(device, str) or not device.startswith('/dev/'):
+            return None
+        return find_usb_bus(device, config.capture['sysfs_root'])
+    
+    def start(self, startup_timeout: Optional[float] = None):
+        """카메라 스트리밍 시작 (캡처 스레드 구동)"""
+        if self.is_running:
+            return True
+        
+        if self.usb_plan and self.usb_plan.get('action') == 'refused':
+            self.logger.error(f"카메라 {self.config['name']}는 USB 대역폭 부족으로 시작하지 않습니다")
+            return False
+        
         if self.cap is None or not self.cap.isOpened():
-            if not self.initialize():
+            if not self.initialize(startup_timeout):
                 return False
         
         self.is_running = True
+        self._capture_done = threading.Event()
+        self.capture_thread = threading.Thread(target=self._capture_loop, args=(self.cap, self._capture_done),
+                                               daemon=True, name=f"capture-{self.camera_id}")
+        self.capture_thread.start()
         self.logger.info(f"카메라 {self.config['name']} 스트리밍 시작")
         return True
     
     def stop(self):
         """카메라 스트리밍 중지"""
         self.is_running = False
-        if self.cap:
-            self.cap.release()
-            self.cap = None
+        self.frames.notify_all()
+        
+        if self._release_timer is not None:
+            self._release_timer.cancel()
+            self._release_timer = None
+        for stage in list(self.h264.values()):
+            stage.stop()
+        
+        # 캡처 스레드가 read()를 마치고 빠져나올 때까지 대기한 뒤에만 장치 해제
+        thread = self.capture_thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=self.stop_timeout)
+        self.capture_thread = None
+        
+        with self._cap_lock:
+            cap, self.cap = self.cap, None
+            if self._capture_done is not None and not self._capture_done.is_set():
+                # read()가 아직 돌아오지 않음 - 캡처 스레드가 빠져나오면서 해제
+                self.logger.warning(f"카메라 {self.config['name']} 읽기가 끝나지 않아 캡처 스레드가 장치를 해제합니다")
+                cap = None
+        if cap is not None:
+            cap.release()
+        self.frames.clear()
+        self.encoded.clear()
         self.logger.info(f"카메라 {self.config['name']} 스트리밍 중지")
     
-    def get_frame(self) -> Optional[np.ndarray]:
-        """현재 프레임 반환 (재시도 로직 포함)"""
-        if not self.is_running or self.cap is None:
-            return None
+    @property
+    def startup_timeout(self) -> float:
+        """기동 시 첫 프레임 대기 한도 (카메라 설정 우선, 없으면 capture 설정 - 쓸 때마다 읽음)"""
+        return self.config.get('startup_timeout', config.capture['startup_timeout'])
+    
+    @property
+    def on_demand(self) -> bool:
+        """온디맨드 캡처 여부 (카메라 설정 우선, 없으면 capture 설정 - 쓸 때마다 읽음)"""
+        return self.config.get('on_demand', config.capture.get('on_demand', False))
+    
+    @property
+    def consumer_count(self) -> int:
+        return sum(self.consumers.values())
+    
+    def subscribe(self, consumer: str = 'consumer') -> bool:
+        """소비자 등록 - 캡처 중이 아니면 시작 (warmup_budget 안에 첫 프레임이 나와야 성공)
         
-        try:
-            # 최대 3번 재시도
-            for attempt in range(3):
-                ret, frame = self.cap.read()
-                if ret:
-                    # FPS 계산
-                    current_time = time.time()
-                    self.frame_count += 1
-                    
-                    if current_time - self.fps_start_time >= 1.0:
-                        self.fps_counter = self.frame_count
-                        self.frame_count = 0
-                        self.fps_start_time = current_time
-                    
-                    # 프레임 정보 오버레이
-                    frame_with_info = self.add_frame_info(frame)
-                    self.frame_buffer = frame_with_info
-                    self.last_frame_time = current_time
-                    
-                    return frame_with_info
-                else:
-                    if attempt < 2:  # 마지막 시도가 아니면
-                        self.logger.warning(f"카메라 {self.config['name']} 프레임 읽기 실패 (시도 {attempt + 1}/3)")
-                        time.sleep(0.1)  # 잠시 대기 후 재시도
-                        continue
-                    else:
-                        self.logger.warning(f"카메라 {self.config['name']}에서 프레임을 읽을 수 없습니다.")
-                        return None
-                
-        except Exception as e:
-            self.logger.error(f"프레임 읽기 오류: {e}")
-            return None
+        같은 카메라를 동시에 구독하는 다른 소비자는 첫 구독자의 기동을 함께 기다립니다.
+        """
+        with self._subscription_lock:
+            if self._release_timer is not None:
+                self._release_timer.cancel()
+                self._release_timer = None
+            self.consumers[consumer] = self.consumers.get(consumer, 0) + 1
+            if self.is_running:
+                return True
+            
+            budget = config.capture.get('warmup_budget', self.startup_timeout)
+            if self.start(budget):
+                self.on_demand_starts += 1
+                return True
+            
+            self._remove_consumer(consumer)
+            return False
     
-    def add_frame_info(self, frame: np.ndarray) -> np.ndarray:
-        """프레임에 정보 오버레이 추가"""
+    def unsubscribe(self, consumer: str = 'consumer'):
+        """소비자 해제 - 마지막 소비자면 linger 후 장치 해제 (온디맨드 카메라만)"""
+        with self._subscription_lock:
+            self._remove_consumer(consumer)
+            if self.consumer_count > 0 or not self.on_demand or not self.is_running:
+                return
+            if self._release_timer is not None:
+                self._release_timer.cancel()
+            self._release_timer = threading.Timer(config.capture.get('linger', 30), self._release_idle)
+            self._release_timer.daemon = True
+            self._release_timer.start()
+    
+    def _remove_consumer(self, consumer: str):
+        count = self.consumers.get(consumer, 0) - 1
+        if count > 0:
+            self.consumers[consumer] = count
+        else:
+            self.consumers.pop(consumer, None)
+    
+    def _release_idle(self):
+        """linger 동안 새 소비자가 없으면 장치 해제"""
+        with self._subscription_lock:
+            self._release_timer = None
+            if self.consumer_count > 0 or not self.is_running:
+                return
+            self.logger.info(f"카메라 {self.config['name']} 소비자 없음 - 장치 해제")
+            self.stop()
+    
+    def _capture_loop(self, cap: CaptureBackend, done: threading.Event):
+        """캡처 스레드: 장치 고유 속도로 프레임을 읽어 링 버퍼에 기록
+        
+        장치는 stop()이 이 스레드가 끝난 뒤 해제합니다. stop()이 기다리다 포기했으면
+        (self.cap이 이미 비워짐) 이 스레드가 빠져나오면서 직접 해제합니다.
+        """
         try:
-            # 현재 시간
-            timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
+            self._read_frames(cap)
+        finally:
+            with self._cap_lock:
+                done.set()
+                orphaned = self.cap is not cap
+            if orphaned:
+                cap.release()
+            self.frames.notify_all()
+    
+    def _read_frames(self, cap: CaptureBackend):
+        """stop()이 불릴 때까지 cap에서 읽어 링 버퍼에 기록"""
+        while self.is_running:
+            try:
+                if self.capture_mode == 'passthrough' and hasattr(cap, 'read_jpeg'):
+                    # 드라이버 버퍼에서 JPEG을 바로 꺼냄
+                    jpeg = cap.read_jpeg()
+                    ret, frame = jpeg is not None, jpeg
+                else:
+                    ret, frame = cap.read()
+            except Exception as e:
+                self.logger.error(f"프레임 읽기 오류: {e}")
+                ret, frame = False, None
             
-            # FPS 정보
-            fps_text = f"FPS: {self.fps_counter}"
+            if not ret:
+                self.read_failures += 1
+                # 연속 실패는 처음과 이후 30번마다 한 번씩만 기록
+                if self.read_failures == 1 or self.read_failures % 30 == 0:
+                    self.logger.warning(f"카메라 {self.config['name']} 프레임 읽기 실패 "
+                                        f"(연속 {self.read_failures}회)")
+                time.sleep(0.1)
+                continue
             
-            # 카메라 이름
-            camera_name = self.config['name']
+            self.read_failures = 0
             
-            # 정보를 프레임에 추가
-            cv2.putText(frame, timestamp, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 
-                        0.7, (0, 255, 0), 2)
-            cv2.putText(frame, fps_text, (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 
-                        0.7, (0, 255, 0), 2)
-            cv2.putText(frame, camera_name, (10, 90), cv2.FONT_HERSHEY_SIMPLEX, 
-                        0.7, (0, 255, 0), 2)
+            # FPS 계산
+            current_time = time.time()
+            self.frame_count += 1
             
-            return frame
+            if current_time - self.fps_start_time >= 1.0:
+                self.fps_counter = self.frame_count
+                self.frame_count = 0
+                self.fps_start_time = current_time
             
-        except Exception as e:
-            self.logger.error(f"프레임 정보 추가 실패: {e}")
-            return frame
+            self.last_frame_time = current_time
+            # 드라이버/워커가 준 캡처 시각이 있으면 그 시각을 프레임 시각으로 (전송 지연의 기준)
+            timestamp = self._capture_time(cap, current_time)
+            
+            if self.capture_mode == 'passthrough':
+                jpeg = frame if isinstance(frame, bytes) else self._extract_jpeg(frame)
+                if jpeg is not None:
+                    # 픽셀이 필요한 소비자가 있을 때만 디코딩 (오버레이도 원하는 소비자에게만)
+                    self.frames.put(None, timestamp, jpeg, annotator=self._annotate)
+                    continue
+                
+                # 백엔드가 원본 JPEG을 주지 않으면 디코딩 모드로 전환
+                self.logger.warning(f"카메라 {self.config['name']}가 MJPEG 원본을 제공하지 않아 "
+                                    f"디코딩 모드로 전환합니다")
+                self.capture_mode = 'decode'
+            
+            # 원본은 그대로 두고, 정보 오버레이는 원하는 소비자가 처음 요청할 때 복사본에 그림
+            self.frame_buffer = frame
+            self.frames.put(frame, timestamp, annotator=self._annotate)
+    
+    def _capture_time(self, cap: CaptureBackend, read_time: float) -> float:
+        """프레임 캡처 시각 (백엔드가 믿을 만한 타임스탬프를 주지 않으면 read 반환 시각)
+        
+        캡처 -> read 반환 지연은 'read' 단계로 기록합니다. 시계가 다르거나 값이 이상하면
+        (5초 이상 차이) 버립니다.
+        """
+        clock = cap.timestamp_clock
+        stamp = cap.last_timestamp
+        if clock is None or stamp <= 0:
+            return read_time
+        if clock == 'monotonic':
+            stamp = read_time - (time.monotonic() - stamp)
+        delay = read_time - stamp
+        if not 0 <= delay < 5.0:
+            return read_time
+        self.latency.record('read', delay)
+        return stamp
+    
+    @staticmethod
+    def _extract_jpeg(raw: np.ndarray) -> Optional[bytes]:
+        """V4L2 원본 버퍼에서 JPEG bytes 추출 (JPEG이 아니면 None)"""
+        if raw is None or raw.dtype != np.uint8 or raw.size < 4:
+            return None
+        if raw.ndim != 1 and not (raw.ndim == 2 and raw.shape[0] == 1):
+            return None
+        data = raw.reshape(-1)
+        if data[0] != 0xFF or data[1] != 0xD8:
+            return None
+        return data.tobytes()
+    
+    def _annotate(self, frame: np.ndarray, entry: FrameEntry) -> np.ndarray:
+        """(FrameEntry.view) 원본 복사본에 캡처 시각/FPS/이름 오버레이"""
+        started = time.perf_counter()
+        frame = self.overlay.apply(frame, entry.timestamp, self.fps_counter)
+        self.latency.record('overlay', time.perf_counter() - started)
+        return frame
+    
+    @property
+    def overlay_enabled(self) -> bool:
+        """소비자가 따로 지정하지 않았을 때 오버레이 여부 (패스스루 카메라는 기본적으로 원본 전달)"""
+        return self.config.get('overlay', self.capture_mode != 'passthrough')
+    
+    def resolve_overlay(self, overlay: Optional[bool]) -> bool:
+        """소비자가 요청한 오버레이 여부 (None이면 카메라 기본값)"""
+        return self.overlay_enabled if overlay is None else overlay
+    
+    def view(self, entry: FrameEntry, overlay: Optional[bool] = None) -> Optional[np.ndarray]:
+        """entry의 원본 또는 오버레이 이미지 (overlay=None이면 카메라 기본값)"""
+        return entry.view(self.resolve_overlay(overlay))
+    
+    def get_frame(self) -> Optional[np.ndarray]:
+        """가장 최근 프레임 반환 (장치를 직접 읽지 않음, 오버레이는 카메라 기본값)
+        
+        반환된 프레임은 다른 소비자와 공유되므로 수정하면 안 됩니다.
+        """
+        if not self.is_running:
+            return None
+        
+        entry = self.frames.latest()
+        return self.view(entry) if entry is not None else None
+    
+    def get_latest(self) -> Optional[FrameEntry]:
+        """가장 최근 프레임을 시퀀스 번호/타임스탬프와 함께 반환"""
+        if not self.is_running:
+            return None
+        return self.frames.latest()
+    
+    def wait_frame(self, after_seq: int = 0, timeout: float = 1.0) -> Optional[FrameEntry]:
+        """after_seq 이후의 새 프레임을 기다려 반환 (타임아웃 시 None)"""
+        if not self.is_running:
+            return None
+        return self.frames.wait_next(after_seq, timeout)
+    
+    def scale_frame(self, entry: FrameEntry, size: Optional[Tuple[Optional[int], Optional[int]]],
+                    overlay: Optional[bool] = None) -> Optional[np.ndarray]:
+        """프레임 축소본 (같은 프레임/크기/오버레이를 요청한 소비자들이 공유)"""
+        overlay = self.resolve_overlay(overlay)
+        if size is None:
+            return entry.view(overlay)
+        return self.encoded.scaler.get_or_scale(entry, size, overlay)
+    
+    def encode_frame(self, entry: FrameEntry, quality: int = 80, fmt: str = '.jpg',
+                     size: Optional[Tuple[Optional[int], Optional[int]]] = None,
+                     overlay: Optional[bool] = None) -> Optional[bytes]:
+        """프레임을 인코딩 (같은 프레임/포맷/품질/크기/오버레이면 캐시된 bytes 공유)"""
+        overlay = self.resolve_overlay(overlay)
+        return self.encoded.get_or_encode(entry, fmt, quality, size, overlay)
+    
+    def get_jpeg(self, quality: int = 80, timeout: float = 0,
+                 size: Optional[Tuple[Optional[int], Optional[int]]] = None,
+                 overlay: Optional[bool] = None) -> Optional[bytes]:
+        """가장 최근 프레임의 JPEG bytes 반환 (timeout > 0이면 첫 프레임을 기다림)"""
+        entry = self.wait_frame(0, timeout) if timeout > 0 else self.get_latest()
+        if entry is None:
+            return None
+        return self.encode_frame(entry, quality, size=size, overlay=overlay)
+    
+    def get_h264_stage(self, size: Optional[Tuple[Optional[int], Optional[int]]] = None,
+                       fps: Optional[float] = None, overlay: Optional[bool] = None) -> Optional[H264EncodeStage]:
+        """(크기, fps, 오버레이) 변형별 공용 H.264 인코딩 단계 반환 (PyAV가 없으면 None)"""
+        if not h264_available():
+            return None
+        overlay = self.resolve_overlay(overlay)
+        key = (size, fps, overlay)
+        # 멈춘 다른 변형 단계는 정리 (요청마다 다른 크기가 와도 쌓이지 않도록)
+        for other, idle in list(self.h264.items()):
+            if other != key and not idle.running and idle.subscribers == 0:
+                self.h264.pop(other, None)
+        stage = self.h264.get(key)
+        if stage is None:
+            # 전역 설정에 카메라별 'h264' 설정을 덮어씀
+            stage = H264EncodeStage(self, {**config.h264, **self.config.get('h264', {})}, size, fps, overlay)
+            stage = self.h264.setdefault(key, stage)
+        return stage
     
     def get_status(self) -> Dict:
         """카메라 상태 정보 반환"""
@@ -162,52 +1299,373 @@ class Camera:
             'is_running': self.is_running,
             'is_connected': self.cap is not None and self.cap.isOpened(),
             'fps': self.fps_counter,
-            'resolution': self.config['resolution'],
+            'resolution': self.effective_config()['resolution'],
             'last_frame_time': self.last_frame_time,
+            'frame_seq': self.frames.seq,
+            'capture_mode': self.capture_mode,
+            'backend': self.config.get('backend', 'opencv'),
+            'usb_bus': self.usb_bus,
+            'usb_plan': self.usb_plan['action'] if self.usb_plan else None,
+            'time_to_first_frame': self.time_to_first_frame,
+            'encode_cache': self.encoded.get_stats(),
+            'overlay': {'default': self.overlay_enabled, **self.overlay.get_stats()},
+            'h264': {variant_label(*key): stage.get_stats() for key, stage in list(self.h264.items())},
+            'latency': self.latency.to_dict(),
+            'on_demand': self.on_demand,
+            'consumers': dict(self.consumers),
             'device': self.config['device']
         }
 
+class MosaicCapture(CaptureBackend):
+    """여러 카메라의 최신 프레임을 한 캔버스에 타일로 합성하는 백엔드
+    
+    미리 할당한 작업 캔버스의 타일 영역에 cv2.resize(dst=...)로 바로 축소해 넣고,
+    원본 카메라에 새 프레임이 없는 타일은 다시 그리지 않습니다. read()는 작업 캔버스를
+    출력 버퍼 풀(링 버퍼 크기 + 2)에 복사해 반환하므로 링 버퍼에 남은 이전 프레임을
+    덮어쓰지 않습니다. 원본 카메라는 열려 있는 동안 구독하며(온디맨드 카메라는 여기서 켜짐),
+    기동이 느린 카메라가 모자이크 시작을 막지 않도록 별도 스레드에서 구독합니다.
+    """
+    
+    name = 'mosaic'
+    
+    def __init__(self, camera_config: Dict, manager: 'CameraManager', consumer: str):
+        super().__init__(camera_config)
+        self.manager = manager
+        self.consumer = consumer
+        self.sources: List[str] = list(camera_config.get('sources', []))
+        
+        count = max(1, len(self.sources))
+        columns, rows = camera_config.get('layout') or (0, 0)
+        if not columns or not rows:
+            columns = int(np.ceil(np.sqrt(count)))
+            rows = int(np.ceil(count / columns))
+        self.columns, self.rows = columns, rows
+        self.width -= self.width % 2
+        self.height -= self.height % 2
+        
+        self.canvas: Optional[np.ndarray] = None
+        self.outputs: List[np.ndarray] = []
+        self.output_index = 0
+        self.tiles: List[Optional[Tuple[int, int, int, int]]] = [None] * len(self.sources)
+        self.tile_entries: List[Optional[FrameEntry]] = [None] * len(self.sources)
+        self.subscribed: List[str] = []
+        self.opened = False
+        self.next_time = 0.0
+        self._subscriber = None
+    
+    def open(self) -> bool:
+        self.canvas = np.zeros((self.height, self.width, 3), np.uint8)
+        pool_size = self.config.get('ring_size', 4) + 2
+        self.outputs = [np.empty_like(self.canvas) for _ in range(pool_size)]
+        for index in range(len(self.sources)):
+            self._draw_placeholder(index)
+        self.opened = True
+        self.next_time = time.time()
+        self._subscriber = threading.Thread(target=self._subscribe_sources, daemon=True,
+                                            name=f"mosaic-sources-{self.consumer}")
+        self._subscriber.start()
+        return True
+    
+    def _subscribe_sources(self):
+        """원본 카메라를 차례로 구독 (켜지는 대로 타일이 채워짐)"""
+        for camera_id in self.sources:
+            if not self.opened:
+                break
+            if self.manager.subscribe(camera_id, self.consumer):
+                self.subscribed.append(camera_id)
+    
+    def isOpened(self) -> bool:
+        return self.opened
+    
+    def _tile_rect(self, index: int) -> Tuple[int, int, int, int]:
+        tile_width = self.width // self.columns
+        tile_height = self.height // self.rows
+        return (index % self.columns) * tile_width, (index // self.columns) * tile_height, tile_width, tile_height
+    
+    def _fit(self, index: int, source_width: int, source_height: int) -> Tuple[int, int, int, int]:
+        """원본 비율을 유지하며 타일 가운데에 들어가는 영역 (x, y, w, h)"""
+        x, y, tile_width, tile_height = self._tile_rect(index)
+        scale = min(tile_width / source_width, tile_height / source_height)
+        width = max(2, int(source_width * scale) & ~1)
+        height = max(2, int(source_height * scale) & ~1)
+        return x + (tile_width - width) // 2, y + (tile_height - height) // 2, width, height
+    
+    def _draw_placeholder(self, index: int):
+        """신호 없는 타일 (검은 배경 + 카메라 ID)"""
+        x, y, width, height = self._tile_rect(index)
+        self.canvas[y:y + height, x:x + width] = 0
+        cv2.putText(self.canvas, f"{self.sources[index]}: no signal", (x + 10, y + height // 2),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (128, 128, 128), 1)
+        self.tiles[index] = None
+        self.tile_entries[index] = None
+    
+    def compose(self):
+        """새 프레임이 있는 원본만 해당 타일에 다시 그림"""
+        for index, camera_id in enumerate(self.sources):
+            camera = self.manager.cameras.get(camera_id)
+            entry = camera.get_latest() if camera is not None else None
+            if entry is None:
+                if self.tile_entries[index] is not None:
+                    self._draw_placeholder(index)
+                continue
+            if entry is self.tile_entries[index]:
+                continue
+            
+            frame = camera.view(entry)
+            if frame is None:
+                continue
+            rect = self._fit(index, frame.shape[1], frame.shape[0])
+            if rect != self.tiles[index]:
+                # 원본 크기가 바뀌면 타일 전체를 지우고 새 영역 사용
+                x, y, width, height = self._tile_rect(index)
+                self.canvas[y:y + height, x:x + width] = 0
+                self.tiles[index] = rect
+            x, y, width, height = rect
+            # 정수배가 아닌 축소에서 INTER_AREA는 INTER_LINEAR보다 몇 배 느림
+            cv2.resize(frame, (width, height), dst=self.canvas[y:y + height, x:x + width],
+                       interpolation=cv2.INTER_LINEAR)
+            self.tile_entries[index] = entry
+    
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        if not self.opened:
+            return False, None
+        
+        # 설정된 FPS에 맞춰 합성
+        delay = self.next_time - time.time()
+        if delay > 0:
+            time.sleep(delay)
+        self.next_time = max(self.next_time, time.time() - 1.0) + 1.0 / max(1, self.fps)
+        
+        self.compose()
+        output = self.outputs[self.output_index]
+        self.output_index = (self.output_index + 1) % len(self.outputs)
+        np.copyto(output, self.canvas)
+        self.last_timestamp = time.time()
+        return True, output
+    
+    def release(self):
+        self.opened = False
+        if self._subscriber is not None and self._subscriber is not threading.current_thread():
+            self._subscriber.join(timeout=10)
+        self._subscriber = None
+        for camera_id in self.subscribed:
+            self.manager.unsubscribe(camera_id, self.consumer)
+        self.subscribed = []
+        self.tile_entries = [None] * len(self.sources)
+
+class MosaicCamera(Camera):
+    """여러 카메라를 한 화면으로 합성한 가상 카메라
+    
+    합성 결과는 일반 카메라와 같은 링 버퍼/인코딩 캐시를 거치므로 MJPEG과 RTSP에서
+    연결 하나, 인코딩 한 번으로 여러 카메라를 볼 수 있습니다.
+    """
+    
+    def __init__(self, camera_id: str, camera_config: Dict, manager: 'CameraManager'):
+        super().__init__(camera_id, camera_config)
+        self.manager = manager
+        # 자기 자신이나 다른 모자이크는 원본으로 쓰지 않음 (구독 순환 방지)
+        self.sources = [source for source in camera_config.get('sources', [])
+                        if source != camera_id and config.cameras.get(source, {}).get('backend') != 'mosaic']
+        self.capture_mode = 'decode'
+    
+    def _create_backend(self) -> CaptureBackend:
+        return MosaicCapture({**self.effective_config(), 'sources': self.sources}, self.manager,
+                             f"mosaic:{self.camera_id}")
+    
+    @property
+    def overlay_enabled(self) -> bool:
+        # 타일마다 원본 카메라의 기본 오버레이가 이미 있음
+        return self.config.get('overlay', False)
+    
+    def get_status(self) -> Dict:
+        status = super().get_status()
+        status['sources'] = list(self.sources)
+        return status
+
 class CameraManager:
     """여러 카메라를 관리하는 매니저 클래스"""
     
     def __init__(self):
         self.cameras: Dict[str, Camera] = {}
         self.is_running = False
+        self.bringup: Dict = {}
+        self.usb_plan: Dict = {}
         self.logger = logging.getLogger("CameraManager")
         
-        # 활성화된 카메라 초기화
-        self._initialize_cameras()
+        # 활성화된 카메라 초기화 (main.py가 config.json을 읽은 뒤 reload_cameras()로 다시 만듦)
+        self.reload_cameras()
     
-    def _initialize_cameras(self):
-        """설정에 따라 카메라들 초기화"""
+    def reload_cameras(self):
+        """현재 설정으로 카메라들을 다시 만듦 (이미 만든 카메라는 중지하고 교체)
+        
+        전역 매니저는 모듈 import 시점(config.json 로드 전)에 만들어지므로 설정을 로드한 직후,
+        카메라를 쓰는 다른 구성 요소가 시작되기 전에 한 번만 호출합니다.
+        """
+        for camera in self.cameras.values():
+            if camera.is_running:
+                camera.stop()
+        cameras: Dict[str, Camera] = {}
         for camera_id, camera_config in config.cameras.items():
             if camera_config.get('enabled', False):
-                camera = Camera(camera_id, camera_config)
-                self.cameras[camera_id] = camera
+                cameras[camera_id] = self._create_camera(camera_id, camera_config)
                 self.logger.info(f"카메라 {camera_config['name']} 등록됨")
+        self.cameras = cameras
+    
+    def _create_camera(self, camera_id: str, camera_config: Dict) -> Camera:
+        if camera_config.get('backend') == 'mosaic':
+            return MosaicCamera(camera_id, camera_config, self)
+        if self._runs_in_worker(camera_id):
+            # camera_worker가 이 모듈을 가져오므로 필요할 때 가져옴
+            from camera_worker import WorkerCamera
+            return WorkerCamera(camera_id, camera_config, config.workers)
+        return Camera(camera_id, camera_config)
+    
+    @staticmethod
+    def _runs_in_worker(camera_id: str) -> bool:
+        """카메라를 워커 프로세스에서 캡처할지 (workers 설정, 모자이크 제외)"""
+        if not config.workers.get('enabled', False):
+            return False
+        cameras = config.workers.get('cameras') or []
+        return not cameras or camera_id in cameras
     
     def start_all(self) -> bool:
-        """모든 카메라 시작 (순차적으로)"""
+        """모든 카메라 시작 (USB 버스별 병렬 기동)
+        
+        서로 다른 USB 버스의 카메라는 동시에 열고, 같은 버스의 카메라는
+        앞 카메라가 첫 프레임을 낸 뒤 순서대로 엽니다. 이미 실행 중인 카메라는 그대로 둡니다.
+        """
         try:
-            success_count = 0
-            for camera_id, camera in self.cameras.items():
-                self.logger.info(f"카메라 {camera_id} 시작 중...")
-                if camera.start():
-                    success_count += 1
-                    self.logger.info(f"카메라 {camera_id} 시작 성공")
-                    # 카메라 간 간격을 두어 USB 대역폭 분산
-                    time.sleep(5)  # 2초 → 5초로 증가
-                else:
-                    self.logger.error(f"카메라 {camera_id} 시작 실패")
+            started = time.time()
+            self.plan_usb_bandwidth()
+            # 온디맨드 카메라는 첫 소비자가 구독할 때 시작
+            on_demand = [camera_id for camera_id, camera in self.cameras.items() if camera.on_demand]
+            # 모자이크는 원본 카메라를 구독하므로 실제 카메라 기동이 끝난 뒤 시작
+            mosaics = [camera_id for camera_id, camera in self.cameras.items()
+                       if isinstance(camera, MosaicCamera) and camera_id not in on_demand]
+            groups = self._group_by_bus(exclude=on_demand + mosaics)
+            results: Dict[str, bool] = {}
+            
+            threads = []
+            for bus, camera_ids in groups.items():
+                thread = threading.Thread(target=self._start_bus_group,
+                                          args=(bus, camera_ids, results),
+                                          daemon=True, name=f"bringup-{bus}")
+                thread.start()
+                threads.append(thread)
+            for thread in threads:
+                thread.join()
+            if mosaics:
+                self._start_bus_group('mosaic', mosaics, results)
             
-            self.is_running = success_count > 0
-            self.logger.info(f"{success_count}/{len(self.cameras)} 카메라 시작됨")
+            success_count = sum(1 for ok in results.values() if ok)
+            self.bringup = {
+                'total_time': round(time.time() - started, 3),
+                'groups': {str(bus): ids for bus, ids in groups.items()},
+                'time_to_first_frame': {
+                    camera_id: (round(self.cameras[camera_id].time_to_first_frame, 3)
+                                if self.cameras[camera_id].time_to_first_frame is not None else None)
+                    for camera_id in results
+                },
+                'on_demand': on_demand
+            }
+            
+            self.is_running = success_count > 0 or len(on_demand) > 0
+            self.logger.info(f"{success_count}/{len(results)} 카메라 시작됨 "
+                             f"({self.bringup['total_time']:.1f}초, 온디맨드 {len(on_demand)}대)")
             return self.is_running
             
         except Exception as e:
             self.logger.error(f"카메라 시작 실패: {e}")
             return False
     
+    def plan_usb_bandwidth(self) -> Dict:
+        """USB 버스별 대역폭 계획을 세워 각 카메라에 적용"""
+        planner = UsbBandwidthPlanner(config.capture['sysfs_root'],
+                                      config.capture['usb_budget_ratio'],
+                                      config.capture['usb_policy'])
+        cameras = {camera_id: camera.config for camera_id, camera in self.cameras.items()}
+        self.usb_plan = planner.plan(cameras)
+        for camera_id, entry in self.usb_plan['cameras'].items():
+            self.cameras[camera_id].apply_usb_plan(entry)
+        return self.usb_plan
+    
+    def _admit_usb(self, camera_id: str):
+        """켜져 있는 카메라(현재 모드)를 먼저 배정한 뒤 남은 대역폭으로 새 카메라 모드 결정"""
+        planner = UsbBandwidthPlanner(config.capture['sysfs_root'],
+                                      config.capture['usb_budget_ratio'],
+                                      config.capture['usb_policy'])
+        cameras = {cid: camera.effective_config() for cid, camera in self.cameras.items()
+                   if camera.is_running and cid != camera_id}
+        cameras[camera_id] = self.cameras[camera_id].config
+        plan = planner.plan(cameras)
+        self.cameras[camera_id].apply_usb_plan(plan['cameras'][camera_id])
+    
+    def subscribe(self, camera_id: str, consumer: str) -> bool:
+        """카메라 소비자 등록 (꺼져 있는 온디맨드 카메라는 USB 대역폭을 다시 확인하고 시작)"""
+        camera = self.cameras.get(camera_id)
+        if camera is None:
+            return False
+        if not camera.is_running and camera.on_demand:
+            try:
+                self._admit_usb(camera_id)
+            except Exception as e:
+                self.logger.error(f"USB 대역폭 확인 실패: {e}")
+        return camera.subscribe(consumer)
+    
+    def unsubscribe(self, camera_id: str, consumer: str):
+        """카메라 소비자 해제"""
+        camera = self.cameras.get(camera_id)
+        if camera is not None:
+            camera.unsubscribe(consumer)
+    
+    def supervise_workers(self) -> List[str]:
+        """죽었거나 멈춘 카메라 워커 재시작 후 재시작한 카메라 ID 목록 반환"""
+        restarted = []
+        for camera_id, camera in list(self.cameras.items()):
+            backend = camera.cap
+            if not camera.is_running or not hasattr(backend, 'restart'):
+                continue
+            reason = backend.check()
+            if reason and backend.restart(reason):
+                restarted.append(camera_id)
+        return restarted
+    
+    def get_usb_plan(self) -> Dict:
+        """마지막 USB 대역폭 계획 반환 (없으면 새로 계산)"""
+        if not self.usb_plan:
+            return self.plan_usb_bandwidth()
+        return self.usb_plan
+    
+    def _group_by_bus(self, exclude: Optional[List[str]] = None) -> Dict[str, List[str]]:
+        """카메라를 USB 버스별로 묶음 (설정 순서 유지, 버스를 모르면 단독 그룹)"""
+        groups: Dict[str, List[str]] = {}
+        for camera_id, camera in self.cameras.items():
+            if exclude and camera_id in exclude:
+                continue
+            bus = camera.usb_bus
+            key = f"bus{bus}" if bus is not None else f"unknown-{camera_id}"
+            groups.setdefault(key, []).append(camera_id)
+        return groups
+    
+    def _start_bus_group(self, bus: str, camera_ids: List[str], results: Dict[str, bool]):
+        """같은 버스의 카메라를 순서대로 시작"""
+        stagger = config.capture['bus_stagger']
+        for index, camera_id in enumerate(camera_ids):
+            if index > 0 and stagger > 0:
+                # 앞 카메라의 스트림이 자리 잡도록 짧게 간격을 둠
+                time.sleep(stagger)
+            self.logger.info(f"카메라 {camera_id} 시작 중... ({bus})")
+            ok = self.cameras[camera_id].start()
+            results[camera_id] = ok
+            if ok:
+                self.logger.info(f"카메라 {camera_id} 시작 성공")
+            else:
+                self.logger.error(f"카메라 {camera_id} 시작 실패")
+    
+    def get_bringup_status(self) -> Dict:
+        """마지막 start_all 기동 결과 반환"""
+        return self.bringup
+    
     def stop_all(self):
         """모든 카메라 중지"""
         for camera in self.cameras.values():
@@ -226,12 +1684,31 @@ class CameraManager:
         if camera_id in self.cameras:
             self.cameras[camera_id].stop()
     
+    def get_camera(self, camera_id: str) -> Optional[Camera]:
+        """카메라 객체 반환"""
+        return self.cameras.get(camera_id)
+    
     def get_camera_frame(self, camera_id: str) -> Optional[np.ndarray]:
         """특정 카메라의 프레임 반환"""
         if camera_id in self.cameras:
             return self.cameras[camera_id].get_frame()
         return None
     
+    def get_camera_jpeg(self, camera_id: str, quality: int = 80, timeout: float = 0,
+                        size: Optional[Tuple[Optional[int], Optional[int]]] = None,
+                        overlay: Optional[bool] = None) -> Optional[bytes]:
+        """특정 카메라의 최신 프레임을 JPEG bytes로 반환 (인코딩 캐시 사용)"""
+        if camera_id in self.cameras:
+            return self.cameras[camera_id].get_jpeg(quality, timeout, size, overlay)
+        return None
+    
+    def wait_camera_frame(self, camera_id: str, after_seq: int = 0,
+                          timeout: float = 1.0) -> Optional[FrameEntry]:
+        """특정 카메라의 새 프레임을 기다려 반환"""
+        if camera_id in self.cameras:
+            return self.cameras[camera_id].wait_frame(after_seq, timeout)
+        return None
+    
     def get_all_frames(self) -> Dict[str, np.ndarray]:
         """모든 카메라의 프레임 반환"""
         frames = {}
@@ -257,7 +1734,7 @@ class CameraManager:
     def add_camera(self, camera_id: str, camera_config: Dict) -> bool:
         """새 카메라 추가"""
         try:
-            camera = Camera(camera_id, camera_config)
+            camera = self._create_camera(camera_id, camera_config)
             self.cameras[camera_id] = camera
             self.logger.info(f"새 카메라 {camera_config['name']} 추가됨")
             return True
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+카메라별 워커 프로세스 (GIL을 나눠 쓰지 않도록 캡처/오버레이/JPEG 인코딩을 분리)
+
+워커 프로세스는 자기 Camera를 열어 캡처하고, 카메라 기본 오버레이를 그려 JPEG으로
+인코딩한 뒤 공유 메모리 링(shared_ring.SharedFrameRing)에 기록합니다. 메인 프로세스의
+WorkerCamera는 WorkerCapture 백엔드로 링에서 JPEG을 받아 패스스루 카메라처럼 링 버퍼에
+넣으므로, RTSP/MJPEG 소비자는 워커가 만든 JPEG을 다시 인코딩하지 않고 그대로 보냅니다.
+워커가 죽거나 멈추면 RTSPCameraSystem의 감독 스레드가 CameraManager.supervise_workers()로
+다시 띄웁니다 (링과 시퀀스 번호는 이어짐).
+"""
+
+import logging
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from config import config
+from camera_manager import Camera, CaptureBackend
+from shared_ring import SharedFrameRing
+
+def run_worker(camera_id: str, camera_config: Dict, ring_name: str, quality: int,
+               stop_event, frame_ready, parent_pid: int):
+    """워커 프로세스 본체: 카메라를 열고 인코딩한 JPEG을 링에 기록 (stop_event가 설정되면 종료)"""
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    logger = logging.getLogger(f"Worker_{camera_id}")
+    # Ctrl+C는 메인 프로세스가 받아 stop_event로 정리
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    
+    ring = SharedFrameRing.attach(ring_name)
+    camera = Camera(camera_id, {**camera_config, 'on_demand': False})
+    if not camera.start():
+        ring.close()
+        sys.exit(2)
+    
+    width, height = camera.effective_config()['resolution']
+    seq = 0
+    oversized = 0
+    logger.info(f"워커 시작 (pid {os.getpid()}, 링 {ring_name})")
+    try:
+        while not stop_event.is_set() and os.getppid() == parent_pid:
+            entry = camera.wait_frame(seq, 0.5)
+            if entry is not None:
+                seq = entry.seq
+                jpeg = camera.encode_frame(entry, quality)
+                if jpeg is not None:
+                    if entry.is_decoded:
+                        height, width = entry.frame.shape[:2]
+                    try:
+                        ring.write(jpeg, entry.timestamp, width, height)
+                        frame_ready.release()
+                    except ValueError as e:
+                        oversized += 1
+                        if oversized == 1 or oversized % 100 == 0:
+                            logger.warning(f"프레임 기록 실패 ({oversized}회): {e}")
+            ring.beat(time.time(), camera.fps_counter)
+    except Exception as e:
+        logger.error(f"워커 오류: {e}")
+        raise
+    finally:
+        camera.stop()
+        ring.close()
+
+class WorkerCapture(CaptureBackend):
+    """카메라 워커 프로세스가 링에 기록한 JPEG을 읽는 백엔드 (메인 프로세스 쪽)
+    
+    open()에서 링을 만들고 워커를 띄우며, release()에서 워커를 멈추고 링을 지웁니다.
+    워커는 새 프레임마다 세마포어를 올리고, read_jpeg()는 밀린 알림을 모두 비운 뒤
+    최신 프레임만 읽습니다 (프레임 bytes는 읽을 때 한 번 복사해 소비자들이 공유).
+    """
+    
+    name = 'worker'
+    
+    def __init__(self, camera_id: str, camera_config: Dict, settings: Dict):
+        super().__init__(camera_config, raw=True)
+        self.camera_id = camera_id
+        self.settings = settings
+        self.ring: Optional[SharedFrameRing] = None
+        self.process = None
+        self.stop_event = None
+        self.frame_ready = None
+        self.last_seq = 0
+        # 링의 타임스탬프는 워커가 기록한 캡처 시각 (time.time() 기준)
+        self.timestamp_clock = 'wall'
+        self.read_timeout = 2.0
+        self.started_at = 0.0
+        self.spawn_seq = 0
+        self.restarts = 0
+        self.failures = 0
+        self.next_restart = 0.0
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(f"Worker_{camera_id}")
+    
+    def open(self) -> bool:
+        try:
+            self.ring = SharedFrameRing.create(f"rtspcam-{os.getpid()}-{self.camera_id}",
+                                               self.settings.get('slots', 8),
+                                               self.settings.get('slot_size', 1024 * 1024))
+            context = multiprocessing.get_context('spawn')
+            self.stop_event = context.Event()
+            self.frame_ready = context.Semaphore(0)
+            self.last_seq = 0
+            self._spawn()
+            return True
+        except Exception as e:
+            self.logger.error(f"워커 시작 실패: {e}")
+            self.release()
+            return False
+    
+    def _spawn(self):
+        """워커 프로세스 시작 (포크 대신 spawn - 스레드가 잡고 있던 잠금을 물려받지 않음)"""
+        context = multiprocessing.get_context('spawn')
+        self.stop_event.clear()
+        self.process = context.Process(
+            target=run_worker, name=f"worker-{self.camera_id}", daemon=True,
+            args=(self.camera_id, self.config, self.ring.name, self.settings.get('quality', 80),
+                  self.stop_event, self.frame_ready, os.getpid()))
+        self.process.start()
+        self.started_at = time.time()
+        self.spawn_seq = self.ring.head
+    
+    def _terminate(self):
+        """워커 프로세스 종료 (응답이 없으면 강제 종료)"""
+        process = self.process
+        if process is None:
+            return
+        self.stop_event.set()
+        process.join(timeout=3)
+        if process.is_alive():
+            process.terminate()
+            process.join(timeout=1)
+        if process.is_alive():
+            process.kill()
+            process.join(timeout=1)
+        self.process = None
+    
+    def isOpened(self) -> bool:
+        return self.ring is not None and self.process is not None and self.process.is_alive()
+    
+    def read_jpeg(self) -> Optional[bytes]:
+        ring, frame_ready = self.ring, self.frame_ready
+        if ring is None or not frame_ready.acquire(timeout=self.read_timeout):
+            return None
+        # 밀린 알림은 버리고 최신 프레임만
+        while frame_ready.acquire(False):
+            pass
+        frame = ring.read(self.last_seq)
+        if frame is None:
+            return None
+        self.last_seq = frame.seq
+        self.last_timestamp = frame.timestamp
+        return frame.data
+    
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        jpeg = self.read_jpeg()
+        if jpeg is None:
+            return False, None
+        return True, np.frombuffer(jpeg, np.uint8)
+    
+    def check(self) -> Optional[str]:
+        """워커가 죽었거나 멈췄으면 그 이유, 정상이면 None"""
+        with self._lock:
+            process, ring = self.process, self.ring
+            if ring is None or process is None:
+                return None
+            if not process.is_alive():
+                return f"종료됨 (exit code {process.exitcode})"
+            now = time.time()
+            beat = ring.heartbeat
+            if beat < self.started_at:
+                # 아직 기동 중 (모듈 로드 + 카메라 첫 프레임 대기)
+                grace = (self.config.get('startup_timeout', config.capture['startup_timeout'])
+                         + self.settings.get('spawn_grace', 5.0) + self.settings.get('heartbeat_timeout', 5.0))
+                if now - self.started_at > grace:
+                    return f"{grace:.0f}초 안에 기동하지 못함"
+            elif now - beat > self.settings.get('heartbeat_timeout', 5.0):
+                return f"{now - beat:.1f}초 동안 응답 없음"
+            return None
+    
+    def restart(self, reason: str) -> bool:
+        """워커 재시작 (프레임을 내지 못하고 죽기를 반복하면 간격을 두 배씩 늘림, 최대 60초)"""
+        with self._lock:
+            now = time.time()
+            if self.ring is None or now < self.next_restart:
+                return False
+            self.failures = self.failures + 1 if self.ring.head == self.spawn_seq else 0
+            self.next_restart = now + min(60.0, self.settings.get('restart_delay', 1.0) * 2 ** self.failures)
+            self.restarts += 1
+            self.logger.warning(f"워커 재시작 ({reason}, {self.restarts}번째)")
+            self._terminate()
+            self._spawn()
+            return True
+    
+    def release(self):
+        with self._lock:
+            self._terminate()
+            if self.ring is not None:
+                self.ring.close()
+                self.ring = None
+    
+    def get_stats(self) -> Dict:
+        process, ring = self.process, self.ring
+        return {
+            'pid': process.pid if process is not None else None,
+            'alive': process is not None and process.is_alive(),
+            'restarts': self.restarts,
+            'fps': round(ring.fps, 1) if ring is not None else 0,
+            'seq': ring.head if ring is not None else 0,
+            'torn_reads': ring.torn_reads if ring is not None else 0
+        }
+
+class WorkerCamera(Camera):
+    """캡처/오버레이/JPEG 인코딩을 워커 프로세스에서 하는 카메라
+    
+    메인 프로세스에서는 패스스루 카메라처럼 동작합니다. JPEG 소비자는 워커가 만든 bytes를
+    그대로 받고, 픽셀이 필요한 소비자(축소, H.264, 모자이크, 모션)만 필요할 때 디코딩합니다.
+    오버레이는 워커가 카메라 기본값대로 한 번 그리므로 소비자별 overlay 지정은
+    기본값이 꺼진 카메라에서 켜는 경우에만 적용됩니다.
+    """
+    
+    def __init__(self, camera_id: str, camera_config: Dict, settings: Dict):
+        super().__init__(camera_id, camera_config)
+        self.settings = settings
+        self.worker_mode = self.capture_mode
+        self.worker_overlay = camera_config.get('overlay', self.worker_mode != 'passthrough')
+        self.capture_mode = 'passthrough'
+    
+    def _create_backend(self) -> CaptureBackend:
+        return WorkerCapture(self.camera_id, self.effective_config(), self.settings)
+    
+    def initialize(self, startup_timeout: Optional[float] = None) -> bool:
+        # 워커 프로세스가 모듈을 불러오는 시간만큼 첫 프레임 대기를 늘림
+        timeout = startup_timeout if startup_timeout is not None else self.startup_timeout
+        return super().initialize(timeout + self.settings.get('spawn_grace', 5.0))
+    
+    def resolve_overlay(self, overlay: Optional[bool]) -> bool:
+        # 워커가 이미 그린 프레임에 다시 그리지 않음
+        if self.worker_overlay:
+            return False
+        return bool(overlay)
+    
+    def get_status(self) -> Dict:
+        status = super().get_status()
+        status['capture_mode'] = self.worker_mode
+        status['overlay']['default'] = self.worker_overlay
+        status['worker'] = self.cap.get_stats() if isinstance(self.cap, WorkerCapture) else None
+        return status
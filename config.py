@@ -17,6 +17,10 @@ class Config:
                 'fps': 30,
                 'rtsp_port': 8554,
                 'rtsp_path': '/camera1',
+                'fourcc': 'MJPG',
+                'capture_mode': 'decode',  # 'passthrough': MJPEG 원본 전달
+                'backend': 'opencv',  # 'v4l2': mmap 직접 캡처, 'fake': 테스트 패턴
+                'codec': 'jpeg',  # RTSP 코덱 - 'h264': 카메라당 한 번 H.264 인코딩
                 'enabled': True
             },
             'camera3': {
@@ -26,6 +30,10 @@ class Config:
                 'fps': 30,
                 'rtsp_port': 8556,
                 'rtsp_path': '/camera3',
+                'fourcc': 'MJPG',
+                'capture_mode': 'decode',  # 'passthrough': MJPEG 원본 전달
+                'backend': 'opencv',  # 'v4l2': mmap 직접 캡처, 'fake': 테스트 패턴
+                'codec': 'jpeg',  # RTSP 코덱 - 'h264': 카메라당 한 번 H.264 인코딩
                 'enabled': True
             },
             'camera2': {
@@ -35,6 +43,10 @@ class Config:
                 'fps': 30,
                 'rtsp_port': 8555,
                 'rtsp_path': '/camera2',
+                'fourcc': 'MJPG',
+                'capture_mode': 'decode',  # 'passthrough': MJPEG 원본 전달
+                'backend': 'opencv',  # 'v4l2': mmap 직접 캡처, 'fake': 테스트 패턴
+                'codec': 'jpeg',  # RTSP 코덱 - 'h264': 카메라당 한 번 H.264 인코딩
                 'enabled': True
             },
             'camera4': {
@@ -44,24 +56,128 @@ class Config:
                 'fps': 30,
                 'rtsp_port': 8557,
                 'rtsp_path': '/camera4',
+                'fourcc': 'MJPG',
+                'capture_mode': 'decode',  # 'passthrough': MJPEG 원본 전달
+                'backend': 'opencv',  # 'v4l2': mmap 직접 캡처, 'fake': 테스트 패턴
+                'codec': 'jpeg',  # RTSP 코덱 - 'h264': 카메라당 한 번 H.264 인코딩
                 'enabled': True
+            },
+            'mosaic': {
+                'name': 'Mosaic',
+                'device': 'mosaic',
+                'backend': 'mosaic',  # 가상 카메라 - sources의 최신 프레임을 타일로 합성
+                'sources': ['camera1', 'camera2', 'camera3', 'camera4'],
+                'layout': (2, 2),  # (열, 행) - 생략하면 카메라 수에 맞춰 자동
+                'resolution': (1280, 720),
+                'fps': 15,
+                'rtsp_port': 8554,  # 별칭 포트 없이 단일 포트 경로로만 제공
+                'rtsp_path': '/mosaic',
+                'codec': 'jpeg',
+                'enabled': False  # 켜면 시청자가 있는 동안 합성/인코딩 스트림이 하나 더 생김
             }
         }
         
+        # 캡처 기동 설정
+        self.capture = {
+            'startup_timeout': 10,  # 첫 프레임 대기 최대 시간 (초)
+            'bus_stagger': 0.5,     # 같은 USB 버스 카메라 사이 간격 (초)
+            'usb_policy': 'downgrade',  # 'off' | 'downgrade' | 'refuse'
+            'usb_budget_ratio': 0.8,    # 버스 속도 중 카메라에 할당할 비율
+            'sysfs_root': '/sys',
+            'on_demand': True,  # 소비자(RTSP/MJPEG/스냅샷)가 있을 때만 장치를 열기
+            'warmup_budget': 5,  # 온디맨드 시작 시 첫 프레임 대기 최대 시간 (초)
+            'linger': 30  # 마지막 소비자가 떠난 뒤 장치를 유지하는 시간 (초)
+        }
+        
+        # 카메라 워커 프로세스 설정 (켜면 카메라마다 별도 프로세스에서 캡처/오버레이/JPEG 인코딩)
+        self.workers = {
+            'enabled': False,
+            'cameras': [],  # 비우면 모자이크를 뺀 모든 카메라
+            'quality': 80,  # 워커가 인코딩하는 JPEG 품질 (모든 JPEG 소비자가 이 품질을 받음)
+            'slots': 8,  # 공유 메모리 링 슬롯 수
+            'slot_size': 1024 * 1024,  # 슬롯 크기 - 인코딩된 프레임 최대 크기 (바이트)
+            'spawn_grace': 5.0,  # 워커 프로세스 기동(모듈 로드)에 더 주는 시간 (초)
+            'heartbeat_timeout': 5.0,  # 이 시간 동안 응답이 없으면 멈춘 워커로 보고 재시작 (초)
+            'restart_delay': 1.0,  # 연속으로 실패하면 두 배씩 늘어나는 재시작 간격 (초, 최대 60)
+            'supervise_interval': 1.0  # 감독 스레드 점검 주기 (초)
+        }
+        
+        # H.264 인코딩 설정 (카메라 설정의 'h264'로 개별 지정 가능)
+        self.h264 = {
+            'encoder': 'auto',  # 'auto' | 'h264_v4l2m2m' | 'libx264'
+            'bitrate': 2000000,  # 목표 비트레이트 (bps)
+            'gop': 30,  # 키프레임 간격 (프레임)
+            'preset': 'ultrafast',  # libx264 프리셋
+            'linger': 10  # 마지막 시청자가 떠난 뒤 인코더 유지 시간 (초)
+        }
+        
+        # 모션 감지 설정 (켜면 대상 카메라를 계속 구독하므로 온디맨드로 닫히지 않음)
+        self.motion = {
+            'enabled': False,
+            'cameras': [],  # 비우면 모자이크를 뺀 모든 카메라
+            'fps': 5,  # 분석 주기 (캡처 FPS보다 낮게)
+            'size': (160, 120),  # 분석용 그레이스케일 평면 크기
+            'learning_rate': 0.05,  # 배경(이동 평균) 갱신 비율
+            'pixel_threshold': 25,  # 배경과의 밝기 차이가 이보다 크면 움직인 픽셀
+            'score_threshold': 0.01,  # 구역 픽셀 중 움직인 비율이 이 이상이면 모션
+            'min_area': 12,  # 영역으로 보고할 최소 픽셀 수 (분석 평면 기준)
+            'hold': 3.0,  # 마지막 모션 후 이 시간(초)이 지나면 모션 종료
+            'zones': {}  # 카메라 ID -> [[x0, y0, x1, y1], ...] (0~1 비율, 비우면 전체 화면)
+        }
+        
+        # 녹화 설정 (켜면 프리롤을 위해 대상 카메라를 계속 구독)
+        self.recording = {
+            'enabled': False,
+            'mode': 'event',  # 'event': 트리거 구간만, 'continuous': 24시간 연속
+            'path': 'recordings',  # 카메라별 하위 디렉터리에 세그먼트 저장
+            'cameras': [],  # 비우면 모자이크를 뺀 모든 카메라
+            'pre_roll': 5.0,  # 트리거 이전 구간 (초, 메모리에 보관)
+            'post_roll': 5.0,  # 트리거가 끝난 뒤 더 녹화할 시간 (초)
+            'segment_seconds': 60,  # 세그먼트 파일 길이 (초, 시각 경계에 맞춰 교체)
+            'quota_mb': 2048,  # 전체 녹화 용량 - 넘으면 오래된 세그먼트부터 삭제
+            'fps': 10,  # JPEG 녹화 FPS (0이면 모든 프레임, H.264는 인코딩 단계 그대로)
+            'quality': 80,  # JPEG 품질 (스트리밍과 같으면 인코딩 캐시 공유)
+            'write_buffer': 1024 * 1024,  # 세그먼트 파일 쓰기 버퍼 (바이트)
+            'motion_trigger': True  # 모션 감지로 녹화 시작
+        }
+        
+        # 프레임 버스 설정 (켜면 대상 카메라를 계속 구독해 공유 메모리로 내보냄 - frame_bus_client로 읽음)
+        self.frame_bus = {
+            'enabled': False,
+            'cameras': [],  # 비우면 모자이크를 뺀 모든 카메라
+            'prefix': 'rtspcam-bus',  # 공유 메모리 이름 접두사 (/dev/shm/<prefix>-<카메라 ID>)
+            'format': 'auto',  # 'auto': 캡처한 그대로 (디코딩 모드 BGR, 패스스루 JPEG), 'bgr', 'jpeg'
+            'fps': 0,  # 0이면 모든 프레임
+            'quality': 80,  # 'jpeg' 형식의 인코딩 품질 (스트리밍과 같으면 인코딩 캐시 공유)
+            'slots': 4  # 카메라별 링 슬롯 수 (슬롯 크기는 카메라 해상도의 BGR 프레임)
+        }
+        
         # RTSP 서버 설정
         self.rtsp_server = {
             'host': '0.0.0.0',
-            'base_port': 8554,
+            'engine': 'asyncio',  # 'asyncio': 이벤트 루프 하나, 'threaded': 클라이언트당 스레드
+            'base_port': 8554,  # 모든 카메라를 경로로 구분하는 단일 포트
+            'port_aliases': True,  # 카메라별 rtsp_port도 별칭으로 열기
             'max_clients': 10,
             'buffer_size': 1024 * 1024,  # 1MB
-            'timeout': 30
+            'timeout': 30,
+            'mtu': 1400,  # RTP 패킷 최대 크기 (바이트)
+            'udp_port_range': (6970, 6999),  # RTP/RTCP 서버 UDP 포트 범위
+            'rtcp_interval': 5,  # RTCP 송신자 보고 주기 (초)
+            'tcp_queue_frames': 15,  # TCP 클라이언트별 전송 큐 최대 프레임 수
+            'tcp_latency_budget': 0.5  # 이보다 오래된 프레임은 버림 (초)
         }
         
         # 웹 인터페이스 설정
         self.web_interface = {
             'host': '0.0.0.0',
             'port': 8080,
-            'debug': False
+            'engine': 'asyncio',  # 'asyncio': 이벤트 루프 하나 (MJPEG/스냅샷 직접 처리), 'threaded': 요청당 스레드
+            'api_workers': 8,  # asyncio 엔진에서 Flask API를 실행할 스레드 수
+            'mjpeg_quality': 80,
+            'send_timeout': 10,  # MJPEG 시청자가 이 시간 동안 받지 않으면 연결 종료 (초)
+            'keepalive_timeout': 15,  # 다음 요청을 기다리는 시간 (초)
+            'debug': False  # 'threaded' 엔진에서만 디버거 사용
         }
         
         # 로깅 설정
@@ -92,6 +208,12 @@ class Config:
         with open(filename, 'w', encoding='utf-8') as f:
             json.dump({
                 'cameras': self.cameras,
+                'capture': self.capture,
+                'workers': self.workers,
+                'h264': self.h264,
+                'motion': self.motion,
+                'recording': self.recording,
+                'frame_bus': self.frame_bus,
                 'rtsp_server': self.rtsp_server,
                 'web_interface': self.web_interface,
                 'logging': self.logging
@@ -104,6 +226,12 @@ class Config:
             with open(filename, 'r', encoding='utf-8') as f:
                 data = json.load(f)
                 self.cameras = data.get('cameras', self.cameras)
+                self.capture = {**self.capture, **data.get('capture', {})}
+                self.workers = {**self.workers, **data.get('workers', {})}
+                self.h264 = {**self.h264, **data.get('h264', {})}
+                self.motion = {**self.motion, **data.get('motion', {})}
+                self.recording = {**self.recording, **data.get('recording', {})}
+                self.frame_bus = {**self.frame_bus, **data.get('frame_bus', {})}
                 self.rtsp_server = data.get('rtsp_server', self.rtsp_server)
                 self.web_interface = data.get('web_interface', self.web_interface)
                 self.logging = data.get('logging', self.logging)
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+공유 메모리 프레임 버스 - 같은 기기의 다른 프로세스에 카메라 프레임을 인코딩 없이 전달
+
+카메라마다 공유 메모리 링(/dev/shm/<prefix>-<camera_id>)을 만들고, 캡처 링 버퍼에
+들어오는 프레임을 그대로 씁니다. 디코딩 모드 카메라는 BGR 원본을, 패스스루 카메라는
+카메라 JPEG을 복사 한 번으로 내보내므로 분석 프로세스가 MJPEG/RTSP를 받아 다시
+디코딩하거나 장치를 따로 열 필요가 없습니다. 읽는 쪽은 frame_bus_client를 사용합니다.
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, List
+
+from config import config
+from camera_manager import camera_manager, FrameDecimator
+from frame_bus_client import BUS_PREFIX, bus_ring_name
+from shared_ring import FORMAT_BGR, FORMAT_JPEG, SharedFrameRing
+
+BUS_FORMATS = ('auto', 'bgr', 'jpeg')
+
+class CameraPublisher:
+    """카메라 하나의 버스 생산자 ('frame_bus' 소비자로 구독하고 새 프레임마다 링에 기록)"""
+    
+    def __init__(self, camera, ring: SharedFrameRing, settings: Dict):
+        self.camera = camera
+        self.camera_id = camera.camera_id
+        self.ring = ring
+        self.settings = settings
+        self.format = settings.get('format', 'auto')
+        if self.format == 'auto':
+            # 캡처한 형태 그대로 (패스스루/워커 카메라는 JPEG, 디코딩 모드는 BGR)
+            self.format = 'jpeg' if camera.capture_mode == 'passthrough' else 'bgr'
+        self.quality = int(settings.get('quality', 80))
+        self.fps = settings.get('fps') or None
+        self.logger = logging.getLogger(f"FrameBus_{camera.camera_id}")
+        self.running = False
+        self.thread = None
+        
+        # 통계
+        self.published = 0
+        self.oversized = 0
+        self.publish_time = 0.0
+    
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._publish_loop, daemon=True,
+                                       name=f"frame-bus-{self.camera_id}")
+        self.thread.start()
+    
+    def stop(self):
+        self.running = False
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=5)
+        self.thread = None
+    
+    def _publish_loop(self):
+        """카메라를 구독하고 새 프레임을 링에 기록 (켜지 못하면 30초마다 다시 시도)"""
+        subscribed = False
+        next_retry = 0.0
+        last_seq = 0
+        decimator = FrameDecimator(self.fps)
+        try:
+            while self.running:
+                now = time.time()
+                if not subscribed:
+                    if now >= next_retry:
+                        subscribed = self.camera.subscribe('frame_bus')
+                        next_retry = now + 30
+                    if not subscribed:
+                        self.ring.beat(now, 0.0)
+                        time.sleep(1.0)
+                        continue
+                
+                entry = self.camera.wait_frame(last_seq, timeout=1.0)
+                if entry is not None:
+                    last_seq = entry.seq
+                    if decimator.accept(entry.timestamp):
+                        self._publish(entry)
+                self.ring.beat(time.time(), self.camera.fps_counter)
+        except Exception as e:
+            self.logger.error(f"프레임 버스 오류: {e}")
+        finally:
+            if subscribed:
+                self.camera.unsubscribe('frame_bus')
+    
+    def _publish(self, entry):
+        """프레임을 BGR 또는 JPEG으로 링에 기록 (오버레이 없는 원본)"""
+        started = time.perf_counter()
+        if self.format == 'jpeg':
+            data = self.camera.encode_frame(entry, self.quality, overlay=False)
+            if data is None:
+                return
+            width, height = self.camera.effective_config()['resolution']
+            if entry.is_decoded:
+                height, width = entry.frame.shape[:2]
+            fmt, channels = FORMAT_JPEG, 3
+        else:
+            data = entry.frame
+            if data is None:
+                return
+            height, width = data.shape[:2]
+            channels = data.shape[2] if data.ndim == 3 else 1
+            fmt = FORMAT_BGR
+        try:
+            self.ring.write(data, entry.timestamp, width, height, channels, fmt)
+        except ValueError as e:
+            self.oversized += 1
+            if self.oversized == 1 or self.oversized % 100 == 0:
+                self.logger.warning(f"프레임 기록 실패 ({self.oversized}회): {e}")
+            return
+        self.published += 1
+        self.publish_time += time.perf_counter() - started
+    
+    def get_status(self) -> Dict:
+        return {
+            'name': self.ring.name,
+            'format': self.format,
+            'seq': self.ring.head,
+            'published': self.published,
+            'oversized': self.oversized,
+            'avg_publish_ms': round(1000 * self.publish_time / self.published, 3) if self.published else 0.0,
+            'slots': self.ring.slots,
+            'slot_size': self.ring.slot_size
+        }
+
+class FrameBus:
+    """공유 메모리 프레임 버스 관리 (카메라별 CameraPublisher)
+    
+    켜 두는 동안 대상 카메라를 구독하므로 온디맨드로 닫히지 않습니다.
+    """
+    
+    def __init__(self, manager=None):
+        self.manager = manager or camera_manager
+        self.logger = logging.getLogger("FrameBus")
+        self.settings: Dict = {}
+        self.publishers: Dict[str, CameraPublisher] = {}
+        self.running = False
+    
+    def _select_cameras(self) -> List[str]:
+        """버스에 낼 카메라 (설정이 비어 있으면 모자이크를 뺀 모든 카메라)"""
+        cameras = self.manager.cameras
+        selected = self.settings.get('cameras') or list(cameras)
+        return [camera_id for camera_id in selected
+                if camera_id in cameras and cameras[camera_id].config.get('backend') != 'mosaic']
+    
+    def start(self) -> bool:
+        """프레임 버스 시작 (설정에서 꺼져 있으면 False)"""
+        if self.running:
+            return True
+        self.settings = dict(config.frame_bus)
+        if not self.settings.get('enabled', False):
+            self.logger.info("프레임 버스 비활성화됨")
+            return False
+        if self.settings.get('format', 'auto') not in BUS_FORMATS:
+            self.logger.error(f"알 수 없는 프레임 버스 형식: {self.settings.get('format')}")
+            return False
+        
+        prefix = self.settings.get('prefix', BUS_PREFIX)
+        for camera_id in self._select_cameras():
+            camera = self.manager.get_camera(camera_id)
+            # 슬롯은 설정 해상도의 BGR 프레임이 들어가는 크기 (USB 계획은 해상도를 낮추기만 함)
+            width, height = camera.config.get('resolution', (640, 480))
+            try:
+                ring = SharedFrameRing.create(bus_ring_name(camera_id, prefix),
+                                              self.settings.get('slots', 4), width * height * 3)
+            except Exception as e:
+                self.logger.error(f"카메라 {camera_id} 프레임 버스 생성 실패: {e}")
+                continue
+            publisher = CameraPublisher(camera, ring, self.settings)
+            publisher.start()
+            self.publishers[camera_id] = publisher
+        
+        if not self.publishers:
+            self.logger.warning("프레임 버스에 낼 카메라가 없습니다")
+            return False
+        self.running = True
+        self.logger.info(f"프레임 버스 시작: {', '.join(self.publishers)} "
+                         f"({self.settings.get('format', 'auto')}, /dev/shm/{prefix}-<카메라>)")
+        return True
+    
+    def stop(self):
+        """프레임 버스 중지 (공유 메모리 삭제)"""
+        if not self.running:
+            return
+        self.running = False
+        for publisher in self.publishers.values():
+            publisher.stop()
+            publisher.ring.close()
+        self.publishers = {}
+    
+    def get_status(self) -> Dict:
+        """버스 상태"""
+        return {
+            'running': self.running,
+            'format': self.settings.get('format', 'auto'),
+            'cameras': {camera_id: publisher.get_status() for camera_id, publisher in self.publishers.items()}
+        }
+
+# 전역 프레임 버스 인스턴스
+frame_bus = FrameBus()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+프레임 버스 클라이언트 - 같은 기기의 다른 프로세스에서 카메라 프레임을 공유 메모리로 읽기
+
+RTSP 카메라 시스템의 frame_bus(설정 `frame_bus.enabled`)가 카메라마다 공유 메모리 링
+/dev/shm/<prefix>-<camera_id> 에 최신 프레임을 씁니다. 이 모듈은 시스템의 다른 모듈을
+가져오지 않으므로(numpy, shared_ring만 필요, JPEG 디코딩에만 cv2) 분석 프로그램에
+복사해 쓸 수 있습니다.
+
+    from frame_bus_client import FrameBusClient
+    
+    with FrameBusClient('camera1') as client:
+        for frame in client.frames():
+            image = frame.image        # BGR ndarray (JPEG 프레임이면 디코딩)
+            print(frame.seq, frame.timestamp, image.shape)
+
+읽기 프로토콜 (잠금 없음)
+  링 헤더의 head가 마지막으로 완성된 프레임의 시퀀스입니다. 슬롯 head % slots의
+  end == head를 확인하고 데이터를 읽은 뒤 begin == head이면 온전한 프레임입니다.
+  생산자는 읽는 쪽을 기다리지 않으므로 느린 클라이언트는 중간 프레임을 건너뛰고
+  항상 최신 프레임을 받습니다. 배치는 shared_ring 모듈 설명을 참고하세요.
+"""
+
+import os
+import time
+from typing import Iterator, List, Optional
+
+import numpy as np
+
+try:
+    import cv2
+except ImportError:  # JPEG 프레임 디코딩에만 필요
+    cv2 = None
+
+from shared_ring import FORMAT_BGR, FORMAT_JPEG, RingFrame, SharedFrameRing
+
+BUS_PREFIX = 'rtspcam-bus'
+SHM_DIR = '/dev/shm'
+
+def bus_ring_name(camera_id: str, prefix: str = BUS_PREFIX) -> str:
+    """카메라의 버스 공유 메모리 이름"""
+    return f"{prefix}-{camera_id}"
+
+def list_cameras(prefix: str = BUS_PREFIX) -> List[str]:
+    """지금 버스에 프레임을 내는 카메라 ID 목록 (/dev/shm 조회)"""
+    try:
+        names = os.listdir(SHM_DIR)
+    except OSError:
+        return []
+    return sorted(name[len(prefix) + 1:] for name in names if name.startswith(prefix + '-'))
+
+class BusFrame:
+    """버스에서 읽은 프레임 (시퀀스, 캡처 시각, 크기, 형식)
+    
+    copy=False로 읽은 프레임의 data는 공유 메모리를 직접 가리킵니다. 처리한 뒤 valid()가
+    False면 그사이 생산자가 슬롯을 덮어쓴 것이므로 결과를 버리세요.
+    """
+    
+    __slots__ = ('seq', 'timestamp', 'width', 'height', 'channels', 'format', 'data', '_ring', '_frame')
+    
+    def __init__(self, frame: RingFrame, ring: Optional[SharedFrameRing] = None):
+        self.seq = frame.seq
+        self.timestamp = frame.timestamp
+        self.width = frame.width
+        self.height = frame.height
+        self.channels = frame.channels
+        self.format = 'bgr' if frame.format == FORMAT_BGR else 'jpeg'
+        self.data = frame.data
+        self._ring = ring
+        self._frame = frame
+    
+    @property
+    def image(self) -> Optional[np.ndarray]:
+        """BGR 이미지 (BGR 프레임은 data 그대로, JPEG 프레임은 디코딩)"""
+        if self._frame.format == FORMAT_BGR:
+            return self._frame.array()
+        if cv2 is None:
+            raise RuntimeError("JPEG 프레임을 디코딩하려면 OpenCV(cv2)가 필요합니다")
+        return cv2.imdecode(self._frame.array(), cv2.IMREAD_COLOR)
+    
+    @property
+    def jpeg(self) -> Optional[bytes]:
+        """JPEG 프레임이면 bytes, BGR 프레임이면 None"""
+        return bytes(self.data) if self._frame.format == FORMAT_JPEG else None
+    
+    def valid(self) -> bool:
+        """복사하지 않고 읽은 프레임이 아직 덮어써지지 않았는지 (복사본은 항상 True)"""
+        return self._ring is None or self._ring.valid(self._frame)
+
+class FrameBusClient:
+    """카메라 하나의 프레임 버스 클라이언트
+    
+    next()는 head를 poll_interval마다 확인하며 새 프레임을 기다립니다. 생산자가
+    stale_after초 넘게 멈춰 있으면(시스템 재시작 등) 같은 이름으로 다시 연결합니다.
+    """
+    
+    def __init__(self, camera_id: str, prefix: str = BUS_PREFIX, poll_interval: float = 0.002,
+                 stale_after: float = 3.0):
+        self.camera_id = camera_id
+        self.name = bus_ring_name(camera_id, prefix)
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self.ring: Optional[SharedFrameRing] = None
+        self.last_seq = 0
+        self.reattaches = 0
+        self._next_reattach = 0.0
+        self.attach()
+    
+    def attach(self):
+        """공유 메모리에 연결 (버스가 없으면 FileNotFoundError)"""
+        ring = SharedFrameRing.attach(self.name, track=False)
+        if self.ring is not None:
+            self.ring.close()
+        self.ring = ring
+        self.last_seq = 0
+    
+    @property
+    def alive(self) -> bool:
+        """생산자가 최근 stale_after초 안에 살아 있었는지"""
+        return self.ring is not None and time.time() - self.ring.heartbeat < self.stale_after
+    
+    @property
+    def fps(self) -> float:
+        """생산자가 보고한 카메라 FPS"""
+        return self.ring.fps if self.ring is not None else 0.0
+    
+    def latest(self, copy: bool = True) -> Optional[BusFrame]:
+        """가장 최근 프레임 (이미 읽은 프레임이어도 반환, 아직 없으면 None)"""
+        frame = self.ring.read(0, copy)
+        if frame is None:
+            return None
+        self.last_seq = frame.seq
+        return BusFrame(frame, None if copy else self.ring)
+    
+    def next(self, timeout: Optional[float] = 1.0, copy: bool = True) -> Optional[BusFrame]:
+        """마지막으로 읽은 것보다 새 프레임을 기다려 반환 (timeout 초과 시 None)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            frame = self.ring.read(self.last_seq, copy)
+            if frame is not None:
+                self.last_seq = frame.seq
+                return BusFrame(frame, None if copy else self.ring)
+            if not self.alive and time.monotonic() >= self._next_reattach:
+                self._next_reattach = time.monotonic() + 1.0
+                self._reattach()
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            time.sleep(self.poll_interval)
+    
+    def frames(self, timeout: Optional[float] = None, copy: bool = True) -> Iterator[BusFrame]:
+        """새 프레임을 차례로 반환 (timeout 동안 프레임이 없으면 끝)"""
+        while True:
+            frame = self.next(timeout, copy)
+            if frame is None:
+                return
+            yield frame
+    
+    def _reattach(self):
+        """생산자가 멈췄으면 같은 이름의 공유 메모리에 다시 연결 (시스템이 링을 새로 만들었을 수 있음)"""
+        try:
+            ring = SharedFrameRing.attach(self.name, track=False)
+        except (FileNotFoundError, ValueError):
+            return
+        if ring.heartbeat > self.ring.heartbeat:
+            self.ring.close()
+            self.ring = ring
+            self.last_seq = 0
+            self.reattaches += 1
+        else:
+            ring.close()
+    
+    def close(self):
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+    
+    def __enter__(self) -> 'FrameBusClient':
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+프레임 정보 오버레이 (시각 / FPS / 카메라 이름)
+
+텍스트 한 줄마다 알파 마스크(스프라이트)를 미리 렌더링해 두고 텍스트가 바뀔 때만
+다시 그립니다. 프레임에는 스프라이트 크기의 ROI만 알파 블렌딩하므로 프레임마다
+cv2.putText로 글꼴을 래스터화하는 것보다 훨씬 적게 듭니다.
+"""
+
+import threading
+import time
+import cv2
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+class TextSprite:
+    """한 줄 텍스트의 미리 렌더링한 알파 마스크 (텍스트가 바뀔 때만 다시 렌더링)"""
+    
+    def __init__(self, color: Tuple[int, int, int] = (0, 255, 0), scale: float = 0.7, thickness: int = 2):
+        self.color = color
+        self.scale = scale
+        self.thickness = thickness
+        self.text: Optional[str] = None
+        self.ascent = 0
+        self.renders = 0
+        # 블렌딩용: 1 - alpha (3채널) 와 미리 곱한 색 (color * alpha)
+        self._inverse: Optional[np.ndarray] = None
+        self._color_term: Optional[np.ndarray] = None
+        # roi * (1 - alpha) 중간 결과용 (FrameOverlay의 잠금 안에서만 씀)
+        self._scratch: Optional[np.ndarray] = None
+    
+    def set_text(self, text: str) -> bool:
+        """텍스트 지정 (바뀌었으면 다시 렌더링하고 True)"""
+        if text == self.text:
+            return False
+        (width, height), baseline = cv2.getTextSize(text, FONT, self.scale, self.thickness)
+        pad = self.thickness
+        mask = np.zeros((height + baseline + 2 * pad, width + 2 * pad), np.uint8)
+        cv2.putText(mask, text, (pad, pad + height), FONT, self.scale, 255, self.thickness, cv2.LINE_AA)
+        
+        alpha = cv2.merge([mask, mask, mask])
+        color = np.empty_like(alpha)
+        color[:] = self.color
+        self._inverse = 255 - alpha
+        self._color_term = cv2.multiply(color, alpha, scale=1 / 255)
+        self._scratch = np.empty_like(alpha)
+        self.ascent = pad + height
+        self.text = text
+        self.renders += 1
+        return True
+    
+    def draw(self, frame: np.ndarray, x: int, baseline: int):
+        """frame의 (x, baseline) 위치에 블렌딩 (프레임 밖으로 나가는 부분은 잘라냄)"""
+        if self._inverse is None:
+            return
+        y = baseline - self.ascent
+        height, width = self._inverse.shape[:2]
+        top, left = max(0, -y), max(0, -x)
+        bottom = min(height, frame.shape[0] - y)
+        right = min(width, frame.shape[1] - x)
+        if bottom <= top or right <= left:
+            return
+        roi = frame[y + top:y + bottom, x + left:x + right]
+        inverse = self._inverse[top:bottom, left:right]
+        color_term = self._color_term[top:bottom, left:right]
+        scratch = self._scratch[top:bottom, left:right]
+        # roi = roi * (1 - alpha) + color * alpha
+        cv2.multiply(roi, inverse, dst=scratch, scale=1 / 255)
+        cv2.add(scratch, color_term, dst=roi)
+
+class FrameOverlay:
+    """카메라 정보 오버레이 (캡처 시각 / FPS / 이름) - 줄마다 TextSprite 하나"""
+    
+    def __init__(self, name: str, origin: Tuple[int, int] = (10, 30), line_height: int = 30,
+                 color: Tuple[int, int, int] = (0, 255, 0)):
+        self.name = name
+        self.origin = origin
+        self.line_height = line_height
+        self.lines: List[TextSprite] = [TextSprite(color) for _ in range(3)]
+        self.frames = 0
+        self._second: Optional[int] = None
+        # 여러 소비자 스레드가 서로 다른 프레임에 동시에 그릴 수 있음
+        self._lock = threading.Lock()
+    
+    def apply(self, frame: np.ndarray, timestamp: float, fps: int) -> np.ndarray:
+        """frame에 오버레이를 그려 반환 (제자리 수정 - 깨끗한 원본이 필요하면 복사본을 넘길 것)"""
+        with self._lock:
+            second = int(timestamp)
+            if second != self._second:
+                # 시각 문자열은 초가 바뀔 때만 만듦
+                self._second = second
+                self.lines[0].set_text(time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(second)))
+            self.lines[1].set_text(f"FPS: {fps}")
+            self.lines[2].set_text(self.name)
+            
+            x, baseline = self.origin
+            for sprite in self.lines:
+                sprite.draw(frame, x, baseline)
+                baseline += self.line_height
+            self.frames += 1
+        return frame
+    
+    def get_stats(self) -> Dict:
+        return {
+            'frames': self.frames,
+            'renders': sum(sprite.renders for sprite in self.lines)
+        }
@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import base64
+import logging
+import threading
+import time
+from collections import deque
+from fractions import Fraction
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+try:
+    import av
+except ImportError:  # PyAV가 없으면 H.264 스트림은 JPEG로 대체
+    av = None
+
+# H.264 NAL 유닛 타입
+NAL_IDR = 5
+NAL_SPS = 7
+NAL_PPS = 8
+NAL_AUD = 9
+
+# 시도 순서: V4L2 M2M 하드웨어 인코더(라즈베리파이) -> libx264 소프트웨어 인코더
+ENCODER_CANDIDATES = ('h264_v4l2m2m', 'libx264')
+
+def is_available() -> bool:
+    """H.264 인코딩 가능 여부 (PyAV 설치 여부)"""
+    return av is not None
+
+def split_annexb(data: bytes) -> List[bytes]:
+    """Annex B 바이트 스트림(00 00 01 / 00 00 00 01 시작 코드)을 NAL 유닛 목록으로 분리"""
+    nals = []
+    i = data.find(b'\x00\x00\x01')
+    while i >= 0:
+        start = i + 3
+        j = data.find(b'\x00\x00\x01', start)
+        end = len(data) if j < 0 else j
+        # 4바이트 시작 코드의 앞 0과 trailing_zero 바이트 제거
+        while end > start and data[end - 1] == 0:
+            end -= 1
+        if end > start:
+            nals.append(data[start:end])
+        i = j
+    return nals
+
+def split_avcc(extradata: bytes) -> List[bytes]:
+    """avcC 형식 extradata에서 SPS/PPS 추출"""
+    nals = []
+    try:
+        i = 5
+        for count_mask in (0x1F, 0xFF):
+            count = extradata[i] & count_mask
+            i += 1
+            for _ in range(count):
+                length = (extradata[i] << 8) | extradata[i + 1]
+                nals.append(extradata[i + 2:i + 2 + length])
+                i += 2 + length
+    except IndexError:
+        pass
+    return nals
+
+class H264AccessUnit:
+    """인코딩된 프레임 하나 (NAL 유닛 목록, 키프레임이면 SPS/PPS 포함)"""
+    
+    __slots__ = ('seq', 'timestamp', 'nals', 'keyframe')
+    
+    def __init__(self, seq: int, timestamp: float, nals: List[bytes], keyframe: bool):
+        self.seq = seq
+        self.timestamp = timestamp
+        self.nals = nals
+        self.keyframe = keyframe
+    
+    @property
+    def size(self) -> int:
+        return sum(len(nal) for nal in self.nals)
+
+class H264Encoder:
+    """PyAV H.264 인코더 래퍼 (사용 가능한 첫 번째 인코더 선택)"""
+    
+    def __init__(self, width: int, height: int, fps: int, bitrate: int = 2000000, gop: int = 30,
+                 encoder: str = 'auto', preset: str = 'ultrafast'):
+        self.width = width - width % 2
+        self.height = height - height % 2
+        self.fps = max(1, int(fps))
+        self.bitrate = bitrate
+        self.gop = gop
+        self.encoder = encoder
+        self.preset = preset
+        self.codec_name: Optional[str] = None
+        self.context = None
+        self.sps: Optional[bytes] = None
+        self.pps: Optional[bytes] = None
+        self.frame_index = 0
+        self._timestamps: Dict[int, float] = {}
+        self.logger = logging.getLogger("H264Encoder")
+    
+    def open(self) -> bool:
+        """인코더 열기 (B 프레임 없음, 저지연 설정)"""
+        if av is None:
+            self.logger.error("PyAV가 설치되어 있지 않습니다 (pip install av)")
+            return False
+        
+        candidates = ENCODER_CANDIDATES if self.encoder == 'auto' else (self.encoder,)
+        for name in candidates:
+            try:
+                context = av.CodecContext.create(name, 'w')
+                context.width = self.width
+                context.height = self.height
+                context.pix_fmt = 'yuv420p'
+                context.time_base = Fraction(1, self.fps)
+                context.framerate = Fraction(self.fps, 1)
+                context.bit_rate = self.bitrate
+                context.gop_size = self.gop
+                context.max_b_frames = 0
+                if name == 'libx264':
+                    context.options = {'preset': self.preset, 'tune': 'zerolatency'}
+                try:
+                    # SPS/PPS를 extradata로 받아 SDP sprop-parameter-sets에 사용
+                    context.flags |= av.codec.context.Flags.global_header
+                except (AttributeError, TypeError):
+                    pass
+                context.open()
+            except Exception as e:
+                self.logger.info(f"{name} 인코더 사용 불가: {e}")
+                continue
+            
+            self.context = context
+            self.codec_name = name
+            extradata = bytes(context.extradata or b'')
+            nals = split_avcc(extradata) if extradata[:1] == b'\x01' else split_annexb(extradata)
+            self._remember_parameter_sets(nals)
+            self.logger.info(f"H.264 인코더 {name} 열림 ({self.width}x{self.height}, "
+                             f"{self.bitrate // 1000}kbps, GOP {self.gop})")
+            return True
+        return False
+    
+    def _remember_parameter_sets(self, nals: List[bytes]):
+        for nal in nals:
+            nal_type = nal[0] & 0x1F
+            if nal_type == NAL_SPS:
+                self.sps = nal
+            elif nal_type == NAL_PPS:
+                self.pps = nal
+    
+    def encode(self, frame: np.ndarray, timestamp: float,
+               force_keyframe: bool = False) -> List[Tuple[List[bytes], bool, float]]:
+        """BGR 프레임 인코딩 -> (NAL 목록, 키프레임 여부, 캡처 시각) 목록
+        
+        하드웨어 인코더는 출력이 한두 프레임 늦을 수 있어 0개 이상을 반환합니다.
+        """
+        video = av.VideoFrame.from_ndarray(frame, format='bgr24')
+        video.pts = self.frame_index
+        if force_keyframe:
+            video.pict_type = av.video.frame.PictureType.I
+        self._timestamps[self.frame_index] = timestamp
+        self.frame_index += 1
+        
+        units = []
+        for packet in self.context.encode(video):
+            nals = [nal for nal in split_annexb(bytes(packet)) if nal[0] & 0x1F != NAL_AUD]
+            if not nals:
+                continue
+            self._remember_parameter_sets(nals)
+            types = {nal[0] & 0x1F for nal in nals}
+            keyframe = bool(packet.is_keyframe) or NAL_IDR in types
+            if keyframe and NAL_SPS not in types and self.sps and self.pps:
+                # 중간에 들어온 수신자도 디코딩을 시작할 수 있도록 키프레임마다 SPS/PPS 포함
+                nals = [self.sps, self.pps] + nals
+            units.append((nals, keyframe, self._timestamps.pop(packet.pts, timestamp)))
+        
+        if len(self._timestamps) > 2 * self.gop:
+            self._timestamps.clear()
+        return units
+    
+    @property
+    def sprop_parameter_sets(self) -> Optional[str]:
+        """SDP sprop-parameter-sets 값 (base64 SPS,PPS)"""
+        if not self.sps or not self.pps:
+            return None
+        return f"{base64.b64encode(self.sps).decode()},{base64.b64encode(self.pps).decode()}"
+    
+    @property
+    def profile_level_id(self) -> Optional[str]:
+        return self.sps[1:4].hex().upper() if self.sps and len(self.sps) >= 4 else None
+    
+    def close(self):
+        self.context = None
+
+class H264EncodeStage:
+    """카메라 하나의 H.264 인코딩 단계 (시청자 수와 무관하게 카메라당 한 번 인코딩)
+    
+    구독자가 있는 동안 카메라 링 버퍼의 프레임을 순서대로 인코딩해 접근 단위(AU)
+    버퍼에 넣고, 소비자들은 wait_next()로 순서대로 읽습니다. 마지막 구독자가 떠난 뒤
+    linger 초가 지나면 인코더를 닫습니다. size/fps를 주면 축소/솎아낸 변형을,
+    overlay로 정보 오버레이 여부(None이면 카메라 기본값)를 정해 인코딩합니다.
+    """
+    
+    def __init__(self, camera, settings: Dict, size: Optional[Tuple[Optional[int], Optional[int]]] = None,
+                 fps: Optional[float] = None, overlay: Optional[bool] = None):
+        self.camera = camera
+        self.settings = settings
+        self.size = size
+        self.fps = fps
+        self.overlay = overlay
+        self.logger = logging.getLogger(f"H264_{camera.camera_id}")
+        self.encoder: Optional[H264Encoder] = None
+        self.subscribers = 0
+        self.running = False
+        self.thread = None
+        self.last_release = 0.0
+        self._lock = threading.Lock()
+        self._cond = threading.Condition()
+        self._units = deque(maxlen=max(30, int(settings.get('gop', 30))))
+        self._seq = 0
+        self._keyframe_requested = False
+        
+        # 마지막으로 알려진 (profile-level-id, sprop-parameter-sets) - 인코더가 닫혀도 유지
+        self.parameter_sets: Optional[Tuple[str, str]] = None
+        
+        # 통계
+        self.encoded_frames = 0
+        self.encoded_bytes = 0
+        self.encode_time = 0.0
+        self.errors = 0
+    
+    def subscribe(self) -> bool:
+        """소비자 등록 (인코딩 스레드가 없으면 시작)"""
+        if av is None:
+            return False
+        with self._lock:
+            self.subscribers += 1
+            if not self.running:
+                self.running = True
+                self.thread = threading.Thread(target=self._encode_loop, daemon=True)
+                self.thread.start()
+        return True
+    
+    def unsubscribe(self):
+        with self._lock:
+            self.subscribers = max(0, self.subscribers - 1)
+            self.last_release = time.time()
+    
+    def request_keyframe(self):
+        """다음 프레임을 키프레임(IDR)으로 인코딩 (새 수신자 / 손실 복구)"""
+        self._keyframe_requested = True
+    
+    def stop(self):
+        """구독자와 무관하게 인코딩 중지"""
+        with self._lock:
+            self.subscribers = 0
+            self.last_release = 0.0
+        with self._cond:
+            self._cond.notify_all()
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=2)
+    
+    def wait_parameter_sets(self, timeout: float = 3.0) -> Optional[Tuple[str, str]]:
+        """SDP용 (profile-level-id, sprop-parameter-sets) - 아직 모르면 최대 timeout초 대기"""
+        deadline = time.time() + timeout
+        with self._cond:
+            while self.parameter_sets is None:
+                remaining = deadline - time.time()
+                if remaining <= 0 or not self.running:
+                    break
+                self._cond.wait(remaining)
+            return self.parameter_sets
+    
+    def wait_next(self, after_seq: int, timeout: Optional[float] = None) -> Optional[H264AccessUnit]:
+        """after_seq 다음 AU 반환 (이미 밀려났으면 남아 있는 가장 오래된 AU - seq 간격으로 손실 확인)"""
+        with self._cond:
+            self._cond.wait_for(lambda: not self.running or
+                                (self._units and self._units[-1].seq > after_seq), timeout)
+            for unit in self._units:
+                if unit.seq > after_seq:
+                    return unit
+            return None
+    
+    def _encode_loop(self):
+        """카메라 프레임을 순서대로 인코딩"""
+        from camera_manager import FrameDecimator  # camera_manager가 이 모듈을 가져오므로 여기서
+        last_seq = 0
+        decimator = FrameDecimator(self.fps)
+        linger = self.settings.get('linger', 10)
+        # 인코딩하는 동안 카메라 캡처 유지 (온디맨드 카메라면 여기서 장치가 열림)
+        if not self.camera.subscribe('h264'):
+            self.logger.error("카메라를 시작할 수 없어 H.264 인코딩을 중단합니다")
+            with self._lock:
+                self.running = False
+            with self._cond:
+                self._cond.notify_all()
+            return
+        try:
+            while True:
+                with self._lock:
+                    if self.subscribers == 0 and time.time() - self.last_release > linger:
+                        self.running = False
+                        break
+                
+                entry = self.camera.wait_frame(last_seq, timeout=1.0)
+                if entry is None:
+                    continue
+                last_seq = entry.seq
+                if not decimator.accept(entry.timestamp):
+                    continue
+                frame = self.camera.scale_frame(entry, self.size, self.overlay)
+                if frame is None:
+                    continue
+                
+                if self.encoder is None:
+                    height, width = frame.shape[:2]
+                    encoder = H264Encoder(width, height, self.fps or self.camera.config.get('fps', 30),
+                                          self.settings.get('bitrate', 2000000),
+                                          self.settings.get('gop', 30),
+                                          self.settings.get('encoder', 'auto'),
+                                          self.settings.get('preset', 'ultrafast'))
+                    if not encoder.open():
+                        self.logger.error("사용 가능한 H.264 인코더가 없습니다")
+                        break
+                    with self._cond:
+                        self.encoder = encoder
+                        if encoder.sprop_parameter_sets:
+                            self.parameter_sets = (encoder.profile_level_id, encoder.sprop_parameter_sets)
+                        self._cond.notify_all()
+                
+                force_keyframe = self._keyframe_requested
+                self._keyframe_requested = False
+                started = time.perf_counter()
+                try:
+                    units = self.encoder.encode(frame, entry.timestamp, force_keyframe)
+                except Exception as e:
+                    self.errors += 1
+                    self.logger.error(f"H.264 인코딩 오류: {e}")
+                    continue
+                elapsed = time.perf_counter() - started
+                self.encode_time += elapsed
+                self.camera.latency.record('h264', elapsed)
+                
+                with self._cond:
+                    if self.parameter_sets is None and self.encoder.sprop_parameter_sets:
+                        # extradata가 없는 인코더는 첫 키프레임의 SPS/PPS로 확인
+                        self.parameter_sets = (self.encoder.profile_level_id,
+                                               self.encoder.sprop_parameter_sets)
+                    for nals, keyframe, timestamp in units:
+                        self._seq += 1
+                        unit = H264AccessUnit(self._seq, timestamp, nals, keyframe)
+                        self._units.append(unit)
+                        self.encoded_frames += 1
+                        self.encoded_bytes += unit.size
+                    self._cond.notify_all()
+        
+        except Exception as e:
+            self.logger.error(f"H.264 인코딩 루프 오류: {e}")
+        finally:
+            self.camera.unsubscribe('h264')
+            with self._lock:
+                self.running = False
+            with self._cond:
+                if self.encoder is not None:
+                    self.encoder.close()
+                    self.encoder = None
+                self._units.clear()
+                self._cond.notify_all()
+    
+    def get_stats(self) -> Dict:
+        encoder = self.encoder
+        frames = self.encoded_frames
+        return {
+            'running': self.running,
+            'encoder': encoder.codec_name if encoder else None,
+            'subscribers': self.subscribers,
+            'size': [encoder.width, encoder.height] if encoder else None,
+            'bitrate': self.settings.get('bitrate', 2000000),
+            'gop': self.settings.get('gop', 30),
+            'encoded_frames': frames,
+            'avg_frame_bytes': self.encoded_bytes // frames if frames else 0,
+            'avg_encode_ms': round(1000 * self.encode_time / frames, 2) if frames else 0.0,
+            'errors': self.errors
+        }
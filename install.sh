@@ -160,6 +160,18 @@ if [ ! -f config.json ]; then
       "rtsp_port": 8557,
       "rtsp_path": "/camera4",
       "enabled": true
+    },
+    "mosaic": {
+      "name": "모자이크",
+      "device": "mosaic",
+      "backend": "mosaic",
+      "sources": ["camera1", "camera2", "camera3", "camera4"],
+      "layout": [2, 2],
+      "resolution": [1280, 720],
+      "fps": 15,
+      "rtsp_port": 8554,
+      "rtsp_path": "/mosaic",
+      "enabled": false
     }
   },
   "rtsp_server": {
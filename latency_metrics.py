@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+지연 시간 히스토그램 - 캡처부터 소켓 전송까지 파이프라인 단계별 지연 집계
+
+값마다 리스트에 쌓아 두고 정렬하는 대신, 미리 정한 로그 간격 버킷(10µs ~ 100초,
+10배마다 10칸)의 개수만 셉니다. 기록은 이진 탐색 한 번과 정수 증가뿐이라 프레임마다
+불러도 부담이 없고, 메모리는 샘플 수와 무관하게 일정합니다. p50/p95/p99는 버킷 안에서
+선형 보간한 근사값입니다 (버킷 폭 약 26%).
+"""
+
+import threading
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence, Tuple
+
+BUCKETS_PER_DECADE = 10
+# 버킷 상한 (초) - 값 x는 BUCKET_BOUNDS[i-1] < x <= BUCKET_BOUNDS[i]인 칸에 들어감 (마지막 칸은 상한 초과)
+BUCKET_BOUNDS: Tuple[float, ...] = tuple(10 ** (exponent / BUCKETS_PER_DECADE) for exponent in range(-50, 21))
+
+# Prometheus 출력에 쓰는 버킷 (1 / 2.5 / 5 단위 - 누적 개수라 일부만 골라도 정확함)
+EXPORT_BOUNDS: Tuple[int, ...] = tuple(index for index in range(len(BUCKET_BOUNDS))
+                                       if index % BUCKETS_PER_DECADE in (0, 4, 7))
+
+# 카메라별 파이프라인 단계
+#   read      - 드라이버(또는 워커 프로세스)의 캡처 시각 -> read() 반환
+#   overlay   - 정보 오버레이 그리기 (프레임/변형당 한 번)
+#   encode    - JPEG 인코딩 (캐시 미스만)
+#   h264      - H.264 인코딩 (변형별 인코딩 단계)
+#   packetize - RTP 패킷화 (RTSP 클라이언트별)
+#   send      - 캡처 시각 -> 소켓에 넘긴 시각 (모든 RTSP/MJPEG 시청자)
+PIPELINE_STAGES = ('read', 'overlay', 'encode', 'h264', 'packetize', 'send')
+
+class LatencyHistogram:
+    """고정 버킷 지연 히스토그램 (여러 스레드에서 record() 가능)"""
+    
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+    
+    def record(self, seconds: float):
+        seconds = max(0.0, seconds)
+        index = bisect_left(BUCKET_BOUNDS, seconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+    
+    def snapshot(self) -> Tuple[List[int], int, float, float]:
+        """(버킷별 개수, 전체 개수, 합계, 최대값) 복사본"""
+        with self._lock:
+            return list(self.counts), self.count, self.total, self.max
+    
+    def percentiles(self, quantiles: Sequence[float] = (50, 95, 99)) -> List[float]:
+        """백분위수 근사값 (초, 기록이 없으면 0)"""
+        counts, count, _, maximum = self.snapshot()
+        return [_percentile(counts, count, maximum, quantile) for quantile in quantiles]
+    
+    def percentile(self, quantile: float) -> float:
+        return self.percentiles((quantile,))[0]
+    
+    def to_dict(self) -> Dict:
+        counts, count, total, maximum = self.snapshot()
+        p50, p95, p99 = (_percentile(counts, count, maximum, quantile) for quantile in (50, 95, 99))
+        return {
+            'count': count,
+            'avg_ms': round(1000 * total / count, 3) if count else 0.0,
+            'p50_ms': round(1000 * p50, 3),
+            'p95_ms': round(1000 * p95, 3),
+            'p99_ms': round(1000 * p99, 3),
+            'max_ms': round(1000 * maximum, 3)
+        }
+
+def _percentile(counts: List[int], count: int, maximum: float, quantile: float) -> float:
+    """버킷 개수에서 백분위수 계산 (해당 버킷 안에서 선형 보간, 최대값을 넘지 않음)"""
+    if count == 0:
+        return 0.0
+    rank = count * quantile / 100
+    cumulative = 0
+    for index, bucket in enumerate(counts):
+        if bucket and cumulative + bucket >= rank:
+            lower = BUCKET_BOUNDS[index - 1] if index > 0 else 0.0
+            upper = BUCKET_BOUNDS[index] if index < len(BUCKET_BOUNDS) else maximum
+            return min(maximum, lower + (upper - lower) * (rank - cumulative) / bucket)
+        cumulative += bucket
+    return maximum
+
+class PipelineLatency:
+    """카메라 하나의 단계별 지연 히스토그램 (PIPELINE_STAGES)"""
+    
+    def __init__(self):
+        self.stages: Dict[str, LatencyHistogram] = {stage: LatencyHistogram() for stage in PIPELINE_STAGES}
+    
+    def record(self, stage: str, seconds: float):
+        self.stages[stage].record(seconds)
+    
+    def to_dict(self) -> Dict:
+        return {stage: histogram.to_dict() for stage, histogram in self.stages.items()}
+
+def _escape_label(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(labels: Dict, le: Optional[str] = None) -> str:
+    pairs = [f'{key}="{_escape_label(value)}"' for key, value in labels.items()]
+    if le is not None:
+        pairs.append(f'le="{le}"')
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def render_prometheus(name: str, description: str,
+                      series: List[Tuple[Dict, LatencyHistogram]]) -> List[str]:
+    """Prometheus 텍스트 형식의 histogram 한 종류 (라벨별 _bucket/_sum/_count 줄)"""
+    lines = [f"# HELP {name} {description}", f"# TYPE {name} histogram"]
+    for labels, histogram in series:
+        counts, count, total, _ = histogram.snapshot()
+        cumulative = 0
+        exported = iter(EXPORT_BOUNDS)
+        target = next(exported, None)
+        for index, bucket in enumerate(counts[:-1]):
+            cumulative += bucket
+            if index == target:
+                lines.append(f"{name}_bucket{_labels(labels, f'{BUCKET_BOUNDS[index]:.6g}')} {cumulative}")
+                target = next(exported, None)
+        lines.append(f"{name}_bucket{_labels(labels, '+Inf')} {count}")
+        lines.append(f"{name}_sum{_labels(labels)} {total:.6f}")
+        lines.append(f"{name}_count{_labels(labels)} {count}")
+    return lines
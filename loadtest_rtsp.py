@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+RTSP 서버 부하 테스트 - 시청자 수에 따른 서버 CPU 사용량 비교
+
+서버는 별도 프로세스에서 가짜 카메라(테스트 패턴)로 실행하고, 이 프로세스의
+클라이언트들이 TCP 인터리브로 재생하며 받은 프레임 수를 셉니다.
+
+    python3 loadtest_rtsp.py --engine both --clients 1,5,10,20 --duration 10
+"""
+
+import argparse
+import multiprocessing
+import os
+import socket
+import struct
+import sys
+import threading
+import time
+
+def run_server(engine: str, port: int, camera: dict, conn):
+    """(서버 프로세스) 가짜 카메라와 RTSP 서버를 띄우고 측정 요청에 응답"""
+    from config import config
+    config.cameras = {'camera1': camera}
+    config.rtsp_server.update({'engine': engine, 'base_port': port, 'port_aliases': False,
+                               'max_clients': 128})
+
+    from camera_manager import camera_manager
+    from rtsp_server import RTSPServer, AsyncRTSPServer
+
+    camera_manager.start_all()
+    server = AsyncRTSPServer() if engine == 'asyncio' else RTSPServer()
+    conn.send(server.start())
+
+    while True:
+        command = conn.recv()
+        if command == 'sample':
+            times = os.times()
+            conn.send((time.time(), times.user + times.system, threading.active_count()))
+        else:
+            break
+
+    server.stop()
+    camera_manager.stop_all()
+    conn.send('stopped')
+
+class LoadClient(threading.Thread):
+    """RTSP 재생 클라이언트 (TCP 인터리브, 수신 프레임 수 집계)"""
+
+    def __init__(self, port: int):
+        super().__init__(daemon=True)
+        self.port = port
+        self.frames = 0
+        self.running = True
+        self.error = None
+
+    def _request(self, sock: socket.socket, method: str, uri: str, cseq: int, headers: str = '') -> str:
+        sock.sendall(f"{method} {uri} RTSP/1.0\r\nCSeq: {cseq}\r\n{headers}\r\n".encode())
+        response = b''
+        while b'\r\n\r\n' not in response:
+            data = sock.recv(4096)
+            if not data:
+                raise ConnectionError("연결 종료")
+            response += data
+        head, _, body = response.partition(b'\r\n\r\n')
+        text = head.decode()
+        for line in text.split('\r\n'):
+            if line.lower().startswith('content-length:'):
+                length = int(line.split(':', 1)[1])
+                while len(body) < length:
+                    body += sock.recv(4096)
+        return text
+
+    def run(self):
+        uri = f"rtsp://127.0.0.1:{self.port}/camera1"
+        try:
+            sock = socket.create_connection(('127.0.0.1', self.port), timeout=5)
+            self._request(sock, 'DESCRIBE', uri, 1, 'Accept: application/sdp\r\n')
+            setup = self._request(sock, 'SETUP', uri + '/trackID=0', 2,
+                                  'Transport: RTP/AVP/TCP;unicast;interleaved=0-1\r\n')
+            session = [line.split(':', 1)[1].split(';')[0].strip()
+                       for line in setup.split('\r\n') if line.lower().startswith('session:')][0]
+            self._request(sock, 'PLAY', uri, 3, f'Session: {session}\r\n')
+
+            buffer = b''
+            while self.running:
+                data = sock.recv(65536)
+                if not data:
+                    break
+                buffer += data
+                while len(buffer) >= 4 and buffer[0:1] == b'$':
+                    channel, length = struct.unpack('!BH', buffer[1:4])
+                    if len(buffer) < 4 + length:
+                        break
+                    # 마커 비트가 켜진 RTP 패킷 = 프레임의 마지막 조각
+                    if channel == 0 and buffer[5] & 0x80:
+                        self.frames += 1
+                    buffer = buffer[4 + length:]
+                if buffer and buffer[0:1] != b'$':
+                    # 인터리브 사이의 RTSP 응답 등은 버림
+                    buffer = buffer[buffer.find(b'$'):] if b'$' in buffer else b''
+            sock.close()
+        except Exception as e:
+            self.error = e
+
+def measure(engine: str, port: int, camera: dict, client_counts: list, duration: float) -> list:
+    """엔진 하나에 대해 시청자 수별 (CPU%, 스레드 수, 클라이언트당 FPS) 측정"""
+    parent, child = multiprocessing.Pipe()
+    process = multiprocessing.Process(target=run_server, args=(engine, port, camera, child))
+    process.start()
+    results = []
+    try:
+        if not parent.poll(30) or not parent.recv():
+            print(f"❌ {engine} 서버 시작 실패")
+            return results
+
+        clients = []
+        for count in client_counts:
+            while len(clients) < count:
+                client = LoadClient(port)
+                client.start()
+                clients.append(client)
+            time.sleep(2.0)  # 워밍업
+
+            start_frames = [client.frames for client in clients]
+            parent.send('sample')
+            wall_start, cpu_start, _ = parent.recv()
+            time.sleep(duration)
+            parent.send('sample')
+            wall_end, cpu_end, thread_count = parent.recv()
+
+            elapsed = wall_end - wall_start
+            fps = [(client.frames - frames) / elapsed for client, frames in zip(clients, start_frames)]
+            errors = sum(1 for client in clients if client.error is not None)
+            results.append({
+                'clients': count,
+                'cpu_percent': 100.0 * (cpu_end - cpu_start) / elapsed,
+                'threads': thread_count,
+                'fps_avg': sum(fps) / len(fps),
+                'fps_min': min(fps),
+                'errors': errors
+            })
+
+        for client in clients:
+            client.running = False
+    finally:
+        parent.send('stop')
+        parent.poll(10)
+        process.join(timeout=10)
+        if process.is_alive():
+            process.terminate()
+    return results
+
+def main():
+    """메인 함수"""
+    parser = argparse.ArgumentParser(description='RTSP 서버 부하 테스트 (threaded vs asyncio)')
+    parser.add_argument('--engine', choices=['threaded', 'asyncio', 'both'], default='both')
+    parser.add_argument('--clients', default='1,5,10,20', help='시청자 수 목록 (쉼표 구분)')
+    parser.add_argument('--duration', type=float, default=10.0, help='단계별 측정 시간 (초)')
+    parser.add_argument('--port', type=int, default=18554)
+    parser.add_argument('--resolution', default='640x480')
+    parser.add_argument('--fps', type=int, default=30)
+    args = parser.parse_args()
+
+    width, height = (int(value) for value in args.resolution.split('x'))
+    camera = {
+        'name': 'Load Test Pattern',
+        'device': 'pattern',
+        'backend': 'fake',
+        'resolution': (width, height),
+        'fps': args.fps,
+        'rtsp_port': args.port,
+        'rtsp_path': '/camera1',
+        'capture_mode': 'decode',
+        'enabled': True
+    }
+    client_counts = sorted(int(value) for value in args.clients.split(','))
+    engines = ['threaded', 'asyncio'] if args.engine == 'both' else [args.engine]
+
+    print("============================================================")
+    print(f"🔴 RTSP 부하 테스트 ({args.resolution} @ {args.fps}fps, 단계별 {args.duration:.0f}초)")
+    print("============================================================")
+
+    for engine in engines:
+        results = measure(engine, args.port, camera, client_counts, args.duration)
+        print(f"\n📊 {engine}")
+        print(f"{'시청자':>6} {'CPU %':>8} {'스레드':>6} {'평균 FPS':>9} {'최소 FPS':>9} {'오류':>4}")
+        for result in results:
+            print(f"{result['clients']:>6} {result['cpu_percent']:>8.1f} {result['threads']:>6} "
+                  f"{result['fps_avg']:>9.1f} {result['fps_min']:>9.1f} {result['errors']:>4}")
+        args.port += 2  # 이전 서버 포트의 TIME_WAIT 회피
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
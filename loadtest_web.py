@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+웹 서버 부하 테스트 - MJPEG 시청자 수에 따른 서버 CPU/스레드/FPS와 API 응답 시간 비교
+
+서버는 별도 프로세스에서 가짜 카메라(테스트 패턴)로 실행하고, 이 프로세스의
+클라이언트들이 /api/cameras/camera1/stream을 받으며 프레임 수를 셉니다. 단계마다
+시청자가 보는 동안 /api/status 응답 시간도 잽니다.
+
+    python3 loadtest_web.py --engine both --clients 1,10,50,100 --duration 10
+"""
+
+import argparse
+import http.client
+import multiprocessing
+import os
+import socket
+import sys
+import threading
+import time
+
+def run_server(engine: str, port: int, camera: dict, conn):
+    """(서버 프로세스) 가짜 카메라와 웹 서버를 띄우고 측정 요청에 응답"""
+    import logging
+    logging.disable(logging.WARNING)
+    from config import config
+    config.cameras = {'camera1': camera}
+    config.web_interface.update({'engine': engine, 'host': '127.0.0.1', 'port': port})
+    
+    from camera_manager import camera_manager
+    from web_server import create_web_server
+    
+    camera_manager.start_all()
+    server = create_web_server()
+    conn.send(server.start())
+    
+    while True:
+        command = conn.recv()
+        if command == 'sample':
+            times = os.times()
+            conn.send((time.time(), times.user + times.system, threading.active_count()))
+        else:
+            break
+    
+    server.stop()
+    camera_manager.stop_all()
+    conn.send('stopped')
+
+class StreamClient(threading.Thread):
+    """MJPEG 시청자 (수신 프레임 수 집계)"""
+    
+    def __init__(self, port: int):
+        super().__init__(daemon=True)
+        self.port = port
+        self.frames = 0
+        self.running = True
+        self.error = None
+    
+    def run(self):
+        try:
+            sock = socket.create_connection(('127.0.0.1', self.port), timeout=10)
+            sock.sendall(b"GET /api/cameras/camera1/stream HTTP/1.1\r\nHost: localhost\r\n\r\n")
+            tail = b''
+            while self.running:
+                data = sock.recv(65536)
+                if not data:
+                    raise ConnectionError("연결 종료")
+                # 조각 경계에 걸친 구분자도 세도록 앞 조각의 끝을 붙여 검사
+                chunk = tail + data
+                self.frames += chunk.count(b'--frame\r\n')
+                tail = chunk[-8:]
+            sock.close()
+        except Exception as e:
+            self.error = e
+
+def api_latency(port: int, count: int = 20) -> float:
+    """/api/status 응답 시간 중앙값 (ms)"""
+    timings = []
+    for _ in range(count):
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+        started = time.perf_counter()
+        connection.request('GET', '/api/status')
+        connection.getresponse().read()
+        timings.append(1000 * (time.perf_counter() - started))
+        connection.close()
+    return sorted(timings)[len(timings) // 2]
+
+def measure(engine: str, port: int, camera: dict, client_counts: list, duration: float) -> list:
+    """엔진 하나에 대해 시청자 수별 (CPU%, 스레드 수, 시청자당 FPS, API 응답 시간) 측정"""
+    parent, child = multiprocessing.Pipe()
+    process = multiprocessing.Process(target=run_server, args=(engine, port, camera, child))
+    process.start()
+    results = []
+    try:
+        if not parent.poll(30) or not parent.recv():
+            print(f"❌ {engine} 서버 시작 실패")
+            return results
+        
+        clients = []
+        for count in client_counts:
+            while len(clients) < count:
+                client = StreamClient(port)
+                client.start()
+                clients.append(client)
+            time.sleep(2.0)  # 워밍업
+            
+            start_frames = [client.frames for client in clients]
+            parent.send('sample')
+            wall_start, cpu_start, _ = parent.recv()
+            latency = api_latency(port)
+            time.sleep(max(0.0, duration - (time.time() - wall_start)))
+            parent.send('sample')
+            wall_end, cpu_end, thread_count = parent.recv()
+            
+            elapsed = wall_end - wall_start
+            fps = [(client.frames - frames) / elapsed for client, frames in zip(clients, start_frames)]
+            errors = sum(1 for client in clients if client.error is not None)
+            results.append({
+                'clients': count,
+                'cpu_percent': 100.0 * (cpu_end - cpu_start) / elapsed,
+                'threads': thread_count,
+                'fps_avg': sum(fps) / len(fps),
+                'fps_min': min(fps),
+                'api_ms': latency,
+                'errors': errors
+            })
+        
+        for client in clients:
+            client.running = False
+    finally:
+        parent.send('stop')
+        parent.poll(10)
+        process.join(timeout=10)
+        if process.is_alive():
+            process.terminate()
+    return results
+
+def main():
+    """메인 함수"""
+    parser = argparse.ArgumentParser(description='웹 서버 부하 테스트 (threaded vs asyncio)')
+    parser.add_argument('--engine', choices=['threaded', 'asyncio', 'both'], default='both')
+    parser.add_argument('--clients', default='1,10,50,100', help='MJPEG 시청자 수 목록 (쉼표 구분)')
+    parser.add_argument('--duration', type=float, default=10.0, help='단계별 측정 시간 (초)')
+    parser.add_argument('--port', type=int, default=18080)
+    parser.add_argument('--resolution', default='640x480')
+    parser.add_argument('--fps', type=int, default=30)
+    args = parser.parse_args()
+    
+    width, height = (int(value) for value in args.resolution.split('x'))
+    camera = {
+        'name': 'Load Test Pattern',
+        'device': 'pattern',
+        'backend': 'fake',
+        'resolution': (width, height),
+        'fps': args.fps,
+        'rtsp_port': 18554,
+        'rtsp_path': '/camera1',
+        'capture_mode': 'decode',
+        'enabled': True
+    }
+    client_counts = sorted(int(value) for value in args.clients.split(','))
+    engines = ['threaded', 'asyncio'] if args.engine == 'both' else [args.engine]
+    
+    print("============================================================")
+    print(f"🔴 웹 서버 부하 테스트 ({args.resolution} @ {args.fps}fps, 단계별 {args.duration:.0f}초)")
+    print("============================================================")
+    
+    for engine in engines:
+        results = measure(engine, args.port, camera, client_counts, args.duration)
+        print(f"\n📊 {engine}")
+        print(f"{'시청자':>6} {'CPU %':>8} {'스레드':>6} {'평균 FPS':>9} {'최소 FPS':>9} {'API ms':>8} {'오류':>4}")
+        for result in results:
+            print(f"{result['clients']:>6} {result['cpu_percent']:>8.1f} {result['threads']:>6} "
+                  f"{result['fps_avg']:>9.1f} {result['fps_min']:>9.1f} {result['api_ms']:>8.1f} "
+                  f"{result['errors']:>4}")
+        args.port += 1  # 이전 서버 포트의 TIME_WAIT 회피
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
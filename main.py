@@ -15,7 +15,10 @@ sys.path.insert(0, str(project_root))
 from config import config
 from camera_manager import camera_manager
 from rtsp_server import rtsp_server
-from web_interface import app
+from motion_detector import motion_detector
+from recorder import recorder
+from frame_bus import frame_bus
+from web_server import create_web_server
 
 # 로깅 설정
 logging.basicConfig(
@@ -35,6 +38,7 @@ class RTSPCameraSystem:
     def __init__(self):
         self.is_running = False
         self.shutdown_event = threading.Event()
+        self.web_server = None
         
         # 시그널 핸들러 설정
         signal.signal(signal.SIGINT, self._signal_handler)
@@ -54,21 +58,49 @@ class RTSPCameraSystem:
             config.load_config()
             logger.info("설정 로드 완료")
             
+            # 로드된 설정으로 카메라를 다시 만들고, 설정의 엔진으로 RTSP 서버 생성
+            camera_manager.reload_cameras()
+            rtsp_server.configure()
+            
             # 카메라 매니저 시작
             logger.info("카메라 매니저 초기화 중...")
             if not camera_manager.start_all():
                 logger.warning("일부 카메라 시작 실패")
             
+            # 카메라 워커 감독 (워커 프로세스 모드인 경우)
+            if config.workers.get('enabled', False):
+                threading.Thread(target=self._supervise_workers, daemon=True,
+                                 name="worker-supervisor").start()
+            
+            # 모션 감지 시작 (설정에서 켠 경우)
+            if config.motion.get('enabled', False):
+                logger.info("모션 감지 시작 중...")
+                if not motion_detector.start():
+                    logger.warning("모션 감지 시작 실패")
+            
+            # 녹화 시작 (설정에서 켠 경우)
+            if config.recording.get('enabled', False):
+                logger.info("녹화 준비 중...")
+                if not recorder.start():
+                    logger.warning("녹화 시작 실패")
+            
+            # 프레임 버스 시작 (설정에서 켠 경우)
+            if config.frame_bus.get('enabled', False):
+                logger.info("프레임 버스 시작 중...")
+                if not frame_bus.start():
+                    logger.warning("프레임 버스 시작 실패")
+            
             # RTSP 서버 시작
             logger.info("RTSP 서버 시작 중...")
             if not rtsp_server.start():
                 logger.error("RTSP 서버 시작 실패")
                 return False
             
-            # 웹 인터페이스 시작 (별도 스레드에서)
+            # 웹 인터페이스 시작 (설정한 엔진으로, 루프/서버 스레드는 내부에서 생성)
             logger.info("웹 인터페이스 시작 중...")
-            web_thread = threading.Thread(target=self._start_web_interface, daemon=True)
-            web_thread.start()
+            self.web_server = create_web_server()
+            if not self.web_server.start():
+                logger.error("웹 인터페이스 시작 실패")
             
             self.is_running = True
             logger.info("시스템 시작 완료!")
@@ -82,19 +114,6 @@ class RTSPCameraSystem:
         
         return True
     
-    def _start_web_interface(self):
-        """웹 인터페이스 시작"""
-        try:
-            host = config.web_interface['host']
-            port = config.web_interface['port']
-            debug = config.web_interface['debug']
-            
-            logger.info(f"웹 인터페이스 시작: http://{host}:{port}")
-            app.run(host=host, port=port, debug=debug, threaded=True, use_reloader=False)
-            
-        except Exception as e:
-            logger.error(f"웹 인터페이스 시작 실패: {e}")
-    
     def _main_loop(self):
         """메인 루프"""
         logger.info("메인 루프 시작됨. Ctrl+C로 종료할 수 있습니다.")
@@ -114,6 +133,16 @@ class RTSPCameraSystem:
         finally:
             self.shutdown()
     
+    def _supervise_workers(self):
+        """카메라 워커 감독: 죽었거나 멈춘 워커 프로세스를 다시 띄움"""
+        interval = config.workers.get('supervise_interval', 1.0)
+        while not self.shutdown_event.wait(interval):
+            try:
+                for camera_id in camera_manager.supervise_workers():
+                    logger.warning(f"카메라 {camera_id} 워커 재시작됨")
+            except Exception as e:
+                logger.error(f"워커 감독 오류: {e}")
+    
     def _health_check(self):
         """시스템 상태 점검"""
         try:
@@ -150,6 +179,15 @@ class RTSPCameraSystem:
             logger.info("RTSP 서버 중지 중...")
             rtsp_server.stop()
             
+            # 웹 인터페이스 중지 (MJPEG 시청자 연결 종료)
+            if self.web_server is not None:
+                self.web_server.stop()
+            
+            # 녹화/모션 감지/프레임 버스 중지 (열린 세그먼트를 닫고 공유 메모리 삭제)
+            recorder.stop()
+            motion_detector.stop()
+            frame_bus.stop()
+            
             # 카메라 매니저 중지
             logger.info("카메라 매니저 중지 중...")
             camera_manager.stop_all()
@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+모션 감지 - 모든 카메라를 한 번에 분석
+
+카메라마다 최신 프레임을 작은 그레이스케일 평면(기본 160x120)으로 줄여
+(카메라 수 x 높이, 너비) 배열 하나에 쌓고, 배경(이동 평균)과의 차이, 임계값,
+구역 마스크, 점수, 배경 갱신을 카메라 수와 무관하게 배열 전체에 대한 연산 몇 번으로
+처리합니다. 카메라별로 남는 일은 축소뿐이며(패스스루 카메라는 JPEG을 1/8 그레이스케일로
+바로 디코딩), 분석은 캡처보다 낮은 FPS로 돌아갑니다.
+"""
+
+import logging
+import threading
+import time
+import cv2
+import numpy as np
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from config import config
+from camera_manager import camera_manager
+
+def parse_zones(zones) -> List[Tuple[float, float, float, float]]:
+    """구역 목록 검증 - [[x0, y0, x1, y1], ...] (0~1 비율, 잘못되면 ValueError)"""
+    if zones is None:
+        return []
+    if not isinstance(zones, (list, tuple)):
+        raise ValueError(f"잘못된 구역 목록: {zones!r}")
+    result = []
+    for zone in zones:
+        try:
+            x0, y0, x1, y1 = (float(value) for value in zone)
+        except (TypeError, ValueError):
+            raise ValueError(f"잘못된 구역: {zone!r}")
+        if not (0 <= x0 < x1 <= 1 and 0 <= y0 < y1 <= 1):
+            raise ValueError(f"구역은 0~1 사이의 [x0, y0, x1, y1]이어야 합니다: {zone!r}")
+        result.append((x0, y0, x1, y1))
+    return result
+
+def shrink_plane(frame: np.ndarray, out: np.ndarray):
+    """BGR 프레임을 out 크기의 그레이스케일 평면으로 축소
+    
+    큰 프레임을 바로 INTER_AREA로 줄이면 1280x720에서 수 ms가 걸리므로, 목표의 두 배
+    크기까지는 INTER_NEAREST로 솎고 그레이로 바꾼 뒤 마지막 2배만 평균으로 줄입니다.
+    """
+    height, width = out.shape
+    if frame.shape[1] > 2 * width and frame.shape[0] > 2 * height:
+        frame = cv2.resize(frame, (2 * width, 2 * height), interpolation=cv2.INTER_NEAREST)
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    cv2.resize(gray, (width, height), dst=out, interpolation=cv2.INTER_AREA)
+
+class MotionAnalyzer:
+    """카메라별 그레이스케일 평면을 쌓은 배열에 대한 벡터화 모션 분석
+    
+    planes[i]에 카메라 i의 축소 평면을 채운 뒤 analyze()를 부르면 모든 카메라의 점수
+    (구역 픽셀 중 움직인 비율)를 한 번에 계산합니다. 배열은 (카메라 수 x 높이, 너비)
+    2차원으로 다뤄 OpenCV 연산 한 번이 모든 카메라를 처리합니다.
+    """
+    
+    def __init__(self, count: int, size: Tuple[int, int] = (160, 120), learning_rate: float = 0.05,
+                 pixel_threshold: int = 25):
+        width, height = size
+        self.count = count
+        self.size = (width, height)
+        self.learning_rate = learning_rate
+        self.pixel_threshold = pixel_threshold
+        shape = (count, height, width)
+        self.planes = np.zeros(shape, np.uint8)
+        self.background = np.zeros(shape, np.float32)
+        self.mask = np.zeros(shape, np.uint8)
+        self.zones = np.full(shape, 255, np.uint8)
+        self.zone_pixels = np.full(count, height * width, np.float64)
+        self.primed = np.zeros(count, bool)
+        self._current = np.zeros(shape, np.float32)
+        self._diff = np.zeros(shape, np.float32)
+    
+    def _flat(self, array: np.ndarray) -> np.ndarray:
+        return array.reshape(-1, self.size[0])
+    
+    def set_zones(self, index: int, zones: Sequence[Tuple[float, float, float, float]]):
+        """카메라 index의 감시 구역 지정 (비율 좌표, 비우면 전체 화면)"""
+        width, height = self.size
+        if not zones:
+            self.zones[index] = 255
+        else:
+            self.zones[index] = 0
+            for x0, y0, x1, y1 in zones:
+                left, top = int(x0 * width), int(y0 * height)
+                right, bottom = max(left + 1, int(round(x1 * width))), max(top + 1, int(round(y1 * height)))
+                self.zones[index, top:bottom, left:right] = 255
+        self.zone_pixels[index] = max(1, np.count_nonzero(self.zones[index]))
+    
+    def analyze(self, active: np.ndarray) -> np.ndarray:
+        """모든 카메라의 모션 점수 (active가 False인 카메라는 0, 다시 켜지면 배경부터 새로 잡음)"""
+        current = self._flat(self._current)
+        background = self._flat(self.background)
+        diff = self._flat(self._diff)
+        mask = self._flat(self.mask)
+        np.copyto(self._current, self.planes)
+        
+        # 처음 보거나 다시 켜진 카메라는 현재 평면을 배경으로
+        self.primed &= active
+        fresh = active & ~self.primed
+        if fresh.any():
+            self.background[fresh] = self._current[fresh]
+            self.primed |= fresh
+        
+        cv2.absdiff(current, background, dst=diff)
+        cv2.compare(diff, float(self.pixel_threshold), cv2.CMP_GT, dst=mask)
+        cv2.bitwise_and(mask, self._flat(self.zones), dst=mask)
+        cv2.accumulateWeighted(current, background, self.learning_rate)
+        
+        # 카메라(행)별 합계를 한 번에 (마스크 값은 0/255)
+        sums = cv2.reduce(self.mask.reshape(self.count, -1), 1, cv2.REDUCE_SUM, dtype=cv2.CV_32S)
+        scores = sums.ravel() / (255.0 * self.zone_pixels)
+        scores[~active] = 0.0
+        return scores
+    
+    def regions(self, index: int, min_area: int = 12, limit: int = 8) -> List[Dict]:
+        """카메라 index의 움직인 영역 (비율 좌표 상자, 넓은 순)"""
+        width, height = self.size
+        # 잘게 쪼개진 조각을 이어 붙인 뒤 연결 요소로 묶음
+        mask = cv2.dilate(self.mask[index], np.ones((3, 3), np.uint8))
+        count, _, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+        regions = []
+        for x, y, w, h, area in stats[1:]:
+            if area < min_area:
+                continue
+            regions.append({
+                'box': [round(x / width, 3), round(y / height, 3),
+                        round((x + w) / width, 3), round((y + h) / height, 3)],
+                'area': round(float(area) / (width * height), 4)
+            })
+        regions.sort(key=lambda region: region['area'], reverse=True)
+        return regions[:limit]
+
+class MotionDetector:
+    """모든 카메라의 모션 감지 (낮은 FPS로 최신 프레임을 모아 한 번에 분석)
+    
+    분석하는 동안 대상 카메라를 'motion' 소비자로 구독합니다. 카메라별 모션 시작/종료는
+    add_listener()로 등록한 콜백(녹화, 알림 등)에 (카메라 ID, 모션 여부, 상태)로 알립니다.
+    """
+    
+    def __init__(self, manager=None):
+        self.manager = manager or camera_manager
+        self.logger = logging.getLogger("MotionDetector")
+        self.settings: Dict = {}
+        self.camera_ids: List[str] = []
+        self.analyzer: Optional[MotionAnalyzer] = None
+        self.states: Dict[str, Dict] = {}
+        self.listeners: List[Callable[[str, bool, Dict], None]] = []
+        self.running = False
+        self.thread = None
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._seqs: List[int] = []
+        
+        # 통계
+        self.ticks = 0
+        self.prepare_time = 0.0
+        self.analyze_time = 0.0
+    
+    def add_listener(self, callback: Callable[[str, bool, Dict], None]):
+        """모션 시작/종료 콜백 등록 - callback(camera_id, motion, state)"""
+        self.listeners.append(callback)
+    
+    def remove_listener(self, callback: Callable[[str, bool, Dict], None]):
+        if callback in self.listeners:
+            self.listeners.remove(callback)
+    
+    def _select_cameras(self) -> List[str]:
+        """분석 대상 카메라 (설정이 비어 있으면 모자이크를 뺀 모든 카메라)"""
+        cameras = self.manager.cameras
+        selected = self.settings.get('cameras') or list(cameras)
+        return [camera_id for camera_id in selected
+                if camera_id in cameras and cameras[camera_id].config.get('backend') != 'mosaic']
+    
+    def start(self) -> bool:
+        """모션 감지 시작 (설정에서 꺼져 있으면 False)"""
+        if self.running:
+            return True
+        self.settings = dict(config.motion)
+        if not self.settings.get('enabled', False):
+            self.logger.info("모션 감지 비활성화됨")
+            return False
+        
+        self.camera_ids = self._select_cameras()
+        if not self.camera_ids:
+            self.logger.warning("모션 감지할 카메라가 없습니다")
+            return False
+        
+        try:
+            self.analyzer = MotionAnalyzer(len(self.camera_ids), tuple(self.settings.get('size', (160, 120))),
+                                           self.settings.get('learning_rate', 0.05),
+                                           self.settings.get('pixel_threshold', 25))
+            zones = self.settings.get('zones', {})
+            for index, camera_id in enumerate(self.camera_ids):
+                self.analyzer.set_zones(index, parse_zones(zones.get(camera_id)))
+        except Exception as e:
+            self.logger.error(f"모션 감지 설정 오류: {e}")
+            return False
+        
+        with self._lock:
+            self.states = {camera_id: {
+                'active': False,
+                'motion': False,
+                'score': 0.0,
+                'regions': [],
+                'last_motion': None,
+                'events': 0
+            } for camera_id in self.camera_ids}
+        self._seqs = [0] * len(self.camera_ids)
+        self.running = True
+        self._stop_event.clear()
+        self.thread = threading.Thread(target=self._detect_loop, daemon=True, name="motion-detector")
+        self.thread.start()
+        self.logger.info(f"모션 감지 시작: {', '.join(self.camera_ids)} "
+                         f"({self.settings.get('fps', 5)}fps, {self.analyzer.size[0]}x{self.analyzer.size[1]})")
+        return True
+    
+    def stop(self):
+        """모션 감지 중지"""
+        self.running = False
+        self._stop_event.set()
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=5)
+        self.thread = None
+    
+    def _detect_loop(self):
+        """분석 스레드: 대상 카메라를 구독하고 설정된 FPS로 분석"""
+        manager = self.manager
+        subscribed = []
+        interval = 1.0 / max(0.1, float(self.settings.get('fps', 5)))
+        next_retry = 0.0
+        next_time = time.time()
+        try:
+            while self.running:
+                now = time.time()
+                if now >= next_retry and len(subscribed) < len(self.camera_ids):
+                    # 아직 켜지 못한 카메라는 주기적으로 다시 구독 시도
+                    for camera_id in self.camera_ids:
+                        if camera_id not in subscribed and self.running and manager.subscribe(camera_id, 'motion'):
+                            subscribed.append(camera_id)
+                    next_retry = time.time() + 30
+                
+                delay = next_time - time.time()
+                if delay > 0 and self._stop_event.wait(delay):
+                    break
+                next_time = max(next_time, time.time() - 1.0) + interval
+                self._tick()
+        except Exception as e:
+            self.logger.error(f"모션 감지 루프 오류: {e}")
+        finally:
+            for camera_id in subscribed:
+                manager.unsubscribe(camera_id, 'motion')
+            self.running = False
+    
+    def _load_plane(self, entry, out: np.ndarray) -> bool:
+        """프레임을 분석용 그레이스케일 평면으로 축소해 out에 기록"""
+        size = self.analyzer.size
+        if not entry.is_decoded and entry.jpeg is not None:
+            # 아직 디코딩되지 않은 패스스루 프레임은 DCT 단계에서 1/8로 줄여 디코딩
+            small = cv2.imdecode(np.frombuffer(entry.jpeg, np.uint8), cv2.IMREAD_REDUCED_GRAYSCALE_8)
+            if small is None:
+                return False
+            cv2.resize(small, size, dst=out, interpolation=cv2.INTER_AREA)
+            return True
+        
+        frame = entry.view(False)
+        if frame is None:
+            return False
+        shrink_plane(frame, out)
+        return True
+    
+    def _tick(self):
+        """최신 프레임을 모아 한 번 분석하고 모션 상태 갱신"""
+        manager = self.manager
+        analyzer = self.analyzer
+        active = np.zeros(len(self.camera_ids), bool)
+        
+        started = time.perf_counter()
+        for index, camera_id in enumerate(self.camera_ids):
+            camera = manager.cameras.get(camera_id)
+            entry = camera.get_latest() if camera is not None and camera.is_running else None
+            if entry is None:
+                continue
+            if entry.seq != self._seqs[index]:
+                # 새 프레임이 없으면 이전 평면을 그대로 씀
+                try:
+                    if not self._load_plane(entry, analyzer.planes[index]):
+                        continue
+                except Exception as e:
+                    self.logger.error(f"모션 분석용 프레임 준비 오류 ({camera_id}): {e}")
+                    continue
+                self._seqs[index] = entry.seq
+            active[index] = True
+        prepared = time.perf_counter()
+        scores = analyzer.analyze(active)
+        self.prepare_time += prepared - started
+        self.analyze_time += time.perf_counter() - prepared
+        self.ticks += 1
+        
+        now = time.time()
+        threshold = self.settings.get('score_threshold', 0.01)
+        hold = self.settings.get('hold', 3.0)
+        min_area = self.settings.get('min_area', 12)
+        changes = []
+        with self._lock:
+            for index, camera_id in enumerate(self.camera_ids):
+                state = self.states[camera_id]
+                state['active'] = bool(active[index])
+                state['score'] = round(float(scores[index]), 4)
+                if active[index] and scores[index] >= threshold:
+                    state['regions'] = analyzer.regions(index, min_area)
+                    state['last_motion'] = now
+                    if not state['motion']:
+                        state['motion'] = True
+                        state['events'] += 1
+                        changes.append((camera_id, True, dict(state)))
+                elif state['motion'] and (not active[index] or now - state['last_motion'] >= hold):
+                    state['motion'] = False
+                    state['regions'] = []
+                    changes.append((camera_id, False, dict(state)))
+        
+        for camera_id, motion, state in changes:
+            self.logger.info(f"{camera_id} 모션 {'시작' if motion else '종료'} (점수 {state['score']})")
+            for listener in list(self.listeners):
+                try:
+                    listener(camera_id, motion, state)
+                except Exception as e:
+                    self.logger.error(f"모션 콜백 오류: {e}")
+    
+    def set_zones(self, camera_id: str, zones) -> List[Tuple[float, float, float, float]]:
+        """카메라의 감시 구역 변경 (설정에 저장, 실행 중이면 바로 적용 - 잘못되면 ValueError)"""
+        parsed = parse_zones(zones)
+        config.motion.setdefault('zones', {})[camera_id] = [list(zone) for zone in parsed]
+        with self._lock:
+            if self.analyzer is not None and camera_id in self.camera_ids:
+                self.analyzer.set_zones(self.camera_ids.index(camera_id), parsed)
+        return parsed
+    
+    def get_camera_status(self, camera_id: str) -> Optional[Dict]:
+        with self._lock:
+            state = self.states.get(camera_id)
+            if state is None:
+                return None
+            state = dict(state)
+        state['zones'] = config.motion.get('zones', {}).get(camera_id, [])
+        return state
+    
+    def get_status(self) -> Dict:
+        ticks = self.ticks
+        return {
+            'enabled': config.motion.get('enabled', False),
+            'running': self.running,
+            'fps': self.settings.get('fps', config.motion.get('fps')),
+            'size': list(self.analyzer.size) if self.analyzer else None,
+            'cameras': {camera_id: self.get_camera_status(camera_id) for camera_id in list(self.states)},
+            'stats': {
+                'ticks': ticks,
+                'avg_prepare_ms': round(1000 * self.prepare_time / ticks, 3) if ticks else 0.0,
+                'avg_analyze_ms': round(1000 * self.analyze_time / ticks, 3) if ticks else 0.0
+            }
+        }
+
+# 전역 모션 감지기 인스턴스
+motion_detector = MotionDetector()
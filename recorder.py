@@ -0,0 +1,574 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+녹화 - 모션/요청 트리거(프리롤 포함) 또는 연속 녹화, 세그먼트 파일
+
+카메라마다 이미 인코딩된 프레임(공유 JPEG 캐시 또는 카메라별 H.264 단계의 AU)을
+pre_roll 초만큼 메모리 링에 보관하다가, 트리거(모션, API)가 오면 프리롤과 이후 프레임을
+세그먼트 파일로 씁니다. mode가 'continuous'면 트리거 없이 항상 씁니다.
+녹화용으로 다시 인코딩하지 않습니다.
+
+세그먼트는 원시 MJPEG(.mjpeg, JPEG 연결) 또는 Annex B H.264(.h264)이고, 프레임마다
+(캡처 시각, 바이트 오프셋, 크기, 플래그)를 담은 .idx 색인 파일이 함께 생깁니다.
+파일 쓰기는 전용 쓰기 스레드 하나가 큰 버퍼로 처리하며, 전체 크기가 quota_mb를 넘으면
+가장 오래된 세그먼트부터 지웁니다.
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional
+from config import config
+from camera_manager import camera_manager, FrameDecimator
+from motion_detector import motion_detector
+from segment_store import FLAG_KEYFRAME, INDEX_RECORD, SegmentInfo, SegmentStore
+
+ANNEXB_START_CODE = b'\x00\x00\x00\x01'
+
+class RecordedFrame:
+    """녹화할 인코딩된 프레임 하나"""
+    
+    __slots__ = ('timestamp', 'data', 'keyframe')
+    
+    def __init__(self, timestamp: float, data: bytes, keyframe: bool = True):
+        self.timestamp = timestamp
+        self.data = data
+        self.keyframe = keyframe
+
+class Segment:
+    """쓰고 있는 세그먼트 파일 하나 (+ 색인 파일)
+    
+    색인 레코드는 모아 두었다가 flush()에서 미디어 파일을 먼저 내보낸 뒤 씁니다. 그래서
+    쓰는 중인 세그먼트를 읽는 쪽은 색인에 보이는 프레임의 바이트를 항상 읽을 수 있습니다.
+    """
+    
+    def __init__(self, directory: str, camera_id: str, kind: str, timestamp: float, buffer_size: int):
+        stamp = time.strftime('%Y%m%d_%H%M%S', time.localtime(timestamp))
+        name = f"{camera_id}_{stamp}_{int(timestamp * 1000) % 1000:03d}"
+        path = os.path.join(directory, f"{name}.{kind}")
+        index_path = os.path.join(directory, f"{name}.idx")
+        self.file = open(path, 'wb', buffering=buffer_size)
+        self.index = open(index_path, 'wb', buffering=0)
+        self.info = SegmentInfo(camera_id, path, index_path, kind, timestamp, open=True)
+        self.bytes = 0
+        self._pending = bytearray()
+    
+    @property
+    def path(self) -> str:
+        return self.info.path
+    
+    @property
+    def start_time(self) -> float:
+        return self.info.start_time
+    
+    def write(self, frame: RecordedFrame):
+        self.file.write(frame.data)
+        self._pending += INDEX_RECORD.pack(frame.timestamp, self.bytes, len(frame.data),
+                                           FLAG_KEYFRAME if frame.keyframe else 0)
+        self.bytes += len(frame.data)
+        self.info.frames += 1
+        self.info.end_time = frame.timestamp
+        self.info.size = self.bytes + self.info.frames * INDEX_RECORD.size
+    
+    def flush(self):
+        """미디어 -> 색인 순서로 디스크에 내보냄"""
+        self.file.flush()
+        if self._pending:
+            self.index.write(self._pending)
+            self._pending.clear()
+    
+    def close(self):
+        self.flush()
+        self.file.close()
+        self.index.close()
+        self.info.open = False
+
+class SegmentWriter:
+    """녹화 파일 쓰기 스레드 (모든 카메라 공용)
+    
+    소스 스레드는 write()/close()로 큐에 넣기만 하고, 디스크 쓰기와 세그먼트 교체,
+    용량 제한은 모두 이 스레드에서 합니다. 세그먼트는 segment_seconds 단위의 시각 경계에서
+    (H.264는 그 뒤 첫 키프레임에서) 교체되고, 쓰는 중인 세그먼트는 flush_interval마다
+    디스크로 내보내 바로 재생/검색할 수 있습니다. 쓰기가 밀려 큐가 가득 차면 프레임을 버리고
+    dropped에 셉니다.
+    """
+    
+    def __init__(self, root: str, segment_seconds: float = 60, quota_bytes: int = 2 * 1024 ** 3,
+                 buffer_size: int = 1024 * 1024, max_queue: int = 1000, flush_interval: float = 1.0):
+        self.root = root
+        self.segment_seconds = segment_seconds
+        self.quota_bytes = quota_bytes
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.logger = logging.getLogger("SegmentWriter")
+        self.store = SegmentStore(root)
+        self.segments: Dict[str, Segment] = {}
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._files: Deque[SegmentInfo] = deque()  # 닫힌 세그먼트 - 오래된 순
+        self._closed_bytes = 0
+        self._last_flush = 0.0
+        self.thread = None
+        
+        # 통계
+        self.written_frames = 0
+        self.written_bytes = 0
+        self.dropped = 0
+        self.deleted_segments = 0
+        self.errors = 0
+    
+    def start(self):
+        os.makedirs(self.root, exist_ok=True)
+        # 이전 실행에서 남은 세그먼트도 검색/용량 계산에 포함
+        self._files = deque(self.store.load())
+        self._closed_bytes = sum(info.size for info in self._files)
+        self.thread = threading.Thread(target=self._write_loop, daemon=True, name="segment-writer")
+        self.thread.start()
+    
+    def stop(self):
+        """남은 큐를 모두 쓰고 열린 세그먼트를 닫은 뒤 종료"""
+        if self.thread is None:
+            return
+        self._queue.put(('stop', None, None, None))
+        self.thread.join(timeout=10)
+        self.thread = None
+    
+    def write(self, camera_id: str, kind: str, frame: RecordedFrame) -> bool:
+        try:
+            self._queue.put_nowait(('frame', camera_id, kind, frame))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+    
+    def close(self, camera_id: str):
+        """카메라의 현재 세그먼트 닫기 (이벤트 끝)"""
+        self._queue.put(('close', camera_id, None, None))
+    
+    def sync(self, timeout: float = 10.0) -> bool:
+        """지금까지 큐에 넣은 프레임이 모두 디스크에 보일 때까지 대기"""
+        done = threading.Event()
+        self._queue.put(('sync', None, None, done))
+        return done.wait(timeout)
+    
+    def _write_loop(self):
+        while True:
+            try:
+                command, camera_id, kind, frame = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                self._flush_all()
+                continue
+            try:
+                if command == 'frame':
+                    self._write_frame(camera_id, kind, frame)
+                elif command == 'close':
+                    self._close_segment(camera_id)
+                elif command == 'sync':
+                    self._flush_all()
+                    frame.set()
+                else:
+                    for open_id in list(self.segments):
+                        self._close_segment(open_id)
+                    break
+            except Exception as e:
+                self.errors += 1
+                self.logger.error(f"녹화 파일 쓰기 오류 ({camera_id}): {e}")
+                segment = self.segments.pop(camera_id, None)
+                if segment is not None:
+                    try:
+                        segment.close()
+                    except Exception:
+                        pass
+            if time.time() - self._last_flush >= self.flush_interval:
+                self._flush_all()
+    
+    def _flush_all(self):
+        for segment in self.segments.values():
+            segment.flush()
+        self._last_flush = time.time()
+    
+    def _write_frame(self, camera_id: str, kind: str, frame: RecordedFrame):
+        segment = self.segments.get(camera_id)
+        if segment is not None and frame.keyframe and (segment.info.kind != kind or
+                int(frame.timestamp // self.segment_seconds) != int(segment.start_time // self.segment_seconds)):
+            # 세그먼트는 키프레임에서만 교체 (각 파일이 혼자 재생 가능하도록)
+            self._close_segment(camera_id)
+            segment = None
+        if segment is None:
+            if not frame.keyframe:
+                return
+            directory = os.path.join(self.root, camera_id)
+            os.makedirs(directory, exist_ok=True)
+            segment = Segment(directory, camera_id, kind, frame.timestamp, self.buffer_size)
+            self.segments[camera_id] = segment
+            self.store.add(segment.info)
+        segment.write(frame)
+        self.written_frames += 1
+        self.written_bytes += len(frame.data)
+        if self._closed_bytes + self._open_bytes() > self.quota_bytes:
+            self._enforce_quota()
+    
+    def _open_bytes(self) -> int:
+        return sum(segment.info.size for segment in self.segments.values())
+    
+    def _close_segment(self, camera_id: str):
+        segment = self.segments.pop(camera_id, None)
+        if segment is None:
+            return
+        segment.close()
+        info = segment.info
+        self._files.append(info)
+        self._closed_bytes += info.size
+        self.logger.info(f"세그먼트 저장: {os.path.basename(info.path)} "
+                         f"({info.frames}프레임, {info.end_time - info.start_time:.1f}초, "
+                         f"{segment.bytes // 1024}KB)")
+        self._enforce_quota()
+    
+    def _enforce_quota(self):
+        """용량을 넘으면 닫힌 세그먼트를 오래된 것부터 삭제"""
+        while self._files and self._closed_bytes + self._open_bytes() > self.quota_bytes:
+            info = self._files.popleft()
+            self._closed_bytes -= info.size
+            self.store.remove(info)
+            for victim in (info.path, info.index_path):
+                try:
+                    os.remove(victim)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    self.logger.error(f"세그먼트 삭제 실패 ({victim}): {e}")
+            self.deleted_segments += 1
+    
+    def list_segments(self, camera_id: Optional[str] = None) -> List[Dict]:
+        """세그먼트 목록 (시작 시각 순, 쓰는 중인 세그먼트 포함)"""
+        return [info.to_dict() for info in self.store.segments(camera_id)]
+    
+    def get_stats(self) -> Dict:
+        return {
+            'written_frames': self.written_frames,
+            'written_bytes': self.written_bytes,
+            'queued': self._queue.qsize(),
+            'dropped': self.dropped,
+            'deleted_segments': self.deleted_segments,
+            'disk_bytes': self._closed_bytes + self._open_bytes(),
+            'quota_bytes': self.quota_bytes,
+            'errors': self.errors
+        }
+
+class CameraRecorder:
+    """카메라 하나의 녹화 소스 (이미 인코딩된 프레임의 프리롤 링 + 트리거 상태)
+    
+    codec이 h264인 카메라는 RTSP와 같은 카메라별 H.264 단계의 AU를, 나머지는 공유 JPEG
+    인코딩 캐시(패스스루면 카메라 원본 JPEG)를 씁니다. 녹화 중이 아니어도 프리롤을 채우기
+    위해 카메라를 'recorder' 소비자로 구독합니다.
+    """
+    
+    def __init__(self, camera, writer: SegmentWriter, settings: Dict):
+        self.camera = camera
+        self.camera_id = camera.camera_id
+        self.writer = writer
+        self.settings = settings
+        self.logger = logging.getLogger(f"Recorder_{camera.camera_id}")
+        self.pre_roll = float(settings.get('pre_roll', 5.0))
+        self.post_roll = float(settings.get('post_roll', 5.0))
+        self.quality = int(settings.get('quality', 80))
+        self.fps = settings.get('fps') or None
+        self.continuous = settings.get('mode') == 'continuous'
+        self.kind = 'mjpeg'
+        self.running = False
+        self.thread = None
+        self.recording = False
+        self.record_until = 0.0
+        self.holds = set()  # 끝날 때까지 녹화를 유지하는 트리거 (예: 'motion', 'api')
+        self.reason: Optional[str] = None
+        self._ring: Deque[RecordedFrame] = deque()
+        self._lock = threading.Lock()
+        
+        # 통계
+        self.events = 0
+        self.last_event: Optional[Dict] = None
+    
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._source_loop, daemon=True,
+                                       name=f"recorder-{self.camera_id}")
+        self.thread.start()
+    
+    def stop(self):
+        self.running = False
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=5)
+        self.thread = None
+        with self._lock:
+            self._stop_recording()
+            self._ring.clear()
+    
+    def trigger(self, reason: str, duration: Optional[float] = None, hold: bool = False):
+        """녹화 시작/연장 - hold면 release(reason)까지, 아니면 duration(기본 post_roll)초"""
+        now = time.time()
+        with self._lock:
+            if hold:
+                self.holds.add(reason)
+            else:
+                self.record_until = max(self.record_until, now + (duration or self.post_roll))
+            if not self.recording:
+                self._start_recording(reason, now)
+    
+    def release(self, reason: str):
+        """hold 트리거 해제 (post_roll 뒤 녹화 종료)"""
+        with self._lock:
+            if reason in self.holds:
+                self.holds.discard(reason)
+                self.record_until = max(self.record_until, time.time() + self.post_roll)
+    
+    def _start_recording(self, reason: str, now: float):
+        """프리롤을 먼저 쓰기 큐에 넣고 녹화 시작 (self._lock 안에서 호출)"""
+        self.recording = True
+        self.reason = reason
+        self.events += 1
+        self.last_event = {'reason': reason, 'started': now, 'pre_roll_frames': len(self._ring)}
+        self.logger.info(f"녹화 시작 ({reason}, 프리롤 {len(self._ring)}프레임)")
+        for frame in self._ring:
+            self.writer.write(self.camera_id, self.kind, frame)
+    
+    def finish(self):
+        """진행 중인 녹화를 트리거와 무관하게 바로 끝냄"""
+        with self._lock:
+            self._stop_recording()
+    
+    def _stop_recording(self):
+        if not self.recording:
+            return
+        self.recording = False
+        self.holds.clear()
+        self.record_until = 0.0
+        self.writer.close(self.camera_id)
+        if self.last_event is not None:
+            self.last_event['ended'] = time.time()
+        self.logger.info("녹화 종료")
+    
+    def _push(self, frame: RecordedFrame):
+        """소스 스레드: 인코딩된 프레임을 프리롤 링에 넣고 녹화 중이면 쓰기 큐로"""
+        with self._lock:
+            if self.continuous:
+                # 연속 녹화는 프리롤 없이 항상 기록 (finish() 뒤에는 새 세그먼트로 다시 시작)
+                if not self.recording:
+                    self.holds.add('continuous')
+                    self._start_recording('continuous', frame.timestamp)
+                self.writer.write(self.camera_id, self.kind, frame)
+                return
+            self._ring.append(frame)
+            cutoff = frame.timestamp - self.pre_roll
+            # 링의 첫 프레임이 항상 키프레임이 되도록 다음 키프레임까지 통째로 버림
+            while len(self._ring) > 1 and self._ring[0].timestamp < cutoff:
+                drop = 1
+                while drop < len(self._ring) and not self._ring[drop].keyframe:
+                    drop += 1
+                if drop >= len(self._ring) or self._ring[drop].timestamp > cutoff:
+                    break
+                for _ in range(drop):
+                    self._ring.popleft()
+            
+            if self.recording:
+                self.writer.write(self.camera_id, self.kind, frame)
+            self._check_stop(frame.timestamp)
+    
+    def _check_stop(self, now: float):
+        if self.recording and not self.holds and now >= self.record_until:
+            self._stop_recording()
+    
+    def _source_loop(self):
+        """카메라를 구독하고 인코딩된 프레임을 받아 _push"""
+        if not self.camera.subscribe('recorder'):
+            self.logger.error("카메라를 시작할 수 없어 녹화 소스를 중단합니다")
+            self.running = False
+            return
+        stage = None
+        try:
+            if self.camera.config.get('codec') == 'h264':
+                stage = self.camera.get_h264_stage()
+                if stage is not None and not stage.subscribe():
+                    stage = None
+            if stage is not None:
+                self.kind = 'h264'
+                self._follow_h264(stage)
+            else:
+                self.kind = 'mjpeg'
+                self._follow_jpeg()
+        except Exception as e:
+            self.logger.error(f"녹화 소스 오류: {e}")
+        finally:
+            if stage is not None:
+                stage.unsubscribe()
+            self.camera.unsubscribe('recorder')
+    
+    def _follow_jpeg(self):
+        last_seq = 0
+        decimator = FrameDecimator(self.fps)
+        while self.running:
+            entry = self.camera.wait_frame(last_seq, timeout=1.0)
+            if entry is None:
+                with self._lock:
+                    self._check_stop(time.time())
+                continue
+            last_seq = entry.seq
+            if not decimator.accept(entry.timestamp):
+                continue
+            # 스트리밍과 같은 인코딩 캐시 (같은 프레임이면 다시 인코딩하지 않음)
+            jpeg = self.camera.encode_frame(entry, self.quality)
+            if jpeg is not None:
+                self._push(RecordedFrame(entry.timestamp, jpeg))
+    
+    def _follow_h264(self, stage):
+        last_seq = 0
+        while self.running:
+            unit = stage.wait_next(last_seq, timeout=1.0)
+            if unit is None:
+                with self._lock:
+                    self._check_stop(time.time())
+                continue
+            last_seq = unit.seq
+            data = b''.join(ANNEXB_START_CODE + nal for nal in unit.nals)
+            self._push(RecordedFrame(unit.timestamp, data, unit.keyframe))
+    
+    def get_status(self) -> Dict:
+        with self._lock:
+            ring = list(self._ring)
+            return {
+                'running': self.running,
+                'recording': self.recording,
+                'format': self.kind,
+                'holds': sorted(self.holds),
+                'record_until': self.record_until or None,
+                'pre_roll_frames': len(ring),
+                'pre_roll_seconds': round(ring[-1].timestamp - ring[0].timestamp, 2) if ring else 0.0,
+                'pre_roll_bytes': sum(len(frame.data) for frame in ring),
+                'events': self.events,
+                'last_event': dict(self.last_event) if self.last_event else None
+            }
+
+class Recorder:
+    """트리거 녹화 관리 (카메라별 CameraRecorder + 공용 SegmentWriter)"""
+    
+    def __init__(self, manager=None):
+        self.manager = manager or camera_manager
+        self.logger = logging.getLogger("Recorder")
+        self.settings: Dict = {}
+        self.writer: Optional[SegmentWriter] = None
+        self.cameras: Dict[str, CameraRecorder] = {}
+        self.running = False
+        self._offline_store: Optional[SegmentStore] = None
+        self._offline_loaded = 0.0
+    
+    def start(self) -> bool:
+        """녹화 시작 (설정에서 꺼져 있으면 False)"""
+        if self.running:
+            return True
+        self.settings = dict(config.recording)
+        if not self.settings.get('enabled', False):
+            self.logger.info("녹화 비활성화됨")
+            return False
+        
+        try:
+            self.writer = SegmentWriter(self.settings.get('path', 'recordings'),
+                                        self.settings.get('segment_seconds', 60),
+                                        int(self.settings.get('quota_mb', 2048) * 1024 * 1024),
+                                        int(self.settings.get('write_buffer', 1024 * 1024)))
+            self.writer.start()
+        except Exception as e:
+            self.logger.error(f"녹화 디렉터리 준비 실패: {e}")
+            self.writer = None
+            return False
+        
+        selected = self.settings.get('cameras') or list(self.manager.cameras)
+        for camera_id in selected:
+            camera = self.manager.get_camera(camera_id)
+            if camera is None or camera.config.get('backend') == 'mosaic':
+                continue
+            recorder = CameraRecorder(camera, self.writer, self.settings)
+            recorder.start()
+            self.cameras[camera_id] = recorder
+        
+        if self.settings.get('motion_trigger', True):
+            motion_detector.add_listener(self._on_motion)
+        self.running = True
+        mode = self.settings.get('mode', 'event')
+        detail = '연속 녹화' if mode == 'continuous' else f"프리롤 {self.settings.get('pre_roll', 5.0)}초"
+        self.logger.info(f"녹화 준비 완료: {', '.join(self.cameras)} ({detail}, 저장 위치 {self.writer.root})")
+        return True
+    
+    def stop(self):
+        """녹화 중지 (열린 세그먼트는 닫고 종료)"""
+        if not self.running:
+            return
+        self.running = False
+        motion_detector.remove_listener(self._on_motion)
+        for recorder in self.cameras.values():
+            recorder.stop()
+        self.cameras = {}
+        if self.writer is not None:
+            self.writer.stop()
+    
+    def _on_motion(self, camera_id: str, motion: bool, state: Dict):
+        recorder = self.cameras.get(camera_id)
+        if recorder is None:
+            return
+        if motion:
+            recorder.trigger('motion', hold=True)
+        else:
+            recorder.release('motion')
+    
+    def trigger(self, camera_id: str, duration: Optional[float] = None, reason: str = 'api') -> bool:
+        """수동 녹화 (duration초, 기본 post_roll)"""
+        recorder = self.cameras.get(camera_id)
+        if recorder is None:
+            return False
+        recorder.trigger(reason, duration)
+        return True
+    
+    def stop_recording(self, camera_id: str) -> bool:
+        """진행 중인 녹화를 바로 끝냄 (다음 프레임에서 닫힘)"""
+        recorder = self.cameras.get(camera_id)
+        if recorder is None:
+            return False
+        recorder.finish()
+        return True
+    
+    @property
+    def store(self) -> SegmentStore:
+        """세그먼트 저장소 (녹화 중이 아니면 디스크에서 읽은 목록 - 재생/썸네일용)"""
+        if self.writer is not None and self.running:
+            return self.writer.store
+        path = config.recording.get('path', 'recordings')
+        if self._offline_store is None or self._offline_store.root != path or \
+                time.time() - self._offline_loaded > 10:
+            store = SegmentStore(path)
+            store.load()
+            self._offline_store = store
+            self._offline_loaded = time.time()
+        return self._offline_store
+    
+    def get_segment_path(self, camera_id: str, filename: str) -> Optional[str]:
+        """세그먼트 파일 경로 (목록에 있는 파일만)"""
+        for info in self.store.segments(camera_id):
+            if os.path.basename(info.path) == filename:
+                return info.path
+        return None
+    
+    def list_recordings(self, camera_id: Optional[str] = None) -> List[Dict]:
+        return [info.to_dict() for info in self.store.segments(camera_id)]
+    
+    def get_status(self) -> Dict:
+        return {
+            'enabled': config.recording.get('enabled', False),
+            'running': self.running,
+            'mode': self.settings.get('mode', config.recording.get('mode', 'event')),
+            'path': self.writer.root if self.writer else None,
+            'cameras': {camera_id: recorder.get_status() for camera_id, recorder in list(self.cameras.items())},
+            'writer': self.writer.get_stats() if self.writer else None
+        }
+
+# 전역 녹화기 인스턴스
+recorder = Recorder()
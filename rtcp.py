@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import struct
+import time
+from typing import Dict, List, Optional, Tuple
+
+RTCP_SR = 200
+RTCP_RR = 201
+RTCP_SDES = 202
+RTCP_BYE = 203
+
+SDES_CNAME = 1
+
+# NTP 기준(1900년)과 유닉스 기준(1970년)의 차이 (초)
+NTP_EPOCH_OFFSET = 2208988800
+
+_HEADER = struct.Struct('!BBH')
+_SENDER_INFO = struct.Struct('!IIIIII')  # SSRC, NTP 초, NTP 소수, RTP 타임스탬프, 패킷 수, 옥텟 수
+_REPORT_BLOCK = struct.Struct('!IIIIII')
+
+def ntp_timestamp(unix_time: float) -> Tuple[int, int]:
+    """유닉스 시각을 64비트 NTP 타임스탬프 (초, 소수)로 변환"""
+    seconds = int(unix_time)
+    fraction = int((unix_time - seconds) * (1 << 32)) & 0xFFFFFFFF
+    return (seconds + NTP_EPOCH_OFFSET) & 0xFFFFFFFF, fraction
+
+def build_sender_report(ssrc: int, unix_time: float, rtp_timestamp: int, packet_count: int,
+                        octet_count: int, cname: str) -> bytes:
+    """SR + SDES(CNAME) 복합 RTCP 패킷 생성 (RFC 3550 6.4.1)"""
+    ntp_seconds, ntp_fraction = ntp_timestamp(unix_time)
+    sender_report = _HEADER.pack(0x80, RTCP_SR, 6) + _SENDER_INFO.pack(
+        ssrc, ntp_seconds, ntp_fraction, rtp_timestamp & 0xFFFFFFFF,
+        packet_count & 0xFFFFFFFF, octet_count & 0xFFFFFFFF)
+    
+    name = cname.encode('utf-8')[:255]
+    chunk = struct.pack('!IBB', ssrc, SDES_CNAME, len(name)) + name + b'\x00'
+    chunk += b'\x00' * (-len(chunk) % 4)
+    sdes = _HEADER.pack(0x81, RTCP_SDES, len(chunk) // 4) + chunk
+    return sender_report + sdes
+
+def build_bye(ssrc: int) -> bytes:
+    """BYE 패킷 생성"""
+    return _HEADER.pack(0x81, RTCP_BYE, 1) + struct.pack('!I', ssrc)
+
+class ReportBlock:
+    """수신자 보고 블록 (RFC 3550 6.4.1)"""
+    
+    __slots__ = ('ssrc', 'fraction_lost', 'cumulative_lost', 'highest_seq', 'jitter', 'lsr', 'dlsr')
+    
+    def __init__(self, data: bytes, offset: int):
+        (self.ssrc, lost, self.highest_seq, self.jitter,
+         self.lsr, self.dlsr) = _REPORT_BLOCK.unpack_from(data, offset)
+        self.fraction_lost = (lost >> 24) / 256.0
+        cumulative = lost & 0xFFFFFF
+        # 24비트 부호 있는 정수
+        self.cumulative_lost = cumulative - (1 << 24) if cumulative & 0x800000 else cumulative
+
+def parse_rtcp(data: bytes) -> List[ReportBlock]:
+    """복합 RTCP 패킷에서 수신자 보고 블록 추출 (잘못된 패킷이면 빈 목록)"""
+    blocks: List[ReportBlock] = []
+    offset = 0
+    while offset + 4 <= len(data):
+        first, packet_type, length = _HEADER.unpack_from(data, offset)
+        if first >> 6 != 2:
+            break
+        end = offset + (length + 1) * 4
+        if end > len(data):
+            break
+        count = first & 0x1F
+        
+        if packet_type == RTCP_RR:
+            start = offset + 8
+        elif packet_type == RTCP_SR:
+            start = offset + 28
+        else:
+            offset = end
+            continue
+        
+        for i in range(count):
+            block_offset = start + i * _REPORT_BLOCK.size
+            if block_offset + _REPORT_BLOCK.size > end:
+                break
+            blocks.append(ReportBlock(data, block_offset))
+        offset = end
+    return blocks
+
+class ReceiverStats:
+    """클라이언트 수신자 보고로 집계한 손실/지터/RTT"""
+    
+    def __init__(self, clock_rate: int = 90000):
+        self.clock_rate = clock_rate
+        self.reports = 0
+        self.fraction_lost = 0.0
+        self.cumulative_lost = 0
+        self.jitter = 0
+        self.rtt: Optional[float] = None
+        self.last_report_time = 0.0
+    
+    def update(self, block: ReportBlock, now: Optional[float] = None):
+        now = now or time.time()
+        self.reports += 1
+        self.fraction_lost = block.fraction_lost
+        self.cumulative_lost = block.cumulative_lost
+        self.jitter = block.jitter
+        self.last_report_time = now
+        
+        if block.lsr:
+            # RTT = 수신 시각 - LSR - DLSR (NTP 중간 32비트, 1/65536초 단위)
+            ntp_seconds, ntp_fraction = ntp_timestamp(now)
+            middle = ((ntp_seconds & 0xFFFF) << 16) | (ntp_fraction >> 16)
+            rtt = ((middle - block.lsr - block.dlsr) & 0xFFFFFFFF) / 65536.0
+            if rtt < 60:
+                self.rtt = rtt
+    
+    def to_dict(self) -> Dict:
+        return {
+            'reports': self.reports,
+            'fraction_lost': round(self.fraction_lost, 4),
+            'cumulative_lost': self.cumulative_lost,
+            'jitter_ms': round(self.jitter * 1000.0 / self.clock_rate, 2),
+            'rtt_ms': round(self.rtt * 1000.0, 1) if self.rtt is not None else None,
+            'last_report_time': self.last_report_time
+        }
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import struct
+from typing import Dict, List, Optional
+
+RTP_HEADER_SIZE = 12
+RTP_VERSION = 2
+
+# RFC 2435: JPEG 정적 페이로드 타입과 90kHz 클럭
+JPEG_PAYLOAD_TYPE = 26
+RTP_CLOCK_RATE = 90000
+
+# RFC 6184: H.264 동적 페이로드 타입과 FU-A 조각 타입
+H264_PAYLOAD_TYPE = 96
+FU_A_TYPE = 28
+FU_HEADER_SIZE = 2
+
+JPEG_HEADER_SIZE = 8
+RESTART_HEADER_SIZE = 4
+QTABLE_HEADER_SIZE = 4
+
+_RTP_HEADER = struct.Struct('!BBHII')
+_JPEG_HEADER = struct.Struct('!BBHBBBB')  # type-specific, offset(24비트), type, Q, width/8, height/8
+_RESTART_HEADER = struct.Struct('!HH')
+_QTABLE_HEADER = struct.Struct('!BBH')
+
+class JpegFrameInfo:
+    """RTP/JPEG 전송에 필요한 JPEG 헤더 정보와 엔트로피 코딩 데이터"""
+    
+    __slots__ = ('type', 'width', 'height', 'qtables', 'dri', 'scan')
+    
+    def __init__(self, jpeg_type: int, width: int, height: int, qtables: bytes,
+                 dri: int, scan: memoryview):
+        self.type = jpeg_type
+        self.width = width
+        self.height = height
+        self.qtables = qtables
+        self.dri = dri
+        self.scan = scan
+
+def parse_jpeg(data: bytes) -> Optional[JpegFrameInfo]:
+    """베이스라인 JPEG(JFIF)을 RFC 2435 전송용으로 분석 (지원하지 않는 형식이면 None)
+    
+    헤더 구간만 훑고 SOS 이후의 스캔 데이터는 복사하지 않고 memoryview로 가리킵니다.
+    """
+    n = len(data)
+    if n < 4 or data[0] != 0xFF or data[1] != 0xD8:
+        return None
+    
+    tables: Dict[int, bytes] = {}
+    components = []
+    width = height = dri = 0
+    i = 2
+    
+    while i + 4 <= n:
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:  # 채움 바이트
+            i += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+            i += 2
+            continue
+        
+        length = (data[i + 2] << 8) | data[i + 3]
+        start, end = i + 4, i + 2 + length
+        if length < 2 or end > n:
+            return None
+        
+        if marker == 0xDB:  # DQT
+            j = start
+            while j < end:
+                precision, table_id = data[j] >> 4, data[j] & 0x0F
+                if precision != 0:
+                    return None  # 16비트 양자화 테이블은 지원하지 않음
+                tables[table_id] = bytes(data[j + 1:j + 65])
+                j += 65
+        elif marker == 0xC0:  # SOF0 (베이스라인)
+            height = (data[start + 1] << 8) | data[start + 2]
+            width = (data[start + 3] << 8) | data[start + 4]
+            count = data[start + 5]
+            for k in range(count):
+                offset = start + 6 + k * 3
+                components.append((data[offset + 1], data[offset + 2]))  # (샘플링, 테이블)
+        elif 0xC1 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            return None  # 프로그레시브/산술 부호화 등
+        elif marker == 0xDD:  # DRI
+            dri = (data[start] << 8) | data[start + 1]
+        elif marker == 0xDA:  # SOS
+            scan_end = n - 2 if data[n - 2] == 0xFF and data[n - 1] == 0xD9 else n
+            if len(components) != 3 or width == 0 or height == 0:
+                return None
+            if width > 2040 or height > 2040:
+                return None  # width/8, height/8이 1바이트에 들어가야 함
+            
+            # 휘도 샘플링 2x1 -> type 0 (4:2:2), 2x2 -> type 1 (4:2:0)
+            luma, chroma1, chroma2 = components
+            if chroma1[0] != 0x11 or chroma2[0] != 0x11:
+                return None
+            if luma[0] == 0x21:
+                jpeg_type = 0
+            elif luma[0] == 0x22:
+                jpeg_type = 1
+            else:
+                return None
+            
+            if luma[1] not in tables or chroma1[1] not in tables:
+                return None
+            qtables = tables[luma[1]] + tables[chroma1[1]]
+            if dri:
+                jpeg_type += 64
+            return JpegFrameInfo(jpeg_type, width, height, qtables, dri,
+                                 memoryview(data)[end:scan_end])
+        
+        i = end
+    return None
+
+class RtpPacketizer:
+    """RTP 패킷화 기본 클래스
+    
+    시퀀스 번호는 패킷마다 1씩 증가하고, 타임스탬프는 캡처 시각에서 90kHz로
+    계산합니다. 패킷은 미리 할당한 버퍼에 직접 작성되며, 반환된 memoryview는
+    다음 packetize() 호출 전까지만 유효합니다.
+    """
+    
+    def __init__(self, payload_type: int, mtu: int = 1400, ssrc: Optional[int] = None,
+                 clock_rate: int = RTP_CLOCK_RATE):
+        self.payload_type = payload_type
+        self.mtu = mtu
+        self.clock_rate = clock_rate
+        self.ssrc = ssrc if ssrc is not None else struct.unpack('!I', os.urandom(4))[0]
+        self.sequence = struct.unpack('!H', os.urandom(2))[0]
+        self.timestamp_base = struct.unpack('!I', os.urandom(4))[0]
+        self.last_timestamp = self.timestamp_base
+        self.last_capture_time = 0.0
+        
+        # RTCP SR에 쓰이는 누적 통계
+        self.packet_count = 0
+        self.octet_count = 0
+        
+        self._buffer = bytearray(mtu * 64)
+        self._view = memoryview(self._buffer)
+    
+    def rtp_timestamp(self, capture_time: float) -> int:
+        """캡처 시각(초)을 RTP 타임스탬프로 변환"""
+        return (self.timestamp_base + int(capture_time * self.clock_rate)) & 0xFFFFFFFF
+    
+    def _ensure_capacity(self, size: int):
+        if len(self._buffer) < size:
+            self._view.release()
+            self._buffer = bytearray(max(size, len(self._buffer) * 2))
+            self._view = memoryview(self._buffer)
+    
+    def _write_header(self, offset: int, marker: bool, timestamp: int):
+        _RTP_HEADER.pack_into(self._buffer, offset, RTP_VERSION << 6,
+                              (0x80 if marker else 0) | self.payload_type,
+                              self.sequence, timestamp, self.ssrc)
+        self.sequence = (self.sequence + 1) & 0xFFFF
+
+class JpegRtpPacketizer(RtpPacketizer):
+    """RFC 2435 RTP/JPEG 패킷화 (MTU 크기로 분할, 마지막 조각에 마커 비트)"""
+    
+    def __init__(self, mtu: int = 1400, ssrc: Optional[int] = None):
+        super().__init__(JPEG_PAYLOAD_TYPE, mtu, ssrc)
+    
+    def packetize(self, jpeg: bytes, capture_time: float) -> List[memoryview]:
+        """JPEG 한 프레임을 RTP 패킷 목록으로 변환 (지원하지 않는 JPEG이면 빈 목록)"""
+        info = parse_jpeg(jpeg)
+        if info is None:
+            return []
+        return self.packetize_info(info, capture_time)
+    
+    def packetize_info(self, info: JpegFrameInfo, capture_time: float) -> List[memoryview]:
+        """분석된 JPEG 프레임을 RTP 패킷 목록으로 변환"""
+        timestamp = self.rtp_timestamp(capture_time)
+        self.last_timestamp = timestamp
+        self.last_capture_time = capture_time
+        
+        scan = info.scan
+        total = len(scan)
+        fixed = RTP_HEADER_SIZE + JPEG_HEADER_SIZE + (RESTART_HEADER_SIZE if info.dri else 0)
+        qtable_size = QTABLE_HEADER_SIZE + len(info.qtables)
+        
+        # 최악의 경우 패킷 수만큼 버퍼 확보
+        max_chunk = self.mtu - fixed - qtable_size
+        if max_chunk <= 0:
+            return []
+        self._ensure_capacity((total // max_chunk + 2) * self.mtu)
+        
+        buffer = self._buffer
+        packets = []
+        offset = 0
+        position = 0
+        
+        while offset < total:
+            start = position
+            header_size = fixed + (qtable_size if offset == 0 else 0)
+            chunk = min(self.mtu - header_size, total - offset)
+            marker = offset + chunk >= total
+            
+            self._write_header(position, marker, timestamp)
+            position += RTP_HEADER_SIZE
+            _JPEG_HEADER.pack_into(buffer, position, 0, offset >> 16, offset & 0xFFFF,
+                                   info.type, 255, info.width // 8, info.height // 8)
+            position += JPEG_HEADER_SIZE
+            
+            if info.dri:
+                # F=1, L=1, 재시작 카운트 0x3FFF (전체 프레임을 하나의 구간으로 취급)
+                _RESTART_HEADER.pack_into(buffer, position, info.dri, 0xFFFF)
+                position += RESTART_HEADER_SIZE
+            
+            if offset == 0:
+                # Q=255: 첫 조각에 양자화 테이블 포함
+                _QTABLE_HEADER.pack_into(buffer, position, 0, 0, len(info.qtables))
+                position += QTABLE_HEADER_SIZE
+                buffer[position:position + len(info.qtables)] = info.qtables
+                position += len(info.qtables)
+            
+            buffer[position:position + chunk] = scan[offset:offset + chunk]
+            position += chunk
+            offset += chunk
+            
+            packets.append(self._view[start:position])
+            self.packet_count += 1
+            self.octet_count += position - start - RTP_HEADER_SIZE
+        
+        return packets
+
+class H264RtpPacketizer(RtpPacketizer):
+    """RFC 6184 RTP/H.264 패킷화 (packetization-mode=1)
+    
+    MTU에 들어가는 NAL 유닛은 단일 NAL 패킷으로, 큰 NAL 유닛은 FU-A로 나눕니다.
+    접근 단위(프레임)의 마지막 패킷에 마커 비트를 설정합니다.
+    """
+    
+    def __init__(self, mtu: int = 1400, ssrc: Optional[int] = None,
+                 payload_type: int = H264_PAYLOAD_TYPE):
+        super().__init__(payload_type, mtu, ssrc)
+    
+    def packetize_nals(self, nals: List[bytes], capture_time: float) -> List[memoryview]:
+        """접근 단위 하나(NAL 유닛 목록, 시작 코드 없음)를 RTP 패킷 목록으로 변환"""
+        timestamp = self.rtp_timestamp(capture_time)
+        self.last_timestamp = timestamp
+        self.last_capture_time = capture_time
+        
+        max_payload = self.mtu - RTP_HEADER_SIZE
+        max_chunk = max_payload - FU_HEADER_SIZE
+        if max_chunk <= 0:
+            return []
+        packet_count = sum(len(nal) // max_chunk + 1 for nal in nals)
+        self._ensure_capacity(sum(len(nal) for nal in nals) +
+                              packet_count * (RTP_HEADER_SIZE + FU_HEADER_SIZE))
+        
+        buffer = self._buffer
+        packets = []
+        position = 0
+        
+        for index, nal in enumerate(nals):
+            last_nal = index == len(nals) - 1
+            size = len(nal)
+            
+            if size <= max_payload:
+                # 단일 NAL 유닛 패킷
+                start = position
+                self._write_header(position, last_nal, timestamp)
+                position += RTP_HEADER_SIZE
+                buffer[position:position + size] = nal
+                position += size
+                packets.append(self._view[start:position])
+                self.packet_count += 1
+                self.octet_count += size
+                continue
+            
+            # FU-A: NAL 헤더의 F/NRI는 FU indicator로, 타입은 FU header로
+            indicator = (nal[0] & 0xE0) | FU_A_TYPE
+            nal_type = nal[0] & 0x1F
+            data = memoryview(nal)[1:]
+            total = size - 1
+            offset = 0
+            while offset < total:
+                chunk = min(max_chunk, total - offset)
+                end = offset + chunk >= total
+                start = position
+                self._write_header(position, last_nal and end, timestamp)
+                position += RTP_HEADER_SIZE
+                buffer[position] = indicator
+                buffer[position + 1] = (0x80 if offset == 0 else 0) | (0x40 if end else 0) | nal_type
+                position += FU_HEADER_SIZE
+                buffer[position:position + chunk] = data[offset:offset + chunk]
+                position += chunk
+                offset += chunk
+                packets.append(self._view[start:position])
+                self.packet_count += 1
+                self.octet_count += chunk + FU_HEADER_SIZE
+        
+        return packets
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import secrets
+import time
+from typing import Dict, List, Optional, Tuple, Union
+
+RTSP_VERSION = 'RTSP/1.0'
+
+SUPPORTED_METHODS = ('OPTIONS', 'DESCRIBE', 'SETUP', 'PLAY', 'PAUSE', 'TEARDOWN', 'GET_PARAMETER')
+
+STATUS_REASONS = {
+    200: 'OK',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    406: 'Not Acceptable',
+    453: 'Not Enough Bandwidth',
+    454: 'Session Not Found',
+    455: 'Method Not Valid in This State',
+    459: 'Aggregate Operation Not Allowed',
+    461: 'Unsupported Transport',
+    500: 'Internal Server Error',
+    501: 'Not Implemented',
+    503: 'Service Unavailable',
+    505: 'RTSP Version Not Supported'
+}
+
+class RTSPParseError(Exception):
+    """잘못된 RTSP 메시지"""
+    pass
+
+class RTSPRequest:
+    """RTSP 요청 (헤더 이름은 소문자로 보관)"""
+    
+    __slots__ = ('method', 'uri', 'version', 'headers', 'body')
+    
+    def __init__(self, method: str, uri: str, version: str, headers: Dict[str, str], body: bytes = b''):
+        self.method = method
+        self.uri = uri
+        self.version = version
+        self.headers = headers
+        self.body = body
+    
+    @property
+    def cseq(self) -> Optional[str]:
+        return self.headers.get('cseq')
+    
+    @property
+    def session_id(self) -> Optional[str]:
+        """Session 헤더의 세션 ID (;timeout 등 파라미터 제외)"""
+        session = self.headers.get('session')
+        if session is None:
+            return None
+        return session.split(';', 1)[0].strip()
+    
+    def __repr__(self) -> str:
+        return f"RTSPRequest({self.method} {self.uri} CSeq={self.cseq})"
+
+class InterleavedPacket:
+    """RTSP 연결로 들어온 인터리브 데이터 ($ 채널 프레이밍, RFC 2326 10.12)"""
+    
+    __slots__ = ('channel', 'data')
+    
+    def __init__(self, channel: int, data: bytes):
+        self.channel = channel
+        self.data = data
+
+class RTSPParser:
+    """증분 RTSP/1.0 요청 파서
+    
+    feed()에 받은 만큼의 바이트를 넣으면 완성된 요청(파이프라이닝 포함)과
+    인터리브 패킷을 순서대로 반환하고, 나머지는 다음 호출까지 보관합니다.
+    """
+    
+    def __init__(self, max_header_size: int = 8192, max_body_size: int = 65536):
+        self.max_header_size = max_header_size
+        self.max_body_size = max_body_size
+        self._buffer = bytearray()
+        # 헤더까지 읽고 본문을 기다리는 요청
+        self._pending: Optional[RTSPRequest] = None
+        self._pending_length = 0
+    
+    def feed(self, data: bytes) -> List[Union[RTSPRequest, InterleavedPacket]]:
+        """수신 데이터를 추가하고 완성된 메시지 목록 반환"""
+        self._buffer += data
+        messages: List[Union[RTSPRequest, InterleavedPacket]] = []
+        buffer = self._buffer
+        
+        while buffer:
+            # 본문 대기 중인 요청
+            if self._pending is not None:
+                if len(buffer) < self._pending_length:
+                    break
+                self._pending.body = bytes(buffer[:self._pending_length])
+                del buffer[:self._pending_length]
+                messages.append(self._pending)
+                self._pending = None
+                continue
+            
+            # 인터리브 바이너리 데이터
+            if buffer[0] == 0x24:  # '$'
+                if len(buffer) < 4:
+                    break
+                length = (buffer[2] << 8) | buffer[3]
+                if len(buffer) < 4 + length:
+                    break
+                messages.append(InterleavedPacket(buffer[1], bytes(buffer[4:4 + length])))
+                del buffer[:4 + length]
+                continue
+            
+            # 요청 사이의 빈 줄 무시
+            if buffer[:2] == b'\r\n':
+                del buffer[:2]
+                continue
+            if buffer[:1] == b'\n':
+                del buffer[:1]
+                continue
+            
+            end = buffer.find(b'\r\n\r\n')
+            if end < 0:
+                if len(buffer) > self.max_header_size:
+                    raise RTSPParseError("헤더가 너무 깁니다")
+                break
+            if end > self.max_header_size:
+                raise RTSPParseError("헤더가 너무 깁니다")
+            
+            request = self._parse_head(bytes(buffer[:end]))
+            del buffer[:end + 4]
+            
+            length = request.headers.get('content-length', '0')
+            try:
+                length = int(length)
+            except ValueError:
+                raise RTSPParseError(f"잘못된 Content-Length: {length}")
+            if length < 0 or length > self.max_body_size:
+                raise RTSPParseError(f"허용되지 않는 Content-Length: {length}")
+            
+            if length:
+                self._pending = request
+                self._pending_length = length
+            else:
+                messages.append(request)
+        
+        return messages
+    
+    @staticmethod
+    def _parse_head(head: bytes) -> RTSPRequest:
+        try:
+            text = head.decode('utf-8')
+        except UnicodeDecodeError:
+            raise RTSPParseError("UTF-8이 아닌 헤더")
+        
+        lines = text.split('\r\n')
+        parts = lines[0].split(' ')
+        if len(parts) != 3 or not parts[0] or not parts[1]:
+            raise RTSPParseError(f"잘못된 요청 줄: {lines[0]!r}")
+        method, uri, version = parts
+        if not version.startswith('RTSP/'):
+            raise RTSPParseError(f"RTSP 요청이 아닙니다: {version!r}")
+        
+        headers: Dict[str, str] = {}
+        last = None
+        for line in lines[1:]:
+            if line[:1] in (' ', '\t') and last is not None:
+                # 이어지는 헤더 줄
+                headers[last] += ' ' + line.strip()
+                continue
+            name, sep, value = line.partition(':')
+            if not sep or not name.strip():
+                raise RTSPParseError(f"잘못된 헤더 줄: {line!r}")
+            last = name.strip().lower()
+            headers[last] = value.strip()
+        
+        return RTSPRequest(method.upper(), uri, version, headers)
+
+def build_response(status: int, cseq: Optional[str], headers: Optional[Dict[str, str]] = None,
+                   body: bytes = b'') -> bytes:
+    """RTSP 응답 메시지 생성"""
+    lines = [f"{RTSP_VERSION} {status} {STATUS_REASONS.get(status, 'Unknown')}"]
+    if cseq is not None:
+        lines.append(f"CSeq: {cseq}")
+    for name, value in (headers or {}).items():
+        lines.append(f"{name}: {value}")
+    if body:
+        lines.append(f"Content-Length: {len(body)}")
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('utf-8') + body
+
+def parse_transport(value: str) -> List[Dict[str, str]]:
+    """Transport 헤더를 후보 목록으로 분석 (예: RTP/AVP/TCP;unicast;interleaved=0-1)"""
+    transports = []
+    for spec in value.split(','):
+        params = [p.strip() for p in spec.split(';') if p.strip()]
+        if not params:
+            continue
+        transport = {'protocol': params[0].upper()}
+        for param in params[1:]:
+            name, _, val = param.partition('=')
+            transport[name.strip().lower()] = val.strip()
+        transports.append(transport)
+    return transports
+
+def parse_port_range(value: str) -> Tuple[int, int]:
+    """'8000-8001' 형식의 포트/채널 범위 분석"""
+    first, _, second = value.partition('-')
+    first_port = int(first)
+    return first_port, int(second) if second else first_port + 1
+
+class RTSPSession:
+    """RTSP 세션 상태 머신 (RFC 2326 Appendix A.2)
+    
+    init --SETUP--> ready --PLAY--> playing --PAUSE--> ready
+    어느 상태에서든 TEARDOWN이면 init으로 돌아갑니다.
+    """
+    
+    INIT = 'init'
+    READY = 'ready'
+    PLAYING = 'playing'
+    
+    TRANSITIONS = {
+        (INIT, 'SETUP'): READY,
+        (READY, 'SETUP'): READY,
+        (READY, 'PLAY'): PLAYING,
+        (READY, 'PAUSE'): READY,
+        (READY, 'TEARDOWN'): INIT,
+        (PLAYING, 'SETUP'): PLAYING,
+        (PLAYING, 'PLAY'): PLAYING,
+        (PLAYING, 'PAUSE'): READY,
+        (PLAYING, 'TEARDOWN'): INIT
+    }
+    
+    def __init__(self, timeout: int = 60):
+        self.session_id = secrets.token_hex(8).upper()
+        self.timeout = timeout
+        self.state = self.INIT
+        self.transport: Dict[str, str] = {}
+        self.last_activity = time.time()
+    
+    @property
+    def header(self) -> str:
+        """응답에 넣을 Session 헤더 값"""
+        return f"{self.session_id};timeout={self.timeout}"
+    
+    def touch(self):
+        """요청 수신 시각 갱신 (keep-alive)"""
+        self.last_activity = time.time()
+    
+    def is_expired(self, now: Optional[float] = None) -> bool:
+        return ((now or time.time()) - self.last_activity) > self.timeout
+    
+    def can(self, method: str) -> bool:
+        """현재 상태에서 메서드가 허용되는지 여부"""
+        if method in ('OPTIONS', 'DESCRIBE', 'GET_PARAMETER'):
+            return True
+        return (self.state, method) in self.TRANSITIONS
+    
+    def apply(self, method: str) -> str:
+        """메서드에 따른 상태 전이 후 새 상태 반환"""
+        self.state = self.TRANSITIONS.get((self.state, method), self.state)
+        return self.state
+    
+    def reset(self):
+        """TEARDOWN 이후 새 세션 ID로 초기화"""
+        self.session_id = secrets.token_hex(8).upper()
+        self.state = self.INIT
+        self.transport = {}
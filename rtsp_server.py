@@ -1,62 +1,481 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import cv2
+import asyncio
 import numpy as np
 import threading
 import time
 import logging
+import select
 import socket
 import struct
-from typing import Dict, Optional, List
-from camera_manager import camera_manager
+from collections import deque
+from typing import Callable, Dict, Optional, List, Tuple
+from urllib.parse import urlsplit, parse_qsl
+from camera_manager import (camera_manager, DeliveryStats, FrameDecimator, parse_variant, scaled_size,
+                            variant_label)
 from config import config
+from rtp_packetizer import (RtpPacketizer, JpegRtpPacketizer, H264RtpPacketizer, JPEG_PAYLOAD_TYPE,
+                            H264_PAYLOAD_TYPE, parse_jpeg)
+from h264_encoder import H264EncodeStage, is_available as h264_available
+from rtcp import ReceiverStats, build_sender_report, build_bye, parse_rtcp
+from rtsp_protocol import (RTSPParser, RTSPParseError, RTSPRequest, RTSPSession, InterleavedPacket,
+                           SUPPORTED_METHODS, build_response, parse_transport, parse_port_range)
+
+class UdpPortPool:
+    """RTP/RTCP 서버 UDP 포트 쌍 할당 (RTP는 짝수, RTCP는 다음 홀수 포트)"""
+    
+    def __init__(self, host: str, first_port: int, last_port: int):
+        self.host = host
+        self.first_port = first_port + (first_port % 2)
+        self.last_port = last_port
+        self.in_use = set()
+        self._lock = threading.Lock()
+    
+    def allocate(self) -> Optional[Tuple[socket.socket, socket.socket]]:
+        """비어 있는 포트 쌍에 소켓을 바인드해 반환 (없으면 None)"""
+        with self._lock:
+            for port in range(self.first_port, self.last_port, 2):
+                if port in self.in_use:
+                    continue
+                rtp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                rtcp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                try:
+                    rtp_socket.bind((self.host, port))
+                    rtcp_socket.bind((self.host, port + 1))
+                except OSError:
+                    rtp_socket.close()
+                    rtcp_socket.close()
+                    continue
+                # 송신 버퍼가 차면 기다리지 않고 프레임을 버림 (RTCP는 논블로킹 수신)
+                rtp_socket.setblocking(False)
+                rtcp_socket.setblocking(False)
+                self.in_use.add(port)
+                return rtp_socket, rtcp_socket
+        return None
+    
+    def release(self, sockets: Tuple[socket.socket, socket.socket]):
+        rtp_socket, rtcp_socket = sockets
+        with self._lock:
+            try:
+                self.in_use.discard(rtp_socket.getsockname()[1])
+            except OSError:
+                pass
+        rtp_socket.close()
+        rtcp_socket.close()
+
+class FrameSendQueue:
+    """클라이언트별 유한 전송 큐
+    
+    프레임 단위(해당 프레임의 인터리브 패킷 전체)로 넣고 빼며, 큐가 가득 차거나
+    가장 오래된 프레임이 지연 예산을 넘으면 앞에서부터 프레임을 통째로 버립니다.
+    키프레임이 아닌 프레임이 남지 않도록 다음 키프레임까지 함께 버립니다.
+    """
+    
+    def __init__(self, max_frames: int = 15, latency_budget: float = 0.5,
+                 delivery: Optional[DeliveryStats] = None):
+        self.max_frames = max(1, max_frames)
+        self.latency_budget = latency_budget
+        self.delivery = delivery
+        # (데이터, 캡처 시각, 키프레임 여부 - 미디어가 아니면 None)
+        self._items: deque = deque()
+        self._bytes = 0
+        self._cond = threading.Condition()
+        self._closed = False
+        self._need_keyframe = False
+        self.sent_frames = 0
+        self.dropped_frames = 0
+    
+    def put(self, data: bytes, timestamp: float, keyframe: Optional[bool] = True):
+        """프레임 추가 (지연 예산 초과 시 오래된 프레임 폐기)"""
+        with self._cond:
+            if self._closed:
+                return
+            if keyframe is False and self._need_keyframe:
+                # 앞 키프레임이 버려졌으므로 다음 키프레임까지 의미 없음
+                self.dropped_frames += 1
+                return
+            if keyframe:
+                self._need_keyframe = False
+            
+            self._items.append((data, timestamp, keyframe))
+            self._bytes += len(data)
+            
+            now = time.time()
+            while len(self._items) > 1 and (len(self._items) > self.max_frames or
+                                            now - self._items[0][1] > self.latency_budget):
+                self._drop_head()
+                # 남은 맨 앞 항목이 키프레임이 아닌 미디어 프레임이면 계속 버림
+                while self._items and self._items[0][2] is False:
+                    self._drop_head()
+                if not self._items:
+                    self._need_keyframe = keyframe is False
+                    break
+            
+            self._cond.notify()
+    
+    def _drop_head(self):
+        data, _, keyframe = self._items.popleft()
+        self._bytes -= len(data)
+        if keyframe is not None:
+            self.dropped_frames += 1
+    
+    def get(self, timeout: Optional[float] = None) -> Optional[bytes]:
+        """다음 전송할 데이터 (타임아웃 또는 종료 시 None)"""
+        with self._cond:
+            if not self._items and not self._closed:
+                self._cond.wait(timeout)
+            if not self._items:
+                return None
+            data, timestamp, keyframe = self._items.popleft()
+            self._bytes -= len(data)
+            if keyframe is not None:
+                self.sent_frames += 1
+                if self.delivery is not None:
+                    self.delivery.record(timestamp)
+            return data
+    
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._items.clear()
+            self._bytes = 0
+            self._cond.notify_all()
+    
+    @property
+    def closed(self) -> bool:
+        return self._closed
+    
+    def get_stats(self) -> Dict:
+        return {
+            'queue_depth': len(self._items),
+            'queue_bytes': self._bytes,
+            'sent_frames': self.sent_frames,
+            'dropped_frames': self.dropped_frames
+        }
+
+class RTSPClient:
+    """RTSP 클라이언트 연결 (제어 채널 + 세션 + RTP 전송 상태)"""
+    
+    def __init__(self, client_socket: socket.socket, addr, session_timeout: int):
+        self.socket = client_socket
+        self.addr = addr
+        self.parser = RTSPParser()
+        self.session = RTSPSession(session_timeout)
+        self.packetizer: Optional[RtpPacketizer] = None
+        self.media_thread = None
+        # H.264: 첫 키프레임(또는 손실 이후 다음 키프레임)까지 프레임을 보내지 않음
+        self.need_keyframe = True
+        # 이 연결이 요청 URI로 연결된 스트림 (첫 DESCRIBE/SETUP 등에서 결정)
+        self.stream: Optional['RTSPStream'] = None
+        # 요청 URI 쿼리로 지정한 (크기, fps, 오버레이) 변형 (예: rtsp://host:8554/camera1?w=320&fps=5)
+        self.variant: Tuple = (None, None, None)
+        # 제어 응답과 RTP 데이터가 같은 소켓을 쓰므로 전송 직렬화
+        self.send_lock = threading.Lock()
+        
+        # 전송 방식: 'tcp' (인터리브) 또는 'udp'
+        self.transport = 'tcp'
+        self.rtp_channel = 0
+        self.rtcp_channel = 1
+        self.udp_ports: Optional[UdpPortPool] = None
+        self.udp_sockets: Optional[Tuple[socket.socket, socket.socket]] = None
+        self.rtp_address = None
+        self.rtcp_address = None
+        self.udp_dropped_frames = 0
+        
+        # RTCP 송신자/수신자 보고
+        self.receiver_stats = ReceiverStats()
+        self.last_sender_report = 0.0
+        
+        # 실제로 보낸 프레임의 FPS와 캡처부터의 지연
+        self.delivery = DeliveryStats()
+        
+        # TCP 인터리브 전송 큐와 전송 스레드 (느린 클라이언트가 캡처/인코딩을 막지 않도록)
+        self.send_queue = FrameSendQueue(config.rtsp_server.get('tcp_queue_frames', 15),
+                                         config.rtsp_server.get('tcp_latency_budget', 0.5), self.delivery)
+        self.writer_thread = None
+    
+    def send(self, data: bytes):
+        with self.send_lock:
+            self.socket.sendall(data)
+    
+    @staticmethod
+    def frame_interleaved(channel: int, packets: List[memoryview]) -> bytes:
+        """RTP/RTCP 패킷들을 $ 채널 프레이밍(RFC 2326 10.12)으로 묶음"""
+        chunks = []
+        for packet in packets:
+            chunks.append(struct.pack('!cBH', b'$', channel, len(packet)))
+            chunks.append(packet)
+        return b''.join(chunks)
+    
+    def send_rtp(self, packets: List[memoryview], timestamp: float, keyframe: bool = True):
+        """협상된 전송 방식으로 한 프레임의 RTP 패킷 전송"""
+        if self.transport == 'udp':
+            rtp_socket = self.udp_sockets[0]
+            try:
+                for packet in packets:
+                    # 패킷 버퍼를 복사 없이 그대로 데이터그램으로 전송
+                    rtp_socket.sendmsg([packet], [], 0, self.rtp_address)
+                self.delivery.record(timestamp)
+            except BlockingIOError:
+                # 소켓 송신 버퍼가 가득 참 - 프레임 나머지는 버림
+                self.udp_dropped_frames += 1
+                self.need_keyframe = True
+        else:
+            # 큐에 넣고 바로 반환 (실제 전송은 writer 스레드)
+            self.send_queue.put(self.frame_interleaved(self.rtp_channel, packets), timestamp, keyframe)
+    
+    def send_rtcp(self, data: bytes):
+        if self.transport == 'udp':
+            try:
+                self.udp_sockets[1].sendto(data, self.rtcp_address)
+            except BlockingIOError:
+                pass
+        else:
+            self.send_queue.put(self.frame_interleaved(self.rtcp_channel, [memoryview(data)]),
+                                time.time(), None)
+    
+    def start_writer(self):
+        """TCP 인터리브 전송 스레드 시작 (이미 실행 중이면 무시)"""
+        if self.transport != 'tcp' or (self.writer_thread and self.writer_thread.is_alive()):
+            return
+        self.writer_thread = threading.Thread(target=self._write_loop, daemon=True)
+        self.writer_thread.start()
+    
+    def _write_loop(self):
+        while not self.send_queue.closed:
+            data = self.send_queue.get(timeout=1.0)
+            if data is None:
+                continue
+            try:
+                # 블로킹 전송 - 느린 클라이언트를 기다리는 동안 큐가 지연 예산을 넘은 프레임을 버리고,
+                # 프레임은 통째로만 나가므로 $ 프레이밍이 중간에 끊기지 않음
+                self.send(data)
+            except OSError:
+                # 블로킹 소켓의 전송 오류는 연결 끊김(EPIPE/ECONNRESET)이나 close()뿐
+                self.send_queue.close()
+                break
+    
+    def handle_rtcp(self, data: bytes):
+        """클라이언트가 보낸 RTCP에서 수신자 보고 반영"""
+        ssrc = self.packetizer.ssrc if self.packetizer else None
+        for block in parse_rtcp(data):
+            if ssrc is None or block.ssrc == ssrc:
+                self.receiver_stats.update(block)
+                # UDP 재생 중에는 RTCP 수신도 세션 유지로 간주
+                self.session.touch()
+    
+    def poll_rtcp(self):
+        """UDP RTCP 소켓에 쌓인 수신자 보고 처리 (논블로킹)"""
+        if self.transport != 'udp' or self.udp_sockets is None:
+            return
+        while True:
+            try:
+                data = self.udp_sockets[1].recv(2048)
+            except (BlockingIOError, OSError):
+                return
+            self.handle_rtcp(data)
+    
+    def release_transport(self):
+        """UDP 포트 반환"""
+        if self.udp_sockets is not None and self.udp_ports is not None:
+            self.udp_ports.release(self.udp_sockets)
+        self.udp_sockets = None
+        self.transport = 'tcp'
+    
+    def get_status(self) -> Dict:
+        status = {
+            'address': f"{self.addr[0]}:{self.addr[1]}",
+            'state': self.session.state,
+            'transport': self.transport,
+            'variant': variant_label(*self.variant),
+            'packets_sent': self.packetizer.packet_count if self.packetizer else 0,
+            'octets_sent': self.packetizer.octet_count if self.packetizer else 0,
+            'receiver_report': self.receiver_stats.to_dict(),
+            'delivery': self.delivery.to_dict()
+        }
+        status.update(self.send_queue.get_stats())
+        if self.transport == 'udp' and self.udp_sockets is not None:
+            status['server_port'] = self.udp_sockets[0].getsockname()[1]
+            status['client_port'] = self.rtp_address[1]
+            status['dropped_frames'] = self.udp_dropped_frames
+        return status
+    
+    def close(self):
+        self.session.state = RTSPSession.INIT
+        self.send_queue.close()
+        self.release_transport()
+        try:
+            # sendall()에서 막힌 전송 스레드를 깨움 (close()만으로는 깨어나지 않음)
+            self.socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        try:
+            self.socket.close()
+        except:
+            pass
+
+def stream_path(uri: str) -> str:
+    """요청 URI에서 경로 부분 추출 (rtsp://host:port/camera1/trackID=0 -> /camera1/trackID=0)"""
+    if uri == '*':
+        return '*'
+    path = urlsplit(uri).path if '://' in uri else uri
+    return path or '/'
+
+def stream_variant(uri: str) -> Optional[Tuple]:
+    """요청 URI 쿼리의 (크기, fps, 오버레이) 변형 - 쿼리가 없으면 None, 잘못된 값은 ValueError
+    
+    클라이언트가 Content-Base 뒤에 트랙 경로를 붙이므로 (camera1?w=320/trackID=0)
+    쿼리에서 첫 '/' 이후는 무시합니다.
+    """
+    query = urlsplit(uri).query.split('/', 1)[0]
+    if not query:
+        return None
+    return parse_variant(dict(parse_qsl(query)))
+
+def dispatch_messages(client: 'RTSPClient', messages: list, route: Callable[[str], Optional['RTSPStream']]):
+    """파싱된 RTSP 요청/인터리브 데이터를 처리 (스레드/asyncio 서버 공용)
+    
+    요청마다 route(URI)로 대상 스트림을 찾고, 처음 찾은 스트림에 연결을 묶습니다.
+    이후 다른 스트림을 가리키는 요청은 459 (Aggregate Operation Not Allowed)로 거절합니다.
+    """
+    for message in messages:
+        if isinstance(message, InterleavedPacket):
+            if message.channel == client.rtcp_channel:
+                client.handle_rtcp(message.data)
+            continue
+        client.session.touch()
+        
+        stream = route(message.uri)
+        if client.stream is None:
+            if stream is None:
+                # 스트림과 무관한 OPTIONS * 등
+                status = 200 if message.method == 'OPTIONS' else 404
+                headers = {'Public': ', '.join(SUPPORTED_METHODS)} if status == 200 else {}
+                client.send(build_response(status, message.cseq, headers))
+                continue
+            client.stream = stream
+            stream.clients.append(client)
+        elif stream is not None and stream is not client.stream:
+            client.send(build_response(459, message.cseq))
+            continue
+        
+        stream = client.stream
+        client.send(stream._handle_request(client, message))
+        if message.method == 'PLAY' and client.session.state == RTSPSession.PLAYING:
+            stream._start_media(client)
+
+def serve_connection(client_socket: socket.socket, addr,
+                     route: Callable[[str], Optional['RTSPStream']], logger: logging.Logger):
+    """RTSP 제어 연결 하나를 처리 (연결당 스레드 방식)"""
+    client = RTSPClient(client_socket, addr, config.rtsp_server.get('timeout', 60))
+    
+    try:
+        # 소켓은 블로킹으로 둠 (시간 제한을 걸면 전송 스레드의 sendall()도 느린 클라이언트에서
+        # 시간 초과로 끊김) - 수신은 select로 1초마다 깨어나 세션 만료를 확인
+        client_socket.settimeout(None)
+        while client.stream is None or client.stream.is_streaming:
+            readable, _, _ = select.select([client_socket], [], [], 1.0)
+            if not readable:
+                # TCP로 재생 중이면 미디어 전송 자체가 연결 유지 역할을 함
+                playing_tcp = client.session.state == RTSPSession.PLAYING and client.transport == 'tcp'
+                if not playing_tcp and client.session.is_expired():
+                    logger.info(f"세션 시간 초과: {addr}")
+                    break
+                continue
+            data = client_socket.recv(4096)
+            if not data:
+                break
+            
+            try:
+                messages = client.parser.feed(data)
+            except RTSPParseError as e:
+                logger.warning(f"잘못된 RTSP 요청 ({addr}): {e}")
+                client.send(build_response(400, None))
+                break
+            
+            dispatch_messages(client, messages, route)
+        
+    except Exception as e:
+        if client.stream is None or client.stream.is_streaming:
+            logger.error(f"클라이언트 처리 오류: {e}")
+    finally:
+        # 클라이언트 정리
+        if client.stream is not None and client in client.stream.clients:
+            client.stream.clients.remove(client)
+        client.close()
+        logger.info(f"클라이언트 연결 종료: {addr}")
 
 class RTSPStream:
-    """개별 RTSP 스트림을 관리하는 클래스"""
+    """개별 RTSP 스트림(카메라 하나)을 관리하는 클래스
+    
+    클라이언트는 보통 RTSPServer의 단일 포트에서 경로로 연결되며,
+    alias=True이면 카메라별 rtsp_port에서도 직접 받습니다 (기존 클라이언트 호환).
+    """
     
-    def __init__(self, camera_id: str, rtsp_config: Dict):
+    def __init__(self, camera_id: str, rtsp_config: Dict, udp_ports: Optional[UdpPortPool] = None):
         self.camera_id = camera_id
         self.config = rtsp_config
+        self.udp_ports = udp_ports
         self.is_streaming = False
-        self.clients: List[socket.socket] = []
+        self.clients: List[RTSPClient] = []
         self.stream_thread = None
         self.logger = logging.getLogger(f"RTSPStream_{camera_id}")
+        self.path = '/' + rtsp_config.get('rtsp_path', f'/{camera_id}').strip('/')
+        
+        # RTP 코덱: 'jpeg' (RFC 2435) 또는 'h264' (RFC 6184, PyAV 필요)
+        self.codec = rtsp_config.get('codec', 'jpeg')
+        if self.codec == 'h264' and not h264_available():
+            self.logger.warning("PyAV가 없어 H.264 대신 JPEG로 전송합니다")
+            self.codec = 'jpeg'
         
-        # RTSP 서버 소켓
+        # 카메라별 별칭 포트 서버 소켓
         self.server_socket = None
         self.port = rtsp_config.get('rtsp_port', 8554)
+        self.alias = False
         
-    def start(self) -> bool:
-        """RTSP 스트림 시작"""
+    def start(self, alias: bool = False) -> bool:
+        """RTSP 스트림 시작 (alias=True이면 카메라별 포트도 열기)"""
         try:
-            # RTSP 서버 소켓 생성
-            self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            self.server_socket.bind(('0.0.0.0', self.port))
-            self.server_socket.listen(5)
+            if alias:
+                # RTSP 서버 소켓 생성
+                self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                self.server_socket.bind((config.rtsp_server.get('host', '0.0.0.0'), self.port))
+                self.server_socket.listen(5)
+                self.alias = True
             
-            self.is_streaming = True
-            self.stream_thread = threading.Thread(target=self._stream_loop, daemon=True)
-            self.stream_thread.start()
+            if self.udp_ports is None:
+                first_port, last_port = config.rtsp_server.get('udp_port_range', (6970, 6999))
+                self.udp_ports = UdpPortPool(config.rtsp_server.get('host', '0.0.0.0'), first_port, last_port)
             
-            self.logger.info(f"RTSP 스트림 {self.camera_id} 시작됨 (포트: {self.port})")
+            self.is_streaming = True
+            if self.alias:
+                self.stream_thread = threading.Thread(target=self._stream_loop, daemon=True)
+                self.stream_thread.start()
+                self.logger.info(f"RTSP 스트림 {self.camera_id} 시작됨 (경로: {self.path}, 별칭 포트: {self.port})")
+            else:
+                self.logger.info(f"RTSP 스트림 {self.camera_id} 시작됨 (경로: {self.path})")
             return True
             
         except Exception as e:
             self.logger.error(f"RTSP 스트림 시작 실패: {e}")
+            if self.server_socket:
+                self.server_socket.close()
+                self.server_socket = None
             return False
     
+    def matches(self, path: str) -> bool:
+        """요청 경로가 이 스트림(또는 그 하위 트랙)을 가리키는지 여부"""
+        return path == self.path or path.startswith(self.path + '/')
+    
     def stop(self):
         """RTSP 스트림 중지"""
         self.is_streaming = False
         
         # 클라이언트 연결 종료
-        for client in self.clients:
-            try:
-                client.close()
-            except:
-                pass
+        for client in list(self.clients):
+            client.close()
         self.clients.clear()
         
         # 서버 소켓 종료
@@ -95,95 +514,173 @@ class RTSPStream:
                 break
     
     def _handle_client(self, client_socket: socket.socket, addr):
-        """클라이언트 연결 처리"""
+        """별칭 포트로 들어온 연결 처리 (요청 경로와 무관하게 이 스트림으로 연결)"""
+        serve_connection(client_socket, addr, lambda uri: self, self.logger)
+    
+    def _handle_request(self, client: RTSPClient, request: RTSPRequest) -> bytes:
+        """RTSP 요청 하나를 처리하고 응답 메시지 반환"""
+        cseq = request.cseq
+        if cseq is None:
+            return build_response(400, None)
+        if request.version != 'RTSP/1.0':
+            return build_response(505, cseq)
+        if request.method not in SUPPORTED_METHODS:
+            return build_response(501, cseq, {'Public': ', '.join(SUPPORTED_METHODS)})
+        
+        session = client.session
+        if request.method not in ('OPTIONS', 'DESCRIBE'):
+            if request.session_id is not None and request.session_id != session.session_id:
+                return build_response(454, cseq)
+        if not session.can(request.method):
+            return build_response(455, cseq, {'Allow': ', '.join(self._allowed_methods(session))})
+        if request.method in ('DESCRIBE', 'SETUP'):
+            try:
+                variant = stream_variant(request.uri)
+            except ValueError as e:
+                self.logger.warning(f"잘못된 변형 요청 ({request.uri}): {e}")
+                return build_response(400, cseq)
+            if variant is not None and client.session.state == RTSPSession.INIT:
+                client.variant = variant
+        
+        handler = getattr(self, f"_on_{request.method.lower()}")
         try:
-            # RTSP 핸드셰이크
-            if not self._rtsp_handshake(client_socket):
-                return
-            
-            # 클라이언트 목록에 추가
-            self.clients.append(client_socket)
-            
-            # RTP 스트리밍 시작
-            self._rtp_stream(client_socket)
-            
+            status, headers, body = handler(client, request)
         except Exception as e:
-            self.logger.error(f"클라이언트 처리 오류: {e}")
-        finally:
-            # 클라이언트 정리
-            if client_socket in self.clients:
-                self.clients.remove(client_socket)
+            self.logger.error(f"{request.method} 처리 오류: {e}")
+            return build_response(500, cseq)
+        return build_response(status, cseq, headers, body)
+    
+    @staticmethod
+    def _allowed_methods(session: RTSPSession) -> List[str]:
+        return [method for method in SUPPORTED_METHODS if session.can(method)]
+    
+    def _on_options(self, client: RTSPClient, request: RTSPRequest) -> Tuple[int, Dict, bytes]:
+        return 200, {'Public': ', '.join(SUPPORTED_METHODS)}, b''
+    
+    def _on_describe(self, client: RTSPClient, request: RTSPRequest) -> Tuple[int, Dict, bytes]:
+        accept = request.headers.get('accept')
+        if accept and 'application/sdp' not in accept and '*/*' not in accept:
+            return 406, {}, b''
+        sdp = self._generate_sdp(client.variant).encode('utf-8')
+        headers = {
+            'Content-Base': request.uri.rstrip('/') + '/',
+            'Content-Type': 'application/sdp'
+        }
+        return 200, headers, sdp
+    
+    def _on_setup(self, client: RTSPClient, request: RTSPRequest) -> Tuple[int, Dict, bytes]:
+        if client.packetizer is None:
+            mtu = config.rtsp_server.get('mtu', 1400)
+            client.packetizer = H264RtpPacketizer(mtu) if self.codec == 'h264' else JpegRtpPacketizer(mtu)
+        transport = self._negotiate_transport(client, request.headers.get('transport', ''))
+        if transport is None:
+            return 461, {}, b''
+        
+        session = client.session
+        session.transport = transport
+        session.apply('SETUP')
+        return 200, {'Transport': transport['header'], 'Session': session.header}, b''
+    
+    def _negotiate_transport(self, client: RTSPClient, value: str) -> Optional[Dict]:
+        """클라이언트가 제시한 Transport 중 지원하는 첫 번째 선택 (UDP 유니캐스트 / TCP 인터리브)"""
+        for transport in parse_transport(value):
+            if 'multicast' in transport:
+                continue
             try:
-                client_socket.close()
-            except:
+                if transport['protocol'] == 'RTP/AVP/TCP':
+                    rtp, rtcp = parse_port_range(transport.get('interleaved', '0-1'))
+                    if not (0 <= rtp <= 255 and 0 <= rtcp <= 255):
+                        continue
+                    client.release_transport()
+                    client.rtp_channel, client.rtcp_channel = rtp, rtcp
+                    transport['header'] = f"RTP/AVP/TCP;unicast;interleaved={rtp}-{rtcp}"
+                    return transport
+                
+                if transport['protocol'] in ('RTP/AVP', 'RTP/AVP/UDP') and 'client_port' in transport:
+                    rtp_port, rtcp_port = parse_port_range(transport['client_port'])
+                    if client.udp_sockets is None:
+                        client.udp_sockets = self.udp_ports.allocate()
+                        if client.udp_sockets is None:
+                            self.logger.warning("사용 가능한 UDP 포트가 없습니다")
+                            continue
+                        client.udp_ports = self.udp_ports
+                    client.transport = 'udp'
+                    client.rtp_address = (client.addr[0], rtp_port)
+                    client.rtcp_address = (client.addr[0], rtcp_port)
+                    server_port = client.udp_sockets[0].getsockname()[1]
+                    ssrc = client.packetizer.ssrc if client.packetizer else 0
+                    transport['header'] = (f"RTP/AVP;unicast;client_port={rtp_port}-{rtcp_port};"
+                                           f"server_port={server_port}-{server_port + 1};ssrc={ssrc:08X}")
+                    return transport
+            except ValueError:
+                continue
+        return None
+    
+    def _on_play(self, client: RTSPClient, request: RTSPRequest) -> Tuple[int, Dict, bytes]:
+        session = client.session
+        session.apply('PLAY')
+        packetizer = client.packetizer
+        headers = {
+            'Session': session.header,
+            'Range': 'npt=0.000-',
+            'RTP-Info': (f"url={request.uri};seq={packetizer.sequence};"
+                         f"rtptime={packetizer.rtp_timestamp(time.time())}")
+        }
+        return 200, headers, b''
+    
+    def _on_pause(self, client: RTSPClient, request: RTSPRequest) -> Tuple[int, Dict, bytes]:
+        client.session.apply('PAUSE')
+        return 200, {'Session': client.session.header}, b''
+    
+    def _on_teardown(self, client: RTSPClient, request: RTSPRequest) -> Tuple[int, Dict, bytes]:
+        session = client.session
+        headers = {'Session': session.session_id}
+        session.apply('TEARDOWN')
+        session.reset()
+        if client.packetizer is not None:
+            try:
+                client.send_rtcp(build_bye(client.packetizer.ssrc))
+            except OSError:
                 pass
-            self.logger.info(f"클라이언트 연결 종료: {addr}")
+        client.release_transport()
+        client.packetizer = None
+        return 200, headers, b''
     
-    def _rtsp_handshake(self, client_socket: socket.socket) -> bool:
-        """RTSP 핸드셰이크 수행"""
-        try:
-            # RTSP 요청 수신
-            request = client_socket.recv(1024).decode('utf-8')
-            if not request:
-                return False
-            
-            # OPTIONS 요청에 대한 응답
-            if 'OPTIONS' in request:
-                response = (
-                    'RTSP/1.0 200 OK\r\n'
-                    'CSeq: 1\r\n'
-                    'Public: DESCRIBE, SETUP, PLAY, PAUSE, TEARDOWN\r\n'
-                    '\r\n'
-                )
-                client_socket.send(response.encode('utf-8'))
-            
-            # DESCRIBE 요청에 대한 응답
-            elif 'DESCRIBE' in request:
-                sdp = self._generate_sdp()
-                response = (
-                    'RTSP/1.0 200 OK\r\n'
-                    'CSeq: 2\r\n'
-                    'Content-Type: application/sdp\r\n'
-                    f'Content-Length: {len(sdp)}\r\n'
-                    '\r\n'
-                    f'{sdp}'
-                )
-                client_socket.send(response.encode('utf-8'))
-            
-            # SETUP 요청에 대한 응답
-            elif 'SETUP' in request:
-                response = (
-                    'RTSP/1.0 200 OK\r\n'
-                    'CSeq: 3\r\n'
-                    'Transport: RTP/AVP;unicast;client_port=8000-8001;server_port=8002-8003\r\n'
-                    'Session: 12345678\r\n'
-                    '\r\n'
-                )
-                client_socket.send(response.encode('utf-8'))
-            
-            # PLAY 요청에 대한 응답
-            elif 'PLAY' in request:
-                response = (
-                    'RTSP/1.0 200 OK\r\n'
-                    'CSeq: 4\r\n'
-                    'Session: 12345678\r\n'
-                    'Range: npt=0.000-\r\n'
-                    '\r\n'
-                )
-                client_socket.send(response.encode('utf-8'))
-                return True
-            
-            return True
-            
-        except Exception as e:
-            self.logger.error(f"RTSP 핸드셰이크 실패: {e}")
-            return False
+    def _on_get_parameter(self, client: RTSPClient, request: RTSPRequest) -> Tuple[int, Dict, bytes]:
+        # 본문 없는 GET_PARAMETER는 keep-alive 용도
+        headers = {'Session': client.session.header} if client.session.state != RTSPSession.INIT else {}
+        return 200, headers, b''
     
-    def _generate_sdp(self) -> str:
-        """SDP (Session Description Protocol) 생성"""
+    def _start_media(self, client: RTSPClient):
+        """PLAY 이후 RTP 전송 스레드 시작 (이미 실행 중이면 무시)"""
+        if client.media_thread and client.media_thread.is_alive():
+            return
+        client.start_writer()
+        client.media_thread = threading.Thread(target=self._rtp_stream, args=(client,), daemon=True)
+        client.media_thread.start()
+    
+    def _generate_sdp(self, variant: Tuple = (None, None, None)) -> str:
+        """SDP (Session Description Protocol) 생성 (변형의 크기/fps 반영)"""
         camera_config = config.get_camera_config(self.camera_id)
         width, height = camera_config['resolution']
         fps = camera_config['fps']
+        size, variant_fps = variant[:2]
+        if size is not None:
+            width, height = scaled_size((width, height), *size) or (width, height)
+        if variant_fps:
+            fps = min(fps, variant_fps)
+        
+        if self.codec == 'h264':
+            media = (
+                f'm=video 0 RTP/AVP {H264_PAYLOAD_TYPE}\r\n'
+                f'a=rtpmap:{H264_PAYLOAD_TYPE} H264/90000\r\n'
+                f'a=fmtp:{H264_PAYLOAD_TYPE} {self._h264_fmtp(variant)}\r\n'
+            )
+        else:
+            media = (
+                f'm=video 0 RTP/AVP {JPEG_PAYLOAD_TYPE}\r\n'
+                f'a=rtpmap:{JPEG_PAYLOAD_TYPE} JPEG/90000\r\n'
+            )
         
         sdp = (
             'v=0\r\n'
@@ -191,90 +688,195 @@ class RTSPStream:
             's=RTSP Camera Stream\r\n'
             'c=IN IP4 0.0.0.0\r\n'
             't=0 0\r\n'
-            f'm=video 0 RTP/AVP 96\r\n'
-            'a=rtpmap:96 H264/90000\r\n'
-            f'a=framerate:{fps}\r\n'
+            'a=control:*\r\n'
+            f'{media}'
+            'a=control:trackID=0\r\n'
+            f'a=framerate:{fps:g}\r\n'
             f'a=resolution:{width}x{height}\r\n'
         )
         return sdp
     
-    def _rtp_stream(self, client_socket: socket.socket):
-        """RTP 스트리밍 수행"""
+    # SPS/PPS를 아직 모를 때 DESCRIBE가 인코더 시작을 기다리는 최대 시간 (초)
+    sdp_wait = 3.0
+    
+    def _h264_fmtp(self, variant: Tuple = (None, None, None)) -> str:
+        """H.264 fmtp 파라미터 (SPS/PPS를 모르면 대역 내 전송에 맡김)"""
+        fmtp = 'packetization-mode=1'
+        stage = self._h264_stage(variant)
+        if stage is None:
+            return fmtp
+        # 잠시 구독해 인코더를 깨움 (linger 동안 유지되어 곧 올 SETUP/PLAY에 재사용)
+        stage.subscribe()
         try:
-            while self.is_streaming and client_socket in self.clients:
-                # 카메라에서 프레임 가져오기
-                frame = camera_manager.get_camera_frame(self.camera_id)
-                if frame is None:
-                    time.sleep(0.033)  # 30 FPS
-                    continue
-                
-                # 프레임을 JPEG로 인코딩
-                ret, jpeg_data = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 80])
-                if not ret:
+            parameter_sets = stage.wait_parameter_sets(self.sdp_wait)
+        finally:
+            stage.unsubscribe()
+        if parameter_sets is not None:
+            profile_level_id, sprop = parameter_sets
+            fmtp += f';profile-level-id={profile_level_id};sprop-parameter-sets={sprop}'
+        return fmtp
+    
+    def _h264_stage(self, variant: Tuple = (None, None, None)) -> Optional[H264EncodeStage]:
+        if self.codec != 'h264':
+            return None
+        camera = camera_manager.get_camera(self.camera_id)
+        return camera.get_h264_stage(*variant) if camera else None
+    
+    def _next_unit(self, stage: Optional[H264EncodeStage], last_seq: int, variant: Tuple = (None, None, None),
+                   decimator: Optional[FrameDecimator] = None) -> Optional[Tuple]:
+        """다음 미디어 단위 (seq, 캡처 시각, 페이로드, 키프레임 여부) - 없으면 None
+        
+        JPEG은 카메라 링 버퍼의 최신 프레임(변형 크기로 공유 인코딩 + RFC 2435 분석),
+        H.264는 인코딩 단계의 다음 접근 단위를 순서대로 반환합니다. 둘 다 새 프레임이 들어오면
+        바로 깨어나므로 호출하는 쪽은 따로 쉬지 않습니다 (카메라가 멈춰 있을 때만 잠시 대기).
+        decimator가 건너뛴 JPEG 프레임은 페이로드 None으로 반환합니다.
+        """
+        if stage is not None:
+            unit = stage.wait_next(last_seq, timeout=1.0)
+            return None if unit is None else (unit.seq, unit.timestamp, unit.nals, unit.keyframe)
+        
+        camera = camera_manager.get_camera(self.camera_id)
+        entry = camera.wait_frame(last_seq, timeout=1.0) if camera else None
+        if entry is None:
+            if camera is None or not camera.is_running:
+                # 멈춘 카메라의 wait_frame은 바로 반환하므로 다시 켜질 때까지 천천히 확인
+                time.sleep(0.1)
+            return None
+        if decimator is not None and not decimator.accept(entry.timestamp):
+            return entry.seq, entry.timestamp, None, True
+        
+        # 카메라에서 JPEG 프레임 가져오기 (같은 변형을 보는 다른 소비자와 인코딩 공유)
+        jpeg_data = camera.encode_frame(entry, 80, size=variant[0], overlay=variant[2])
+        info = parse_jpeg(jpeg_data) if jpeg_data is not None else None
+        if info is None and jpeg_data is not None:
+            self.logger.warning("RFC 2435로 전송할 수 없는 JPEG 형식입니다")
+        return entry.seq, entry.timestamp, info, True
+    
+    def _send_unit(self, client: RTSPClient, unit: Tuple) -> bool:
+        """미디어 단위 하나를 RTP로 패킷화해 전송 (키프레임을 기다리는 중이면 건너뜀)"""
+        _, timestamp, payload, keyframe = unit
+        packetizer = client.packetizer
+        if payload is None or packetizer is None:
+            return False
+        if not keyframe and client.need_keyframe:
+            return False
+        
+        started = time.perf_counter()
+        if self.codec == 'h264':
+            packets = packetizer.packetize_nals(payload, timestamp)
+        else:
+            packets = packetizer.packetize_info(payload, timestamp)
+        camera = camera_manager.get_camera(self.camera_id)
+        if camera is not None:
+            camera.latency.record('packetize', time.perf_counter() - started)
+            # 소켓에 넘길 때 카메라 전체 'send' 단계에도 기록
+            client.delivery.pipeline = camera.latency
+        if not packets:
+            return False
+        client.need_keyframe = False
+        client.send_rtp(packets, timestamp, keyframe)
+        self._send_rtcp(client, packetizer)
+        return True
+    
+    def _rtp_stream(self, client: RTSPClient):
+        """RTP 스트리밍 수행 (JPEG 또는 H.264 패킷화, UDP 또는 인터리브 전송)"""
+        # 온디맨드 카메라는 첫 시청자가 장치를 열고 마지막 시청자가 떠나면 해제
+        if not camera_manager.subscribe(self.camera_id, 'rtsp'):
+            self.logger.error(f"카메라 {self.camera_id}를 시작할 수 없습니다")
+            return
+        stage = self._h264_stage(client.variant)
+        if stage is not None:
+            stage.subscribe()
+            stage.request_keyframe()
+        decimator = FrameDecimator(client.variant[1])
+        last_seq = 0
+        try:
+            while (self.is_streaming and client in self.clients
+                   and client.session.state == RTSPSession.PLAYING):
+                # 새 프레임(또는 접근 단위)이 들어오는 즉시 깨어남 - 고정 간격으로 쉬지 않음
+                unit = self._next_unit(stage, last_seq, client.variant, decimator)
+                if unit is None:
                     continue
+                if stage is not None and unit[0] != last_seq + 1 and not client.need_keyframe:
+                    # 인코딩 출력을 놓침 - 다음 키프레임부터 다시 전송
+                    client.need_keyframe = True
+                    stage.request_keyframe()
+                last_seq = unit[0]
                 
-                # RTP 패킷 생성 및 전송
-                rtp_packet = self._create_rtp_packet(jpeg_data.tobytes())
                 try:
-                    client_socket.send(rtp_packet)
+                    self._send_unit(client, unit)
                 except:
                     break
-                
-                time.sleep(0.033)  # 30 FPS
-                
         except Exception as e:
             self.logger.error(f"RTP 스트리밍 오류: {e}")
+        finally:
+            if stage is not None:
+                stage.unsubscribe()
+            camera_manager.unsubscribe(self.camera_id, 'rtsp')
     
-    def _create_rtp_packet(self, payload: bytes) -> bytes:
-        """RTP 패킷 생성"""
-        # RTP 헤더 (12바이트)
-        version = 2
-        padding = 0
-        extension = 0
-        cc = 0
-        marker = 0
-        payload_type = 96  # JPEG
-        
-        # 시퀀스 번호와 타임스탬프는 간단하게 처리
-        sequence_number = 0
-        timestamp = int(time.time() * 90000)  # 90kHz 클럭
-        ssrc = 0x12345678
-        
-        # RTP 헤더 구성
-        first_byte = (version << 6) | (padding << 5) | (extension << 4) | cc
-        second_byte = (marker << 7) | payload_type
-        
-        header = struct.pack('!BBHII', first_byte, second_byte, sequence_number, timestamp, ssrc)
-        
-        return header + payload
+    def _send_rtcp(self, client: RTSPClient, packetizer: RtpPacketizer):
+        """수신자 보고를 처리하고 주기적으로 송신자 보고(SR) 전송"""
+        client.poll_rtcp()
+        now = time.time()
+        if now - client.last_sender_report < config.rtsp_server.get('rtcp_interval', 5):
+            return
+        client.last_sender_report = now
+        report = build_sender_report(packetizer.ssrc, now, packetizer.rtp_timestamp(now),
+                                     packetizer.packet_count, packetizer.octet_count,
+                                     f"rtsp-camera@{self.camera_id}")
+        client.send_rtcp(report)
     
     def get_status(self) -> Dict:
         """스트림 상태 정보 반환"""
         return {
             'camera_id': self.camera_id,
-            'port': self.port,
+            'port': config.rtsp_server.get('base_port', 8554),
+            'path': self.path,
+            'alias_port': self.port if self.alias else None,
             'is_streaming': self.is_streaming,
             'client_count': len(self.clients),
-            'rtsp_url': f"rtsp://localhost:{self.port}{self.config.get('rtsp_path', '')}"
+            'clients': [client.get_status() for client in list(self.clients)],
+            'rtsp_url': f"rtsp://localhost:{config.rtsp_server.get('base_port', 8554)}{self.path}"
         }
 
 class RTSPServer:
-    """RTSP 서버 메인 클래스"""
+    """RTSP 서버 메인 클래스
+    
+    하나의 포트(base_port, 기본 8554)에서 모든 카메라를 받아
+    rtsp://host:8554/camera1 처럼 요청 경로로 카메라를 구분합니다.
+    """
     
     def __init__(self):
         self.streams: Dict[str, RTSPStream] = {}
         self.is_running = False
+        self.udp_ports: Optional[UdpPortPool] = None
+        self.server_socket = None
+        self.accept_thread = None
         self.logger = logging.getLogger("RTSPServer")
         
     def start(self) -> bool:
         """RTSP 서버 시작"""
         try:
+            # 모든 스트림이 공유하는 UDP 포트 풀
+            if self.udp_ports is None:
+                first_port, last_port = config.rtsp_server.get('udp_port_range', (6970, 6999))
+                self.udp_ports = UdpPortPool(config.rtsp_server.get('host', '0.0.0.0'), first_port, last_port)
+            
+            # 단일 RTSP 리스너
+            if self.server_socket is None:
+                port = config.rtsp_server.get('base_port', 8554)
+                self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                self.server_socket.bind((config.rtsp_server.get('host', '0.0.0.0'), port))
+                self.server_socket.listen(config.rtsp_server.get('max_clients', 10))
+                self.is_running = True
+                self.accept_thread = threading.Thread(target=self._accept_loop, daemon=True)
+                self.accept_thread.start()
+                self.logger.info(f"RTSP 리스너 시작됨 (포트: {port})")
+            
             # 활성화된 카메라들에 대해 RTSP 스트림 시작
             for camera_id in config.get_enabled_cameras():
-                camera_config = config.get_camera_config(camera_id)
-                stream = RTSPStream(camera_id, camera_config)
-                if stream.start():
-                    self.streams[camera_id] = stream
+                self.start_stream(camera_id)
             
             self.is_running = len(self.streams) > 0
             self.logger.info(f"RTSP 서버 시작됨 - {len(self.streams)}개 스트림")
@@ -286,12 +888,43 @@ class RTSPServer:
     
     def stop(self):
         """RTSP 서버 중지"""
+        self.is_running = False
+        if self.server_socket:
+            try:
+                self.server_socket.close()
+            except:
+                pass
+            self.server_socket = None
+        if self.accept_thread and self.accept_thread.is_alive():
+            self.accept_thread.join(timeout=2)
+        
         for stream in self.streams.values():
             stream.stop()
         self.streams.clear()
-        self.is_running = False
         self.logger.info("RTSP 서버 중지됨")
     
+    def _accept_loop(self):
+        """단일 포트 연결 수락 루프"""
+        while self.server_socket is not None:
+            try:
+                client_socket, addr = self.server_socket.accept()
+                self.logger.info(f"클라이언트 연결됨: {addr}")
+                threading.Thread(target=serve_connection,
+                                 args=(client_socket, addr, self.route, self.logger),
+                                 daemon=True).start()
+            except Exception as e:
+                if self.server_socket is not None:
+                    self.logger.error(f"클라이언트 연결 오류: {e}")
+                break
+    
+    def route(self, uri: str) -> Optional[RTSPStream]:
+        """요청 URI 경로에 해당하는 스트림 반환"""
+        path = stream_path(uri)
+        for stream in list(self.streams.values()):
+            if stream.matches(path):
+                return stream
+        return None
+    
     def start_stream(self, camera_id: str) -> bool:
         """특정 카메라의 RTSP 스트림 시작"""
         if camera_id in self.streams:
@@ -301,11 +934,19 @@ class RTSPServer:
         if not camera_config:
             return False
         
-        stream = RTSPStream(camera_id, camera_config)
-        if stream.start():
-            self.streams[camera_id] = stream
-            return True
-        return False
+        # 단일 포트와 겹치지 않는 카메라별 포트는 별칭으로 유지
+        alias = (config.rtsp_server.get('port_aliases', True)
+                 and camera_config.get('rtsp_port', 0) != config.rtsp_server.get('base_port', 8554))
+        stream = self._create_stream(camera_id, camera_config)
+        if not stream.start(alias=alias):
+            # 별칭 포트를 열 수 없으면 단일 포트로만 제공
+            if not alias or not stream.start():
+                return False
+        self.streams[camera_id] = stream
+        return True
+    
+    def _create_stream(self, camera_id: str, camera_config: Dict) -> RTSPStream:
+        return RTSPStream(camera_id, camera_config, self.udp_ports)
     
     def stop_stream(self, camera_id: str):
         """특정 카메라의 RTSP 스트림 중지"""
@@ -334,5 +975,432 @@ class RTSPServer:
             urls[camera_id] = status['rtsp_url']
         return urls
 
-# 전역 RTSP 서버 인스턴스
-rtsp_server = RTSPServer()
+class AsyncRTSPClient(RTSPClient):
+    """이벤트 루프에서 처리되는 RTSP 클라이언트
+    
+    모든 메서드는 루프 스레드에서만 호출합니다. TCP 인터리브 전송은 asyncio 전송 객체의
+    흐름 제어(pause_writing/resume_writing)를 따르며, 멈춘 동안 들어온 프레임은
+    FrameSendQueue의 지연 예산 규칙대로 버려집니다.
+    """
+    
+    def __init__(self, transport: asyncio.Transport, addr, session_timeout: int):
+        super().__init__(None, addr, session_timeout)
+        self.writer = transport
+        self.paused = False
+    
+    def send(self, data: bytes):
+        if not self.writer.is_closing():
+            self.writer.write(data)
+    
+    def send_rtp(self, packets: List[memoryview], timestamp: float, keyframe: bool = True):
+        super().send_rtp(packets, timestamp, keyframe)
+        self.flush()
+    
+    def send_rtcp(self, data: bytes):
+        super().send_rtcp(data)
+        self.flush()
+    
+    def flush(self):
+        """전송 버퍼에 여유가 있는 동안 큐의 데이터를 넘김"""
+        while not self.paused and not self.writer.is_closing():
+            data = self.send_queue.get(timeout=0)
+            if data is None:
+                break
+            self.writer.write(data)
+    
+    def start_writer(self):
+        # 전송 스레드 없음 - flush()가 루프에서 직접 씀
+        pass
+    
+    def close(self):
+        self.session.state = RTSPSession.INIT
+        self.send_queue.close()
+        self.release_transport()
+        self.writer.close()
+
+class RTSPControlProtocol(asyncio.Protocol):
+    """RTSP 제어 연결 하나 (serve_connection의 asyncio 버전)"""
+    
+    def __init__(self, server: 'AsyncRTSPServer', route: Callable[[str], Optional[RTSPStream]]):
+        self.server = server
+        self.route = route
+        self.client: Optional[AsyncRTSPClient] = None
+    
+    def connection_made(self, transport: asyncio.Transport):
+        addr = transport.get_extra_info('peername')
+        self.client = AsyncRTSPClient(transport, addr, config.rtsp_server.get('timeout', 60))
+        self.server.connections.add(self.client)
+        self.server.logger.info(f"클라이언트 연결됨: {addr}")
+    
+    def data_received(self, data: bytes):
+        client = self.client
+        try:
+            messages = client.parser.feed(data)
+        except RTSPParseError as e:
+            self.server.logger.warning(f"잘못된 RTSP 요청 ({client.addr}): {e}")
+            client.send(build_response(400, None))
+            client.writer.close()
+            return
+        try:
+            dispatch_messages(client, messages, self.route)
+        except Exception as e:
+            self.server.logger.error(f"클라이언트 처리 오류: {e}")
+            client.writer.close()
+    
+    def pause_writing(self):
+        self.client.paused = True
+    
+    def resume_writing(self):
+        self.client.paused = False
+        self.client.flush()
+    
+    def connection_lost(self, exc: Optional[Exception]):
+        client = self.client
+        self.server.connections.discard(client)
+        if client.stream is not None and client in client.stream.clients:
+            client.stream.clients.remove(client)
+        client.close()
+        self.server.logger.info(f"클라이언트 연결 종료: {client.addr}")
+
+class MediaPump:
+    """AsyncRTSPStream의 (크기, fps, 오버레이) 변형 하나를 담당하는 프레임 펌프 스레드
+    
+    카메라 프레임(또는 H.264 접근 단위)을 기다려 JPEG 인코딩과 분석까지 마친 뒤
+    call_soon_threadsafe로 루프에 넘깁니다. 루프가 아직 앞 프레임을 처리하지
+    못했으면 대기 중인 프레임을 최신 것으로 바꾸므로 루프에 쌓이는 프레임은 최대 하나입니다.
+    H.264 접근 단위는 순서대로 모두 넘기고, 밀리면 버린 뒤 다음 키프레임부터 다시 보냅니다.
+    이 변형을 재생하는 클라이언트가 모두 떠나면 스스로 종료합니다.
+    """
+    
+    def __init__(self, stream: 'AsyncRTSPStream', variant: Tuple):
+        self.stream = stream
+        self.variant = variant
+        self.label = variant_label(*variant)
+        self.thread = None
+        self.handoff_drops = 0
+        self._handoff_lock = threading.Lock()
+        self._pending: List[Tuple] = []
+        self._scheduled = False
+        self._delivered_seq = 0
+        self._wakeup = threading.Event()
+    
+    def start(self):
+        self.thread = threading.Thread(target=self._run, daemon=True,
+                                       name=f"rtsp-pump-{self.stream.camera_id}-{self.label}")
+        self.thread.start()
+    
+    def wake(self):
+        self._wakeup.set()
+    
+    def players(self) -> List[RTSPClient]:
+        return [client for client in list(self.stream.clients)
+                if client.session.state == RTSPSession.PLAYING and client.variant == self.variant]
+    
+    def _run(self):
+        """프레임을 기다려 이벤트 루프로 넘김 (재생 중인 클라이언트가 없으면 종료)"""
+        stream = self.stream
+        last_seq = 0
+        stage = None
+        subscribed = False
+        decimator = FrameDecimator(self.variant[1])
+        handoff_limit = config.rtsp_server.get('tcp_queue_frames', 15)
+        while stream.is_streaming and stream.keep_pump(self):
+            try:
+                if not subscribed:
+                    # 온디맨드 카메라 기동은 루프 밖(이 스레드)에서 기다림
+                    subscribed = camera_manager.subscribe(stream.camera_id, 'rtsp')
+                    if not subscribed:
+                        stream.logger.error(f"카메라 {stream.camera_id}를 시작할 수 없습니다")
+                        self._wakeup.wait(1.0)
+                        self._wakeup.clear()
+                        continue
+                
+                if stage is None and stream.codec == 'h264':
+                    stage = stream._h264_stage(self.variant)
+                    if stage is not None:
+                        stage.subscribe()
+                        stage.request_keyframe()
+                
+                # 인코딩/JPEG 분석은 루프 밖에서 변형당 한 번만
+                unit = stream._next_unit(stage, last_seq, self.variant, decimator)
+                if unit is None:
+                    continue
+                last_seq = unit[0]
+                if unit[2] is None:
+                    continue
+                
+                with self._handoff_lock:
+                    if stage is None:
+                        if self._pending:
+                            self.handoff_drops += 1
+                        self._pending = [unit]
+                    else:
+                        self._pending.append(unit)
+                        if len(self._pending) > handoff_limit:
+                            # 루프가 밀림 - 버리고 다음 키프레임부터 (deliver가 seq 간격으로 감지)
+                            self.handoff_drops += len(self._pending)
+                            self._pending = []
+                    schedule = not self._scheduled and bool(self._pending)
+                    self._scheduled = self._scheduled or schedule
+                if schedule:
+                    stream.loop.call_soon_threadsafe(self.deliver)
+                    
+            except RuntimeError:
+                # 이벤트 루프 종료
+                break
+            except Exception as e:
+                stream.logger.error(f"프레임 펌프 오류 ({self.label}): {e}")
+                time.sleep(0.1)
+        
+        if stage is not None:
+            stage.unsubscribe()
+        if subscribed:
+            camera_manager.unsubscribe(stream.camera_id, 'rtsp')
+    
+    def deliver(self):
+        """(루프 스레드) 대기 중인 미디어 단위를 이 변형을 재생 중인 클라이언트 모두에게 전송"""
+        with self._handoff_lock:
+            pending, self._pending = self._pending, []
+            self._scheduled = False
+        stream = self.stream
+        if not stream.is_streaming:
+            return
+        
+        for unit in pending:
+            # H.264 접근 단위를 놓쳤으면 모든 클라이언트가 다음 키프레임을 기다림
+            gap = stream.codec == 'h264' and unit[0] != self._delivered_seq + 1
+            self._delivered_seq = unit[0]
+            if gap and not unit[3]:
+                stage = stream._h264_stage(self.variant)
+                if stage is not None:
+                    stage.request_keyframe()
+            
+            for client in self.players():
+                if gap:
+                    client.need_keyframe = True
+                try:
+                    stream._send_unit(client, unit)
+                except Exception as e:
+                    stream.logger.error(f"RTP 전송 오류 ({client.addr}): {e}")
+                    client.writer.close()
+
+class AsyncRTSPStream(RTSPStream):
+    """이벤트 루프에서 재생 중인 모든 클라이언트에 RTP를 보내는 스트림
+    
+    클라이언트가 요청한 (크기, fps, 오버레이) 변형마다 MediaPump 스레드 하나가 프레임을 준비하고,
+    같은 변형을 보는 클라이언트들은 같은 패킷화 입력을 공유합니다.
+    """
+    
+    # 루프를 막지 않도록 DESCRIBE는 이미 알려진 SPS/PPS만 사용 (없으면 대역 내 전송)
+    sdp_wait = 0.0
+    
+    def __init__(self, camera_id: str, rtsp_config: Dict, server: 'AsyncRTSPServer'):
+        super().__init__(camera_id, rtsp_config, server.udp_ports)
+        self.server = server
+        self.loop = server.loop
+        self.alias_server = None
+        self.pumps: Dict[Tuple, MediaPump] = {}
+        self._pumps_lock = threading.Lock()
+        self.handoff_drops = 0
+    
+    def start(self, alias: bool = False) -> bool:
+        """스트림 시작 (별칭 포트도 같은 이벤트 루프에서 수락)"""
+        try:
+            if alias:
+                self.alias_server = self.server.run_coroutine(self.loop.create_server(
+                    lambda: RTSPControlProtocol(self.server, lambda uri: self),
+                    config.rtsp_server.get('host', '0.0.0.0'), self.port, reuse_address=True))
+                self.alias = True
+            
+            self.is_streaming = True
+            if self.alias:
+                self.logger.info(f"RTSP 스트림 {self.camera_id} 시작됨 (경로: {self.path}, 별칭 포트: {self.port})")
+            else:
+                self.logger.info(f"RTSP 스트림 {self.camera_id} 시작됨 (경로: {self.path})")
+            return True
+            
+        except Exception as e:
+            self.logger.error(f"RTSP 스트림 시작 실패: {e}")
+            return False
+    
+    def stop(self):
+        """스트림 중지 (클라이언트 종료는 루프 스레드에서 수행)"""
+        self.is_streaming = False
+        with self._pumps_lock:
+            pumps = list(self.pumps.values())
+        for pump in pumps:
+            pump.wake()
+        
+        def close_all():
+            if self.alias_server is not None:
+                self.alias_server.close()
+                self.alias_server = None
+            for client in list(self.clients):
+                client.close()
+            self.clients.clear()
+        
+        try:
+            self.loop.call_soon_threadsafe(close_all)
+        except RuntimeError:
+            # 루프가 이미 닫힘
+            pass
+        
+        for pump in pumps:
+            if pump.thread and pump.thread.is_alive():
+                pump.thread.join(timeout=2)
+        self.logger.info(f"RTSP 스트림 {self.camera_id} 중지됨")
+    
+    def _start_media(self, client: RTSPClient):
+        """PLAY 이후 클라이언트 변형의 프레임 펌프를 시작하거나 깨움 (클라이언트별 스레드 없음)"""
+        stage = self._h264_stage(client.variant)
+        if stage is not None and stage.running:
+            stage.request_keyframe()
+        with self._pumps_lock:
+            pump = self.pumps.get(client.variant)
+            if pump is None:
+                pump = MediaPump(self, client.variant)
+                self.pumps[client.variant] = pump
+                pump.start()
+        pump.wake()
+    
+    def keep_pump(self, pump: MediaPump) -> bool:
+        """(펌프 스레드) 재생 중인 클라이언트가 없으면 펌프를 목록에서 빼고 False"""
+        with self._pumps_lock:
+            if pump.players():
+                return True
+            if self.pumps.get(pump.variant) is pump:
+                del self.pumps[pump.variant]
+            self.handoff_drops += pump.handoff_drops
+            return False
+    
+    def get_status(self) -> Dict:
+        status = super().get_status()
+        with self._pumps_lock:
+            pumps = list(self.pumps.values())
+        status['handoff_drops'] = self.handoff_drops + sum(pump.handoff_drops for pump in pumps)
+        status['variants'] = [pump.label for pump in pumps]
+        return status
+
+class AsyncRTSPServer(RTSPServer):
+    """asyncio 이벤트 루프 하나로 모든 RTSP 제어 연결과 RTP 전송을 처리하는 서버
+    
+    스레드는 이벤트 루프 1개와 재생 중인 카메라 변형별 프레임 펌프 1개뿐이라
+    시청자가 늘어도 스레드 수가 늘지 않습니다.
+    """
+    
+    def __init__(self):
+        super().__init__()
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.loop_thread = None
+        self.listener = None
+        self.reaper = None
+        self.connections = set()
+        self.logger = logging.getLogger("AsyncRTSPServer")
+    
+    def run_coroutine(self, coro, timeout: float = 5.0):
+        """다른 스레드에서 루프에 코루틴을 실행하고 결과를 기다림"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+    
+    def start(self) -> bool:
+        """RTSP 서버 시작"""
+        try:
+            if self.udp_ports is None:
+                first_port, last_port = config.rtsp_server.get('udp_port_range', (6970, 6999))
+                self.udp_ports = UdpPortPool(config.rtsp_server.get('host', '0.0.0.0'), first_port, last_port)
+            
+            if self.loop is None:
+                self.loop = asyncio.new_event_loop()
+                self.loop_thread = threading.Thread(target=self.loop.run_forever, name="rtsp-asyncio", daemon=True)
+                self.loop_thread.start()
+            
+            # 단일 RTSP 리스너
+            if self.listener is None:
+                port = config.rtsp_server.get('base_port', 8554)
+                self.listener = self.run_coroutine(self.loop.create_server(
+                    lambda: RTSPControlProtocol(self, self.route),
+                    config.rtsp_server.get('host', '0.0.0.0'), port, reuse_address=True,
+                    backlog=config.rtsp_server.get('max_clients', 10)))
+                self.reaper = asyncio.run_coroutine_threadsafe(self._reap_sessions(), self.loop)
+                self.logger.info(f"RTSP 리스너 시작됨 (포트: {port}, asyncio)")
+            
+            for camera_id in config.get_enabled_cameras():
+                self.start_stream(camera_id)
+            
+            self.is_running = len(self.streams) > 0
+            self.logger.info(f"RTSP 서버 시작됨 - {len(self.streams)}개 스트림")
+            return self.is_running
+            
+        except Exception as e:
+            self.logger.error(f"RTSP 서버 시작 실패: {e}")
+            return False
+    
+    def stop(self):
+        """RTSP 서버 중지"""
+        self.is_running = False
+        for stream in self.streams.values():
+            stream.stop()
+        self.streams.clear()
+        
+        if self.loop is not None:
+            async def shutdown():
+                if self.reaper is not None:
+                    self.reaper.cancel()
+                if self.listener is not None:
+                    self.listener.close()
+                for client in list(self.connections):
+                    client.close()
+            
+            try:
+                self.run_coroutine(shutdown())
+            except Exception as e:
+                self.logger.error(f"이벤트 루프 종료 오류: {e}")
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.loop_thread.join(timeout=2)
+            self.loop.close()
+            self.loop = None
+            self.listener = None
+            self.reaper = None
+        self.logger.info("RTSP 서버 중지됨")
+    
+    async def _reap_sessions(self):
+        """시간 초과된 세션 정리 (TCP 재생 중이면 미디어 전송이 연결 유지 역할)"""
+        while True:
+            await asyncio.sleep(1.0)
+            for client in list(self.connections):
+                playing_tcp = client.session.state == RTSPSession.PLAYING and client.transport == 'tcp'
+                if not playing_tcp and client.session.is_expired():
+                    self.logger.info(f"세션 시간 초과: {client.addr}")
+                    client.writer.close()
+    
+    def _create_stream(self, camera_id: str, camera_config: Dict) -> RTSPStream:
+        return AsyncRTSPStream(camera_id, camera_config, self)
+
+def create_rtsp_server() -> RTSPServer:
+    """설정된 엔진('asyncio' 또는 'threaded')으로 RTSP 서버 생성"""
+    if config.rtsp_server.get('engine', 'asyncio') == 'threaded':
+        return RTSPServer()
+    return AsyncRTSPServer()
+
+class RTSPServerHandle:
+    """전역 RTSP 서버 핸들 - 설정을 로드한 뒤 configure()에서 엔진을 골라 서버 생성
+    
+    모듈 import 시점에는 config.json이 아직 로드되지 않았으므로 서버를 바로 만들지 않습니다.
+    나머지 속성/메서드는 만들어진 서버로 전달하며, configure() 전에 쓰면 그때의 설정으로 만듭니다.
+    """
+    
+    def __init__(self):
+        self.server: Optional[RTSPServer] = None
+    
+    def configure(self) -> RTSPServer:
+        """현재 설정의 엔진으로 서버 생성 (실행 중인 서버는 중지 후 교체)"""
+        if self.server is not None and self.server.is_running:
+            self.server.stop()
+        self.server = create_rtsp_server()
+        return self.server
+    
+    def __getattr__(self, name):
+        server = self.server if self.server is not None else self.configure()
+        return getattr(server, name)
+
+# 전역 RTSP 서버 (main.py가 load_config() 뒤에 configure() 호출)
+rtsp_server = RTSPServerHandle()
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+녹화 세그먼트 저장소 - 시각 색인으로 빠르게 찾기
+
+세그먼트 파일(.mjpeg / .h264)마다 고정 크기 레코드(캡처 시각, 바이트 오프셋, 크기, 플래그)의
+.idx 색인이 붙어 있습니다. 카메라별 세그먼트 목록은 시작 시각 순으로 메모리에 두고,
+시각 t의 프레임은 세그먼트 목록과 색인 파일을 각각 이진 탐색해 O(log n)번의 작은 읽기로
+찾습니다. 썸네일/재생은 찾은 위치의 바이트만 읽으므로 파일 전체를 훑지 않습니다.
+"""
+
+import bisect
+import logging
+import os
+import struct
+import threading
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+import cv2
+import numpy as np
+
+try:
+    import av
+except ImportError:  # PyAV가 없으면 H.264 세그먼트 썸네일은 만들 수 없음
+    av = None
+
+# 색인 레코드: 캡처 시각(double), 바이트 오프셋(uint64), 크기(uint32), 플래그(uint32)
+INDEX_RECORD = struct.Struct('<dQII')
+FLAG_KEYFRAME = 1
+
+SEGMENT_KINDS = ('mjpeg', 'h264')
+
+def parse_time(value) -> float:
+    """시각 인자 -> 유닉스 시각 (초 단위 숫자 또는 ISO 8601 로컬 시각, 잘못되면 ValueError)"""
+    if value is None or value == '':
+        raise ValueError("시각이 없습니다")
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return datetime.fromisoformat(str(value)).timestamp()
+    except ValueError:
+        raise ValueError(f"잘못된 시각: {value!r} (유닉스 시각 또는 2024-01-31T12:00:00 형식)")
+
+class SegmentInfo:
+    """세그먼트 하나의 메타데이터 (쓰는 중이면 open=True, end_time/size가 계속 바뀜)"""
+    
+    __slots__ = ('camera_id', 'path', 'index_path', 'kind', 'start_time', 'end_time', 'frames', 'size', 'open')
+    
+    def __init__(self, camera_id: str, path: str, index_path: str, kind: str, start_time: float,
+                 end_time: Optional[float] = None, frames: int = 0, size: int = 0, open: bool = False):
+        self.camera_id = camera_id
+        self.path = path
+        self.index_path = index_path
+        self.kind = kind
+        self.start_time = start_time
+        self.end_time = start_time if end_time is None else end_time
+        self.frames = frames
+        self.size = size
+        self.open = open
+    
+    def to_dict(self) -> Dict:
+        return {
+            'camera_id': self.camera_id,
+            'file': os.path.basename(self.path),
+            'format': self.kind,
+            'start': self.start_time,
+            'end': self.end_time,
+            'frames': self.frames,
+            'size': self.size,
+            'open': self.open
+        }
+
+class SegmentIndex:
+    """색인 파일 읽기 - 레코드를 위치로 읽고 시각으로 이진 탐색 (쓰는 중인 파일도 가능)"""
+    
+    def __init__(self, path: str):
+        self.fd = os.open(path, os.O_RDONLY)
+        self.count = os.fstat(self.fd).st_size // INDEX_RECORD.size
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    def __getitem__(self, position: int) -> Tuple[float, int, int, int]:
+        if not 0 <= position < self.count:
+            raise IndexError(position)
+        return INDEX_RECORD.unpack(os.pread(self.fd, INDEX_RECORD.size, position * INDEX_RECORD.size))
+    
+    def read(self, start: int, count: int) -> List[Tuple[float, int, int, int]]:
+        """start부터 최대 count개 레코드 (한 번에 읽기)"""
+        count = max(0, min(count, self.count - start))
+        data = os.pread(self.fd, count * INDEX_RECORD.size, start * INDEX_RECORD.size)
+        return list(INDEX_RECORD.iter_unpack(data))
+    
+    def bisect(self, timestamp: float) -> int:
+        """캡처 시각이 timestamp 이하인 마지막 레코드 위치 (없으면 -1)"""
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self[middle][0] <= timestamp:
+                low = middle + 1
+            else:
+                high = middle
+        return low - 1
+    
+    def keyframe_at_or_before(self, position: int) -> int:
+        """position 이전의 가장 가까운 키프레임 (GOP 하나만큼만 거슬러 읽음)"""
+        while position > 0:
+            start = max(0, position - 63)
+            records = self.read(start, position - start + 1)
+            for offset in range(len(records) - 1, -1, -1):
+                if records[offset][3] & FLAG_KEYFRAME:
+                    return start + offset
+            position = start - 1
+        return 0
+    
+    def close(self):
+        os.close(self.fd)
+    
+    def __enter__(self) -> 'SegmentIndex':
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+
+class SegmentStore:
+    """카메라별 세그먼트 목록 (시작 시각 순) + 시각 기반 조회/재생/썸네일"""
+    
+    def __init__(self, root: str):
+        self.root = root
+        self.logger = logging.getLogger("SegmentStore")
+        self._segments: Dict[str, List[SegmentInfo]] = {}
+        self._starts: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+    
+    def load(self) -> List[SegmentInfo]:
+        """디스크의 세그먼트를 목록으로 읽음 (색인 첫/마지막 레코드만 읽음) - 시작 시각 순 반환"""
+        found = []
+        if os.path.isdir(self.root):
+            for camera_id in sorted(os.listdir(self.root)):
+                directory = os.path.join(self.root, camera_id)
+                if not os.path.isdir(directory):
+                    continue
+                for name in os.listdir(directory):
+                    base, ext = os.path.splitext(name)
+                    if ext[1:] not in SEGMENT_KINDS:
+                        continue
+                    info = self._read_info(camera_id, os.path.join(directory, name),
+                                           os.path.join(directory, base + '.idx'), ext[1:])
+                    if info is not None:
+                        found.append(info)
+        found.sort(key=lambda info: info.start_time)
+        with self._lock:
+            self._segments = {}
+            self._starts = {}
+            for info in found:
+                self._segments.setdefault(info.camera_id, []).append(info)
+                self._starts.setdefault(info.camera_id, []).append(info.start_time)
+        return found
+    
+    def _read_info(self, camera_id: str, path: str, index_path: str, kind: str) -> Optional[SegmentInfo]:
+        try:
+            with SegmentIndex(index_path) as index:
+                if len(index) == 0:
+                    return None
+                first, last = index[0], index[len(index) - 1]
+                size = os.path.getsize(path) + len(index) * INDEX_RECORD.size
+                return SegmentInfo(camera_id, path, index_path, kind, first[0], last[0], len(index), size)
+        except OSError as e:
+            self.logger.warning(f"색인 없는 세그먼트 무시 ({path}): {e}")
+            return None
+    
+    def add(self, info: SegmentInfo):
+        """새 세그먼트 등록 (쓰기 시작 시 - 시작 시각 순서 유지)"""
+        with self._lock:
+            starts = self._starts.setdefault(info.camera_id, [])
+            position = bisect.bisect_right(starts, info.start_time)
+            starts.insert(position, info.start_time)
+            self._segments.setdefault(info.camera_id, []).insert(position, info)
+    
+    def remove(self, info: SegmentInfo):
+        with self._lock:
+            segments = self._segments.get(info.camera_id, [])
+            if info in segments:
+                position = segments.index(info)
+                segments.pop(position)
+                self._starts[info.camera_id].pop(position)
+    
+    def cameras(self) -> List[str]:
+        with self._lock:
+            return [camera_id for camera_id, segments in self._segments.items() if segments]
+    
+    def segments(self, camera_id: Optional[str] = None, start: Optional[float] = None,
+                 end: Optional[float] = None) -> List[SegmentInfo]:
+        """[start, end]와 겹치는 세그먼트 (시작 시각 순)"""
+        with self._lock:
+            camera_ids = [camera_id] if camera_id is not None else list(self._segments)
+            result = []
+            for owner in camera_ids:
+                segments = self._segments.get(owner, [])
+                starts = self._starts.get(owner, [])
+                first = 0
+                if start is not None:
+                    # start를 포함할 수 있는 첫 세그먼트 (시작 시각이 start 이하인 마지막 것)
+                    first = max(0, bisect.bisect_right(starts, start) - 1)
+                last = len(segments) if end is None else bisect.bisect_right(starts, end)
+                result.extend(info for info in segments[first:last]
+                              if start is None or info.end_time >= start)
+        result.sort(key=lambda info: info.start_time)
+        return result
+    
+    def locate(self, camera_id: str, timestamp: float) -> Optional[Tuple[SegmentInfo, int]]:
+        """timestamp 시점에 보이던 프레임 (세그먼트, 색인 위치) - 세그먼트 사이 공백이면 다음 세그먼트의 첫 프레임"""
+        with self._lock:
+            segments = list(self._segments.get(camera_id, []))
+            starts = list(self._starts.get(camera_id, []))
+        if not segments:
+            return None
+        position = bisect.bisect_right(starts, timestamp) - 1
+        if position < 0:
+            return segments[0], 0
+        info = segments[position]
+        with SegmentIndex(info.index_path) as index:
+            if len(index) == 0:
+                return None
+            frame = index.bisect(timestamp)
+            if frame == len(index) - 1 and timestamp > index[frame][0] and position + 1 < len(segments):
+                # 세그먼트 끝 이후의 공백이면 다음 세그먼트 처음
+                return segments[position + 1], 0
+            return info, max(0, frame)
+    
+    def iter_frames(self, camera_id: str, start: float, end: float,
+                    kind: Optional[str] = None) -> Iterator[Tuple[float, bytes, bool, str]]:
+        """[start, end] 구간의 프레임 (캡처 시각, 바이트, 키프레임, 형식) - 파일에서 필요한 부분만 읽음
+        
+        H.264는 디코딩할 수 있도록 start 직전 키프레임부터 돌려줍니다. kind를 주면 그 형식의
+        세그먼트만 읽습니다.
+        """
+        for info in self.segments(camera_id, start, end):
+            if kind is not None and info.kind != kind:
+                continue
+            with SegmentIndex(info.index_path) as index, open(info.path, 'rb') as media:
+                position = index.bisect(start)
+                if position < 0:
+                    position = 0
+                elif info.kind == 'h264':
+                    position = index.keyframe_at_or_before(position)
+                elif index[position][0] < start:
+                    position += 1
+                while position < len(index):
+                    records = index.read(position, 256)
+                    for timestamp, offset, size, flags in records:
+                        if timestamp > end:
+                            return
+                        yield timestamp, os.pread(media.fileno(), size, offset), bool(flags & FLAG_KEYFRAME), info.kind
+                    position += len(records)
+    
+    def thumbnail(self, camera_id: str, timestamp: float, width: Optional[int] = None,
+                  quality: int = 80) -> Optional[Tuple[float, bytes]]:
+        """timestamp 시점의 JPEG (실제 프레임 시각, JPEG) - MJPEG은 그 프레임만, H.264는 직전 키프레임부터 디코딩"""
+        found = self.locate(camera_id, timestamp)
+        if found is None:
+            return None
+        info, position = found
+        with SegmentIndex(info.index_path) as index, open(info.path, 'rb') as media:
+            frame_time, offset, size, _ = index[position]
+            if info.kind == 'mjpeg':
+                data = os.pread(media.fileno(), size, offset)
+                if not width:
+                    return frame_time, data
+                image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+            else:
+                start = index.keyframe_at_or_before(position)
+                start_offset = index[start][1]
+                data = os.pread(media.fileno(), offset + size - start_offset, start_offset)
+                image = self._decode_last_h264(data)
+        if image is None:
+            return None
+        if width and width < image.shape[1]:
+            height = max(2, int(round(image.shape[0] * width / image.shape[1])))
+            image = cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA)
+        ok, jpeg = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        return (frame_time, jpeg.tobytes()) if ok else None
+    
+    def _decode_last_h264(self, data: bytes) -> Optional[np.ndarray]:
+        """Annex B 구간(키프레임부터)을 디코딩해 마지막 프레임 반환"""
+        if av is None:
+            self.logger.error("H.264 썸네일에는 PyAV가 필요합니다")
+            return None
+        context = av.CodecContext.create('h264', 'r')
+        last = None
+        try:
+            for packet in context.parse(data) + context.parse(None):
+                for frame in context.decode(packet):
+                    last = frame
+            for frame in context.decode(None):
+                last = frame
+        except Exception as e:
+            self.logger.error(f"H.264 썸네일 디코딩 오류: {e}")
+        return last.to_ndarray(format='bgr24') if last is not None else None
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+공유 메모리 프레임 링 (프로세스 사이 최신 프레임 전달)
+
+multiprocessing.shared_memory 블록 하나에 고정 크기 슬롯을 두고, 생산자 하나가
+프레임을 차례로 기록하면 여러 소비자가 잠금 없이 읽습니다.
+
+배치 (리틀 엔디언)
+  링 헤더 (64바이트): magic 'FRNG', version, slots, slot_size, head(마지막 시퀀스),
+                      heartbeat(생산자 생존 시각), fps
+  슬롯 (64바이트 헤더 + slot_size 데이터)마다:
+                      begin, end(시퀀스), timestamp, size, width, height, channels, format
+
+쓰기는 begin = seq -> 데이터/메타 -> end = seq -> head = seq 순서입니다. 읽는 쪽은
+end를 먼저 읽고 데이터를 복사한 뒤 begin을 다시 읽어, 둘 다 기대한 시퀀스일 때만
+받아들입니다 (복사 중에 슬롯이 덮어써지면 begin이 바뀌므로 버리고 다시 읽음).
+복사하지 않고 슬롯을 직접 보는 읽기(copy=False)는 사용을 마친 뒤 valid()로 그동안
+덮어써지지 않았는지 확인해야 합니다.
+"""
+
+import struct
+from multiprocessing import resource_tracker, shared_memory
+from typing import Optional
+
+import numpy as np
+
+MAGIC = b'FRNG'
+VERSION = 1
+
+RING_HEADER = struct.Struct('<4sHHIIQdd')
+RING_HEADER_SIZE = 64
+HEAD_OFFSET = 16
+HEARTBEAT_OFFSET = 24
+FPS_OFFSET = 32
+
+SLOT_HEADER_SIZE = 64
+SLOT_END_OFFSET = 8
+SLOT_META = struct.Struct('<dIIIII')
+SLOT_META_OFFSET = 16
+
+# 슬롯 데이터 형식
+FORMAT_JPEG = 1
+FORMAT_BGR = 2
+
+# 이 프로세스가 만든 링 (resource_tracker 등록을 소유자가 관리)
+_created_names = set()
+
+class RingFrame:
+    """링에서 읽은 프레임 한 장"""
+    
+    __slots__ = ('seq', 'timestamp', 'width', 'height', 'channels', 'format', 'data')
+    
+    def __init__(self, seq: int, timestamp: float, width: int, height: int, channels: int, fmt: int, data):
+        self.seq = seq
+        self.timestamp = timestamp
+        self.width = width
+        self.height = height
+        self.channels = channels
+        self.format = fmt
+        self.data = data
+    
+    def array(self) -> np.ndarray:
+        """BGR이면 (높이, 너비, 채널) 배열, JPEG이면 1차원 uint8 배열 (data를 복사하지 않음)"""
+        array = np.frombuffer(self.data, np.uint8)
+        if self.format == FORMAT_BGR:
+            return array.reshape(self.height, self.width, self.channels)
+        return array
+
+class SharedFrameRing:
+    """공유 메모리 프레임 링 - create()로 만든 쪽이 소유(삭제)하고, 생산자/소비자는 attach()로 연결"""
+    
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool = False):
+        self.shm = shm
+        self.owner = owner
+        self.name = shm.name
+        magic, version, _, self.slots, self.slot_size, _, _, _ = RING_HEADER.unpack_from(shm.buf, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"프레임 링이 아님: {shm.name}")
+        self.stride = SLOT_HEADER_SIZE + -(-self.slot_size // 64) * 64
+        self._buf = shm.buf
+        self.torn_reads = 0
+    
+    @classmethod
+    def create(cls, name: Optional[str], slots: int = 8, slot_size: int = 1024 * 1024) -> 'SharedFrameRing':
+        """새 링 생성 (같은 이름이 남아 있으면 지우고 다시 만듦, 새 공유 메모리는 0으로 채워져 있음)"""
+        slots = max(2, int(slots))
+        stride = SLOT_HEADER_SIZE + -(-int(slot_size) // 64) * 64
+        size = RING_HEADER_SIZE + slots * stride
+        try:
+            shm = shared_memory.SharedMemory(name, create=True, size=size)
+        except FileExistsError:
+            # 비정상 종료로 남은 이전 링
+            stale = shared_memory.SharedMemory(name)
+            stale.close()
+            stale.unlink()
+            shm = shared_memory.SharedMemory(name, create=True, size=size)
+        RING_HEADER.pack_into(shm.buf, 0, MAGIC, VERSION, 0, slots, int(slot_size), 0, 0.0, 0.0)
+        _created_names.add(shm._name)
+        return cls(shm, owner=True)
+    
+    @classmethod
+    def attach(cls, name: str, track: bool = True) -> 'SharedFrameRing':
+        """이미 있는 링에 연결
+        
+        multiprocessing으로 띄우지 않은 별개 프로세스는 track=False로 연결합니다. 그러지 않으면
+        그 프로세스의 resource_tracker가 종료 시 남의 공유 메모리를 지워 버립니다.
+        """
+        shm = shared_memory.SharedMemory(name)
+        if not track and shm._name not in _created_names:
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        return cls(shm)
+    
+    @property
+    def head(self) -> int:
+        """마지막으로 기록된 시퀀스 (0이면 아직 없음)"""
+        return struct.unpack_from('<Q', self._buf, HEAD_OFFSET)[0]
+    
+    @property
+    def heartbeat(self) -> float:
+        return struct.unpack_from('<d', self._buf, HEARTBEAT_OFFSET)[0]
+    
+    @property
+    def fps(self) -> float:
+        return struct.unpack_from('<d', self._buf, FPS_OFFSET)[0]
+    
+    def beat(self, timestamp: float, fps: Optional[float] = None):
+        """생산자 생존 시각(과 FPS) 기록"""
+        struct.pack_into('<d', self._buf, HEARTBEAT_OFFSET, timestamp)
+        if fps is not None:
+            struct.pack_into('<d', self._buf, FPS_OFFSET, fps)
+    
+    def write(self, data, timestamp: float, width: int = 0, height: int = 0, channels: int = 3,
+              fmt: int = FORMAT_JPEG) -> int:
+        """프레임 기록 후 시퀀스 반환 (생산자 하나만 호출, 슬롯보다 크면 ValueError)"""
+        view = memoryview(data).cast('B')
+        size = view.nbytes
+        if size > self.slot_size:
+            raise ValueError(f"프레임이 슬롯보다 큼: {size} > {self.slot_size}")
+        seq = self.head + 1
+        offset = RING_HEADER_SIZE + (seq % self.slots) * self.stride
+        struct.pack_into('<Q', self._buf, offset, seq)
+        SLOT_META.pack_into(self._buf, offset + SLOT_META_OFFSET, timestamp, size, width, height, channels, fmt)
+        self._buf[offset + SLOT_HEADER_SIZE:offset + SLOT_HEADER_SIZE + size] = view
+        struct.pack_into('<Q', self._buf, offset + SLOT_END_OFFSET, seq)
+        struct.pack_into('<Q', self._buf, HEAD_OFFSET, seq)
+        return seq
+    
+    def read(self, after_seq: int = 0, copy: bool = True) -> Optional[RingFrame]:
+        """after_seq보다 새 프레임이 있으면 최신 프레임 반환 (없으면 None)
+        
+        copy=False면 data가 슬롯을 직접 가리키는 memoryview이며, 쓰고 난 뒤 valid()가
+        False면 그사이 덮어써진 것이므로 결과를 버려야 합니다.
+        """
+        for _ in range(4):
+            seq = self.head
+            if seq <= after_seq:
+                return None
+            offset = RING_HEADER_SIZE + (seq % self.slots) * self.stride
+            end = struct.unpack_from('<Q', self._buf, offset + SLOT_END_OFFSET)[0]
+            if end == seq:
+                timestamp, size, width, height, channels, fmt = SLOT_META.unpack_from(
+                    self._buf, offset + SLOT_META_OFFSET)
+                if size <= self.slot_size:
+                    data = self._buf[offset + SLOT_HEADER_SIZE:offset + SLOT_HEADER_SIZE + size]
+                    if copy:
+                        data = bytes(data)
+                    if struct.unpack_from('<Q', self._buf, offset)[0] == seq:
+                        return RingFrame(seq, timestamp, width, height, channels, fmt, data)
+            # 읽는 중에 덮어써짐 - 새 head로 다시 시도
+            self.torn_reads += 1
+        return None
+    
+    def valid(self, frame: RingFrame) -> bool:
+        """frame이 있던 슬롯이 아직 덮어써지지 않았는지 (copy=False로 읽은 프레임 확인용)"""
+        offset = RING_HEADER_SIZE + (frame.seq % self.slots) * self.stride
+        return struct.unpack_from('<Q', self._buf, offset)[0] == frame.seq
+    
+    def close(self):
+        """연결 해제 (소유자는 공유 메모리도 삭제)"""
+        if self.shm is None:
+            return
+        self._buf = None
+        try:
+            self.shm.close()
+        except BufferError:
+            # copy=False로 읽은 프레임이 아직 살아 있음 - 매핑은 그 프레임들이 사라질 때 풀림
+            pass
+        if self.owner:
+            _created_names.discard(self.shm._name)
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+        self.shm = None
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import sys
+import threading
+import time
+
+import numpy as np
+
+from camera_manager import Camera, CameraManager, CaptureBackend, FrameDecimator
+from bench_util import run_tests
+from config import config
+
+CAMERA_CONFIG = {'name': 'slow', 'device': 'slow', 'backend': 'fake', 'resolution': (64, 48), 'fps': 30}
+
+class SlowCapture(CaptureBackend):
+    """read()가 delay초 걸리는 백엔드 - 닫힌 뒤에 읽으면 기록"""
+    
+    name = 'slow'
+    
+    def __init__(self, delay: float):
+        super().__init__(CAMERA_CONFIG)
+        self.delay = delay
+        self.opened = False
+        self.reading = threading.Event()
+        self.read_after_release = False
+        self.releases = 0
+    
+    def open(self) -> bool:
+        self.opened = True
+        return True
+    
+    def isOpened(self) -> bool:
+        return self.opened
+    
+    def read(self):
+        self.reading.set()
+        time.sleep(self.delay)
+        if not self.opened:
+            self.read_after_release = True
+            return False, None
+        return True, np.zeros((48, 64, 3), np.uint8)
+    
+    def release(self):
+        self.opened = False
+        self.releases += 1
+
+class SlowCamera(Camera):
+    def __init__(self, backend: SlowCapture):
+        super().__init__('slow', dict(CAMERA_CONFIG))
+        self.backend = backend
+    
+    def _create_backend(self) -> CaptureBackend:
+        return self.backend
+
+def test_stop_waits_for_read_before_release():
+    """stop()은 진행 중인 read()가 끝난 뒤에 장치를 해제"""
+    backend = SlowCapture(0.3)
+    camera = SlowCamera(backend)
+    assert camera.start(startup_timeout=2.0)
+    backend.reading.clear()
+    assert backend.reading.wait(1.0)
+    camera.stop()
+    assert backend.releases == 1 and not backend.read_after_release
+    assert camera.cap is None and camera.capture_thread is None
+
+def test_stuck_read_hands_release_to_capture_thread():
+    """read()가 stop_timeout보다 오래 걸리면 캡처 스레드가 빠져나오며 한 번만 해제"""
+    backend = SlowCapture(0.05)
+    camera = SlowCamera(backend)
+    camera.stop_timeout = 0.1
+    assert camera.start(startup_timeout=2.0)
+    thread = camera.capture_thread
+    backend.delay = 0.5
+    backend.reading.clear()
+    assert backend.reading.wait(1.0)
+    camera.stop()
+    assert backend.releases == 0 and thread.is_alive()
+    thread.join(2.0)
+    assert backend.releases == 1 and not backend.read_after_release
+
+def test_reload_builds_cameras_from_loaded_config():
+    """import 때 만든 매니저도 reload_cameras()로 로드된 설정(워커 모드)의 카메라를 만듦"""
+    from camera_worker import WorkerCamera
+    saved = config.cameras, config.workers
+    config.cameras = {'fake': {**CAMERA_CONFIG, 'name': 'fake', 'enabled': True, 'on_demand': True}}
+    config.workers = {**config.workers, 'enabled': False}
+    try:
+        manager = CameraManager()
+        assert type(manager.cameras['fake']) is Camera
+        # main.py가 load_config()로 워커 모드를 읽은 뒤 reload_cameras()
+        config.workers = {**config.workers, 'enabled': True}
+        manager.reload_cameras()
+        assert isinstance(manager.cameras['fake'], WorkerCamera)
+    finally:
+        config.cameras, config.workers = saved
+
+def test_start_all_keeps_running_cameras():
+    """start_all()을 다시 불러도 (웹 UI 전체 시작) 같은 카메라 객체가 계속 실행됨"""
+    saved = config.cameras
+    config.cameras = {'pattern': {'name': 'pattern', 'device': 'pattern', 'backend': 'fake',
+                                  'resolution': (64, 48), 'fps': 30, 'enabled': True, 'on_demand': False}}
+    try:
+        manager = CameraManager()
+        camera = manager.cameras['pattern']
+        assert manager.start_all()
+        thread = camera.capture_thread
+        assert manager.start_all()
+        assert manager.cameras == {'pattern': camera}
+        assert camera.is_running and camera.capture_thread is thread and thread.is_alive()
+        manager.stop_all()
+    finally:
+        config.cameras = saved
+
+def test_capture_settings_read_at_use_time():
+    """카메라를 만든 뒤 로드된 capture 설정(on_demand, startup_timeout, linger)도 적용"""
+    saved = config.capture
+    backend = SlowCapture(0.01)
+    camera = SlowCamera(backend)
+    try:
+        config.capture = {**saved, 'on_demand': False}
+        assert not camera.on_demand
+        config.capture = {**saved, 'on_demand': True, 'startup_timeout': 2.5, 'linger': 0.1}
+        assert camera.on_demand and camera.startup_timeout == 2.5
+        assert camera.subscribe('test') and camera.is_running
+        camera.unsubscribe('test')
+        deadline = time.time() + 2.0
+        while backend.releases == 0 and time.time() < deadline:
+            time.sleep(0.02)
+        assert not camera.is_running and backend.releases == 1
+    finally:
+        config.capture = saved
+        camera.stop()
+
+def capture_times(fps: float, seconds: float, jitter: float, seed: int = 1) -> np.ndarray:
+    """fps로 찍은 캡처 시각 (표준편차 jitter초의 흔들림)"""
+    count = int(fps * seconds)
+    base = 1_700_000_000.0 + np.arange(count) / fps
+    return base + np.random.default_rng(seed).normal(0, jitter, count)
+
+def test_decimator_rate_within_target():
+    """30fps 원본을 솎아도 실제 전달 FPS가 목표의 ±10% 이내"""
+    for jitter in (0.0, 0.004, 0.01, 0.03):
+        timestamps = capture_times(30, 60, jitter)
+        # 30ms 흔들림은 캡처 시각 순서가 뒤바뀌어 원본에 가까운 목표는 채울 프레임이 없음
+        for target in (1, 5, 10, 15, 25) if jitter < 0.03 else (1, 5, 10, 15):
+            decimator = FrameDecimator(target)
+            delivered = sum(decimator.accept(timestamp) for timestamp in timestamps)
+            rate = delivered / 60
+            assert abs(rate - target) <= 0.1 * target, (jitter, target, rate)
+    assert all(FrameDecimator(None).accept(timestamp) for timestamp in capture_times(30, 1, 0.0))
+
+def test_decimators_share_frames_and_resync():
+    """같은 FPS 소비자는 늦게 시작해도 같은 프레임을 고르고, 멈췄다 재개하면 다시 맞춤"""
+    timestamps = capture_times(30, 20, 0.004)
+    first, second = FrameDecimator(5), FrameDecimator(5)
+    picked_first = [timestamp for timestamp in timestamps if first.accept(timestamp)]
+    picked_second = [timestamp for timestamp in timestamps[95:] if second.accept(timestamp)]
+    assert picked_first[-50:] == picked_second[-50:]
+    
+    # 10초 공백 뒤 바로 목표 속도로 복귀 (밀린 프레임을 몰아 보내지 않음)
+    resumed = timestamps + 30.0
+    delivered = sum(first.accept(timestamp) for timestamp in resumed[:30])
+    assert 4 <= delivered <= 6, delivered
+
+if __name__ == "__main__":
+    sys.exit(run_tests("카메라 관리 테스트", globals()))
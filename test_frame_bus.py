@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from config import config
+from camera_manager import CameraManager
+from frame_bus import FrameBus
+from frame_bus_client import FrameBusClient, bus_ring_name, list_cameras
+from bench_util import benchmark, run_tests
+
+PREFIX = f"test-bus-{os.getpid()}"
+SIZE = (320, 240)
+
+def still_image(directory: str) -> np.ndarray:
+    """가짜 카메라가 반복 재생할 정지 이미지 (프레임 내용 비교용)"""
+    image = np.random.default_rng(3).integers(0, 255, (SIZE[1], SIZE[0], 3), dtype=np.uint8)
+    image = cv2.GaussianBlur(image, (9, 9), 0)
+    cv2.imwrite(os.path.join(directory, 'still.png'), image)
+    return image
+
+def start_bus(directory: str, **settings) -> FrameBus:
+    """가짜 카메라 두 대(디코딩/패스스루)로 버스 시작"""
+    config.cameras = {
+        camera_id: {'name': camera_id, 'device': os.path.join(directory, 'still.png'), 'backend': 'fake',
+                    'resolution': SIZE, 'fps': 30, 'rtsp_port': 18554, 'rtsp_path': f"/{camera_id}",
+                    'capture_mode': mode, 'enabled': True}
+        for camera_id, mode in (('decoded', 'decode'), ('passthrough', 'passthrough'))
+    }
+    config.frame_bus.update({'enabled': True, 'prefix': PREFIX, 'slots': 4, 'format': 'auto', **settings})
+    bus = FrameBus(CameraManager())
+    assert bus.start()
+    return bus
+
+def stop_bus(bus: FrameBus):
+    bus.stop()
+    bus.manager.stop_all()
+
+# multiprocessing과 무관한 분석 프로그램 (별도 인터프리터로 실행)
+READER = """
+import sys
+from frame_bus_client import FrameBusClient
+with FrameBusClient(sys.argv[1], sys.argv[2]) as client:
+    for _ in range(5):
+        frame = client.next(timeout=5)
+        print(frame.seq, *frame.image.shape)
+"""
+
+def test_bgr_frames_match_camera():
+    """디코딩 모드 카메라는 BGR 원본 그대로 (오버레이 없음)"""
+    directory = tempfile.mkdtemp()
+    bus = None
+    try:
+        image = still_image(directory)
+        bus = start_bus(directory)
+        assert list_cameras(PREFIX) == ['decoded', 'passthrough'], list_cameras(PREFIX)
+        with FrameBusClient('decoded', PREFIX) as client:
+            first = client.next(timeout=5)
+            second = client.next(timeout=5)
+            assert first.format == 'bgr' and (first.width, first.height, first.channels) == (*SIZE, 3)
+            assert second.seq > first.seq and second.timestamp > first.timestamp
+            assert np.array_equal(second.image, image)
+            assert abs(time.time() - second.timestamp) < 1.0
+    finally:
+        if bus is not None:
+            stop_bus(bus)
+        shutil.rmtree(directory)
+
+def test_passthrough_publishes_camera_jpeg():
+    """패스스루 카메라는 카메라 JPEG 그대로"""
+    directory = tempfile.mkdtemp()
+    bus = None
+    try:
+        image = still_image(directory)
+        bus = start_bus(directory)
+        with FrameBusClient('passthrough', PREFIX) as client:
+            frame = client.next(timeout=5)
+            assert frame.format == 'jpeg' and frame.jpeg[:2] == b'\xff\xd8'
+            assert np.abs(frame.image.astype(int) - image).mean() < 20
+    finally:
+        if bus is not None:
+            stop_bus(bus)
+        shutil.rmtree(directory)
+
+def test_zero_copy_view_detects_overwrite():
+    """복사 없이 읽은 프레임은 슬롯이 덮어써지면 valid()가 False"""
+    directory = tempfile.mkdtemp()
+    bus = None
+    try:
+        image = still_image(directory)
+        bus = start_bus(directory)
+        with FrameBusClient('decoded', PREFIX) as client:
+            frame = client.next(timeout=5, copy=False)
+            assert frame.valid() and np.array_equal(frame.image, image)
+            # 30fps, 슬롯 4개 - 0.5초면 한 바퀴 넘게 돎
+            time.sleep(0.5)
+            assert not frame.valid()
+            del frame
+    finally:
+        if bus is not None:
+            stop_bus(bus)
+        shutil.rmtree(directory)
+
+def test_external_process_does_not_remove_bus():
+    """다른 프로세스가 연결했다 끝나도 공유 메모리가 남아 있음"""
+    directory = tempfile.mkdtemp()
+    bus = None
+    try:
+        still_image(directory)
+        bus = start_bus(directory)
+        output = subprocess.run([sys.executable, '-c', READER, 'decoded', PREFIX], capture_output=True,
+                                text=True, timeout=30, cwd=os.path.dirname(os.path.abspath(__file__)))
+        assert output.returncode == 0, output.stderr
+        frames = [tuple(map(int, line.split())) for line in output.stdout.splitlines()]
+        assert len(frames) == 5 and frames[0][1:] == (SIZE[1], SIZE[0], 3), frames
+        assert [frame[0] for frame in frames] == sorted(frame[0] for frame in frames)
+        assert not output.stderr, output.stderr
+        assert os.path.exists(os.path.join('/dev/shm', bus_ring_name('decoded', PREFIX)))
+    finally:
+        if bus is not None:
+            stop_bus(bus)
+        shutil.rmtree(directory)
+
+def test_client_reattaches_after_restart():
+    """시스템이 버스를 다시 만들면 클라이언트가 새 공유 메모리로 옮겨 감"""
+    directory = tempfile.mkdtemp()
+    bus = None
+    try:
+        image = still_image(directory)
+        bus = start_bus(directory)
+        client = FrameBusClient('decoded', PREFIX, stale_after=0.5)
+        assert client.next(timeout=5) is not None
+        stop_bus(bus)
+        bus = start_bus(directory)
+        # 이전 링에 남은 안 읽은 프레임을 먼저 받은 뒤 새 링으로 옮겨 감
+        frame = client.next(timeout=5)
+        while frame is not None and client.reattaches == 0:
+            frame = client.next(timeout=5)
+        assert frame is not None and client.reattaches == 1 and np.array_equal(frame.image, image)
+        client.close()
+    finally:
+        if bus is not None:
+            stop_bus(bus)
+        shutil.rmtree(directory)
+
+def report():
+    """벤치마크 출력"""
+    print("\n📊 분석 프로세스가 프레임 한 장을 BGR로 얻는 비용")
+    print(f"{'해상도':>10} {'버스 복사':>10} {'버스 뷰':>10} {'JPEG 디코딩':>12}")
+    from shared_ring import FORMAT_BGR, SharedFrameRing
+    for width, height in ((640, 480), (1280, 720)):
+        image = np.random.default_rng(1).integers(0, 255, (height, width, 3), dtype=np.uint8)
+        image = cv2.GaussianBlur(image, (9, 9), 0)
+        jpeg = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, 80])[1]
+        ring = SharedFrameRing.create(f"{PREFIX}-bench", 4, image.nbytes)
+        ring.write(image, time.time(), width, height, 3, FORMAT_BGR)
+        client = FrameBusClient('bench', PREFIX)
+        try:
+            copied = benchmark(lambda: client.latest().image)
+            viewed = benchmark(lambda: client.latest(copy=False).image)
+            decoded = benchmark(lambda: cv2.imdecode(jpeg, cv2.IMREAD_COLOR))
+        finally:
+            client.close()
+            ring.close()
+        print(f"{width}x{height:<5} {copied:>8.0f}µs {viewed:>8.1f}µs {decoded:>10.0f}µs")
+
+if __name__ == "__main__":
+    sys.exit(run_tests("프레임 버스 테스트", globals(), report))
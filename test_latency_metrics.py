@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import itertools
+import sys
+import time
+
+import numpy as np
+
+from camera_manager import Camera, CaptureBackend, DeliveryStats, EncodedFrameCache, FrameEntry
+from latency_metrics import BUCKET_BOUNDS, LatencyHistogram, PipelineLatency, render_prometheus
+from bench_util import benchmark, run_tests
+
+def test_percentiles_close_to_exact():
+    """버킷 근사 p50/p95/p99가 정확한 값과 버킷 폭 안에서 일치"""
+    samples = np.random.default_rng(5).lognormal(np.log(0.004), 0.6, 20000)
+    histogram = LatencyHistogram()
+    for value in samples:
+        histogram.record(float(value))
+    for quantile, approx in zip((50, 95, 99), histogram.percentiles()):
+        exact = np.percentile(samples, quantile)
+        assert abs(approx - exact) / exact < 0.1, (quantile, approx, exact)
+    assert histogram.count == len(samples) and histogram.max == samples.max()
+
+def test_empty_and_out_of_range():
+    """기록이 없으면 0, 범위를 벗어난 값도 최대값을 넘지 않음"""
+    histogram = LatencyHistogram()
+    assert histogram.to_dict()['p99_ms'] == 0.0
+    histogram.record(-1.0)
+    histogram.record(BUCKET_BOUNDS[-1] * 3)
+    assert histogram.counts[0] == 1 and histogram.counts[-1] == 1
+    assert histogram.percentile(99) <= histogram.max == BUCKET_BOUNDS[-1] * 3
+
+def test_prometheus_cumulative_buckets():
+    """Prometheus 출력은 누적 버킷, +Inf는 전체 개수"""
+    histogram = LatencyHistogram()
+    for value in (0.0005, 0.002, 0.002, 0.3):
+        histogram.record(value)
+    lines = render_prometheus('latency_seconds', 'test', [({'camera': 'a"b'}, histogram)])
+    assert lines[1] == '# TYPE latency_seconds histogram'
+    buckets = [line for line in lines if line.startswith('latency_seconds_bucket')]
+    counts = [int(line.rsplit(' ', 1)[1]) for line in buckets]
+    assert counts == sorted(counts) and counts[-1] == 4
+    assert 'camera="a\\"b",le="+Inf"} 4' in buckets[-1]
+    assert 'latency_seconds_bucket{camera="a\\"b",le="0.001"} 1' in lines
+    assert 'latency_seconds_count{camera="a\\"b"} 4' in lines
+
+def test_capture_time_from_monotonic_driver_stamp():
+    """V4L2 단조 시계 타임스탬프를 실제 시각으로 바꿔 프레임 시각과 'read' 단계에 반영"""
+    camera = Camera('test', {'name': 'test', 'device': 'pattern', 'backend': 'fake'})
+    backend = CaptureBackend({'resolution': (640, 480)})
+    now = time.time()
+    backend.timestamp_clock, backend.last_timestamp = 'monotonic', time.monotonic() - 0.02
+    captured = camera._capture_time(backend, now)
+    assert 0.019 < now - captured < 0.03
+    # 다른 시계(실시간) 값이거나 시계를 모르면 read 반환 시각
+    backend.last_timestamp = now
+    assert camera._capture_time(backend, now) == now
+    backend.timestamp_clock = None
+    assert camera._capture_time(backend, now) == now
+    assert camera.latency.stages['read'].count == 1
+
+def test_stages_recorded_along_pipeline():
+    """인코딩 캐시 미스와 시청자 전송이 카메라 단계 히스토그램에 쌓임"""
+    pipeline = PipelineLatency()
+    cache = EncodedFrameCache(histogram=pipeline.stages['encode'])
+    entry = FrameEntry(1, time.time() - 0.05, np.zeros((240, 320, 3), np.uint8))
+    cache.get_or_encode(entry, quality=80)
+    cache.get_or_encode(entry, quality=80)
+    assert pipeline.stages['encode'].count == 1
+    
+    stats = DeliveryStats(pipeline=pipeline)
+    stats.record(entry.timestamp)
+    assert pipeline.stages['send'].count == 1 and stats.histogram.count == 1
+    assert 45 < stats.to_dict()['p50_latency_ms'] < 80
+
+def report():
+    """벤치마크 출력"""
+    print("\n📊 기록/조회 비용 (고정 버킷 vs 샘플 목록 + np.percentile)")
+    histogram = LatencyHistogram()
+    samples = []
+    values = itertools.cycle(np.random.default_rng(1).lognormal(np.log(0.004), 0.6, 100_000).tolist())
+    record_histogram = benchmark(lambda: histogram.record(next(values)))
+    record_list = benchmark(lambda: samples.append(next(values)))
+    query_histogram = benchmark(histogram.to_dict)
+    query_list = benchmark(lambda: np.percentile(samples, (50, 95, 99)))
+    print(f"{'':>8} {'기록':>10} {'p50/95/99 조회':>16} {'메모리':>14}")
+    print(f"{'버킷':>8} {record_histogram:>8.2f}µs {query_histogram:>14.1f}µs {len(histogram.counts):>9}칸 고정")
+    print(f"{'목록':>8} {record_list:>8.2f}µs {query_list:>14.1f}µs {len(samples):>9}개 누적")
+
+if __name__ == "__main__":
+    sys.exit(run_tests("지연 히스토그램 테스트", globals(), report))
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import sys
+
+import cv2
+import numpy as np
+
+from motion_detector import MotionAnalyzer, parse_zones, shrink_plane
+from bench_util import benchmark, run_tests
+
+SIZE = (160, 120)
+
+def scene(count: int, seed: int = 7) -> np.ndarray:
+    """카메라별 고정 배경 (잡음 약간)"""
+    rng = np.random.default_rng(seed)
+    return rng.integers(40, 200, (count, SIZE[1], SIZE[0]), dtype=np.uint8)
+
+def test_static_scene_has_no_motion():
+    """배경이 그대로면 점수 0"""
+    analyzer = MotionAnalyzer(3, SIZE)
+    active = np.ones(3, bool)
+    background = scene(3)
+    for _ in range(5):
+        analyzer.planes[:] = background
+        scores = analyzer.analyze(active)
+    assert scores.max() == 0, scores
+
+def test_moving_object_scores_and_region():
+    """한 카메라에만 물체가 나타나면 그 카메라만 점수와 영역"""
+    analyzer = MotionAnalyzer(4, SIZE)
+    active = np.ones(4, bool)
+    background = scene(4)
+    analyzer.planes[:] = background
+    analyzer.analyze(active)
+    
+    analyzer.planes[:] = background
+    analyzer.planes[2, 60:90, 100:140] = 255
+    scores = analyzer.analyze(active)
+    assert scores[2] > 0.05 and scores[[0, 1, 3]].max() == 0, scores
+    regions = analyzer.regions(2)
+    assert len(regions) == 1, regions
+    x0, y0, x1, y1 = regions[0]['box']
+    assert abs(x0 - 100 / 160) < 0.02 and abs(y1 - 90 / 120) < 0.02, regions
+
+def test_zones_exclude_motion():
+    """구역 밖의 움직임은 무시하고 점수는 구역 픽셀 기준"""
+    analyzer = MotionAnalyzer(1, SIZE)
+    analyzer.set_zones(0, parse_zones([[0, 0, 0.5, 1]]))
+    active = np.ones(1, bool)
+    background = scene(1)
+    analyzer.planes[:] = background
+    analyzer.analyze(active)
+    
+    analyzer.planes[:] = background
+    analyzer.planes[0, :, 100:] = 255
+    assert analyzer.analyze(active)[0] == 0
+    analyzer.planes[:] = background
+    analyzer.planes[0, :, :40] = 255
+    assert abs(analyzer.analyze(active)[0] - 0.5) < 0.01
+
+def test_inactive_camera_reprimes():
+    """꺼졌다 켜진 카메라는 첫 프레임을 새 배경으로 (켜지는 순간 모션으로 보지 않음)"""
+    analyzer = MotionAnalyzer(2, SIZE)
+    analyzer.planes[:] = scene(2)
+    analyzer.analyze(np.ones(2, bool))
+    assert analyzer.analyze(np.array([True, False]))[1] == 0
+    analyzer.planes[1] = 255 - analyzer.planes[1]
+    assert analyzer.analyze(np.ones(2, bool))[1] == 0
+
+def test_parse_zones():
+    """구역 검증"""
+    assert parse_zones(None) == [] and parse_zones([[0, 0, 1, 1]]) == [(0.0, 0.0, 1.0, 1.0)]
+    for bad in ('x', [[0, 0, 1]], [[0.5, 0, 0.2, 1]], [[0, 0, 1, 2]], [['a', 0, 1, 1]]):
+        try:
+            parse_zones(bad)
+        except ValueError:
+            continue
+        raise AssertionError(f"ValueError가 발생해야 함: {bad!r}")
+
+def analyze_per_camera(analyzers, active) -> list:
+    """비교용: 카메라마다 따로 분석 (같은 연산을 카메라 수만큼 반복)"""
+    return [analyzer.analyze(active[:1]) for analyzer in analyzers]
+
+def report():
+    """벤치마크 출력"""
+    frame = np.random.randint(0, 255, (720, 1280, 3), np.uint8)
+    plane = np.empty((SIZE[1], SIZE[0]), np.uint8)
+    
+    def prepare_area():
+        cv2.cvtColor(cv2.resize(frame, SIZE, interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY, dst=plane)
+    
+    print(f"\n📊 분석 1회 비용 ({SIZE[0]}x{SIZE[1]} 평면, 축소 제외)")
+    print(f"{'카메라':>6} {'카메라별':>10} {'일괄':>10} {'카메라당':>10}")
+    for count in (1, 2, 4, 8, 16):
+        active = np.ones(count, bool)
+        stacked = MotionAnalyzer(count, SIZE)
+        stacked.planes[:] = scene(count)
+        separate = [MotionAnalyzer(1, SIZE) for _ in range(count)]
+        for analyzer, planes in zip(separate, scene(count)):
+            analyzer.planes[0] = planes
+        looped = benchmark(lambda: analyze_per_camera(separate, active))
+        batched = benchmark(lambda: stacked.analyze(active))
+        print(f"{count:>6} {looped:>8.1f}µs {batched:>8.1f}µs {batched / count:>8.1f}µs")
+    print(f"\n📊 카메라별 축소 1280x720 -> {SIZE[0]}x{SIZE[1]} 그레이")
+    print(f"INTER_AREA 한 번: {benchmark(prepare_area):.1f}µs, shrink_plane: "
+          f"{benchmark(lambda: shrink_plane(frame, plane)):.1f}µs")
+
+if __name__ == "__main__":
+    sys.exit(run_tests("모션 감지 테스트", globals(), report))
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from camera_manager import FrameRingBuffer
+from frame_overlay import FrameOverlay, TextSprite
+from bench_util import benchmark, run_tests
+
+NAME = 'Arducam 1'
+
+def legacy_overlay(frame: np.ndarray, fps: int) -> np.ndarray:
+    """이전 방식: 프레임마다 strftime + cv2.putText 세 번"""
+    timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
+    cv2.putText(frame, timestamp, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+    cv2.putText(frame, f"FPS: {fps}", (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+    cv2.putText(frame, NAME, (10, 90), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+    return frame
+
+def test_sprite_renders_only_on_change():
+    """같은 텍스트는 다시 렌더링하지 않음"""
+    sprite = TextSprite()
+    assert sprite.set_text('FPS: 30')
+    assert not sprite.set_text('FPS: 30')
+    assert sprite.set_text('FPS: 29')
+    assert sprite.renders == 2
+
+def test_overlay_renders_per_second():
+    """시각은 초가 바뀔 때만, 이름/FPS는 바뀔 때만 렌더링"""
+    overlay = FrameOverlay(NAME)
+    frame = np.zeros((480, 640, 3), np.uint8)
+    for i in range(90):
+        overlay.apply(frame, 1000.0 + i / 30, 30)
+    # 시각 3번 (1000, 1001, 1002초) + FPS 1번 + 이름 1번
+    assert overlay.get_stats()['renders'] == 5, overlay.get_stats()
+    assert frame[10:90, 10:200, 1].max() > 200 and frame[200:, :, :].max() == 0
+
+def test_draw_is_clipped():
+    """프레임보다 큰 스프라이트나 작은 프레임에서도 예외 없이 잘림"""
+    overlay = FrameOverlay('a very long camera name that does not fit')
+    for shape in ((40, 60, 3), (2, 2, 3), (480, 160, 3)):
+        overlay.apply(np.zeros(shape, np.uint8), time.time(), 30)
+
+def test_blend_matches_alpha():
+    """ROI 블렌딩 = 원본 * (1 - alpha) + 색 * alpha"""
+    sprite = TextSprite((0, 255, 0))
+    sprite.set_text('X')
+    frame = np.full((60, 60, 3), 100, np.uint8)
+    sprite.draw(frame, 5, 40)
+    changed = frame[:, :, 1] != 100
+    assert changed.any() and (frame[changed][:, 1] > 100).all() and (frame[changed][:, 0] <= 100).all()
+
+def test_raw_frame_stays_clean():
+    """링 버퍼 원본은 그대로, 오버레이 복사본은 한 번만 만들어 공유"""
+    overlay = FrameOverlay(NAME)
+    calls = []
+    
+    def annotate(frame, entry):
+        calls.append(entry.seq)
+        return overlay.apply(frame, entry.timestamp, 30)
+    
+    frames = FrameRingBuffer(2)
+    raw = np.zeros((480, 640, 3), np.uint8)
+    frames.put(raw, time.time(), annotator=annotate)
+    entry = frames.latest()
+    annotated = entry.view(True)
+    assert entry.view(True) is annotated and calls == [1]
+    assert entry.view(False) is raw and raw.max() == 0 and annotated.max() > 0
+
+def report():
+    """벤치마크 출력"""
+    print("\n📊 프레임당 오버레이 비용")
+    print(f"{'해상도':>10} {'putText':>10} {'스프라이트':>10} {'+복사':>10}")
+    for width, height in ((640, 480), (1280, 720)):
+        frame = np.random.randint(0, 255, (height, width, 3), np.uint8)
+        overlay = FrameOverlay(NAME)
+        before = benchmark(lambda f: legacy_overlay(f, 30), frame)
+        after = benchmark(lambda f: overlay.apply(f, time.time(), 30), frame)
+        # 원본을 깨끗하게 두려면 오버레이 소비자가 있을 때 프레임당 한 번 복사
+        copied = benchmark(lambda f: overlay.apply(f.copy(), time.time(), 30), frame)
+        print(f"{width}x{height:<5} {before:>8.1f}µs {after:>8.1f}µs {copied:>8.1f}µs")
+    print("(캡처 스레드 비용: 이전에는 프레임마다 putText, 이제는 0 - 오버레이 소비자가 프레임당 한 번)")
+
+if __name__ == "__main__":
+    sys.exit(run_tests("프레임 오버레이 테스트", globals(), report))
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import struct
+import sys
+
+from rtcp import (NTP_EPOCH_OFFSET, RTCP_BYE, RTCP_RR, RTCP_SDES, RTCP_SR, SDES_CNAME, ReceiverStats,
+                  build_bye, build_sender_report, ntp_timestamp, parse_rtcp)
+from bench_util import run_tests
+
+def report_block(ssrc: int, fraction: int, cumulative: int, highest: int, jitter: int, lsr: int, dlsr: int) -> bytes:
+    """RFC 3550 6.4.1 수신자 보고 블록 24바이트"""
+    return struct.pack('!IIIIII', ssrc, (fraction << 24) | (cumulative & 0xFFFFFF), highest, jitter, lsr, dlsr)
+
+def receiver_report(sender_ssrc: int, blocks) -> bytes:
+    body = struct.pack('!I', sender_ssrc) + b''.join(blocks)
+    return struct.pack('!BBH', 0x80 | len(blocks), RTCP_RR, len(body) // 4) + body
+
+def test_sender_report_layout():
+    """SR(헤더 + 발신자 정보 20바이트) 뒤에 4바이트로 맞춘 SDES CNAME"""
+    data = build_sender_report(0xDEADBEEF, 1_700_000_000.5, 0x1_2345_6789, 1000, 2 ** 32 + 5, 'cam1')
+    first, packet_type, length = struct.unpack_from('!BBH', data)
+    assert (first, packet_type, length) == (0x80, RTCP_SR, 6)
+    ssrc, ntp_seconds, ntp_fraction, rtp_timestamp, packets, octets = struct.unpack_from('!IIIIII', data, 4)
+    assert ssrc == 0xDEADBEEF and ntp_seconds == 1_700_000_000 + NTP_EPOCH_OFFSET
+    assert ntp_fraction == 1 << 31
+    # 32비트 필드는 넘치면 순환
+    assert rtp_timestamp == 0x23456789 and packets == 1000 and octets == 5
+    
+    sdes = data[28:]
+    first, packet_type, length = struct.unpack_from('!BBH', sdes)
+    assert (first, packet_type) == (0x81, RTCP_SDES) and len(sdes) == (length + 1) * 4
+    assert struct.unpack_from('!IBB', sdes, 4) == (0xDEADBEEF, SDES_CNAME, 4)
+    assert sdes[10:14] == b'cam1' and set(sdes[14:]) == {0}
+    # SR만 있는 패킷이므로 수신자 보고 블록은 없음
+    assert parse_rtcp(data) == []
+
+def test_ntp_timestamp():
+    """유닉스 시각 -> NTP (1900년 기준 초, 2^-32초 단위 소수)"""
+    assert ntp_timestamp(0.0) == (NTP_EPOCH_OFFSET, 0)
+    assert ntp_timestamp(1.25) == (NTP_EPOCH_OFFSET + 1, 1 << 30)
+
+def test_bye_layout():
+    assert build_bye(0x01020304) == bytes([0x81, RTCP_BYE, 0, 1, 1, 2, 3, 4])
+
+def test_receiver_report_blocks():
+    """RR과 SR의 보고 블록을 모두 읽고, 누적 손실은 24비트 부호 있는 정수"""
+    rr = receiver_report(0x11, [report_block(0xAA, 64, 0xFFFFFE, 5000, 900, 0x12345678, 0x00010000),
+                                report_block(0xBB, 0, 7, 42, 3, 0, 0)])
+    sr_with_block = (struct.pack('!BBH', 0x81, RTCP_SR, 12) + bytes(24)
+                     + report_block(0xCC, 255, 100, 1, 2, 3, 4))
+    blocks = parse_rtcp(rr + sr_with_block + build_bye(0x11))
+    assert [block.ssrc for block in blocks] == [0xAA, 0xBB, 0xCC]
+    first = blocks[0]
+    assert first.fraction_lost == 0.25 and first.cumulative_lost == -2
+    assert (first.highest_seq, first.jitter, first.lsr, first.dlsr) == (5000, 900, 0x12345678, 0x00010000)
+    assert blocks[1].cumulative_lost == 7 and blocks[2].fraction_lost == 255 / 256
+
+def test_malformed_rtcp():
+    """버전이 다르거나 길이가 넘치거나 블록 수가 본문보다 많으면 읽은 데까지만"""
+    block = report_block(0xAA, 0, 0, 0, 0, 0, 0)
+    assert parse_rtcp(b'') == [] and parse_rtcp(b'\x80\xc9') == []
+    assert parse_rtcp(b'\x40' + receiver_report(1, [block])[1:]) == []
+    truncated = receiver_report(1, [block])[:-4]
+    assert parse_rtcp(truncated) == []
+    # RC=2인데 본문에는 블록 하나뿐
+    lying = bytes([0x82]) + receiver_report(1, [block])[1:]
+    assert [b.ssrc for b in parse_rtcp(lying)] == [0xAA]
+
+def test_round_trip_time():
+    """RTT = 수신 시각 - LSR - DLSR (NTP 중간 32비트)"""
+    sent = 1_700_000_000.0
+    ntp_seconds, ntp_fraction = ntp_timestamp(sent)
+    lsr = ((ntp_seconds & 0xFFFF) << 16) | (ntp_fraction >> 16)
+    # 수신자가 SR을 받고 0.5초 뒤 RR 전송, 서버는 SR 전송 0.6초 뒤 수신 -> RTT 0.1초
+    block = parse_rtcp(receiver_report(1, [report_block(0xAA, 0, 0, 0, 4500, lsr, 0x8000)]))[0]
+    stats = ReceiverStats()
+    stats.update(block, now=sent + 0.6)
+    assert abs(stats.rtt - 0.1) < 0.001
+    status = stats.to_dict()
+    assert status['rtt_ms'] == 100.0 and status['jitter_ms'] == 50.0 and status['reports'] == 1
+
+if __name__ == "__main__":
+    sys.exit(run_tests("RTCP 테스트", globals()))
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import struct
+import sys
+
+import cv2
+import numpy as np
+
+from h264_encoder import split_annexb, split_avcc
+from rtp_packetizer import (FU_A_TYPE, H264_PAYLOAD_TYPE, H264RtpPacketizer, JPEG_PAYLOAD_TYPE,
+                            JpegRtpPacketizer, parse_jpeg, RTP_HEADER_SIZE)
+from bench_util import benchmark, run_tests
+
+CAPTURE_TIME = 1_700_000_000.25
+
+def make_jpeg(width: int = 320, height: int = 240, restart_interval: int = 0) -> bytes:
+    """노이즈 이미지를 인코딩한 베이스라인 JPEG (restart_interval을 주면 DRI 마커 포함)"""
+    image = np.random.default_rng(3).integers(0, 255, (height, width, 3), dtype=np.uint8)
+    params = [cv2.IMWRITE_JPEG_QUALITY, 90]
+    if restart_interval:
+        params += [cv2.IMWRITE_JPEG_RST_INTERVAL, restart_interval]
+    ok, encoded = cv2.imencode('.jpg', image, params)
+    assert ok
+    return encoded.tobytes()
+
+def parse_rtp(packet) -> tuple:
+    """RTP 헤더 (버전, 마커, 페이로드 타입, 시퀀스, 타임스탬프, SSRC)와 페이로드"""
+    first, second, sequence, timestamp, ssrc = struct.unpack_from('!BBHII', packet)
+    return (first >> 6, bool(second & 0x80), second & 0x7F, sequence, timestamp, ssrc), bytes(packet[RTP_HEADER_SIZE:])
+
+def unpack_jpeg_packets(packets, restart: bool):
+    """RFC 2435 패킷들을 풀어 (조각 오프셋, 헤더 값, 스캔 조각) 목록으로"""
+    fragments = []
+    for packet in packets:
+        _, payload = parse_rtp(packet)
+        specific, offset_high, offset_low, jpeg_type, q, width8, height8 = struct.unpack_from('!BBHBBBB', payload)
+        position = 8
+        restart_header = None
+        if restart:
+            restart_header = struct.unpack_from('!HH', payload, position)
+            position += 4
+        offset = (offset_high << 16) | offset_low
+        qtables = None
+        if offset == 0:
+            _, precision, length = struct.unpack_from('!BBH', payload, position)
+            qtables = payload[position + 4:position + 4 + length]
+            position += 4 + length
+        fragments.append({'offset': offset, 'type': jpeg_type, 'q': q, 'size': (width8 * 8, height8 * 8),
+                          'restart': restart_header, 'qtables': qtables, 'data': payload[position:]})
+    return fragments
+
+def test_fragment_offsets_and_marker():
+    """조각 오프셋은 앞 조각까지의 스캔 바이트 수, 마커 비트는 마지막 조각에만 (RFC 2435 3.1)"""
+    jpeg = make_jpeg()
+    info = parse_jpeg(jpeg)
+    packetizer = JpegRtpPacketizer(mtu=1400, ssrc=0x1234)
+    packetizer.sequence = 0xFFFE
+    packets = packetizer.packetize(jpeg, CAPTURE_TIME)
+    assert len(packets) > 2 and all(len(packet) <= 1400 for packet in packets)
+    
+    headers = [parse_rtp(packet)[0] for packet in packets]
+    assert all(version == 2 and payload_type == JPEG_PAYLOAD_TYPE and ssrc == 0x1234
+               for version, _, payload_type, _, _, ssrc in headers)
+    assert [marker for _, marker, _, _, _, _ in headers] == [False] * (len(packets) - 1) + [True]
+    # 시퀀스 번호는 16비트로 순환, 타임스탬프는 프레임 안에서 같음
+    assert [sequence for _, _, _, sequence, _, _ in headers][:3] == [0xFFFE, 0xFFFF, 0]
+    assert len({timestamp for _, _, _, _, timestamp, _ in headers}) == 1
+    
+    fragments = unpack_jpeg_packets(packets, restart=False)
+    expected = 0
+    for fragment in fragments:
+        assert fragment['offset'] == expected
+        assert fragment['type'] == info.type == 1 and fragment['q'] == 255 and fragment['size'] == (320, 240)
+        expected += len(fragment['data'])
+    # 양자화 테이블은 첫 조각에만 (Q=255)
+    assert fragments[0]['qtables'] == info.qtables and len(info.qtables) == 128
+    assert all(fragment['qtables'] is None for fragment in fragments[1:])
+    assert b''.join(fragment['data'] for fragment in fragments) == bytes(info.scan)
+    assert packetizer.packet_count == len(packets)
+    assert packetizer.octet_count == sum(len(packet) - RTP_HEADER_SIZE for packet in packets)
+
+def test_restart_marker_header():
+    """DRI가 있으면 type에 64를 더하고 모든 조각에 재시작 헤더(간격, F=1/L=1/카운트 0x3FFF)"""
+    jpeg = make_jpeg(restart_interval=4)
+    info = parse_jpeg(jpeg)
+    assert info.dri == 4 and info.type == 65
+    packets = JpegRtpPacketizer(mtu=1000).packetize(jpeg, CAPTURE_TIME)
+    fragments = unpack_jpeg_packets(packets, restart=True)
+    assert all(fragment['type'] == 65 and fragment['restart'] == (4, 0xFFFF) for fragment in fragments)
+    assert [fragment['offset'] for fragment in fragments] == \
+        [sum(len(fragment['data']) for fragment in fragments[:i]) for i in range(len(fragments))]
+    assert b''.join(fragment['data'] for fragment in fragments) == bytes(info.scan)
+    assert [parse_rtp(packet)[0][1] for packet in packets].count(True) == 1
+
+def test_unsupported_jpeg():
+    """프로그레시브, 잘못된 데이터, 1바이트를 넘는 크기는 패킷화하지 않음"""
+    image = np.zeros((64, 64, 3), np.uint8)
+    ok, progressive = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_PROGRESSIVE, 1])
+    assert parse_jpeg(progressive.tobytes()) is None
+    assert parse_jpeg(b'\xff\xd8garbage') is None
+    assert JpegRtpPacketizer().packetize(b'not a jpeg', CAPTURE_TIME) == []
+    assert parse_jpeg(make_jpeg(2048, 16)) is None
+    # 헤더(양자화 테이블 포함)도 들어가지 않는 MTU
+    assert JpegRtpPacketizer(mtu=100).packetize(make_jpeg(), CAPTURE_TIME) == []
+
+def make_nal(nal_type: int, size: int, nri: int = 3) -> bytes:
+    """NAL 헤더(F=0, NRI, 타입) + 번호 매긴 본문"""
+    return bytes([(nri << 5) | nal_type]) + bytes(index % 251 for index in range(size - 1))
+
+def test_h264_single_nal_at_exact_mtu():
+    """RTP 헤더와 합쳐 MTU에 딱 맞는 NAL은 단일 NAL 패킷, 1바이트 더 크면 FU-A"""
+    mtu = 1400
+    packetizer = H264RtpPacketizer(mtu=mtu)
+    nal = make_nal(1, mtu - RTP_HEADER_SIZE)
+    packets = packetizer.packetize_nals([nal], CAPTURE_TIME)
+    assert len(packets) == 1 and len(packets[0]) == mtu
+    header, payload = parse_rtp(packets[0])
+    assert header[1] and header[2] == H264_PAYLOAD_TYPE and payload == nal
+    
+    packets = packetizer.packetize_nals([make_nal(1, mtu - RTP_HEADER_SIZE + 1)], CAPTURE_TIME)
+    assert len(packets) == 2 and all(parse_rtp(packet)[1][0] & 0x1F == FU_A_TYPE for packet in packets)
+
+def test_h264_fu_a_start_end_bits():
+    """FU-A 조각: 첫 조각 S, 마지막 조각 E, indicator는 원래 F/NRI, 재조립하면 원래 NAL"""
+    packetizer = H264RtpPacketizer(mtu=500)
+    sps, pps, idr = make_nal(7, 20), make_nal(8, 6), make_nal(5, 2000, nri=2)
+    packets = packetizer.packetize_nals([sps, pps, idr], CAPTURE_TIME)
+    parsed = [parse_rtp(packet) for packet in packets]
+    # 접근 단위의 마지막 패킷에만 마커 비트, 시퀀스는 연속, 타임스탬프는 같음
+    assert [header[1] for header, _ in parsed] == [False] * (len(packets) - 1) + [True]
+    sequences = [header[3] for header, _ in parsed]
+    assert sequences == [(sequences[0] + i) & 0xFFFF for i in range(len(packets))]
+    assert len({header[4] for header, _ in parsed}) == 1
+    assert parsed[0][1] == sps and parsed[1][1] == pps
+    
+    fragments = [payload for _, payload in parsed[2:]]
+    assert len(fragments) == 5 and all(len(packet) <= 500 for packet in packets)
+    assert all(fragment[0] == (2 << 5) | FU_A_TYPE for fragment in fragments)
+    bits = [(bool(fragment[1] & 0x80), bool(fragment[1] & 0x40), fragment[1] & 0x1F) for fragment in fragments]
+    assert bits == [(True, False, 5)] + [(False, False, 5)] * 3 + [(False, True, 5)]
+    assert bytes([idr[0]]) + b''.join(fragment[2:] for fragment in fragments) == idr
+    assert packetizer.octet_count == sum(len(packet) - RTP_HEADER_SIZE for packet in packets)
+
+def test_split_annexb():
+    """3/4바이트 시작 코드를 모두 나누고 NAL 뒤의 0(trailing_zero) 바이트는 제거"""
+    sps, pps, idr = make_nal(7, 12), make_nal(8, 4), make_nal(5, 300)
+    stream = b'\x00\x00\x00\x01' + sps + b'\x00\x00\x01' + pps + b'\x00\x00' + b'\x00\x00\x01' + idr
+    assert split_annexb(stream) == [sps, pps, idr]
+    assert split_annexb(b'') == [] and split_annexb(b'\x00\x00\x01') == []
+    assert split_annexb(b'\x00\x00\x01\x09\xf0\x00\x00\x00\x01') == [b'\x09\xf0']
+
+def test_split_avcc():
+    """avcC extradata의 SPS/PPS 목록 (잘린 데이터는 읽은 만큼만)"""
+    sps, pps = make_nal(7, 12), make_nal(8, 4)
+    extradata = (bytes([1, 0x64, 0x00, 0x1F, 0xFF, 0xE1]) + struct.pack('!H', len(sps)) + sps
+                 + bytes([1]) + struct.pack('!H', len(pps)) + pps)
+    assert split_avcc(extradata) == [sps, pps]
+    assert split_avcc(extradata[:6 + 2 + len(sps)]) == [sps]
+    assert split_avcc(b'') == []
+
+def report():
+    """벤치마크 출력"""
+    print("\n📊 RTP/JPEG 패킷화 비용 (640x480)")
+    jpeg = make_jpeg(640, 480)
+    packetizer = JpegRtpPacketizer()
+    info = parse_jpeg(jpeg)
+    print(f"JPEG {len(jpeg) // 1024}KB -> {len(packetizer.packetize(jpeg, CAPTURE_TIME))}개 패킷")
+    print(f"분석+패킷화 {benchmark(packetizer.packetize, jpeg, CAPTURE_TIME):.1f}µs, "
+          f"패킷화만 {benchmark(packetizer.packetize_info, info, CAPTURE_TIME):.1f}µs")
+    
+    print("\n📊 RTP/H.264 패킷화 비용 (SPS/PPS + 60KB IDR)")
+    nals = [make_nal(7, 20), make_nal(8, 6), make_nal(5, 60_000)]
+    h264 = H264RtpPacketizer()
+    print(f"{len(h264.packetize_nals(nals, CAPTURE_TIME))}개 패킷, "
+          f"{benchmark(h264.packetize_nals, nals, CAPTURE_TIME):.1f}µs")
+
+if __name__ == "__main__":
+    sys.exit(run_tests("RTP 패킷화 테스트", globals(), report))
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import random
+import sys
+import time
+
+from rtsp_protocol import (RTSPParser, RTSPParseError, RTSPRequest, RTSPSession, InterleavedPacket,
+                           build_response, parse_transport)
+from bench_util import run_tests
+
+URI = 'rtsp://127.0.0.1:8554/camera1'
+
+SAMPLE_REQUESTS = [
+    f'OPTIONS {URI} RTSP/1.0\r\nCSeq: 1\r\nUser-Agent: LibVLC/3.0.18\r\n\r\n',
+    f'DESCRIBE {URI} RTSP/1.0\r\nCSeq: 2\r\nAccept: application/sdp\r\n\r\n',
+    f'SETUP {URI}/trackID=0 RTSP/1.0\r\nCSeq: 3\r\nTransport: RTP/AVP/TCP;unicast;interleaved=0-1\r\n\r\n',
+    f'PLAY {URI} RTSP/1.0\r\nCSeq: 4\r\nSession: 0A796C8CA1555391\r\nRange: npt=0.000-\r\n\r\n',
+    f'GET_PARAMETER {URI} RTSP/1.0\r\nCSeq: 5\r\nSession: 0A796C8CA1555391\r\n\r\n',
+    f'TEARDOWN {URI} RTSP/1.0\r\nCSeq: 6\r\nSession: 0A796C8CA1555391\r\n\r\n'
+]
+
+def test_pipelined_requests():
+    """한 번에 들어온 여러 요청 처리"""
+    parser = RTSPParser()
+    messages = parser.feed(''.join(SAMPLE_REQUESTS).encode())
+    assert [m.method for m in messages] == ['OPTIONS', 'DESCRIBE', 'SETUP', 'PLAY', 'GET_PARAMETER', 'TEARDOWN']
+    assert [m.cseq for m in messages] == ['1', '2', '3', '4', '5', '6']
+    assert messages[3].session_id == '0A796C8CA1555391'
+
+def test_byte_by_byte():
+    """한 바이트씩 나뉘어 들어와도 같은 결과"""
+    parser = RTSPParser()
+    data = ''.join(SAMPLE_REQUESTS).encode()
+    messages = []
+    for i in range(len(data)):
+        messages.extend(parser.feed(data[i:i + 1]))
+    assert len(messages) == len(SAMPLE_REQUESTS)
+
+def test_content_length_body():
+    """Content-Length 본문과 뒤따르는 요청 분리"""
+    body = b'packets_received\r\njitter\r\n'
+    data = (f'GET_PARAMETER {URI} RTSP/1.0\r\nCSeq: 7\r\nContent-Type: text/parameters\r\n'
+            f'Content-Length: {len(body)}\r\n\r\n').encode() + body + SAMPLE_REQUESTS[0].encode()
+    parser = RTSPParser()
+    messages = parser.feed(data[:-10])
+    assert len(messages) == 1 and messages[0].body == body
+    messages = parser.feed(data[-10:])
+    assert len(messages) == 1 and messages[0].method == 'OPTIONS'
+
+def test_interleaved_packets():
+    """요청 사이에 섞인 $ 인터리브 데이터"""
+    rtcp = bytes(range(32))
+    data = b'$\x01\x00\x20' + rtcp + SAMPLE_REQUESTS[4].encode()
+    messages = RTSPParser().feed(data)
+    assert isinstance(messages[0], InterleavedPacket)
+    assert messages[0].channel == 1 and messages[0].data == rtcp
+    assert messages[1].method == 'GET_PARAMETER'
+
+def test_malformed_requests():
+    """잘못된 요청은 RTSPParseError"""
+    for bad in (b'HELLO\r\n\r\n', b'OPTIONS * HTTP/1.1\r\nCSeq: 1\r\n\r\n',
+                b'OPTIONS * RTSP/1.0\r\nno colon\r\n\r\n',
+                b'OPTIONS * RTSP/1.0\r\nCSeq: 1\r\nContent-Length: -5\r\n\r\n',
+                b'OPTIONS * RTSP/1.0\r\n' + b'X' * 10000):
+        try:
+            RTSPParser().feed(bad)
+        except RTSPParseError:
+            continue
+        raise AssertionError(f"파싱 오류가 발생해야 함: {bad[:40]!r}")
+
+def test_fuzz():
+    """무작위 변형 입력에서 RTSPParseError 외의 예외가 나지 않아야 함"""
+    rng = random.Random(2435)
+    corpus = [r.encode() for r in SAMPLE_REQUESTS]
+    for _ in range(5000):
+        data = bytearray(rng.choice(corpus) * rng.randint(1, 3))
+        for _ in range(rng.randint(1, 8)):
+            action = rng.randint(0, 3)
+            position = rng.randrange(len(data) + 1)
+            if action == 0 and data:
+                data[min(position, len(data) - 1)] = rng.randrange(256)
+            elif action == 1:
+                data[position:position] = bytes(rng.randrange(256) for _ in range(rng.randint(1, 16)))
+            elif action == 2:
+                del data[position:position + rng.randint(1, 16)]
+            else:
+                data[position:position] = rng.choice([b'\r\n', b'$', b':', b'Content-Length: 9\r\n'])
+        
+        parser = RTSPParser()
+        try:
+            step = rng.randint(1, 64)
+            for i in range(0, len(data), step):
+                for message in parser.feed(bytes(data[i:i + step])):
+                    assert isinstance(message, (RTSPRequest, InterleavedPacket))
+        except RTSPParseError:
+            pass
+
+def test_session_state_machine():
+    """init -> ready -> playing -> ready -> init"""
+    session = RTSPSession()
+    assert not session.can('PLAY')
+    assert session.apply('SETUP') == RTSPSession.READY
+    assert session.apply('PLAY') == RTSPSession.PLAYING
+    assert session.apply('PAUSE') == RTSPSession.READY
+    assert session.apply('TEARDOWN') == RTSPSession.INIT
+    assert session.can('GET_PARAMETER')
+    assert RTSPSession().session_id != RTSPSession().session_id
+
+def test_response_and_transport():
+    """응답 생성과 Transport 헤더 분석"""
+    response = build_response(200, '3', {'Session': 'ABC'}, b'v=0\r\n')
+    assert response.startswith(b'RTSP/1.0 200 OK\r\nCSeq: 3\r\nSession: ABC\r\nContent-Length: 5\r\n\r\n')
+    transports = parse_transport('RTP/AVP/TCP;unicast;interleaved=2-3,RTP/AVP;unicast;client_port=5000-5001')
+    assert transports[0]['protocol'] == 'RTP/AVP/TCP' and transports[0]['interleaved'] == '2-3'
+    assert transports[1]['client_port'] == '5000-5001'
+
+def benchmark_parser(seconds: float = 1.0) -> float:
+    """파서 처리량 측정 (초당 요청 수)"""
+    data = ''.join(SAMPLE_REQUESTS).encode()
+    count = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        parser = RTSPParser()
+        count += len(parser.feed(data))
+    return count / (time.perf_counter() - started)
+
+def report():
+    """벤치마크 출력"""
+    rate = benchmark_parser()
+    print(f"\n📊 파서 처리량: {rate:,.0f} 요청/초 ({1e6 / rate:.1f}µs/요청)")
+
+if __name__ == "__main__":
+    sys.exit(run_tests("RTSP 프로토콜 테스트", globals(), report))
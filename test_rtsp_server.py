@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import logging
+import socket
+import struct
+import sys
+import threading
+import time
+
+from config import config
+from rtsp_server import AsyncRTSPServer, FrameSendQueue, RTSPClient, RTSPServer, RTSPServerHandle, serve_connection
+from bench_util import run_tests
+
+def test_queue_drops_oldest_when_full():
+    """큐가 가득 차면 가장 오래된 프레임부터 버리고 최신 프레임을 유지"""
+    queue = FrameSendQueue(max_frames=3, latency_budget=10.0)
+    now = time.time()
+    for index in range(5):
+        queue.put(bytes([index]), now)
+    assert queue.dropped_frames == 2 and queue.get_stats()['queue_depth'] == 3
+    assert [queue.get(0) for _ in range(4)] == [b'\x02', b'\x03', b'\x04', None]
+    assert queue.sent_frames == 3
+
+def test_queue_drops_stale_frames_up_to_keyframe():
+    """지연 예산을 넘은 프레임은 버리고, 키프레임이 아닌 프레임이 맨 앞에 남지 않음"""
+    queue = FrameSendQueue(max_frames=10, latency_budget=0.5)
+    now = time.time()
+    queue.put(b'I0', now - 2.0, True)
+    queue.put(b'P1', now - 1.5, False)
+    queue.put(b'P2', now - 0.1, False)
+    queue.put(b'rtcp', now - 0.1, None)
+    queue.put(b'I3', now, True)
+    # 예산을 넘은 I0를 버리면 뒤따르는 P1, P2도 디코딩할 수 없으므로 함께 버림
+    assert queue.get(0) == b'rtcp' and queue.get(0) == b'I3'
+    assert queue.dropped_frames == 3
+    
+    # 큐가 비어 버려진 뒤에는 다음 키프레임 전까지 P 프레임을 받지 않음
+    queue = FrameSendQueue(max_frames=1, latency_budget=10.0)
+    queue.put(b'I0', now, True)
+    queue.put(b'P1', now, False)
+    assert queue.get(0) is None and queue.dropped_frames == 2
+    queue.put(b'P2', now, False)
+    assert queue.get(0) is None and queue.dropped_frames == 3
+    queue.put(b'I3', now, True)
+    assert queue.get(0) == b'I3'
+    queue.close()
+    assert queue.closed and queue.get(0) is None
+    queue.put(b'I1', now, True)
+    assert queue.get_stats()['queue_depth'] == 0
+
+def interleaved_chunks(data: bytes):
+    """$ 채널 프레이밍을 풀어 (채널, 페이로드) 목록으로 (프레이밍이 깨지면 AssertionError)"""
+    chunks, offset = [], 0
+    while offset < len(data):
+        magic, channel, length = struct.unpack_from('!cBH', data, offset)
+        assert magic == b'$' and offset + 4 + length <= len(data), offset
+        chunks.append((channel, data[offset + 4:offset + 4 + length]))
+        offset += 4 + length
+    return chunks
+
+def stalled_client(latency_budget: float = 0.2):
+    """송수신 버퍼를 작게 잡은 socketpair 위의 TCP 인터리브 클라이언트와 수신 쪽 소켓"""
+    server_side, viewer_side = socket.socketpair()
+    server_side.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 16384)
+    viewer_side.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 16384)
+    client = RTSPClient(server_side, ('stall', 0), 60)
+    client.send_queue = FrameSendQueue(15, latency_budget, client.delivery)
+    client.start_writer()
+    return client, viewer_side
+
+def send_frames(client: RTSPClient, first: int, count: int):
+    """30fps로 프레임 전송 (프레임마다 번호가 든 8KB 패킷 3개)"""
+    for index in range(first, first + count):
+        packets = [memoryview(struct.pack('!IB', index, part) + bytes(8000)) for part in range(3)]
+        client.send_rtp(packets, time.time())
+        time.sleep(1 / 30)
+
+def test_writer_survives_reader_stall():
+    """시청자가 1초 넘게 읽지 않아도 전송 스레드가 살아 있고, 재개 후 최신 프레임을 온전히 받음"""
+    client, viewer = stalled_client()
+    try:
+        send_frames(client, 0, 60)
+        assert client.writer_thread.is_alive() and not client.send_queue.closed
+        assert client.send_queue.dropped_frames > 0
+        
+        received = bytearray()
+        def read_all():
+            while True:
+                data = viewer.recv(65536)
+                if not data:
+                    return
+                received.extend(data)
+        reader = threading.Thread(target=read_all, daemon=True)
+        reader.start()
+        send_frames(client, 60, 15)
+        time.sleep(0.3)
+        client.close()
+        reader.join(2.0)
+        
+        chunks = interleaved_chunks(bytes(received))
+        frames = [struct.unpack_from('!IB', payload) for _, payload in chunks]
+        # 프레임은 통째로만 전송 (같은 프레임의 패킷 3개가 순서대로)
+        assert [part for _, part in frames] == [0, 1, 2] * (len(frames) // 3)
+        indexes = [index for index, _ in frames]
+        assert indexes == sorted(indexes) and indexes[-1] == 74
+    finally:
+        client.close()
+        viewer.close()
+
+def test_close_wakes_blocked_writer():
+    """sendall()에서 막힌 전송 스레드도 close() 후 끝남"""
+    client, viewer = stalled_client(latency_budget=10.0)
+    try:
+        send_frames(client, 0, 10)
+        assert client.writer_thread.is_alive()
+        client.close()
+        client.writer_thread.join(2.0)
+        assert not client.writer_thread.is_alive()
+    finally:
+        viewer.close()
+
+def test_connection_socket_stays_blocking():
+    """제어 연결 수신 대기 중에도 소켓은 블로킹(전송 시간 제한 없음)이고 요청에는 응답"""
+    server_side, viewer_side = socket.socketpair()
+    thread = threading.Thread(target=serve_connection,
+                              args=(server_side, ('test', 0), lambda uri: None, logging.getLogger("test")),
+                              daemon=True)
+    thread.start()
+    try:
+        viewer_side.settimeout(2.0)
+        viewer_side.sendall(b'OPTIONS * RTSP/1.0\r\nCSeq: 1\r\n\r\n')
+        assert viewer_side.recv(4096).startswith(b'RTSP/1.0 200')
+        time.sleep(1.2)
+        assert thread.is_alive() and server_side.gettimeout() is None
+    finally:
+        viewer_side.close()
+        thread.join(3.0)
+    assert not thread.is_alive()
+
+def test_engine_chosen_after_config_load():
+    """전역 서버 핸들은 import 시점이 아니라 configure() 때의 설정으로 엔진을 고름"""
+    saved = config.rtsp_server
+    try:
+        config.rtsp_server = {**saved, 'engine': 'asyncio'}
+        handle = RTSPServerHandle()
+        assert handle.server is None
+        # main.py가 load_config()로 threaded 엔진을 읽은 뒤 configure()
+        config.rtsp_server = {**saved, 'engine': 'threaded'}
+        handle.configure()
+        assert type(handle.server) is RTSPServer and handle.is_running is False
+        config.rtsp_server = {**saved, 'engine': 'asyncio'}
+        assert isinstance(handle.configure(), AsyncRTSPServer)
+    finally:
+        config.rtsp_server = saved
+
+def test_handle_creates_server_on_first_use():
+    """configure() 전에 쓰면 그때의 설정으로 서버를 만들어 전달"""
+    handle = RTSPServerHandle()
+    assert handle.get_all_status() == {} and isinstance(handle.server, RTSPServer)
+
+if __name__ == "__main__":
+    sys.exit(run_tests("RTSP 서버 테스트", globals()))
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from recorder import RecordedFrame, SegmentWriter
+from segment_store import INDEX_RECORD, SegmentIndex, SegmentStore, parse_time
+from bench_util import run_tests
+
+START = 1700000040.0  # 세그먼트 경계(60초)에 맞춘 시각
+CAMERA = 'camera1'
+
+def synthetic_jpeg(number: int) -> bytes:
+    """프레임 번호를 밝기로 담은 작은 JPEG"""
+    image = np.full((48, 64, 3), number % 256, np.uint8)
+    return cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, 95])[1].tobytes()
+
+def record(root: str, seconds: float, fps: float, gap: tuple = None, segment_seconds: float = 60,
+           quota_bytes: int = 1024 ** 3, payload=synthetic_jpeg) -> SegmentWriter:
+    """합성 프레임 소스로 seconds초 분량을 기록 (gap=(시작, 끝) 구간은 건너뜀)"""
+    writer = SegmentWriter(root, segment_seconds, quota_bytes)
+    writer.start()
+    for number in range(int(seconds * fps)):
+        offset = number / fps
+        if gap and gap[0] <= offset < gap[1]:
+            continue
+        while not writer.write(CAMERA, 'mjpeg', RecordedFrame(START + offset, payload(number))):
+            time.sleep(0.001)
+    writer.sync()
+    return writer
+
+def test_fixed_duration_segments():
+    """세그먼트는 60초 경계마다 나뉘고 색인 레코드 수 = 프레임 수"""
+    root = tempfile.mkdtemp()
+    try:
+        writer = record(root, 150, 2)
+        writer.stop()
+        segments = SegmentStore(root).load()
+        assert [round(info.start_time - START) for info in segments] == [0, 60, 120], segments
+        assert sum(info.frames for info in segments) == 300
+        with SegmentIndex(segments[1].index_path) as index:
+            assert len(index) == 120 and index[0][1] == 0
+    finally:
+        shutil.rmtree(root)
+
+def test_locate_and_thumbnail():
+    """시각으로 찾은 프레임이 그 시각의 합성 프레임과 같음 (세그먼트 사이 공백은 다음 프레임)"""
+    root = tempfile.mkdtemp()
+    try:
+        writer = record(root, 180, 5, gap=(100, 130))
+        store = writer.store
+        info, position = store.locate(CAMERA, START + 42.3)
+        with SegmentIndex(info.index_path) as index:
+            assert abs(index[position][0] - (START + 42.2)) < 1e-6
+        frame_time, jpeg = store.thumbnail(CAMERA, START + 42.3)
+        assert jpeg == synthetic_jpeg(211)
+        frame_time, _ = store.thumbnail(CAMERA, START + 99.8)
+        assert abs(frame_time - (START + 99.8)) < 1e-6, frame_time - START
+        frame_time, _ = store.thumbnail(CAMERA, START + 110)
+        assert abs(frame_time - (START + 130)) < 1e-6, frame_time - START
+        frame_time, small = store.thumbnail(CAMERA, START + 10, width=32)
+        assert cv2.imdecode(np.frombuffer(small, np.uint8), cv2.IMREAD_COLOR).shape == (24, 32, 3)
+        assert store.locate('camera9', START) is None
+        writer.stop()
+    finally:
+        shutil.rmtree(root)
+
+def test_iter_frames_range():
+    """구간 재생은 [from, to]의 프레임만 세그먼트를 넘어 순서대로"""
+    root = tempfile.mkdtemp()
+    try:
+        writer = record(root, 130, 2)
+        frames = list(writer.store.iter_frames(CAMERA, START + 58, START + 62))
+        assert [round(timestamp - START, 1) for timestamp, _, _, _ in frames] == \
+            [58.0, 58.5, 59.0, 59.5, 60.0, 60.5, 61.0, 61.5, 62.0]
+        assert frames[4][1] == synthetic_jpeg(120)
+        writer.stop()
+    finally:
+        shutil.rmtree(root)
+
+def test_open_segment_is_searchable():
+    """쓰는 중인 세그먼트도 sync 뒤에는 바로 검색/재생"""
+    root = tempfile.mkdtemp()
+    try:
+        writer = record(root, 30, 5)
+        assert writer.segments and writer.store.segments(CAMERA)[0].open
+        assert abs(writer.store.thumbnail(CAMERA, START + 29.9)[0] - (START + 29.8)) < 1e-6
+        writer.stop()
+        assert not writer.store.segments(CAMERA)[0].open
+    finally:
+        shutil.rmtree(root)
+
+def test_quota_deletes_oldest():
+    """용량을 넘으면 가장 오래된 세그먼트부터 삭제하고 목록에서도 빠짐"""
+    root = tempfile.mkdtemp()
+    try:
+        frame = synthetic_jpeg(0)
+        per_segment = 10 * 10 * (len(frame) + INDEX_RECORD.size)
+        writer = record(root, 60, 10, segment_seconds=10, quota_bytes=int(per_segment * 2.5),
+                        payload=lambda number: frame)
+        writer.stop()
+        segments = writer.store.segments(CAMERA)
+        assert len(segments) == 2 and writer.deleted_segments == 4, (len(segments), writer.deleted_segments)
+        assert round(segments[0].start_time - START) == 40
+        assert len(os.listdir(os.path.join(root, CAMERA))) == 4
+    finally:
+        shutil.rmtree(root)
+
+def test_parse_time():
+    """from/to 인자"""
+    assert parse_time('1700000000.5') == 1700000000.5
+    assert parse_time('2024-01-31T12:00:00') == time.mktime((2024, 1, 31, 12, 0, 0, 0, 0, -1))
+    for bad in (None, '', 'yesterday'):
+        try:
+            parse_time(bad)
+        except ValueError:
+            continue
+        raise AssertionError(f"ValueError가 발생해야 함: {bad!r}")
+
+def benchmark_locate(root: str, hours: float, fps: float = 5, count: int = 2000) -> tuple:
+    """hours 시간 분량(60초 세그먼트)에서 임의 시각 찾기 - (색인 이진 탐색, 선형 탐색) µs"""
+    writer = record(root, hours * 3600, fps, payload=lambda number: b'\xff\xd8\xff\xd9')
+    writer.stop()
+    store = SegmentStore(root)
+    store.load()
+    rng = np.random.default_rng(1)
+    targets = START + rng.random(count) * hours * 3600
+    
+    started = time.perf_counter()
+    for target in targets:
+        store.locate(CAMERA, target)
+    indexed = 1e6 * (time.perf_counter() - started) / count
+    
+    segments = store.segments(CAMERA)
+    started = time.perf_counter()
+    for target in targets[:20]:
+        # 비교용: 색인을 처음부터 읽어 가며 찾기
+        for info in segments:
+            with open(info.index_path, 'rb') as f:
+                if any(timestamp > target for timestamp, _, _, _ in INDEX_RECORD.iter_unpack(f.read())):
+                    break
+    linear = 1e6 * (time.perf_counter() - started) / 20
+    return indexed, linear
+
+def report():
+    """벤치마크 출력"""
+    print("\n📊 시각으로 프레임 찾기 (5fps, 60초 세그먼트)")
+    print(f"{'녹화 분량':>8} {'색인 탐색':>10} {'선형 탐색':>10}")
+    for hours in (1, 6):
+        root = tempfile.mkdtemp()
+        try:
+            indexed, linear = benchmark_locate(root, hours)
+        finally:
+            shutil.rmtree(root)
+        print(f"{hours:>6}시간 {indexed:>8.1f}µs {linear:>8.0f}µs")
+
+if __name__ == "__main__":
+    sys.exit(run_tests("녹화 세그먼트 저장소 테스트", globals(), report))
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import multiprocessing
+import sys
+
+import numpy as np
+
+from shared_ring import FORMAT_BGR, FORMAT_JPEG, RING_HEADER_SIZE, SharedFrameRing
+from bench_util import benchmark, run_tests
+
+def produce(name: str, count: int, size: int):
+    """다른 프로세스에서 프레임 기록 (내용은 시퀀스 번호로 채움)"""
+    ring = SharedFrameRing.attach(name)
+    for number in range(1, count + 1):
+        ring.write(bytes([number % 256]) * size, float(number))
+    ring.close()
+
+def test_write_read_latest():
+    """읽기는 after_seq보다 새 프레임 중 최신만, 메타데이터 유지"""
+    ring = SharedFrameRing.create(None, slots=4, slot_size=1024)
+    try:
+        assert ring.read() is None and ring.head == 0
+        for number in range(1, 7):
+            ring.write(bytes([number]) * (10 + number), 100.0 + number, 64, 48)
+        frame = ring.read()
+        assert (frame.seq, frame.timestamp, frame.width, frame.height, frame.format) == (6, 106.0, 64, 48, FORMAT_JPEG)
+        assert frame.data == bytes([6]) * 16
+        assert ring.read(6) is None
+    finally:
+        ring.close()
+
+def test_bgr_frame_shape():
+    """BGR 프레임은 배열 모양 그대로 복원"""
+    image = np.random.randint(0, 255, (48, 64, 3), np.uint8)
+    ring = SharedFrameRing.create(None, slots=2, slot_size=image.nbytes)
+    try:
+        ring.write(image, 1.0, 64, 48, 3, FORMAT_BGR)
+        assert np.array_equal(ring.read().array(), image)
+        try:
+            ring.write(bytes(image.nbytes + 1), 2.0)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("슬롯보다 큰 프레임은 ValueError")
+    finally:
+        ring.close()
+
+def test_overwritten_slot_is_rejected():
+    """복사 중에 덮어써진 슬롯(begin이 바뀜)은 돌려주지 않음"""
+    ring = SharedFrameRing.create(None, slots=2, slot_size=64)
+    try:
+        ring.write(b'a' * 8, 1.0)
+        offset = RING_HEADER_SIZE + (1 % ring.slots) * ring.stride
+        # 생산자가 같은 슬롯에 다음 바퀴를 쓰기 시작한 상태 (begin만 바뀜)
+        ring.shm.buf[offset:offset + 8] = (3).to_bytes(8, 'little')
+        assert ring.read() is None and ring.torn_reads > 0
+    finally:
+        ring.close()
+
+def test_cross_process():
+    """다른 프로세스가 쓴 프레임을 읽는 동안 찢어진 데이터를 받지 않음"""
+    size = 64 * 1024
+    ring = SharedFrameRing.create(None, slots=3, slot_size=size)
+    try:
+        producer = multiprocessing.get_context('spawn').Process(target=produce, args=(ring.name, 3000, size))
+        producer.start()
+        seq, reads = 0, 0
+        while producer.is_alive() or ring.head > seq:
+            frame = ring.read(seq)
+            if frame is None:
+                continue
+            reads += 1
+            assert frame.data == bytes([frame.seq % 256]) * size and frame.timestamp == frame.seq
+            seq = frame.seq
+        producer.join()
+        assert seq == 3000 and reads > 0
+    finally:
+        ring.close()
+
+def report():
+    """벤치마크 출력"""
+    print("\n📊 프레임 한 장 전달 (쓰기 + 읽기)")
+    print(f"{'크기':>8} {'공유 메모리 링':>12} {'mp.Queue':>10}")
+    context = multiprocessing.get_context('spawn')
+    for size in (32 * 1024, 128 * 1024, 1280 * 720 * 3):
+        data = bytes(size)
+        ring = SharedFrameRing.create(None, slots=4, slot_size=size)
+        queue = context.Queue()
+        try:
+            shared = benchmark(lambda: ring.read(ring.write(data, 0.0) - 1))
+            queued = benchmark(lambda: (queue.put(data), queue.get()))
+        finally:
+            ring.close()
+            queue.close()
+        print(f"{size // 1024:>6}KB {shared:>10.1f}µs {queued:>8.1f}µs")
+
+if __name__ == "__main__":
+    sys.exit(run_tests("공유 메모리 프레임 링 테스트", globals(), report))
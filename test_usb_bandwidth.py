@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+
+from usb_bandwidth import (UsbBandwidthPlanner, estimate_bandwidth, find_usb_bus, find_usb_device,
+                           read_usb_speed)
+from bench_util import run_tests
+
+def make_sysfs(root, devices) -> str:
+    """가짜 sysfs 트리 - devices: {videoN: (버스, 포트, 링크 속도 문자열)}
+    
+    실제 커널처럼 class/video4linux/videoN/device가 USB 인터페이스 디렉터리를 가리키고,
+    busnum/speed는 그 상위의 USB 장치 디렉터리에 있습니다.
+    """
+    root = str(root)
+    for name, (bus, port, speed) in devices.items():
+        usb_device = os.path.join(root, 'devices', 'platform', f'usb{bus}', f'{bus}-{port}')
+        interface = os.path.join(usb_device, f'{bus}-{port}:1.0')
+        video = os.path.join(interface, 'video4linux', name)
+        os.makedirs(video)
+        for filename, value in (('busnum', str(bus)), ('speed', speed)):
+            with open(os.path.join(usb_device, filename), 'w') as f:
+                f.write(value + '\n')
+        with open(os.path.join(os.path.dirname(usb_device), 'busnum'), 'w') as f:
+            f.write(f'{bus}\n')
+        os.symlink(interface, os.path.join(video, 'device'))
+        os.makedirs(os.path.join(root, 'class', 'video4linux'), exist_ok=True)
+        os.symlink(video, os.path.join(root, 'class', 'video4linux', name))
+    return root
+
+def camera(device: str, resolution=(1920, 1080), fps: int = 30, fourcc: str = 'MJPG', **extra):
+    return {'name': device, 'device': device, 'resolution': resolution, 'fps': fps, 'fourcc': fourcc, **extra}
+
+def test_sysfs_lookup(tmp_path):
+    """videoN -> USB 인터페이스 -> 상위 USB 장치의 busnum/speed"""
+    root = make_sysfs(tmp_path, {'video0': (1, '1.2', '480'), 'video2': (3, '1', 'fast')})
+    assert find_usb_device('/dev/video0', root).endswith(os.path.join('usb1', '1-1.2'))
+    assert find_usb_bus('/dev/video0', root) == 1 and read_usb_speed('/dev/video0', root) == 480.0
+    # 읽을 수 없는 속도 값, 없는 장치
+    assert find_usb_bus('/dev/video2', root) == 3 and read_usb_speed('/dev/video2', root) is None
+    assert find_usb_bus('/dev/video9', root) is None and read_usb_speed('/dev/video9', root) is None
+
+def test_policy_off_reports_over_budget(tmp_path):
+    """off: 모드는 그대로 두고 예산을 넘는 카메라만 oversubscribed로 표시"""
+    root = make_sysfs(tmp_path, {'video0': (1, '1', '480'), 'video2': (1, '2', '480')})
+    cameras = {'a': camera('/dev/video0', (1280, 720), 30, 'YUYV'), 'b': camera('/dev/video2')}
+    plan = UsbBandwidthPlanner(root, 0.8, 'off').plan(cameras)
+    bus = plan['buses']['1']
+    assert bus['budget_mbps'] == 384.0 and bus['cameras'] == ['a', 'b']
+    assert plan['cameras']['a']['action'] == 'oversubscribed'
+    assert plan['cameras']['b']['action'] == 'oversubscribed'
+    assert plan['cameras']['a']['mode'] == plan['cameras']['a']['requested']
+    assert bus['used_mbps'] > bus['budget_mbps']
+
+def test_policy_downgrade_fits_budget(tmp_path):
+    """downgrade: 같은 버스의 뒤 카메라부터 MJPG 전환, FPS/해상도를 낮춰 예산 안으로"""
+    root = make_sysfs(tmp_path, {'video0': (1, '1', '480'), 'video2': (1, '2', '480'),
+                                 'video4': (1, '3', '480'), 'video6': (2, '1', '5000')})
+    cameras = {'a': camera('/dev/video0'), 'b': camera('/dev/video2'),
+               'c': camera('/dev/video4'), 'd': camera('/dev/video6', fourcc='YUYV')}
+    plan = UsbBandwidthPlanner(root, 0.8, 'downgrade').plan(cameras)
+    entries = plan['cameras']
+    assert [entries[camera_id]['action'] for camera_id in 'abcd'] == ['ok', 'ok', 'downgraded', 'ok']
+    # 앞 두 대가 예산 대부분을 쓰고 세 번째는 남은 만큼으로 낮춤 (설정 순서 = 우선순위)
+    remaining = 384.0 - entries['a']['bandwidth_mbps'] - entries['b']['bandwidth_mbps']
+    mode = entries['c']['mode']
+    assert estimate_bandwidth(**mode) <= remaining
+    assert mode['resolution'][0] * mode['resolution'][1] * mode['fps'] < 1920 * 1080 * 30
+    assert plan['buses']['1']['used_mbps'] <= plan['buses']['1']['budget_mbps']
+    # USB 3 버스는 YUYV 1080p30(약 995Mbps)도 그대로 허용
+    assert plan['buses']['2']['budget_mbps'] == 4000.0 and entries['d']['mode']['fourcc'] == 'YUYV'
+
+def test_downgrade_prefers_mjpeg_switch(tmp_path):
+    """예산을 넘는 YUYV 요청은 해상도/FPS보다 MJPG 전환을 먼저 시도"""
+    root = make_sysfs(tmp_path, {'video0': (1, '1', '480')})
+    plan = UsbBandwidthPlanner(root, 0.8, 'downgrade').plan({'a': camera('/dev/video0', fourcc='YUYV')})
+    assert plan['cameras']['a']['action'] == 'downgraded'
+    assert plan['cameras']['a']['mode'] == {'resolution': (1920, 1080), 'fps': 30, 'fourcc': 'MJPG'}
+
+def test_policy_refuse(tmp_path):
+    """refuse: 예산을 넘는 카메라는 모드 없이 refused, 버스 사용량에 넣지 않음"""
+    root = make_sysfs(tmp_path, {'video0': (1, '1', '480'), 'video2': (1, '2', '480'),
+                                 'video4': (1, '3', '480')})
+    cameras = {'a': camera('/dev/video0'), 'b': camera('/dev/video2'), 'c': camera('/dev/video4')}
+    plan = UsbBandwidthPlanner(root, 0.8, 'refuse').plan(cameras)
+    refused = plan['cameras']['c']
+    assert refused['action'] == 'refused' and refused['mode'] is None and refused['bandwidth_mbps'] == 0.0
+    assert plan['buses']['1']['cameras'] == ['a', 'b']
+    assert plan['buses']['1']['used_mbps'] == round(2 * estimate_bandwidth((1920, 1080), 30, 'MJPG'), 1)
+
+def test_unknown_bus_and_override(tmp_path):
+    """sysfs에 없는 장치는 unplanned, 설정의 usb_bus는 sysfs보다 우선 (속도는 USB 2.0 가정)"""
+    root = make_sysfs(tmp_path, {'video0': (1, '1', '480')})
+    cameras = {'pattern': camera('pattern'), 'missing': camera('/dev/video8'),
+               'pinned': camera('/dev/video8', usb_bus=4)}
+    plan = UsbBandwidthPlanner(root, 0.5, 'refuse').plan(cameras)
+    assert plan['cameras']['pattern']['action'] == 'unplanned'
+    assert plan['cameras']['missing']['action'] == 'unplanned'
+    assert plan['cameras']['pinned']['bus'] == 4 and plan['buses']['4']['budget_mbps'] == 240.0
+
+if __name__ == "__main__":
+    sys.exit(run_tests("USB 대역폭 계획 테스트", globals()))
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+import socket
+import sys
+import time
+
+from flask import Flask, Response, request
+
+import web_interface
+from camera_manager import Camera, camera_manager
+from config import config
+from web_server import AsyncWebServer, HttpError
+from bench_util import run_tests
+
+def read_request(data: bytes, limit: int = 2 ** 16):
+    """바이트열을 StreamReader에 넣고 _read_request() 결과 (HttpError면 그 예외)"""
+    async def run():
+        reader = asyncio.StreamReader(limit=limit)
+        reader.feed_data(data)
+        reader.feed_eof()
+        try:
+            return await AsyncWebServer()._read_request(reader)
+        except HttpError as e:
+            return e
+    return asyncio.run(run())
+
+def test_request_line_and_headers():
+    """요청 줄/쿼리 분리, 헤더 이름은 소문자로, 같은 이름은 쉼표로 합침"""
+    parsed = read_request(b'get /api/status?camera=1&w=320 HTTP/1.1\r\nHost: pi\r\n'
+                          b'X-Tag: a\r\nx-tag: b\r\nno-colon-line\r\n\r\n')
+    assert (parsed.method, parsed.path, parsed.query, parsed.version) == ('GET', '/api/status', 'camera=1&w=320', 'HTTP/1.1')
+    assert parsed.headers == {'host': 'pi', 'x-tag': 'a, b'} and parsed.args == {'camera': '1', 'w': '320'}
+    assert parsed.keep_alive and parsed.body == b''
+    assert not read_request(b'GET / HTTP/1.0\r\n\r\n').keep_alive
+    assert not read_request(b'GET / HTTP/1.1\r\nConnection: Close\r\n\r\n').keep_alive
+    # 요청 전에 연결이 닫히거나 헤더가 끝나지 않음
+    assert read_request(b'') is None and read_request(b'GET / HTTP/1.1\r\nHost:') is None
+
+def test_malformed_and_oversized_requests():
+    """잘못된 요청 줄/길이, 청크 본문, 너무 큰 헤더와 본문은 HttpError 상태 코드로"""
+    cases = [
+        (b'GARBAGE\r\n\r\n', 400),
+        (b'POST / HTTP/1.1\r\nContent-Length: ten\r\n\r\n', 400),
+        (b'POST / HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n', 501),
+        (b'POST / HTTP/1.1\r\nContent-Length: %d\r\n\r\n' % (config.web_interface.get('max_body', 1 << 20) + 1), 413),
+        (b'GET / HTTP/1.1\r\nX-Big: ' + b'a' * 2000 + b'\r\n\r\n', 431)
+    ]
+    for data, status in cases:
+        error = read_request(data, limit=1024)
+        assert isinstance(error, HttpError) and error.status == status, (data[:30], error)
+    # 본문이 Content-Length보다 짧게 끊기면 예외 (연결 종료)
+    try:
+        read_request(b'POST / HTTP/1.1\r\nContent-Length: 10\r\n\r\nabc')
+        assert False, "잘린 본문"
+    except asyncio.IncompleteReadError:
+        pass
+
+echo_app = Flask("web_server_test")
+
+@echo_app.route('/hello')
+def hello():
+    return {'hello': request.args.get('name', 'world')}
+
+@echo_app.route('/echo', methods=['POST'])
+def echo():
+    return Response(request.get_data(), content_type=request.content_type)
+
+@echo_app.route('/chunks')
+def chunks():
+    return Response((f"chunk{index};" for index in range(3)), content_type='text/plain')
+
+class ServerRunner:
+    """임의 포트의 AsyncWebServer (테스트용 Flask 앱)"""
+    
+    def __enter__(self) -> AsyncWebServer:
+        self.saved = config.web_interface
+        config.web_interface = {**self.saved, 'host': '127.0.0.1', 'port': 0}
+        self.server = AsyncWebServer(echo_app)
+        assert self.server.start()
+        self.port = self.server.listener.sockets[0].getsockname()[1]
+        return self.server
+    
+    def connect(self) -> socket.socket:
+        return socket.create_connection(('127.0.0.1', self.port), timeout=3.0)
+    
+    def __exit__(self, *exc):
+        self.server.stop()
+        config.web_interface = self.saved
+
+def read_response(stream) -> tuple:
+    """(상태 코드, 헤더, 본문) - Content-Length가 없으면 연결이 닫힐 때까지 읽음"""
+    status = int(stream.readline().split()[1])
+    headers = {}
+    while True:
+        line = stream.readline().decode('latin-1').strip()
+        if not line:
+            break
+        name, _, value = line.partition(':')
+        headers[name.strip().lower()] = value.strip()
+    if 'content-length' in headers:
+        body = stream.read(int(headers['content-length']))
+    else:
+        body = stream.read()
+    return status, headers, body
+
+def test_keep_alive_reuses_connection():
+    """HTTP/1.1 요청 여러 개를 한 연결로, Connection: close나 스트리밍 응답 뒤에는 닫음"""
+    server = ServerRunner()
+    with server as web:
+        connection = server.connect()
+        stream = connection.makefile('rb')
+        for name in ('a', 'b', 'c'):
+            connection.sendall(f'GET /hello?name={name} HTTP/1.1\r\nHost: test\r\n\r\n'.encode())
+            status, headers, body = read_response(stream)
+            assert status == 200 and body == f'{{"hello":"{name}"}}\n'.encode(), body
+            assert 'connection' not in headers
+        assert web.requests == 3 and len(web.connections) == 1
+        
+        # 길이를 모르는 스트리밍 응답은 보낸 뒤 연결 종료
+        connection.sendall(b'GET /chunks HTTP/1.1\r\n\r\n')
+        status, headers, body = read_response(stream)
+        assert status == 200 and headers['connection'] == 'close' and body == b'chunk0;chunk1;chunk2;'
+        connection.close()
+        
+        connection = server.connect()
+        stream = connection.makefile('rb')
+        connection.sendall(b'GET /hello HTTP/1.1\r\nConnection: close\r\n\r\n')
+        status, headers, _ = read_response(stream)
+        assert status == 200 and headers['connection'] == 'close' and stream.read() == b''
+        connection.close()
+
+def test_content_length_body_through_flask():
+    """Content-Length 본문이 WSGI 입력으로 Flask에 그대로 전달되고, 파이프라인 요청도 순서대로"""
+    server = ServerRunner()
+    with server:
+        connection = server.connect()
+        stream = connection.makefile('rb')
+        payload = '{"name": "카메라"}'.encode()
+        connection.sendall(b'POST /echo HTTP/1.1\r\nContent-Type: application/json\r\n'
+                           b'Content-Length: %d\r\n\r\n' % len(payload) + payload
+                           + b'GET /hello HTTP/1.1\r\n\r\n')
+        status, headers, body = read_response(stream)
+        assert status == 200 and body == payload and headers['content-type'] == 'application/json'
+        assert read_response(stream)[0] == 200
+        
+        # 잘못된 요청은 JSON 오류 응답 후 연결 종료
+        connection.sendall(b'BROKEN\r\n\r\n')
+        status, headers, body = read_response(stream)
+        assert status == 400 and headers['connection'] == 'close' and b'error' in body
+        assert stream.read() == b''
+        connection.close()
+
+def test_stream_disconnect_releases_subscription():
+    """MJPEG 시청자가 스트림 중간에 끊으면 시청자 등록, 방송 스레드, 카메라 구독이 정리됨"""
+    camera = Camera('webtest', {'name': 'webtest', 'device': 'pattern', 'backend': 'fake',
+                                'resolution': (160, 120), 'fps': 30, 'on_demand': True})
+    camera_manager.cameras['webtest'] = camera
+    server = ServerRunner()
+    try:
+        with server as web:
+            connection = server.connect()
+            connection.sendall(b'GET /api/cameras/webtest/stream?fps=10 HTTP/1.1\r\n\r\n')
+            stream = connection.makefile('rb')
+            assert stream.readline().startswith(b'HTTP/1.1 200')
+            while stream.readline().strip():
+                pass
+            assert stream.readline() == b'--frame\r\n'
+            assert camera.consumers == {'mjpeg': 1} and len(web_interface.mjpeg_clients) == 1
+            broadcaster = web.broadcasters['webtest']
+            
+            stream.close()
+            connection.close()
+            deadline = time.time() + 3.0
+            while (camera.consumers or web.broadcasters) and time.time() < deadline:
+                time.sleep(0.05)
+            assert camera.consumers == {} and web.broadcasters == {}
+            assert web_interface.mjpeg_clients == {}
+            broadcaster.thread.join(2.0)
+            assert not broadcaster.thread.is_alive()
+    finally:
+        camera.stop()
+        del camera_manager.cameras['webtest']
+
+if __name__ == "__main__":
+    sys.exit(run_tests("웹 서버 테스트", globals()))
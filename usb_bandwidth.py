@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import logging
+from typing import Dict, List, Optional, Tuple
+
+# 픽셀당 바이트 수 추정값
+# MJPEG 압축률은 장면마다 다르므로 YUYV 대비 약 1:6으로 보수적으로 가정
+BYTES_PER_PIXEL = {
+    'YUYV': 2.0,
+    'MJPG': 2.0 / 6,
+    'H264': 2.0 / 60
+}
+
+# 다운그레이드 후보 (해상도는 큰 것부터, FPS는 높은 것부터)
+RESOLUTION_LADDER = [(1920, 1080), (1280, 720), (960, 540), (640, 480), (320, 240)]
+FPS_LADDER = [30, 25, 20, 15, 10, 5]
+
+# 버스 속도를 알 수 없을 때 가정하는 USB 2.0 High-Speed (Mbps)
+DEFAULT_USB_SPEED = 480.0
+
+logger = logging.getLogger("UsbBandwidth")
+
+def find_usb_device(device: str, sysfs_root: str = '/sys') -> Optional[str]:
+    """/dev/videoN 장치가 속한 USB 장치의 sysfs 디렉터리 경로 조회"""
+    name = os.path.basename(os.path.realpath(device))
+    path = os.path.realpath(os.path.join(sysfs_root, 'class', 'video4linux', name, 'device'))
+    root = os.path.realpath(sysfs_root)
+    
+    # USB 인터페이스에서 상위로 올라가며 busnum이 있는 USB 장치를 찾음
+    while path.startswith(root) and path != root:
+        if os.path.isfile(os.path.join(path, 'busnum')):
+            return path
+        path = os.path.dirname(path)
+    return None
+
+def _read_sysfs(path: str) -> Optional[str]:
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+def find_usb_bus(device: str, sysfs_root: str = '/sys') -> Optional[int]:
+    """/dev/videoN 장치가 연결된 USB 버스 번호를 sysfs에서 조회"""
+    usb_device = find_usb_device(device, sysfs_root)
+    if usb_device is None:
+        return None
+    value = _read_sysfs(os.path.join(usb_device, 'busnum'))
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+def read_usb_speed(device: str, sysfs_root: str = '/sys') -> Optional[float]:
+    """장치의 USB 링크 속도(Mbps)를 sysfs에서 조회"""
+    usb_device = find_usb_device(device, sysfs_root)
+    if usb_device is None:
+        return None
+    value = _read_sysfs(os.path.join(usb_device, 'speed'))
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+def estimate_bandwidth(resolution: Tuple[int, int], fps: float, fourcc: str = 'MJPG') -> float:
+    """(해상도, FPS, 포맷)에 필요한 대역폭 추정 (Mbps)"""
+    width, height = resolution
+    bytes_per_pixel = BYTES_PER_PIXEL.get(fourcc, BYTES_PER_PIXEL['YUYV'])
+    return width * height * fps * bytes_per_pixel * 8 / 1e6
+
+class UsbBandwidthPlanner:
+    """USB 버스별 대역폭 예산에 맞춰 카메라 모드(해상도/FPS/포맷)를 정하는 플래너
+    
+    policy:
+        'off'       - 계산만 하고 설정은 바꾸지 않음
+        'downgrade' - 예산을 넘으면 MJPG 전환, FPS/해상도 순으로 낮춤
+        'refuse'    - 예산을 넘는 카메라는 시작하지 않음
+    """
+    
+    def __init__(self, sysfs_root: str = '/sys', budget_ratio: float = 0.8,
+                 policy: str = 'downgrade'):
+        self.sysfs_root = sysfs_root
+        # USB 2.0은 마이크로프레임의 최대 80%만 등시성 전송에 예약 가능
+        self.budget_ratio = budget_ratio
+        self.policy = policy
+    
+    def enumerate(self, cameras: Dict[str, Dict]) -> Dict[str, Dict]:
+        """카메라별 USB 버스 번호와 링크 속도 조회"""
+        result = {}
+        for camera_id, camera_config in cameras.items():
+            device = camera_config.get('device')
+            bus = camera_config.get('usb_bus')
+            speed = None
+            if isinstance(device, str) and device.startswith('/dev/'):
+                if bus is None:
+                    bus = find_usb_bus(device, self.sysfs_root)
+                speed = read_usb_speed(device, self.sysfs_root)
+            result[camera_id] = {'device': device, 'bus': bus, 'speed_mbps': speed}
+        return result
+    
+    @staticmethod
+    def requested_mode(camera_config: Dict) -> Dict:
+        width, height = camera_config.get('resolution', (640, 480))
+        return {
+            'resolution': (width, height),
+            'fps': camera_config.get('fps', 30),
+            'fourcc': camera_config.get('fourcc', 'MJPG')
+        }
+    
+    @staticmethod
+    def candidate_modes(mode: Dict) -> List[Dict]:
+        """요청 모드부터 점점 낮아지는 후보 모드 목록"""
+        width, height = mode['resolution']
+        formats = [mode['fourcc']] + (['MJPG'] if mode['fourcc'] != 'MJPG' else [])
+        resolutions = [(width, height)] + [r for r in RESOLUTION_LADDER
+                                           if r[0] * r[1] < width * height]
+        rates = [mode['fps']] + [f for f in FPS_LADDER if f < mode['fps']]
+        
+        # 같은 해상도/FPS라면 포맷 전환(MJPG)을 먼저 시도
+        candidates = []
+        for resolution in resolutions:
+            for fps in rates:
+                for fourcc in formats:
+                    candidates.append({'resolution': resolution, 'fps': fps, 'fourcc': fourcc})
+        return candidates
+    
+    def plan(self, cameras: Dict[str, Dict]) -> Dict:
+        """카메라 설정 목록(설정 순서 = 우선순위)에 대한 대역폭 계획 생성"""
+        devices = self.enumerate(cameras)
+        buses: Dict[str, Dict] = {}
+        plan_cameras: Dict[str, Dict] = {}
+        
+        for camera_id, camera_config in cameras.items():
+            info = devices[camera_id]
+            requested = self.requested_mode(camera_config)
+            entry = {
+                'bus': info['bus'],
+                'requested': requested,
+                'mode': requested,
+                'bandwidth_mbps': round(estimate_bandwidth(**requested), 1),
+                'action': 'ok'
+            }
+            plan_cameras[camera_id] = entry
+            
+            if info['bus'] is None:
+                entry['action'] = 'unplanned'
+                continue
+            
+            key = str(info['bus'])
+            bus = buses.setdefault(key, {
+                'speed_mbps': info['speed_mbps'] or DEFAULT_USB_SPEED,
+                'budget_mbps': round((info['speed_mbps'] or DEFAULT_USB_SPEED) * self.budget_ratio, 1),
+                'used_mbps': 0.0,
+                'cameras': []
+            })
+            available = bus['budget_mbps'] - bus['used_mbps']
+            
+            if self.policy == 'off':
+                if entry['bandwidth_mbps'] > available:
+                    entry['action'] = 'oversubscribed'
+            elif entry['bandwidth_mbps'] > available:
+                chosen = None
+                if self.policy == 'downgrade':
+                    for mode in self.candidate_modes(requested):
+                        if estimate_bandwidth(**mode) <= available:
+                            chosen = mode
+                            break
+                if chosen is None:
+                    entry.update(mode=None, bandwidth_mbps=0.0, action='refused')
+                    logger.warning(f"카메라 {camera_id}: 버스 {key} 대역폭 부족으로 시작하지 않음")
+                    continue
+                entry.update(mode=chosen, bandwidth_mbps=round(estimate_bandwidth(**chosen), 1),
+                             action='downgraded')
+                logger.warning(f"카메라 {camera_id}: 버스 {key} 대역폭에 맞춰 "
+                               f"{chosen['resolution'][0]}x{chosen['resolution'][1]} "
+                               f"{chosen['fps']}fps {chosen['fourcc']}로 조정")
+            
+            bus['used_mbps'] = round(bus['used_mbps'] + entry['bandwidth_mbps'], 1)
+            bus['cameras'].append(camera_id)
+        
+        return {
+            'policy': self.policy,
+            'budget_ratio': self.budget_ratio,
+            'buses': buses,
+            'cameras': plan_cameras
+        }
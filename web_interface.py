@@ -1,15 +1,21 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-from flask import Flask, render_template, jsonify, request, Response
-import cv2
+from flask import Flask, render_template, jsonify, request, Response, send_from_directory
 import numpy as np
 import threading
 import time
 import logging
 import json
-from camera_manager import camera_manager
+import os
+from typing import Dict, List, Tuple
+from camera_manager import camera_manager, DeliveryStats, FrameDecimator, parse_variant, variant_label
 from rtsp_server import rtsp_server
+from motion_detector import motion_detector
+from recorder import recorder
+from frame_bus import frame_bus
+from segment_store import parse_time
+from latency_metrics import render_prometheus
 from config import config
 
 # Flask 앱 생성
@@ -27,6 +33,30 @@ def after_request(response):
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# MJPEG 시청자별 전달 통계 (두 웹 서버 엔진 공용, id -> (시청자 정보, DeliveryStats))
+mjpeg_clients: Dict[int, Tuple[Dict, DeliveryStats]] = {}
+mjpeg_clients_lock = threading.Lock()
+
+def register_mjpeg_client(camera_id: str, address: str, variant: Tuple) -> DeliveryStats:
+    """MJPEG 시청자 등록 후 전송마다 기록할 통계 반환 (카메라의 'send' 단계에도 함께 기록)"""
+    camera = camera_manager.get_camera(camera_id)
+    stats = DeliveryStats(pipeline=camera.latency if camera is not None else None)
+    info = {'camera_id': camera_id, 'address': address, 'variant': variant_label(*variant),
+            'connected': time.time()}
+    with mjpeg_clients_lock:
+        mjpeg_clients[id(stats)] = (info, stats)
+    return stats
+
+def unregister_mjpeg_client(stats: DeliveryStats):
+    with mjpeg_clients_lock:
+        mjpeg_clients.pop(id(stats), None)
+
+def get_mjpeg_clients() -> List[Dict]:
+    """MJPEG 시청자별 실제 FPS/지연"""
+    with mjpeg_clients_lock:
+        clients = list(mjpeg_clients.values())
+    return [{**info, **stats.to_dict()} for info, stats in clients]
+
 @app.route('/')
 def index():
     """메인 페이지"""
@@ -39,15 +69,25 @@ def get_status():
         camera_status = camera_manager.get_all_status()
         rtsp_status = rtsp_server.get_all_status()
         
+        # 인코딩 캐시 통계 합계
+        cache_hits = sum(cam['encode_cache']['hits'] for cam in camera_status.values())
+        cache_misses = sum(cam['encode_cache']['misses'] for cam in camera_status.values())
+        
         status = {
             'system': {
                 'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
                 'uptime': time.time(),
                 'cameras': len(camera_status),
-                'rtsp_streams': len(rtsp_status)
+                'rtsp_streams': len(rtsp_status),
+                'encode_cache': {
+                    'hits': cache_hits,
+                    'misses': cache_misses
+                }
             },
             'cameras': camera_status,
-            'rtsp_streams': rtsp_status
+            'rtsp_streams': rtsp_status,
+            'mjpeg_clients': get_mjpeg_clients(),
+            'bringup': camera_manager.get_bringup_status()
         }
         
         return jsonify(status)
@@ -129,6 +169,241 @@ def get_rtsp_urls():
         logger.error(f"RTSP URL 조회 오류: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/clients')
+def get_clients():
+    """시청자별 실제 FPS와 캡처부터 전송까지의 지연 (RTSP/MJPEG)"""
+    try:
+        rtsp_clients = []
+        for camera_id, stream in rtsp_server.get_all_status().items():
+            for client in stream['clients']:
+                rtsp_clients.append({'camera_id': camera_id, 'address': client['address'],
+                                     'transport': client['transport'], 'variant': client['variant'],
+                                     'state': client['state'], **client['delivery']})
+        return jsonify({'success': True, 'rtsp': rtsp_clients, 'mjpeg': get_mjpeg_clients()})
+    except Exception as e:
+        logger.error(f"시청자 통계 조회 오류: {e}")
+        return jsonify({'error': str(e)}), 500
+
+def _client_latency_series() -> List[Tuple[Dict, DeliveryStats]]:
+    """시청자별 (라벨, 전달 통계) - RTSP와 MJPEG"""
+    series = []
+    for camera_id, stream in list(rtsp_server.streams.items()):
+        for client in list(stream.clients):
+            series.append(({'camera': camera_id, 'protocol': 'rtsp', 'client': f"{client.addr[0]}:{client.addr[1]}",
+                            'variant': variant_label(*client.variant)}, client.delivery))
+    with mjpeg_clients_lock:
+        clients = list(mjpeg_clients.values())
+    for info, stats in clients:
+        series.append(({'camera': info['camera_id'], 'protocol': 'mjpeg', 'client': info['address'],
+                        'variant': info['variant']}, stats))
+    return series
+
+@app.route('/api/metrics')
+def get_metrics():
+    """파이프라인 단계별(카메라)과 시청자별 지연 히스토그램 (p50/p95/p99)
+    
+    ?format=prometheus이면 Prometheus 텍스트 형식으로 버킷을 그대로 내보냅니다.
+    """
+    try:
+        cameras = dict(camera_manager.cameras)
+        clients = _client_latency_series()
+        if request.args.get('format') == 'prometheus':
+            lines = render_prometheus(
+                'rtsp_camera_stage_latency_seconds',
+                '카메라 파이프라인 단계별 지연 (read: 캡처 -> read 반환, send: 캡처 -> 소켓 전송)',
+                [({'camera': camera_id, 'stage': stage}, histogram)
+                 for camera_id, camera in cameras.items() for stage, histogram in camera.latency.stages.items()])
+            lines += render_prometheus(
+                'rtsp_camera_client_latency_seconds', '시청자별 캡처 -> 소켓 전송 지연',
+                [(labels, stats.histogram) for labels, stats in clients])
+            return Response('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
+        
+        return jsonify({
+            'success': True,
+            'cameras': {camera_id: camera.latency.to_dict() for camera_id, camera in cameras.items()},
+            'clients': [{**labels, 'frames': stats.frames, 'fps': round(stats.fps, 1),
+                         **stats.histogram.to_dict()} for labels, stats in clients]
+        })
+    except Exception as e:
+        logger.error(f"지연 지표 조회 오류: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/usb/plan')
+def get_usb_plan():
+    """USB 버스별 대역폭 계획 반환 (?refresh=1이면 다시 계산)"""
+    try:
+        if request.args.get('refresh'):
+            plan = camera_manager.plan_usb_bandwidth()
+        else:
+            plan = camera_manager.get_usb_plan()
+        return jsonify({'success': True, 'plan': plan})
+    except Exception as e:
+        logger.error(f"USB 대역폭 계획 조회 오류: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/frame_bus')
+def get_frame_bus():
+    """프레임 버스 상태 (카메라별 공유 메모리 이름, 형식, 시퀀스) 반환"""
+    try:
+        return jsonify({'success': True, 'frame_bus': frame_bus.get_status()})
+    except Exception as e:
+        logger.error(f"프레임 버스 상태 조회 오류: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/motion')
+def get_motion():
+    """모든 카메라의 모션 점수/영역/구역과 분석 통계 반환"""
+    try:
+        return jsonify({'success': True, 'motion': motion_detector.get_status()})
+    except Exception as e:
+        logger.error(f"모션 상태 조회 오류: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/motion/<camera_id>')
+def get_camera_motion(camera_id):
+    """특정 카메라의 모션 상태 반환"""
+    status = motion_detector.get_camera_status(camera_id)
+    if status is None:
+        return jsonify({'error': '모션 감지 대상 카메라가 아닙니다'}), 404
+    return jsonify({'success': True, 'motion': status})
+
+@app.route('/api/motion/<camera_id>/zones', methods=['PUT'])
+def update_motion_zones(camera_id):
+    """감시 구역 변경 ({"zones": [[x0, y0, x1, y1], ...]} - 0~1 비율, 빈 목록이면 전체 화면)"""
+    if camera_manager.get_camera(camera_id) is None:
+        return jsonify({'error': '카메라를 찾을 수 없습니다'}), 404
+    data = request.get_json(silent=True) or {}
+    try:
+        zones = motion_detector.set_zones(camera_id, data.get('zones', []))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        config.save_config()
+        return jsonify({'success': True, 'zones': [list(zone) for zone in zones]})
+    except Exception as e:
+        logger.error(f"모션 구역 저장 오류: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/cameras/<camera_id>/record', methods=['POST'])
+def record_camera(camera_id):
+    """수동 녹화 트리거 ({"duration": 초} - 생략하면 post_roll, 프리롤 포함)"""
+    data = request.get_json(silent=True) or {}
+    try:
+        duration = float(data['duration']) if data.get('duration') is not None else None
+    except (TypeError, ValueError):
+        return jsonify({'error': f"잘못된 녹화 시간: {data.get('duration')!r}"}), 400
+    if duration is not None and not 0 < duration <= 3600:
+        return jsonify({'error': '녹화 시간은 0~3600초여야 합니다'}), 400
+    if not recorder.running:
+        return jsonify({'error': '녹화가 비활성화되어 있습니다'}), 503
+    if not recorder.trigger(camera_id, duration):
+        return jsonify({'error': '녹화 대상 카메라가 아닙니다'}), 404
+    return jsonify({'success': True, 'message': f'카메라 {camera_id} 녹화 시작됨'})
+
+@app.route('/api/cameras/<camera_id>/record/stop', methods=['POST'])
+def stop_recording(camera_id):
+    """진행 중인 녹화 종료"""
+    if not recorder.stop_recording(camera_id):
+        return jsonify({'error': '녹화 대상 카메라가 아닙니다'}), 404
+    return jsonify({'success': True, 'message': f'카메라 {camera_id} 녹화 종료됨'})
+
+@app.route('/api/recordings')
+def get_recordings():
+    """녹화 상태와 저장된 세그먼트 목록 (?camera=camera1로 필터)"""
+    try:
+        return jsonify({
+            'success': True,
+            'status': recorder.get_status(),
+            'recordings': recorder.list_recordings(request.args.get('camera'))
+        })
+    except Exception as e:
+        logger.error(f"녹화 목록 조회 오류: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/recordings/<camera_id>/<filename>')
+def download_recording(camera_id, filename):
+    """세그먼트 파일 다운로드 (.mjpeg / .h264)"""
+    path = recorder.get_segment_path(camera_id, filename)
+    if path is None:
+        return jsonify({'error': '녹화 파일을 찾을 수 없습니다'}), 404
+    mimetype = 'video/h264' if filename.endswith('.h264') else 'video/x-motion-jpeg'
+    return send_from_directory(os.path.abspath(os.path.dirname(path)), filename, mimetype=mimetype,
+                               as_attachment=True)
+
+@app.route('/api/cameras/<camera_id>/playback')
+def get_playback(camera_id):
+    """녹화 재생 (?from=...&to=...&speed=1 - 시각은 유닉스 시각 또는 ISO 8601 로컬 시각)
+    
+    MJPEG 녹화는 multipart MJPEG으로 녹화 시각 간격에 맞춰(speed=0이면 최대한 빠르게),
+    H.264 녹화는 from 직전 키프레임부터 Annex B 바이트 스트림으로 보냅니다.
+    """
+    try:
+        start = parse_time(request.args.get('from'))
+        end = parse_time(request.args['to']) if request.args.get('to') else time.time()
+        speed = float(request.args.get('speed', 1))
+        if end < start or speed < 0:
+            raise ValueError("to는 from 이후, speed는 0 이상이어야 합니다")
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    segments = recorder.store.segments(camera_id, start, end)
+    if not segments:
+        return jsonify({'error': '해당 구간의 녹화가 없습니다'}), 404
+    kind = segments[0].kind
+    frames = recorder.store.iter_frames(camera_id, start, end, kind)
+    
+    if kind == 'h264':
+        def generate_h264():
+            try:
+                for _, data, _, _ in frames:
+                    yield data
+            except Exception as e:
+                logger.error(f"녹화 재생 오류: {e}")
+        return Response(generate_h264(), mimetype='video/h264')
+    
+    def generate_mjpeg():
+        started = None
+        try:
+            for timestamp, data, _, _ in frames:
+                if speed > 0:
+                    # 녹화된 시각 간격대로 재생
+                    if started is None:
+                        started = (time.time(), timestamp)
+                    delay = (timestamp - started[1]) / speed - (time.time() - started[0])
+                    if delay > 0:
+                        time.sleep(min(delay, 5.0))
+                yield (b'--frame\r\n'
+                       b'Content-Type: image/jpeg\r\n'
+                       b'X-Timestamp: ' + f"{timestamp:.3f}".encode() + b'\r\n\r\n' + data + b'\r\n')
+        except Exception as e:
+            logger.error(f"녹화 재생 오류: {e}")
+    
+    return Response(generate_mjpeg(), mimetype='multipart/x-mixed-replace; boundary=frame')
+
+@app.route('/api/cameras/<camera_id>/thumbnail')
+def get_recording_thumbnail(camera_id):
+    """녹화에서 특정 시각의 JPEG (?at=...&w=320)"""
+    try:
+        timestamp = parse_time(request.args.get('at'))
+        width = int(request.args['w']) if request.args.get('w') else None
+        if width is not None and not 16 <= width <= 4096:
+            raise ValueError(f"잘못된 너비: {width}")
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        found = recorder.store.thumbnail(camera_id, timestamp, width)
+        if found is None:
+            return jsonify({'error': '해당 시각의 녹화가 없습니다'}), 404
+        frame_time, jpeg_data = found
+        response = Response(jpeg_data, mimetype='image/jpeg')
+        response.headers['X-Timestamp'] = f"{frame_time:.3f}"
+        return response
+    except Exception as e:
+        logger.error(f"녹화 썸네일 오류: {e}")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/config')
 def get_config():
     """현재 설정 반환"""
@@ -163,19 +438,28 @@ def update_config():
 
 @app.route('/api/cameras/<camera_id>/snapshot')
 def get_snapshot(camera_id):
-    """카메라 스냅샷 반환"""
+    """카메라 스냅샷 반환 (?w=320&h=240으로 축소, ?overlay=0이면 오버레이 없는 원본)"""
+    try:
+        size, _, overlay = parse_variant(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if camera_manager.get_camera(camera_id) is None:
+        return jsonify({'error': '카메라를 찾을 수 없습니다'}), 404
+    
     try:
-        frame = camera_manager.get_camera_frame(camera_id)
-        if frame is None:
+        # 온디맨드 카메라는 잠시 구독해 첫 프레임을 받음 (linger 동안 유지되어 연속 요청은 바로 응답)
+        if not camera_manager.subscribe(camera_id, 'snapshot'):
+            return jsonify({'error': '카메라를 시작할 수 없습니다'}), 503
+        try:
+            # 최신 프레임의 JPEG (인코딩 캐시 공유, 패스스루면 카메라 원본)
+            jpeg_data = camera_manager.get_camera_jpeg(camera_id, 90, timeout=2.0, size=size, overlay=overlay)
+        finally:
+            camera_manager.unsubscribe(camera_id, 'snapshot')
+        if jpeg_data is None:
             return jsonify({'error': '프레임을 가져올 수 없습니다'}), 400
         
-        # JPEG로 인코딩
-        ret, jpeg_data = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 90])
-        if not ret:
-            return jsonify({'error': '이미지 인코딩 실패'}), 500
-        
         # 응답 생성
-        response = Response(jpeg_data.tobytes(), mimetype='image/jpeg')
+        response = Response(jpeg_data, mimetype='image/jpeg')
         response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
         response.headers['Pragma'] = 'no-cache'
         response.headers['Expires'] = '0'
@@ -188,25 +472,56 @@ def get_snapshot(camera_id):
 
 @app.route('/api/cameras/<camera_id>/stream')
 def get_stream(camera_id):
-    """카메라 스트림 반환 (MJPEG)"""
+    """카메라 스트림 반환 (MJPEG, ?w=320&fps=5&overlay=0처럼 시청자별 크기/FPS/오버레이 지정 가능)
+    
+    같은 (크기, fps, 오버레이)를 요청한 시청자들은 프레임마다 축소/인코딩 결과를 공유합니다.
+    """
+    try:
+        size, fps, overlay = parse_variant(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    camera = camera_manager.get_camera(camera_id)
+    if camera is None:
+        return jsonify({'error': '카메라를 찾을 수 없습니다'}), 404
+    
+    address = request.remote_addr
+    
     def generate_frames():
+        # 시청하는 동안 카메라 구독 유지 (연결이 끊기면 제너레이터가 닫히며 해제)
+        if not camera_manager.subscribe(camera_id, 'mjpeg'):
+            return
+        stats = register_mjpeg_client(camera_id, address, (size, fps, overlay))
+        try:
+            yield from stream_frames(stats)
+        finally:
+            unregister_mjpeg_client(stats)
+            camera_manager.unsubscribe(camera_id, 'mjpeg')
+    
+    def stream_frames(stats: DeliveryStats):
+        decimator = FrameDecimator(fps)
+        last_seq = 0
         while True:
             try:
-                frame = camera_manager.get_camera_frame(camera_id)
-                if frame is None:
-                    time.sleep(0.1)
+                # 새 프레임이 들어오는 즉시 깨어나 목표 FPS에 맞는 프레임만 전송 (고정 간격 대기 없음)
+                entry = camera.wait_frame(last_seq, timeout=1.0)
+                if entry is None:
+                    if not camera.is_running:
+                        time.sleep(0.1)
+                    continue
+                last_seq = entry.seq
+                if not decimator.accept(entry.timestamp):
                     continue
                 
-                # JPEG로 인코딩
-                ret, jpeg_data = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 80])
-                if not ret:
+                # JPEG 프레임 가져오기 (RTSP/같은 크기의 다른 뷰어와 인코딩 공유)
+                jpeg_data = camera.encode_frame(entry, 80, size=size, overlay=overlay)
+                if jpeg_data is None:
+                    time.sleep(0.1)
                     continue
                 
-                # MJPEG 스트림 형식으로 전송
+                # MJPEG 스트림 형식으로 전송 (서버가 쓰고 나면 제너레이터가 재개됨)
                 yield (b'--frame\r\n'
-                       b'Content-Type: image/jpeg\r\n\r\n' + jpeg_data.tobytes() + b'\r\n')
-                
-                time.sleep(0.033)  # 30 FPS
+                       b'Content-Type: image/jpeg\r\n\r\n' + jpeg_data + b'\r\n')
+                stats.record(entry.timestamp)
                 
             except Exception as e:
                 logger.error(f"스트림 생성 오류: {e}")
@@ -0,0 +1,603 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+웹 서버 엔진 - asyncio 이벤트 루프 하나로 MJPEG 스트림/스냅샷을 처리하고 나머지 API는 Flask 앱으로 전달
+
+'asyncio' 엔진은 MJPEG 시청자마다 스레드를 잡지 않습니다. 카메라마다 방송 스레드 하나가
+새 프레임을 기다려 (크기, fps, 오버레이) 변형별로 한 번만 인코딩하고, 이벤트 루프가
+그 bytes를 시청자 연결에 씁니다. 느린 시청자는 중간 프레임을 건너뛰고 최신 프레임을 받으며,
+연결이 끊기면 EOF로 바로 알아채 구독을 정리합니다. 그 밖의 요청(JSON API, 페이지, 녹화 재생)은
+WSGI로 web_interface의 Flask 앱을 API 스레드 풀에서 실행합니다.
+
+'threaded' 엔진은 기존 Werkzeug 개발 서버(요청/시청자당 스레드)입니다. debug 설정은 이
+엔진에서만 디버거를 켭니다.
+"""
+
+import asyncio
+import io
+import json
+import logging
+import re
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qsl, unquote_to_bytes
+
+from config import config
+from camera_manager import camera_manager, FrameDecimator, parse_variant
+from web_interface import app, register_mjpeg_client, unregister_mjpeg_client
+
+STREAM_ROUTE = re.compile(r'^/api/cameras/([^/]+)/stream$')
+SNAPSHOT_ROUTE = re.compile(r'^/api/cameras/([^/]+)/snapshot$')
+
+CORS_HEADERS = [
+    ('Access-Control-Allow-Origin', '*'),
+    ('Access-Control-Allow-Headers', 'Content-Type,Authorization'),
+    ('Access-Control-Allow-Methods', 'GET,PUT,POST,DELETE,OPTIONS')
+]
+NO_CACHE_HEADERS = [
+    ('Cache-Control', 'no-cache, no-store, must-revalidate'),
+    ('Pragma', 'no-cache'),
+    ('Expires', '0')
+]
+STATUS_TEXT = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 413: 'Payload Too Large',
+               431: 'Request Header Fields Too Large', 500: 'Internal Server Error',
+               501: 'Not Implemented', 503: 'Service Unavailable'}
+
+class HttpError(Exception):
+    """요청을 해석할 수 없음 (상태 코드와 함께 응답하고 연결 종료)"""
+    
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+class HttpRequest:
+    """파싱된 HTTP 요청"""
+    
+    __slots__ = ('method', 'path', 'query', 'version', 'headers', 'body')
+    
+    def __init__(self, method: str, path: str, query: str, version: str, headers: Dict[str, str], body: bytes):
+        self.method = method
+        self.path = path
+        self.query = query
+        self.version = version
+        self.headers = headers
+        self.body = body
+    
+    @property
+    def args(self) -> Dict[str, str]:
+        return dict(parse_qsl(self.query))
+    
+    @property
+    def keep_alive(self) -> bool:
+        return self.version == 'HTTP/1.1' and self.headers.get('connection', '').lower() != 'close'
+
+class MjpegViewer:
+    """MJPEG 시청자 하나 (루프 스레드에서만 사용, 보내지 못한 프레임은 최신 것으로 교체)"""
+    
+    def __init__(self, variant: Tuple):
+        self.variant = variant
+        # (캡처 시각, JPEG)
+        self.frame: Optional[Tuple[float, bytes]] = None
+        self.closed = False
+        self.event = asyncio.Event()
+        self.skipped = 0
+    
+    def offer(self, timestamp: float, jpeg: bytes):
+        if self.frame is not None:
+            self.skipped += 1
+        self.frame = (timestamp, jpeg)
+        self.event.set()
+    
+    def close(self):
+        self.closed = True
+        self.event.set()
+
+class CameraBroadcaster:
+    """카메라 하나의 MJPEG 방송 스레드
+    
+    'mjpeg' 소비자로 한 번만 구독하고, 새 프레임마다 시청자가 있는 변형별로 FrameDecimator를
+    거쳐 한 번씩 인코딩한 뒤 call_soon_threadsafe로 루프에 넘깁니다. 루프가 앞 프레임을 아직
+    나눠 주지 못했으면 대기 중인 프레임을 최신 것으로 바꾸므로 루프에 쌓이는 프레임은 최대
+    한 묶음입니다. 마지막 시청자가 떠나면 구독을 풀고 종료합니다.
+    """
+    
+    def __init__(self, server: 'AsyncWebServer', camera_id: str):
+        self.server = server
+        self.camera_id = camera_id
+        self.camera = camera_manager.get_camera(camera_id)
+        self.loop = server.loop
+        self.viewers: Dict[Tuple, Set[MjpegViewer]] = {}
+        self.ready = self.loop.create_future()
+        self.running = True
+        self.thread = None
+        self.frames = 0
+        self.handoff_drops = 0
+        self._lock = threading.Lock()
+        self._variants: List[Tuple] = []
+        self._pending = None
+        self._wakeup = threading.Event()
+        self.logger = logging.getLogger(f"MjpegBroadcaster_{camera_id}")
+    
+    def start(self):
+        self.thread = threading.Thread(target=self._run, daemon=True, name=f"mjpeg-{self.camera_id}")
+        self.thread.start()
+    
+    def add(self, viewer: MjpegViewer):
+        """시청자 추가 (루프 스레드)"""
+        self.viewers.setdefault(viewer.variant, set()).add(viewer)
+        self._update_variants()
+    
+    def remove(self, viewer: MjpegViewer):
+        """시청자 제거 (루프 스레드) - 마지막 시청자면 방송 종료"""
+        viewers = self.viewers.get(viewer.variant)
+        if viewers is not None:
+            viewers.discard(viewer)
+            if not viewers:
+                del self.viewers[viewer.variant]
+        self._update_variants()
+        if not self.viewers:
+            self.stop()
+    
+    def stop(self):
+        self.running = False
+        self._wakeup.set()
+        if self.server.broadcasters.get(self.camera_id) is self:
+            del self.server.broadcasters[self.camera_id]
+        for viewers in self.viewers.values():
+            for viewer in viewers:
+                viewer.close()
+    
+    def _update_variants(self):
+        with self._lock:
+            self._variants = list(self.viewers)
+    
+    def _run(self):
+        """구독 후 프레임을 기다려 변형별로 인코딩해 루프로 넘김"""
+        subscribed = camera_manager.subscribe(self.camera_id, 'mjpeg')
+        self._call_in_loop(self._set_ready, subscribed)
+        if not subscribed:
+            self.logger.error(f"카메라 {self.camera_id}를 시작할 수 없습니다")
+            return
+        decimators: Dict[Tuple, FrameDecimator] = {}
+        quality = config.web_interface.get('mjpeg_quality', 80)
+        last_seq = 0
+        try:
+            while self.running:
+                entry = self.camera.wait_frame(last_seq, timeout=1.0)
+                if entry is None:
+                    if not self.camera.is_running:
+                        self._wakeup.wait(0.1)
+                    continue
+                last_seq = entry.seq
+                
+                with self._lock:
+                    variants = self._variants
+                frames = []
+                for variant in variants:
+                    decimator = decimators.get(variant)
+                    if decimator is None:
+                        decimator = decimators[variant] = FrameDecimator(variant[1])
+                    if not decimator.accept(entry.timestamp):
+                        continue
+                    # RTSP/스냅샷/같은 변형의 다른 소비자와 인코딩 캐시 공유
+                    jpeg = self.camera.encode_frame(entry, quality, size=variant[0], overlay=variant[2])
+                    if jpeg is not None:
+                        frames.append((variant, jpeg))
+                if not frames:
+                    continue
+                
+                self.frames += 1
+                with self._lock:
+                    schedule = self._pending is None
+                    if not schedule:
+                        self.handoff_drops += 1
+                    self._pending = (entry.timestamp, frames)
+                if schedule:
+                    self._call_in_loop(self._deliver)
+        except Exception as e:
+            self.logger.error(f"MJPEG 방송 오류: {e}")
+            self._call_in_loop(self.stop)
+        finally:
+            camera_manager.unsubscribe(self.camera_id, 'mjpeg')
+    
+    def _call_in_loop(self, callback, *args):
+        try:
+            self.loop.call_soon_threadsafe(callback, *args)
+        except RuntimeError:
+            # 서버가 멈춰 루프가 닫힘
+            self.running = False
+    
+    def _set_ready(self, subscribed: bool):
+        if not self.ready.done():
+            self.ready.set_result(subscribed)
+        if not subscribed:
+            self.stop()
+    
+    def _deliver(self):
+        """(루프 스레드) 대기 중인 프레임을 시청자들에게 나눠 줌"""
+        with self._lock:
+            pending, self._pending = self._pending, None
+        if pending is None:
+            return
+        timestamp, frames = pending
+        for variant, jpeg in frames:
+            for viewer in self.viewers.get(variant, ()):
+                viewer.offer(timestamp, jpeg)
+    
+    def get_status(self) -> Dict:
+        return {
+            'viewers': sum(len(viewers) for viewers in self.viewers.values()),
+            'variants': len(self.viewers),
+            'frames': self.frames,
+            'handoff_drops': self.handoff_drops
+        }
+
+class AsyncWebServer:
+    """asyncio 웹 서버 (MJPEG/스냅샷은 직접, 나머지는 Flask 앱을 API 스레드 풀에서 실행)
+    
+    스레드는 이벤트 루프 1개, 시청 중인 카메라별 방송 스레드 1개, API 스레드 풀뿐이라
+    MJPEG 시청자가 늘어도 스레드 수가 늘지 않습니다.
+    """
+    
+    def __init__(self, application=None):
+        self.app = application or app
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.loop_thread = None
+        self.listener = None
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.broadcasters: Dict[str, CameraBroadcaster] = {}
+        self.connections: Set[asyncio.Task] = set()
+        self.requests = 0
+        self.is_running = False
+        self.logger = logging.getLogger("AsyncWebServer")
+    
+    def run_coroutine(self, coro, timeout: float = 5.0):
+        """다른 스레드에서 루프에 코루틴을 실행하고 결과를 기다림"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+    
+    def start(self) -> bool:
+        """웹 서버 시작"""
+        try:
+            host = config.web_interface.get('host', '0.0.0.0')
+            port = config.web_interface.get('port', 8080)
+            self.executor = ThreadPoolExecutor(max_workers=config.web_interface.get('api_workers', 8),
+                                               thread_name_prefix='web-api')
+            self.loop = asyncio.new_event_loop()
+            self.loop_thread = threading.Thread(target=self.loop.run_forever, name="web-asyncio", daemon=True)
+            self.loop_thread.start()
+            self.listener = self.run_coroutine(asyncio.start_server(
+                self._serve_connection, host, port, reuse_address=True, backlog=128))
+            self.is_running = True
+            self.logger.info(f"웹 서버 시작됨: http://{host}:{port} (asyncio)")
+            return True
+        except Exception as e:
+            self.logger.error(f"웹 서버 시작 실패: {e}")
+            self.stop()
+            return False
+    
+    def stop(self):
+        """웹 서버 중지 (시청자 연결을 끊고 방송 스레드 정리)"""
+        self.is_running = False
+        if self.loop is not None:
+            async def shutdown():
+                if self.listener is not None:
+                    self.listener.close()
+                for broadcaster in list(self.broadcasters.values()):
+                    broadcaster.stop()
+                for task in list(self.connections):
+                    task.cancel()
+            
+            try:
+                self.run_coroutine(shutdown())
+            except Exception as e:
+                self.logger.error(f"이벤트 루프 종료 오류: {e}")
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.loop_thread.join(timeout=2)
+            self.loop.close()
+            self.loop = None
+            self.listener = None
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+        self.logger.info("웹 서버 중지됨")
+    
+    async def _serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """연결 하나의 요청들을 차례로 처리 (HTTP/1.1 keep-alive)"""
+        task = asyncio.current_task()
+        self.connections.add(task)
+        try:
+            keep_alive = True
+            while keep_alive:
+                try:
+                    request = await self._read_request(reader)
+                except HttpError as e:
+                    await self._send_json(writer, e.status, {'error': str(e)}, keep_alive=False)
+                    break
+                if request is None:
+                    break
+                self.requests += 1
+                keep_alive = await self._dispatch(request, reader, writer)
+        except (ConnectionError, asyncio.TimeoutError):
+            pass
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            self.logger.error(f"요청 처리 오류: {e}")
+        finally:
+            self.connections.discard(task)
+            writer.close()
+    
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[HttpRequest]:
+        """요청 하나 읽기 (연결이 닫혔거나 keep-alive 대기 시간이 지나면 None)"""
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'),
+                                          config.web_interface.get('keepalive_timeout', 15))
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError):
+            return None
+        except asyncio.LimitOverrunError:
+            raise HttpError(431, "요청 헤더가 너무 깁니다")
+        
+        lines = head.decode('latin-1').split('\r\n')
+        try:
+            method, target, version = lines[0].split(' ', 2)
+        except ValueError:
+            raise HttpError(400, "잘못된 요청 줄")
+        headers: Dict[str, str] = {}
+        for line in lines[1:]:
+            name, separator, value = line.partition(':')
+            if not separator:
+                continue
+            name = name.strip().lower()
+            headers[name] = f"{headers[name]}, {value.strip()}" if name in headers else value.strip()
+        if 'transfer-encoding' in headers:
+            raise HttpError(501, "청크 요청 본문은 지원하지 않습니다")
+        try:
+            length = int(headers.get('content-length') or 0)
+        except ValueError:
+            raise HttpError(400, "잘못된 Content-Length")
+        if length > config.web_interface.get('max_body', 1024 * 1024):
+            raise HttpError(413, "요청 본문이 너무 큽니다")
+        body = await reader.readexactly(length) if length else b''
+        path, _, query = target.partition('?')
+        return HttpRequest(method.upper(), path, query, version.strip(), headers, body)
+    
+    async def _dispatch(self, request: HttpRequest, reader: asyncio.StreamReader,
+                        writer: asyncio.StreamWriter) -> bool:
+        """요청 처리 후 연결을 계속 쓸 수 있으면 True"""
+        if request.method == 'GET':
+            match = STREAM_ROUTE.match(request.path)
+            if match:
+                await self._stream(request, unquote_to_bytes(match.group(1)).decode(), reader, writer)
+                return False
+            match = SNAPSHOT_ROUTE.match(request.path)
+            if match:
+                return await self._snapshot(request, unquote_to_bytes(match.group(1)).decode(), writer)
+        return await self._call_app(request, writer)
+    
+    async def _send(self, writer: asyncio.StreamWriter, status: int, headers: List[Tuple[str, str]],
+                    body: bytes = b'', keep_alive: bool = True):
+        head = [f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}"]
+        head += [f"{name}: {value}" for name, value in headers + CORS_HEADERS]
+        head.append(f"Content-Length: {len(body)}")
+        if not keep_alive:
+            head.append("Connection: close")
+        writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + body)
+        await writer.drain()
+    
+    async def _send_json(self, writer: asyncio.StreamWriter, status: int, data: Dict, keep_alive: bool = True):
+        await self._send(writer, status, [('Content-Type', 'application/json')],
+                         json.dumps(data).encode(), keep_alive)
+    
+    async def _stream(self, request: HttpRequest, camera_id: str, reader: asyncio.StreamReader,
+                      writer: asyncio.StreamWriter):
+        """MJPEG 스트림 (?w=320&fps=5&overlay=0 - web_interface의 같은 경로와 동일)"""
+        try:
+            variant = parse_variant(request.args)
+        except ValueError as e:
+            await self._send_json(writer, 400, {'error': str(e)}, keep_alive=False)
+            return
+        if camera_manager.get_camera(camera_id) is None:
+            await self._send_json(writer, 404, {'error': '카메라를 찾을 수 없습니다'}, keep_alive=False)
+            return
+        
+        broadcaster = self.broadcasters.get(camera_id)
+        if broadcaster is None:
+            broadcaster = self.broadcasters[camera_id] = CameraBroadcaster(self, camera_id)
+            broadcaster.start()
+        viewer = MjpegViewer(variant)
+        broadcaster.add(viewer)
+        stats = register_mjpeg_client(camera_id, (writer.get_extra_info('peername') or ('',))[0], variant)
+        # 시청자는 요청 뒤 아무것도 보내지 않으므로 읽기가 끝나면(EOF) 연결이 끊긴 것
+        watcher = asyncio.ensure_future(reader.read(1))
+        watcher.add_done_callback(lambda _: viewer.close())
+        try:
+            if not await broadcaster.ready:
+                await self._send_json(writer, 503, {'error': '카메라를 시작할 수 없습니다'}, keep_alive=False)
+                return
+            head = ["HTTP/1.1 200 OK", "Content-Type: multipart/x-mixed-replace; boundary=frame",
+                    "Connection: close"]
+            head += [f"{name}: {value}" for name, value in NO_CACHE_HEADERS + CORS_HEADERS]
+            writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1'))
+            
+            send_timeout = config.web_interface.get('send_timeout', 10)
+            while True:
+                await viewer.event.wait()
+                viewer.event.clear()
+                if viewer.closed:
+                    break
+                (timestamp, jpeg), viewer.frame = viewer.frame, None
+                writer.write(b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + jpeg + b'\r\n')
+                # 받지 않는 시청자는 send_timeout 후 끊음 (그동안 새 프레임은 최신 것만 남김)
+                await asyncio.wait_for(writer.drain(), send_timeout)
+                stats.record(timestamp)
+        finally:
+            watcher.cancel()
+            unregister_mjpeg_client(stats)
+            broadcaster.remove(viewer)
+    
+    async def _snapshot(self, request: HttpRequest, camera_id: str, writer: asyncio.StreamWriter) -> bool:
+        """카메라 스냅샷 (?w=320&h=240, ?overlay=0 - web_interface의 같은 경로와 동일)"""
+        try:
+            size, _, overlay = parse_variant(request.args)
+        except ValueError as e:
+            await self._send_json(writer, 400, {'error': str(e)}, request.keep_alive)
+            return request.keep_alive
+        if camera_manager.get_camera(camera_id) is None:
+            await self._send_json(writer, 404, {'error': '카메라를 찾을 수 없습니다'}, request.keep_alive)
+            return request.keep_alive
+        
+        def take_snapshot() -> Optional[bytes]:
+            # 온디맨드 카메라 기동/첫 프레임 대기는 API 스레드에서
+            if not camera_manager.subscribe(camera_id, 'snapshot'):
+                return None
+            try:
+                return camera_manager.get_camera_jpeg(camera_id, 90, timeout=2.0, size=size, overlay=overlay)
+            finally:
+                camera_manager.unsubscribe(camera_id, 'snapshot')
+        
+        try:
+            jpeg = await asyncio.get_running_loop().run_in_executor(self.executor, take_snapshot)
+        except Exception as e:
+            self.logger.error(f"스냅샷 생성 오류: {e}")
+            await self._send_json(writer, 500, {'error': str(e)}, request.keep_alive)
+            return request.keep_alive
+        if jpeg is None:
+            await self._send_json(writer, 503, {'error': '프레임을 가져올 수 없습니다'}, request.keep_alive)
+        else:
+            await self._send(writer, 200, [('Content-Type', 'image/jpeg')] + NO_CACHE_HEADERS, jpeg,
+                             request.keep_alive)
+        return request.keep_alive
+    
+    def _environ(self, request: HttpRequest, writer: asyncio.StreamWriter) -> Dict:
+        """WSGI environ 구성"""
+        host, port = (config.web_interface.get('host', '0.0.0.0'), config.web_interface.get('port', 8080))
+        peer = writer.get_extra_info('peername') or ('', 0)
+        environ = {
+            'REQUEST_METHOD': request.method,
+            'SCRIPT_NAME': '',
+            'PATH_INFO': unquote_to_bytes(request.path).decode('latin-1'),
+            'QUERY_STRING': request.query,
+            'SERVER_NAME': host,
+            'SERVER_PORT': str(port),
+            'SERVER_PROTOCOL': request.version,
+            'REMOTE_ADDR': peer[0],
+            'REMOTE_PORT': str(peer[1]),
+            'CONTENT_TYPE': request.headers.get('content-type', ''),
+            'CONTENT_LENGTH': str(len(request.body)) if request.body else '',
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': io.BytesIO(request.body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False
+        }
+        for name, value in request.headers.items():
+            if name not in ('content-type', 'content-length'):
+                environ['HTTP_' + name.upper().replace('-', '_')] = value
+        return environ
+    
+    async def _call_app(self, request: HttpRequest, writer: asyncio.StreamWriter) -> bool:
+        """Flask 앱을 API 스레드 풀에서 실행하고 응답 전송
+        
+        Content-Length가 있는 응답은 본문을 스레드에서 다 모아 한 번에 보내고 연결을 유지합니다.
+        길이를 모르는 스트리밍 응답(녹화 재생 등)은 조각마다 스레드에서 꺼내 보내고 연결을 닫습니다.
+        """
+        loop = asyncio.get_running_loop()
+        environ = self._environ(request, writer)
+        response = {}
+        
+        def start_response(status, headers, exc_info=None):
+            response['status'], response['headers'] = status, headers
+            return lambda data: None
+        
+        def run_app():
+            result = self.app(environ, start_response)
+            chunks = iter(result)
+            headers = dict((name.lower(), value) for name, value in response['headers'])
+            limit = config.web_interface.get('max_buffered_body', 1024 * 1024)
+            if 'content-length' in headers and int(headers['content-length']) <= limit:
+                body = b''.join(chunks)
+                return result, None, body
+            return result, chunks, next(chunks, b'')
+        
+        result, chunks, first = await loop.run_in_executor(self.executor, run_app)
+        try:
+            keep_alive = request.keep_alive and chunks is None
+            head = [f"HTTP/1.1 {response['status']}"]
+            head += [f"{name}: {value}" for name, value in response['headers']]
+            if not keep_alive:
+                head.append("Connection: close")
+            writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + first)
+            await writer.drain()
+            while chunks is not None:
+                chunk = await loop.run_in_executor(self.executor, next, chunks, None)
+                if chunk is None:
+                    break
+                writer.write(chunk)
+                await writer.drain()
+            return keep_alive
+        finally:
+            if hasattr(result, 'close'):
+                # 스트리밍 응답의 제너레이터 정리 (연결이 끊긴 경우 포함)
+                loop.run_in_executor(self.executor, result.close)
+    
+    def get_status(self) -> Dict:
+        return {
+            'engine': 'asyncio',
+            'connections': len(self.connections),
+            'requests': self.requests,
+            'mjpeg': {camera_id: broadcaster.get_status()
+                      for camera_id, broadcaster in list(self.broadcasters.items())}
+        }
+
+class ThreadedWebServer:
+    """Werkzeug 개발 서버 (요청/시청자마다 스레드, debug 설정이면 디버거 사용)"""
+    
+    def __init__(self, application=None):
+        self.app = application or app
+        self.server = None
+        self.thread = None
+        self.is_running = False
+        self.logger = logging.getLogger("ThreadedWebServer")
+    
+    def start(self) -> bool:
+        """웹 서버 시작"""
+        from werkzeug.serving import make_server
+        try:
+            host = config.web_interface.get('host', '0.0.0.0')
+            port = config.web_interface.get('port', 8080)
+            application = self.app
+            if config.web_interface.get('debug', False):
+                from werkzeug.debug import DebuggedApplication
+                self.app.debug = True
+                application = DebuggedApplication(self.app, evalex=True)
+            self.server = make_server(host, port, application, threaded=True)
+            self.thread = threading.Thread(target=self.server.serve_forever, name="web-threaded", daemon=True)
+            self.thread.start()
+            self.is_running = True
+            self.logger.info(f"웹 서버 시작됨: http://{host}:{port} (threaded)")
+            return True
+        except Exception as e:
+            self.logger.error(f"웹 서버 시작 실패: {e}")
+            return False
+    
+    def stop(self):
+        """웹 서버 중지 (진행 중인 스트림 스레드는 연결이 끊길 때 끝남)"""
+        self.is_running = False
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+        self.logger.info("웹 서버 중지됨")
+    
+    def get_status(self) -> Dict:
+        return {'engine': 'threaded', 'threads': threading.active_count()}
+
+def create_web_server():
+    """설정된 엔진('asyncio' 또는 'threaded')으로 웹 서버 생성"""
+    if config.web_interface.get('engine', 'asyncio') == 'threaded':
+        return ThreadedWebServer()
+    return AsyncWebServer()